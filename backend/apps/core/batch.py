@@ -0,0 +1,147 @@
+"""
+In-process execution of batched GET requests.
+
+``BatchView`` (``POST /api/v1/batch/``) authenticates the caller and
+resolves the winery once, then runs each sub-request directly against its
+view. Sub-requests reuse that user and membership instead of decoding the
+token and querying the membership again, and skip the middleware stack.
+
+Results of views that send an ETag (``ConditionalGetMixin``) are cached per
+user and winery; later batches revalidate them with ``If-None-Match`` and
+reuse the cached body on 304, so unchanged dropdowns cost no queries.
+"""
+import copy
+import hashlib
+import logging
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import QueryDict
+from django.urls import Resolver404, resolve
+from rest_framework import status
+
+logger = logging.getLogger(__name__)
+
+API_PREFIX = '/api/v1/'
+CACHE_PREFIX = 'batchres'
+
+
+class SubRequestError(Exception):
+    """A sub-request that cannot be executed; reported in its own slot."""
+
+    def __init__(self, message, status_code=status.HTTP_400_BAD_REQUEST):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def normalize_url(url):
+    """Return ``(path, query)`` for an absolute API path or one relative to /api/v1/."""
+    parts = urlsplit(url)
+    path = parts.path
+    if not path.startswith('/'):
+        path = API_PREFIX + path
+    if not path.startswith(API_PREFIX):
+        raise SubRequestError('Only /api/v1/ endpoints can be batched')
+    if not path.endswith('/'):
+        path += '/'
+    return path, parts.query
+
+
+def build_subrequest(request, path, query, if_none_match=None):
+    """
+    Clone the outer Django request as a GET for ``path``, carrying over the
+    authenticated user and the already resolved winery membership.
+    """
+    outer = request._request
+    sub = copy.copy(outer)
+    # Drop cached properties derived from the outer request's META
+    sub.__dict__.pop('headers', None)
+    sub.method = 'GET'
+    sub.path = sub.path_info = path
+    sub.GET = QueryDict(query)
+    sub.META = {
+        key: value for key, value in outer.META.items()
+        if key not in ('CONTENT_LENGTH', 'CONTENT_TYPE', 'HTTP_IF_NONE_MATCH')
+    }
+    sub.META.update(REQUEST_METHOD='GET', PATH_INFO=path, QUERY_STRING=query)
+    if if_none_match:
+        sub.META['HTTP_IF_NONE_MATCH'] = if_none_match
+
+    sub._force_auth_user = request.user
+    sub._force_auth_token = request.auth
+    sub.winery = request.winery
+    sub.winery_role = request.winery_role
+    sub.winery_membership = request.winery_membership
+    sub._winery_resolved = True
+    return sub
+
+
+def _cache_key(request, path, query):
+    winery = getattr(request, 'winery', None)
+    digest = hashlib.blake2b(f'{path}?{query}'.encode(), digest_size=16).hexdigest()
+    return f'{CACHE_PREFIX}:{winery.id if winery else "global"}:{request.user.pk}:{digest}'
+
+
+def execute(request, url, if_none_match=None):
+    """
+    Run one GET sub-request. Returns ``(status, etag, body)``; ``body`` is
+    None for 304 (when ``if_none_match`` matches) and for empty responses.
+    """
+    path, query = normalize_url(url)
+    try:
+        match = resolve(path)
+    except Resolver404:
+        raise SubRequestError('Not found', status.HTTP_404_NOT_FOUND)
+    if match.url_name == 'batch':
+        raise SubRequestError('Batch requests cannot be nested')
+
+    key = _cache_key(request, path, query)
+    cached = cache.get(key)
+    sub = build_subrequest(request, path, query, cached['etag'] if cached else None)
+    sub.resolver_match = match
+    response = match.func(sub, *match.args, **match.kwargs)
+
+    etag = response.get('ETag')
+    if response.status_code == status.HTTP_304_NOT_MODIFIED and cached:
+        response_status, body = status.HTTP_200_OK, cached['body']
+    else:
+        response_status = response.status_code
+        if hasattr(response, 'data'):
+            body = response.data
+        else:
+            body = response.content.decode(response.charset or 'utf-8')
+        if etag and response_status == status.HTTP_200_OK:
+            cache.set(key, {'etag': etag, 'body': body}, settings.BATCH_CACHE_TIMEOUT)
+
+    if etag and if_none_match == etag:
+        return status.HTTP_304_NOT_MODIFIED, etag, None
+    return response_status, etag, body
+
+
+def run_batch(request, items):
+    """
+    Execute ``items`` (dicts with ``url`` and optional ``id``/``if_none_match``)
+    in order. Identical URLs are executed once.
+    """
+    results, seen = [], {}
+    for index, item in enumerate(items):
+        url = item['url']
+        if_none_match = item.get('if_none_match')
+        if (url, if_none_match) not in seen:
+            try:
+                seen[url, if_none_match] = execute(request, url, if_none_match)
+            except SubRequestError as exc:
+                seen[url, if_none_match] = (exc.status_code, None, {'error': str(exc)})
+            except Exception:
+                logger.exception('Batched request to %s failed', url)
+                seen[url, if_none_match] = (
+                    status.HTTP_500_INTERNAL_SERVER_ERROR, None, {'error': 'Internal server error'},
+                )
+
+        response_status, etag, body = seen[url, if_none_match]
+        result = {'id': item.get('id', str(index)), 'status': response_status, 'body': body}
+        if etag:
+            result['etag'] = etag
+        results.append(result)
+    return results
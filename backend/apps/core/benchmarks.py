@@ -0,0 +1,175 @@
+"""
+Endpoint benchmark suite.
+
+Drives the main API endpoints through DRF's test client against generated
+datasets (see ``load_data``) and records latency percentiles and query
+counts. Results are compared against a stored JSON baseline so regressions
+can fail CI.
+
+Used by the ``run_benchmarks`` management command.
+"""
+import json
+import math
+import statistics
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .middleware import RequestStats
+
+
+DEFAULT_BASELINE_PATH = Path(settings.BASE_DIR) / 'benchmarks' / 'baseline.json'
+
+# Latency regressions smaller than this are treated as noise
+LATENCY_FLOOR_MS = 5.0
+
+
+def _transfer_payload(winery):
+    """Build a valid tank-to-tank racking payload for ``winery``."""
+    from apps.equipment.models import Tank
+
+    tanks = Tank.objects.filter(winery=winery, is_active=True)
+    source = tanks.filter(current_volume_l__gte=100).order_by('code').first()
+    destination = tanks.filter(current_volume_l=0, capacity_l__gte=100).order_by('code').first()
+    if source is None or destination is None:
+        return None
+    return {
+        'action_type': 'RACK',
+        'transfer_date': timezone.now().isoformat(),
+        'source_tank': str(source.id),
+        'destination_tank': str(destination.id),
+        'volume_l': '50.00',
+        'notes': 'benchmark',
+    }
+
+
+# name -> (method, path, payload factory or None)
+SCENARIOS = {
+    'tank-list': ('get', '/api/v1/equipment/tanks/', None),
+    'composition-list': ('get', '/api/v1/ledger/composition/', None),
+    'composition-integrity': ('get', '/api/v1/ledger/composition/integrity/', None),
+    'transfer-create': ('post', '/api/v1/production/transfers/', _transfer_payload),
+    'dashboard': ('get', '/api/v1/wineries/dashboard/', None),
+    'lab-summary': ('get', '/api/v1/lab/analyses/summary/', None),
+    'work-order-list': ('get', '/api/v1/work-orders/', None),
+    'material-list': ('get', '/api/v1/inventory/materials/', None),
+    'search': ('get', '/api/v1/search/?q=merlo', None),
+}
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of ``samples`` (pct in 0-100)."""
+    ordered = sorted(samples)
+    rank = max(math.ceil(pct / 100 * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+class BenchmarkRunner:
+    """
+    Runs the benchmark scenarios for one generated winery.
+
+    Unsafe requests are executed inside a transaction that is rolled back,
+    so every iteration sees the same dataset.
+    """
+
+    def __init__(self, winery, user, iterations=20, warmup=2):
+        self.winery = winery
+        self.iterations = iterations
+        self.warmup = warmup
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        self.client.credentials(HTTP_X_WINERY_ID=str(winery.id))
+
+    def run(self, names=None):
+        results = {}
+        for name, (method, path, payload_factory) in SCENARIOS.items():
+            if names and name not in names:
+                continue
+            payload = payload_factory(self.winery) if payload_factory else None
+            if payload_factory and payload is None:
+                continue
+            results[name] = self.run_scenario(method, path, payload)
+        return results
+
+    def run_scenario(self, method, path, payload=None):
+        for _ in range(self.warmup):
+            self._request(method, path, payload)
+
+        timings = []
+        queries = 0
+        for _ in range(self.iterations):
+            stats = RequestStats()
+            with connection.execute_wrapper(stats.db_wrapper):
+                started = time.perf_counter()
+                response = self._request(method, path, payload)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries = max(queries, stats.db_queries)
+            if response.status_code >= 400:
+                raise RuntimeError(
+                    f'{method.upper()} {path} returned {response.status_code}: {response.content[:300]!r}'
+                )
+
+        return {
+            'p50_ms': round(percentile(timings, 50), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'p99_ms': round(percentile(timings, 99), 2),
+            'mean_ms': round(statistics.fmean(timings), 2),
+            'queries': queries,
+            'iterations': self.iterations,
+        }
+
+    def _request(self, method, path, payload):
+        if method == 'get':
+            return self.client.get(path)
+        with transaction.atomic():
+            response = getattr(self.client, method)(path, payload, format='json')
+            transaction.set_rollback(True)
+        return response
+
+
+def load_baseline(path):
+    path = Path(path)
+    if not path.exists():
+        return {}
+    with path.open() as fh:
+        return json.load(fh).get('results', {})
+
+
+def save_baseline(path, results, meta):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open('w') as fh:
+        json.dump({'meta': meta, 'results': results}, fh, indent=2, sort_keys=True)
+        fh.write('\n')
+
+
+def compare(results, baseline, threshold_pct):
+    """
+    Compare ``results`` with ``baseline``.
+
+    A scenario regresses when its query count grows, or when its p95 latency
+    grows by more than ``threshold_pct`` percent (and by at least
+    LATENCY_FLOOR_MS). Returns a list of human readable regression messages.
+    """
+    regressions = []
+    for size, scenarios in results.items():
+        for name, current in scenarios.items():
+            previous = baseline.get(size, {}).get(name)
+            if not previous:
+                continue
+            label = f'{size}/{name}'
+            if current['queries'] > previous['queries']:
+                regressions.append(
+                    f"{label}: queries {previous['queries']} -> {current['queries']}"
+                )
+            limit = previous['p95_ms'] * (1 + threshold_pct / 100)
+            if current['p95_ms'] > limit and current['p95_ms'] - previous['p95_ms'] > LATENCY_FLOOR_MS:
+                regressions.append(
+                    f"{label}: p95 {previous['p95_ms']:.1f}ms -> {current['p95_ms']:.1f}ms "
+                    f"(threshold {threshold_pct:g}%)"
+                )
+    return regressions
@@ -0,0 +1,54 @@
+"""
+Enumerations (``TextChoices``) of all local apps as one immutable document.
+
+The document is built once per process and addressed by a hash of its
+content, so ``/api/v1/enums/<version>/`` can be cached forever by browsers
+and nginx; a deploy that changes any choice changes the URL. Clients learn
+the current version from ``/api/v1/enums/``.
+
+Keys are ``<app_label>.<qualified class name>``::
+
+    {"production.TransferActionType": [{"value": "RACK", "label": "Rack"}, ...],
+     "lab.Analysis.SampleType": [...]}
+"""
+import hashlib
+import inspect
+import json
+from functools import lru_cache
+
+from django.apps import apps
+from django.db import models
+
+
+def _choices_classes(namespace, module_name):
+    for value in vars(namespace).values():
+        if not inspect.isclass(value) or value.__module__ != module_name:
+            continue
+        if issubclass(value, models.TextChoices):
+            yield value
+        elif issubclass(value, models.Model):
+            # Choices declared inside a model, e.g. Analysis.SampleType
+            yield from _choices_classes(value, module_name)
+
+
+def collect_enums():
+    """Return ``{key: [{'value', 'label'}, ...]}`` for every local TextChoices class."""
+    enums = {}
+    for config in apps.get_app_configs():
+        module = config.models_module
+        if module is None or not config.name.startswith('apps.'):
+            continue
+        for choices in _choices_classes(module, module.__name__):
+            enums[f'{config.label}.{choices.__qualname__}'] = [
+                {'value': value, 'label': str(label)}
+                for value, label in choices.choices
+            ]
+    return dict(sorted(enums.items()))
+
+
+@lru_cache(maxsize=1)
+def get_enums_document():
+    """Return ``(version, body)``: the content hash and the rendered JSON bytes."""
+    body = json.dumps(collect_enums(), ensure_ascii=False, separators=(',', ':')).encode()
+    version = hashlib.sha256(body).hexdigest()[:16]
+    return version, body
@@ -0,0 +1,870 @@
+"""
+Synthetic large-winery data generator.
+
+Builds seeded, reproducible tenants for benchmarking. Everything is written
+with bulk_create, so model signals do not fire; the side effects they would
+have produced (tank ledger entries, tank volumes/status, material stock,
+low-stock alerts) are simulated in memory and written explicitly, and the
+derived inventory tables (movement costs, addition rollups) are rebuilt from
+the generated rows once they are flushed.
+
+Volumes are tracked internally in centiliters (ints) so the generated ledger
+sums exactly to each tank's current_volume_l.
+"""
+import random
+import time
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+
+# Per-tenant scale presets. Every knob can be overridden individually.
+SCALE_PRESETS = {
+    'tiny': {
+        'tanks': 12, 'barrels': 30, 'seasons': 1, 'batches_per_season': 10,
+        'transfers_per_year': 60, 'analyses_per_tank': 12, 'materials': 15,
+        'movements_per_material': 20, 'work_orders': 25,
+    },
+    'small': {
+        'tanks': 40, 'barrels': 150, 'seasons': 2, 'batches_per_season': 40,
+        'transfers_per_year': 600, 'analyses_per_tank': 26, 'materials': 40,
+        'movements_per_material': 60, 'work_orders': 200,
+    },
+    'medium': {
+        'tanks': 120, 'barrels': 600, 'seasons': 3, 'batches_per_season': 150,
+        'transfers_per_year': 3000, 'analyses_per_tank': 52, 'materials': 80,
+        'movements_per_material': 200, 'work_orders': 1500,
+    },
+    'large': {
+        'tanks': 300, 'barrels': 2000, 'seasons': 5, 'batches_per_season': 400,
+        'transfers_per_year': 12000, 'analyses_per_tank': 52, 'materials': 150,
+        'movements_per_material': 1000, 'work_orders': 6000,
+    },
+}
+
+VARIETIES = [
+    ('Cabernet Sauvignon', 'CS', 'RED'), ('Merlot', 'ME', 'RED'), ('Syrah', 'SY', 'RED'),
+    ('Pinot Noir', 'PN', 'RED'), ('Grenache', 'GR', 'RED'), ('Tempranillo', 'TE', 'RED'),
+    ('Chardonnay', 'CH', 'WHITE'), ('Sauvignon Blanc', 'SB', 'WHITE'),
+    ('Riesling', 'RI', 'WHITE'), ('Viognier', 'VI', 'WHITE'), ('Xinisteri', 'XI', 'WHITE'),
+    ('Maratheftiko', 'MA', 'RED'),
+]
+
+MATERIAL_TEMPLATES = [
+    ('Potassium Metabisulfite', 'STABILIZER', 'g'), ('Tartaric Acid', 'ACID', 'kg'),
+    ('Bentonite', 'FINING_AGENT', 'kg'), ('EC-1118 Yeast', 'YEAST', 'g'),
+    ('DAP', 'NUTRIENT', 'g'), ('Pectinase', 'ENZYME', 'ml'), ('Oak Chips', 'OAK', 'kg'),
+    ('Grape Tannin', 'TANNIN', 'g'), ('PVPP', 'FINING_AGENT', 'g'),
+    ('Citric Acid', 'ACID', 'kg'), ('Caustic Soda', 'CLEANING', 'l'),
+    ('Screw Caps', 'PACKAGING', 'unit'), ('Corks', 'PACKAGING', 'pack'),
+    ('Gum Arabic', 'STABILIZER', 'ml'), ('Lysozyme', 'ENZYME', 'g'),
+]
+
+LOCATIONS = ['MAIN_STORAGE', 'CELLAR', 'LAB', 'WAREHOUSE']
+
+TRANSFER_WEIGHTS = [
+    ('RACK', 50), ('BLEND', 20), ('TOP_UP', 15), ('BARREL_FILL', 5),
+    ('BARREL_EMPTY', 4), ('BOTTLE', 4), ('DRAIN', 2),
+]
+
+TANK_CAPACITIES_L = [1000, 2500, 5000, 5000, 10000, 10000, 20000, 50000]
+
+
+class _IndexedSet:
+    """Set with O(1) add/remove and deterministic random choice."""
+
+    def __init__(self, items=()):
+        self._items = []
+        self._pos = {}
+        for item in items:
+            self.add(item)
+
+    def add(self, item):
+        if item not in self._pos:
+            self._pos[item] = len(self._items)
+            self._items.append(item)
+
+    def discard(self, item):
+        pos = self._pos.pop(item, None)
+        if pos is None:
+            return
+        last = self._items.pop()
+        if pos < len(self._items):
+            self._items[pos] = last
+            self._pos[last] = pos
+
+    def choice(self, rng):
+        return rng.choice(self._items) if self._items else None
+
+    def __len__(self):
+        return len(self._items)
+
+
+def _cl_to_decimal(centiliters):
+    return Decimal(centiliters) / 100
+
+
+def _aware(day, hour=8, minute=0):
+    return datetime(day.year, day.month, day.day, hour, minute, tzinfo=dt_timezone.utc)
+
+
+class LoadDataGenerator:
+    """
+    Generate one or more synthetic tenants.
+
+    Usage:
+        generator = LoadDataGenerator(seed=42, scale=SCALE_PRESETS['small'])
+        wineries = generator.generate(tenants=1)
+    """
+
+    def __init__(self, seed=42, scale=None, batch_size=5000, code_prefix='LOAD',
+                 password='load123', stdout=None):
+        self.seed = seed
+        self.scale = dict(SCALE_PRESETS['small'], **(scale or {}))
+        self.batch_size = batch_size
+        self.code_prefix = code_prefix
+        self.password_hash = make_password(password)
+        self.stdout = stdout
+        self.counts = {}
+        self._pending = {}
+
+    # ------------------------------------------------------------------
+    # Buffered writes
+    # ------------------------------------------------------------------
+
+    def _flush_order(self):
+        from apps.equipment.models import Tank, Barrel
+        from apps.harvest.models import HarvestSeason, Batch, BatchSource
+        from apps.inventory.models import Material, MaterialStock, MaterialMovement, Addition, LowStockAlert
+        from apps.lab.models import Analysis
+        from apps.ledger.models import TankLedger
+        from apps.master_data.models import GrapeVariety, Grower, VineyardBlock
+        from apps.production.models import Transfer, WineLot, LotBatchLink
+        from apps.work_orders.models import WorkOrder, WorkOrderLine
+
+        return [
+            GrapeVariety, Grower, VineyardBlock, Tank, Barrel, HarvestSeason,
+            Batch, BatchSource, WineLot, LotBatchLink, Transfer, TankLedger,
+            Analysis, Material, MaterialMovement, Addition, MaterialStock,
+            LowStockAlert, WorkOrder, WorkOrderLine,
+        ]
+
+    def _emit(self, obj):
+        self._pending.setdefault(type(obj), []).append(obj)
+        if sum(len(objs) for objs in self._pending.values()) >= self.batch_size * 4:
+            self._flush()
+
+    def _flush(self):
+        for model in self._flush_order():
+            objs = self._pending.pop(model, None)
+            if objs:
+                model.objects.bulk_create(objs, batch_size=self.batch_size)
+                self.counts[model.__name__] = self.counts.get(model.__name__, 0) + len(objs)
+
+    def _log(self, message):
+        if self.stdout is not None:
+            self.stdout.write(message)
+
+    # ------------------------------------------------------------------
+    # Entry points
+    # ------------------------------------------------------------------
+
+    def generate(self, tenants=1):
+        """Create ``tenants`` wineries and return them."""
+        wineries = []
+        for index in range(tenants):
+            started = time.monotonic()
+            with transaction.atomic():
+                winery = self._generate_tenant(index)
+            wineries.append(winery)
+            self._log(f'  {winery.code}: done in {time.monotonic() - started:.1f}s')
+        return wineries
+
+    def flush_existing(self):
+        """Delete previously generated tenants (matching the code prefix)."""
+        from apps.wineries.models import Winery
+
+        wineries = list(Winery.objects.filter(code__startswith=f'{self.code_prefix}-'))
+        for winery in wineries:
+            with transaction.atomic():
+                self._delete_tenant(winery)
+        return len(wineries)
+
+    def _delete_tenant(self, winery):
+        from apps.equipment.models import Tank, Barrel
+        from apps.harvest.models import HarvestSeason, Batch, BatchSource
+        from apps.inventory.models import (
+            Material, MaterialStock, MaterialMovement, Addition, LowStockAlert,
+            MaterialCost, AdditionCostAllocation, AdditionDailyRollup, AdditionMonthlyRollup,
+        )
+        from apps.lab.models import Analysis
+        from apps.ledger.models import TankLedger
+        from apps.master_data.models import GrapeVariety, Grower, VineyardBlock
+        from apps.production.models import Transfer, WineLot, LotBatchLink
+        from apps.users.models import User
+        from apps.wineries.models import WineryMembership
+        from apps.work_orders.models import WorkOrder, WorkOrderLine
+
+        # Raw deletes skip the per-row collector and post_delete signals,
+        # which would otherwise take longer than generating the data.
+        querysets = [
+            TankLedger.objects.filter(winery=winery),
+            WorkOrderLine.objects.filter(winery=winery),
+            WorkOrder.objects.filter(winery=winery),
+            AdditionDailyRollup.objects.filter(winery=winery),
+            AdditionMonthlyRollup.objects.filter(winery=winery),
+            AdditionCostAllocation.objects.filter(winery=winery),
+            Addition.objects.filter(winery=winery),
+            LowStockAlert.objects.filter(winery=winery),
+            MaterialCost.objects.filter(winery=winery),
+            MaterialMovement.objects.filter(material__winery=winery),
+            MaterialStock.objects.filter(material__winery=winery),
+            Material.objects.filter(winery=winery),
+            Analysis.objects.filter(winery=winery),
+            Transfer.objects.filter(winery=winery),
+            LotBatchLink.objects.filter(wine_lot__winery=winery),
+            WineLot.objects.filter(winery=winery),
+            BatchSource.objects.filter(winery=winery),
+            Batch.objects.filter(winery=winery),
+            HarvestSeason.objects.filter(winery=winery),
+            Tank.objects.filter(winery=winery),
+            Barrel.objects.filter(winery=winery),
+            VineyardBlock.objects.filter(winery=winery),
+            Grower.objects.filter(winery=winery),
+            GrapeVariety.objects.filter(winery=winery),
+        ]
+        for queryset in querysets:
+            queryset._raw_delete(queryset.db)
+
+        user_ids = list(WineryMembership.objects.filter(winery=winery).values_list('user_id', flat=True))
+        winery.delete()
+        User.objects.filter(id__in=user_ids, email__startswith=f'{self.code_prefix.lower()}-').delete()
+
+    # ------------------------------------------------------------------
+    # Tenant generation
+    # ------------------------------------------------------------------
+
+    def _generate_tenant(self, index):
+        from apps.users.models import User
+        from apps.wineries.models import Winery, WineryMembership, WineryMembershipRole
+
+        self.rng = random.Random(f'{self.seed}:{index}')
+        self.counts = {}
+        self.today = timezone.now().date()
+
+        code = f'{self.code_prefix}-{self.seed}-{index:02d}'
+        winery = Winery.objects.create(
+            name=f'Load Test Winery {self.seed}/{index}',
+            code=code,
+            country='Cyprus',
+        )
+        self.user = User.objects.create(
+            email=f'{code.lower()}@example.com',
+            full_name=f'Load Tester {index}',
+            password=self.password_hash,
+        )
+        WineryMembership.objects.create(
+            user=self.user, winery=winery, role=WineryMembershipRole.WINERY_OWNER,
+        )
+        self.winery = winery
+
+        self._log(f'Generating {code} with {self.scale}')
+        self._generate_master_data()
+        self._generate_equipment()
+        self._generate_production()
+        self._generate_analyses()
+        self._generate_inventory()
+        self._generate_work_orders()
+        self._flush()
+        self._finalize_vessels()
+        self._derive_inventory()
+
+        summary = ', '.join(f'{name}={count}' for name, count in sorted(self.counts.items()))
+        self._log(f'  rows: {summary}')
+        return winery
+
+    def _generate_master_data(self):
+        from apps.master_data.models import GrapeVariety, Grower, VineyardBlock
+
+        self.varieties = []
+        for name, code, color in VARIETIES:
+            variety = GrapeVariety(winery=self.winery, name=name, code=code, color=color)
+            self.varieties.append(variety)
+            self._emit(variety)
+
+        self.growers = []
+        for i in range(8):
+            grower = Grower(winery=self.winery, name=f'Grower {i + 1:02d}')
+            self.growers.append(grower)
+            self._emit(grower)
+
+        self.blocks = []
+        for i in range(24):
+            block = VineyardBlock(
+                winery=self.winery,
+                grower=self.rng.choice(self.growers),
+                name=f'Block {i + 1:02d}',
+                code=f'VB{i + 1:03d}',
+                area_acres=Decimal(self.rng.randint(2, 40)),
+            )
+            self.blocks.append(block)
+            self._emit(block)
+
+    def _generate_equipment(self):
+        from apps.equipment.models import Tank, Barrel
+        from apps.master_data.models import TankMaterial, WoodType
+
+        tank_materials = list(TankMaterial.objects.filter(is_active=True)) or [None]
+        wood_types = list(WoodType.objects.filter(is_active=True)) or [None]
+        rng = self.rng
+
+        self.tanks = []
+        for i in range(self.scale['tanks']):
+            capacity = rng.choice(TANK_CAPACITIES_L)
+            tank = Tank(
+                winery=self.winery,
+                code=f'T{i + 1:04d}',
+                name=f'Tank {i + 1}',
+                tank_type=rng.choice(['FERMENTATION', 'STORAGE', 'STORAGE', 'BLENDING']),
+                material=rng.choice(tank_materials),
+                capacity_l=Decimal(capacity),
+                location=f'Hall {chr(65 + i % 4)}',
+                has_cooling=rng.random() < 0.6,
+            )
+            tank._capacity_cl = capacity * 100
+            tank._composition = {}
+            tank._volume_cl = 0
+            tank._family = None
+            self.tanks.append(tank)
+            self._emit(tank)
+
+        self.barrels = []
+        for i in range(self.scale['barrels']):
+            vintage = self.today.year - rng.randint(0, 6)
+            barrel = Barrel(
+                winery=self.winery,
+                code=f'B{i + 1:05d}',
+                volume_l=Decimal('225'),
+                wood_type=rng.choice(wood_types),
+                vintage_year=vintage,
+                first_use_year=vintage + 1,
+                use_count=rng.randint(0, 5),
+                location=f'Cellar {chr(65 + i % 3)}',
+            )
+            barrel._volume_cl = 0
+            barrel._family = None
+            self.barrels.append(barrel)
+            self._emit(barrel)
+
+        self.empty_tanks = _IndexedSet(range(len(self.tanks)))
+        self.filled_tanks = _IndexedSet()
+        # Filled tanks grouped by the wine "family" (roughly a future wine lot)
+        # they hold, so blends and top-ups stay between related wines.
+        self.family_tanks = {}
+        self.empty_barrels = _IndexedSet(range(len(self.barrels)))
+        self.filled_barrels = _IndexedSet()
+
+    # ------------------------------------------------------------------
+    # Harvest, transfers and the ledger
+    # ------------------------------------------------------------------
+
+    def _generate_production(self):
+        from apps.harvest.models import HarvestSeason
+
+        first_year = self.today.year - self.scale['seasons']
+        self.transfer_seq = 0
+        for year in range(first_year, first_year + self.scale['seasons']):
+            season = HarvestSeason(
+                winery=self.winery,
+                year=year,
+                start_date=date(year, 8, 20),
+                end_date=date(year, 10, 25),
+                is_active=year == first_year + self.scale['seasons'] - 1,
+            )
+            self._emit(season)
+            batches = self._generate_intake(season)
+            self._generate_wine_lots(season, batches)
+            self._generate_cellar_year(year)
+
+    def _generate_intake(self, season):
+        from apps.harvest.models import Batch, BatchSource
+        from apps.ledger.models import TankLedger
+
+        rng = self.rng
+        count = self.scale['batches_per_season']
+        days = sorted(rng.randint(0, 60) for _ in range(count))
+        batches = []
+        for n, offset in enumerate(days, start=1):
+            intake = date(season.year, 8, 25) + timedelta(days=offset)
+            batch = Batch(
+                winery=self.winery,
+                batch_code=f'{season.year}-{n:03d}',
+                harvest_season=season,
+                intake_date=intake,
+                source_type=rng.choice(['OWN', 'OWN', 'PURCHASED', 'MIXED']),
+                stage='AGING' if season.year < self.today.year else 'FERMENTATION',
+            )
+            sources = [
+                BatchSource(
+                    winery=self.winery,
+                    batch=batch,
+                    vineyard_block=rng.choice(self.blocks),
+                    variety=rng.choice(self.varieties),
+                    weight_kg=Decimal(rng.randint(500, 6000)),
+                )
+                for _ in range(rng.choice([1, 1, 2, 2, 3, 4]))
+            ]
+            total_kg = sum(int(source.weight_kg) for source in sources)
+            must_cl = int(total_kg * rng.uniform(0.62, 0.75)) * 100
+            batch.grape_weight_kg = Decimal(total_kg)
+            batch.must_volume_l = _cl_to_decimal(must_cl)
+            tank_index = self._find_tank_with_space(must_cl)
+            if tank_index is not None:
+                batch.initial_tank = self.tanks[tank_index]
+
+            self._emit(batch)
+            for source in sources:
+                self._emit(source)
+
+            if tank_index is not None:
+                tank = self.tanks[tank_index]
+                when = _aware(intake, hour=rng.randint(7, 17))
+                self._emit(TankLedger(
+                    winery=self.winery,
+                    batch=batch,
+                    event_datetime=when,
+                    tank=tank,
+                    delta_volume_l=batch.must_volume_l,
+                    composition_key_type='BATCH',
+                    composition_key_id=batch.id,
+                    composition_key_label=batch.batch_code,
+                    derived_source='EXPLICIT',
+                ))
+                family = f'{season.year}-{(n - 1) // 8}'
+                self._add_to_tank(tank_index, {('BATCH', batch.id, batch.batch_code): must_cl}, family)
+
+            batches.append(batch)
+        return batches
+
+    def _generate_wine_lots(self, season, batches):
+        from apps.production.models import WineLot, LotBatchLink
+
+        rng = self.rng
+        for n in range(max(1, len(batches) // 8)):
+            linked = rng.sample(batches, min(len(batches), rng.randint(1, 3)))
+            total = sum(int(batch.must_volume_l) for batch in linked)
+            status = 'BOTTLED' if season.year < self.today.year - 1 else 'AGING'
+            lot = WineLot(
+                winery=self.winery,
+                lot_code=f'{season.year}-L{n + 1:03d}',
+                name=f'{rng.choice(self.varieties).name} {season.year}',
+                vintage=season.year,
+                status=status,
+                initial_volume_l=Decimal(total),
+                current_volume_l=Decimal(total) if status == 'AGING' else Decimal(0),
+            )
+            self._emit(lot)
+            for batch in linked:
+                self._emit(LotBatchLink(wine_lot=lot, batch=batch, volume_l=Decimal(int(batch.must_volume_l))))
+
+    def _generate_cellar_year(self, year):
+        rng = self.rng
+        start = _aware(date(year, 10, 26))
+        end = min(_aware(date(year + 1, 8, 20)), timezone.now())
+        if end <= start:
+            return
+        span = (end - start).total_seconds()
+        moments = sorted(rng.random() * span for _ in range(self.scale['transfers_per_year']))
+        actions = [name for name, _ in TRANSFER_WEIGHTS]
+        weights = [weight for _, weight in TRANSFER_WEIGHTS]
+
+        for offset in moments:
+            when = start + timedelta(seconds=offset)
+            action = rng.choices(actions, weights)[0]
+            if action == 'RACK':
+                self._rack(when)
+            elif action == 'BLEND':
+                self._blend(when, fraction=rng.uniform(0.2, 0.6), action='BLEND')
+            elif action == 'TOP_UP':
+                self._blend(when, fraction=rng.uniform(0.005, 0.03), action='TOP_UP')
+            elif action == 'BARREL_FILL':
+                self._barrel_fill(when)
+            elif action == 'BARREL_EMPTY':
+                self._barrel_empty(when)
+            else:
+                self._drain(when, action)
+
+    def _rack(self, when):
+        source = self.filled_tanks.choice(self.rng)
+        if source is None:
+            return
+        volume = self.tanks[source]._volume_cl
+        dest = self._find_tank_with_space(volume, exclude=source, empty_only=True)
+        if dest is None:
+            return self._blend(when, fraction=0.3, action='BLEND')
+        self._move(when, 'RACK', source, dest, volume)
+
+    def _blend(self, when, fraction, action):
+        source = self.filled_tanks.choice(self.rng)
+        if source is None:
+            return
+        if action == 'BLEND' and self.rng.random() < 0.02:
+            dest = self.filled_tanks.choice(self.rng)
+        else:
+            dest = self.family_tanks[self.tanks[source]._family].choice(self.rng)
+        if dest is None or source == dest:
+            return
+        dest_tank = self.tanks[dest]
+        free = dest_tank._capacity_cl - dest_tank._volume_cl
+        volume = min(int(self.tanks[source]._volume_cl * fraction), free)
+        if volume >= 100:
+            self._move(when, action, source, dest, volume)
+
+    def _drain(self, when, action):
+        source = self.filled_tanks.choice(self.rng)
+        if source is None:
+            return
+        self._move(when, action, source, None, self.tanks[source]._volume_cl)
+
+    def _barrel_fill(self, when):
+        source = self.filled_tanks.choice(self.rng)
+        barrel_index = self.empty_barrels.choice(self.rng)
+        if source is None or barrel_index is None:
+            return
+        volume = min(22500, self.tanks[source]._volume_cl)
+        self._move(when, 'BARREL_FILL', source, None, volume, dest_barrel=barrel_index)
+
+    def _barrel_empty(self, when):
+        barrel_index = self.filled_barrels.choice(self.rng)
+        if barrel_index is None:
+            return
+        volume = self.barrels[barrel_index]._volume_cl
+        dest = self._find_tank_with_space(volume)
+        if dest is None:
+            return
+        self._move(when, 'BARREL_EMPTY', None, dest, volume, source_barrel=barrel_index)
+
+    def _move(self, when, action, source, dest, volume, source_barrel=None, dest_barrel=None):
+        """
+        Record a transfer and its ledger fan-out, mirroring the ledger
+        signal: outflow/inflow entries proportional to the source tank's
+        composition, UNKNOWN when wine arrives from outside a tank.
+        """
+        from apps.ledger.models import TankLedger
+        from apps.production.models import Transfer
+
+        if volume <= 0:
+            return
+
+        transfer = Transfer(
+            winery=self.winery,
+            action_type=action,
+            transfer_date=when,
+            source_tank=self.tanks[source] if source is not None else None,
+            destination_tank=self.tanks[dest] if dest is not None else None,
+            source_barrel=self.barrels[source_barrel] if source_barrel is not None else None,
+            destination_barrel=self.barrels[dest_barrel] if dest_barrel is not None else None,
+            volume_l=_cl_to_decimal(volume),
+            temperature_c=Decimal(self.rng.randint(100, 180)) / 10,
+            performed_by=self.user,
+        )
+        self._emit(transfer)
+
+        if source is not None:
+            parts = self._split(self.tanks[source]._composition, volume)
+            family = self.tanks[source]._family
+        else:
+            parts = {('UNKNOWN', None, 'Unknown (External)'): volume}
+            family = self.barrels[source_barrel]._family if source_barrel is not None else None
+
+        def ledger(tank, key, delta, derived):
+            key_type, key_id, label = key
+            self._emit(TankLedger(
+                winery=self.winery,
+                transfer=transfer,
+                event_datetime=when,
+                tank=tank,
+                delta_volume_l=_cl_to_decimal(delta),
+                composition_key_type=key_type,
+                composition_key_id=key_id,
+                composition_key_label=label,
+                derived_source=derived,
+            ))
+
+        if source is not None:
+            for key, amount in parts.items():
+                ledger(self.tanks[source], key, -amount, 'INHERITED')
+            self._remove_from_tank(source, parts)
+
+        if dest is not None:
+            derived = 'INHERITED' if source is not None else 'UNKNOWN'
+            for key, amount in parts.items():
+                ledger(self.tanks[dest], key, amount, derived)
+            self._add_to_tank(dest, parts, family)
+
+        if source_barrel is not None:
+            self.barrels[source_barrel]._volume_cl = 0
+            self.filled_barrels.discard(source_barrel)
+            self.empty_barrels.add(source_barrel)
+        if dest_barrel is not None:
+            self.barrels[dest_barrel]._volume_cl += volume
+            self.barrels[dest_barrel]._family = family
+            self.empty_barrels.discard(dest_barrel)
+            self.filled_barrels.add(dest_barrel)
+
+    @staticmethod
+    def _split(composition, volume):
+        """Split ``volume`` across composition keys, exactly, dropping < 0.01 L parts."""
+        total = sum(composition.values())
+        if total <= 0:
+            return {('UNKNOWN', None, 'Unknown (No Source Composition)'): volume}
+        parts = {}
+        assigned = 0
+        largest = max(composition, key=composition.get)
+        for key, amount in composition.items():
+            share = min(volume * amount // total, amount)
+            if share > 0:
+                parts[key] = share
+                assigned += share
+        remainder = volume - assigned
+        if remainder:
+            parts[largest] = parts.get(largest, 0) + remainder
+        return parts
+
+    def _add_to_tank(self, index, parts, family):
+        tank = self.tanks[index]
+        if tank._volume_cl == 0:
+            tank._family = family
+            self.family_tanks.setdefault(family, _IndexedSet()).add(index)
+        for key, amount in parts.items():
+            tank._composition[key] = tank._composition.get(key, 0) + amount
+            tank._volume_cl += amount
+        if tank._volume_cl > 0:
+            self.empty_tanks.discard(index)
+            self.filled_tanks.add(index)
+
+    def _remove_from_tank(self, index, parts):
+        tank = self.tanks[index]
+        for key, amount in parts.items():
+            remaining = tank._composition.get(key, 0) - amount
+            if remaining > 0:
+                tank._composition[key] = remaining
+            else:
+                tank._composition.pop(key, None)
+            tank._volume_cl -= amount
+        if tank._volume_cl <= 0:
+            tank._volume_cl = 0
+            tank._composition = {}
+            self.family_tanks[tank._family].discard(index)
+            tank._family = None
+            self.filled_tanks.discard(index)
+            self.empty_tanks.add(index)
+
+    def _find_tank_with_space(self, volume_cl, exclude=None, empty_only=False):
+        """Prefer an empty tank that fits; otherwise any tank with room."""
+        for _ in range(8):
+            index = self.empty_tanks.choice(self.rng)
+            if index is None:
+                break
+            if index != exclude and self.tanks[index]._capacity_cl >= volume_cl:
+                return index
+        candidates = [
+            i for i, tank in enumerate(self.tanks)
+            if i != exclude
+            and (not empty_only or tank._volume_cl == 0)
+            and tank._capacity_cl - tank._volume_cl >= volume_cl
+        ]
+        return self.rng.choice(candidates) if candidates else None
+
+    def _finalize_vessels(self):
+        from apps.equipment.models import Tank, Barrel
+
+        for tank in self.tanks:
+            tank.current_volume_l = _cl_to_decimal(tank._volume_cl)
+            tank.status = 'IN_USE' if tank._volume_cl > 0 else 'EMPTY'
+        Tank.objects.bulk_update(self.tanks, ['current_volume_l', 'status'], batch_size=self.batch_size)
+
+        for barrel in self.barrels:
+            barrel.current_volume_l = _cl_to_decimal(barrel._volume_cl)
+            barrel.status = 'IN_USE' if barrel._volume_cl > 0 else 'EMPTY'
+        Barrel.objects.bulk_update(self.barrels, ['current_volume_l', 'status'], batch_size=self.batch_size)
+
+    # ------------------------------------------------------------------
+    # Lab, inventory and work orders
+    # ------------------------------------------------------------------
+
+    def _generate_analyses(self):
+        from apps.lab.models import Analysis
+
+        rng = self.rng
+        days = self.scale['seasons'] * 365
+        total = self.scale['tanks'] * self.scale['analyses_per_tank'] * self.scale['seasons']
+        for _ in range(total):
+            use_barrel = self.barrels and rng.random() < 0.15
+            when = _aware(self.today - timedelta(days=rng.randint(0, days)), hour=rng.randint(8, 16))
+            self._emit(Analysis(
+                winery=self.winery,
+                sample_type='BARREL' if use_barrel else 'TANK',
+                tank=None if use_barrel else rng.choice(self.tanks),
+                barrel=rng.choice(self.barrels) if use_barrel else None,
+                analysis_date=when,
+                temperature_c=Decimal(rng.randint(100, 200)) / 10,
+                ph=Decimal(rng.randint(300, 390)) / 100,
+                ta_gl=Decimal(rng.randint(450, 800)) / 100,
+                va_gl=Decimal(rng.randint(20, 80)) / 100,
+                free_so2_mgl=Decimal(rng.randint(50, 450)) / 10,
+                total_so2_mgl=Decimal(rng.randint(400, 1500)) / 10,
+                alcohol_abv=Decimal(rng.randint(110, 155)) / 10,
+                residual_sugar_gl=Decimal(rng.randint(5, 80)) / 10,
+                analyzed_by=self.user,
+            ))
+
+    def _generate_inventory(self):
+        from apps.inventory.models import Material, MaterialStock, MaterialMovement, Addition, LowStockAlert
+
+        rng = self.rng
+        span_days = self.scale['seasons'] * 365
+        stock = {}
+        materials = []
+        for n in range(self.scale['materials']):
+            name, category, unit = MATERIAL_TEMPLATES[n % len(MATERIAL_TEMPLATES)]
+            material = Material(
+                winery=self.winery,
+                name=f'{name} #{n // len(MATERIAL_TEMPLATES) + 1}',
+                code=f'MAT-{n + 1:04d}',
+                category=category,
+                unit=unit,
+                supplier=f'Supplier {rng.randint(1, 6)}',
+                low_stock_threshold=Decimal(rng.choice([10, 25, 50, 100, 250, 500, 1000])),
+            )
+            self._emit(material)
+            materials.append(material)
+
+            moments = sorted(rng.randint(0, span_days * 24) for _ in range(self.scale['movements_per_material']))
+            for hours in moments:
+                when = _aware(self.today - timedelta(days=span_days)) + timedelta(hours=hours)
+                location = rng.choice(LOCATIONS)
+                on_hand = stock.get((material, location), 0)
+                roll = rng.random()
+                movement = MaterialMovement(
+                    material=material, location=location, movement_date=when, created_by=self.user,
+                )
+                if on_hand < 5000 or roll < 0.15:
+                    movement.movement_type = 'PURCHASE'
+                    quantity = rng.randint(10, 200) * 1000
+                    movement.unit_cost = Decimal(rng.randint(50, 5000)) / 100
+                    movement.reference_number = f'PO-{rng.randint(10000, 99999)}'
+                elif roll < 0.80:
+                    movement.movement_type = 'USAGE'
+                    quantity = -min(on_hand, rng.randint(100, 5000))
+                    tank = rng.choice(self.tanks)
+                    self._emit(Addition(
+                        winery=self.winery,
+                        material=material,
+                        quantity=Decimal(-quantity) / 1000,
+                        tank=tank,
+                        addition_date=when,
+                        purpose='SO₂ adjustment' if category == 'STABILIZER' else 'Cellar addition',
+                        target_volume_l=Decimal(rng.randint(500, 20000)),
+                        added_by=self.user,
+                    ))
+                    movement.notes = f'Used in Tank {tank.code}'
+                elif roll < 0.90:
+                    movement.movement_type = 'TRANSFER'
+                    quantity = -min(on_hand, rng.randint(100, 5000))
+                    movement.destination_location = rng.choice([loc for loc in LOCATIONS if loc != location])
+                    dest_key = (material, movement.destination_location)
+                    stock[dest_key] = stock.get(dest_key, 0) - quantity
+                elif roll < 0.96:
+                    movement.movement_type = 'ADJUSTMENT'
+                    quantity = rng.randint(-min(on_hand, 2000), 2000)
+                else:
+                    movement.movement_type = 'WASTE'
+                    quantity = -min(on_hand, rng.randint(10, 1000))
+                movement.quantity = Decimal(quantity) / 1000
+                stock[(material, location)] = on_hand + quantity
+                self._emit(movement)
+
+        totals = dict.fromkeys(materials, 0)
+        for (material, location), quantity in stock.items():
+            self._emit(MaterialStock(material=material, location=location, quantity=Decimal(quantity) / 1000))
+            totals[material] += quantity
+
+        # What LowStockAlert.sync() would have raised after the last movement
+        for material, quantity in totals.items():
+            current_stock = Decimal(quantity) / 1000
+            if current_stock < material.low_stock_threshold:
+                self._emit(LowStockAlert(
+                    winery=self.winery, material=material,
+                    threshold=material.low_stock_threshold, current_stock=current_stock,
+                ))
+
+    def _derive_inventory(self):
+        """Cost the flushed movements and aggregate the addition rollups."""
+        from apps.inventory import costing
+        from apps.inventory.models import AdditionDailyRollup
+
+        costing.recompute_winery(self.winery)
+        AdditionDailyRollup.rebuild(self.winery)
+
+    def _generate_work_orders(self):
+        from apps.work_orders.models import WorkOrder, WorkOrderLine
+
+        rng = self.rng
+        statuses = ['DRAFT', 'PLANNED', 'IN_PROGRESS', 'DONE', 'VERIFIED', 'CANCELLED']
+        status_weights = [5, 15, 10, 35, 30, 5]
+        line_types = ['TRANSFER', 'ADDITION', 'ANALYSIS', 'INSPECTION', 'CLEANING']
+        span_days = self.scale['seasons'] * 365
+        per_day = {}
+
+        for _ in range(self.scale['work_orders']):
+            scheduled = self.today - timedelta(days=rng.randint(-14, span_days))
+            seq = per_day[scheduled] = per_day.get(scheduled, 0) + 1
+            status = rng.choices(statuses, status_weights)[0]
+            done = status in ('DONE', 'VERIFIED')
+            work_order = WorkOrder(
+                winery=self.winery,
+                code=f"WO-{scheduled.strftime('%y%m%d')}-{seq:03d}",
+                title=f'Cellar work {scheduled.isoformat()}',
+                status=status,
+                priority=rng.choice(['LOW', 'NORMAL', 'NORMAL', 'HIGH', 'URGENT']),
+                scheduled_for=_aware(scheduled),
+                due_date=scheduled + timedelta(days=rng.randint(0, 3)),
+                completed_at=_aware(scheduled, hour=17) if done else None,
+                created_by=self.user,
+                assigned_to=self.user,
+                verified_by=self.user if status == 'VERIFIED' else None,
+                verified_at=_aware(scheduled, hour=18) if status == 'VERIFIED' else None,
+            )
+            self._emit(work_order)
+            for line_no in range(1, rng.randint(1, 6) + 1):
+                line_type = rng.choice(line_types)
+                if done:
+                    line_status = 'COMPLETED'
+                elif status == 'IN_PROGRESS':
+                    line_status = rng.choice(['PENDING', 'COMPLETED', 'SKIPPED'])
+                else:
+                    line_status = 'PENDING'
+                line = WorkOrderLine(
+                    winery=self.winery,
+                    work_order=work_order,
+                    line_no=line_no,
+                    line_type=line_type,
+                    status=line_status,
+                    executed_by=self.user if line_status == 'COMPLETED' else None,
+                    executed_at=_aware(scheduled, hour=12) if line_status == 'COMPLETED' else None,
+                )
+                if line_type == 'TRANSFER':
+                    line.from_tank, line.to_tank = rng.sample(self.tanks, 2)
+                    line.target_volume_l = Decimal(rng.randint(5, 200) * 10)
+                elif line_type == 'ADDITION':
+                    line.target_tank = rng.choice(self.tanks)
+                    line.material_name = rng.choice(MATERIAL_TEMPLATES)[0]
+                    line.dosage_value = Decimal(rng.randint(5, 500)) / 10
+                    line.dosage_unit = 'g/hL'
+                else:
+                    line.target_tank = rng.choice(self.tanks)
+                self._emit(line)
@@ -0,0 +1,127 @@
+"""
+Management command comparing per-request latency with fresh, persistent and
+pooled database connections.
+
+Each mode runs in a subprocess with the matching DB_POOL/DB_CONN_MAX_AGE
+environment and drives a cheap endpoint through Django's WSGI handler, the
+same path gunicorn uses, so connections are opened and released by the
+request_started/request_finished signals exactly as in production. The test
+client cannot be used here: it keeps connections open between requests.
+
+Usage:
+    python manage.py benchmark_db_connections                          # Latest LOAD-* winery
+    python manage.py benchmark_db_connections --requests=500 --winery=LOAD-42-00
+    python manage.py benchmark_db_connections --path=/api/v1/master-data/varieties/dropdown/
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.benchmarks import percentile
+
+MODES = {
+    'per-request': {'DB_POOL': 'False', 'DB_CONN_MAX_AGE': '0'},
+    'persistent': {'DB_POOL': 'False', 'DB_CONN_MAX_AGE': '600'},
+    'pool': {'DB_POOL': 'True'},
+}
+
+
+class Command(BaseCommand):
+    help = 'Benchmark request latency with fresh, persistent and pooled DB connections'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--winery', help='Winery code (default: most recent LOAD-* winery)')
+        parser.add_argument('--requests', type=int, default=200, help='Timed requests per mode (default: 200)')
+        parser.add_argument(
+            '--path',
+            default='/api/v1/equipment/tanks/dropdown/',
+            help='Endpoint to request (default: tank dropdown)',
+        )
+        parser.add_argument('--child', choices=list(MODES), help='Internal: run one mode in this process')
+
+    def handle(self, *args, **options):
+        if options['child']:
+            self.stdout.write(json.dumps(self._run_child(options)))
+            return
+
+        self.stdout.write(f"{options['requests']} requests to {options['path']}")
+        self.stdout.write(f"  {'mode':<14}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'connects':>10}")
+        for mode, env in MODES.items():
+            result = self._spawn(mode, env, options)
+            timings = result['timings']
+            self.stdout.write(
+                f"  {mode:<14}{sum(timings) / len(timings):>10.2f}{percentile(timings, 50):>10.2f}"
+                f"{percentile(timings, 95):>10.2f}{result['connects']:>10}"
+            )
+
+    def _spawn(self, mode, env, options):
+        command = [
+            sys.executable, sys.argv[0], 'benchmark_db_connections',
+            '--child', mode, '--requests', str(options['requests']), '--path', options['path'],
+        ]
+        if options['winery']:
+            command += ['--winery', options['winery']]
+        completed = subprocess.run(
+            command, env={**os.environ, **env}, capture_output=True, text=True,
+        )
+        if completed.returncode != 0:
+            raise CommandError(f'{mode} run failed:\n{completed.stderr}')
+        return json.loads(completed.stdout.strip().splitlines()[-1])
+
+    def _run_child(self, options):
+        from django.core.handlers.wsgi import WSGIHandler
+        from django.db import connection
+        from django.test import RequestFactory
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        from apps.wineries.models import Winery, WineryMembership
+
+        wineries = Winery.objects.order_by('-created_at')
+        if options['winery']:
+            winery = wineries.filter(code=options['winery']).first()
+        else:
+            winery = wineries.filter(code__startswith='LOAD-').first()
+        if winery is None:
+            raise CommandError('Winery not found; run generate_load_data first')
+        user = WineryMembership.objects.filter(winery=winery, is_active=True).first().user
+        connection.close()
+
+        host = next((h for h in settings.ALLOWED_HOSTS if h != '*' and not h.startswith('.')), 'localhost')
+        environ = RequestFactory().get(
+            options['path'],
+            HTTP_HOST=host,
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}',
+            HTTP_X_WINERY_ID=str(winery.id),
+        ).environ
+
+        # Count physical connections; the pool opens them outside Django
+        import psycopg
+
+        connects = 0
+        init = psycopg.Connection.__init__
+
+        def counting_init(self, *args, **kwargs):
+            nonlocal connects
+            connects += 1
+            init(self, *args, **kwargs)
+
+        psycopg.Connection.__init__ = counting_init
+        handler = WSGIHandler()
+        timings = []
+        for i in range(options['requests'] + 5):
+            started = time.perf_counter()
+            response = handler(dict(environ), lambda status, headers: None)
+            if response.status_code != 200:
+                raise CommandError(f'{options["path"]} returned {response.status_code}')
+            b''.join(response)
+            response.close()  # Sends request_finished, which releases the connection
+            if i == 4:
+                connects = 0
+            elif i >= 5:  # Warm-up requests are not timed
+                timings.append((time.perf_counter() - started) * 1000)
+        return {'timings': timings, 'connects': connects}
@@ -0,0 +1,90 @@
+"""
+Management command comparing DRF's stdlib JSON renderer/parser with the
+orjson-backed ones on real payloads.
+
+Payloads are the 1,000 most recent transfers (TransferSerializer) and the
+full tank composition list of a winery, e.g. one created with
+``generate_load_data``.
+
+Usage:
+    python manage.py benchmark_json                        # Latest LOAD-* winery
+    python manage.py benchmark_json --winery=LOAD-42-00 --rounds=50
+"""
+import io
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from apps.core.parsers import FastJSONParser, orjson
+from apps.core.renderers import FastJSONRenderer
+
+
+class Command(BaseCommand):
+    help = 'Benchmark stdlib vs orjson rendering and parsing of large API payloads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--winery', help='Winery code (default: most recent LOAD-* winery)')
+        parser.add_argument('--rounds', type=int, default=20, help='Timed rounds per case (default: 20)')
+        parser.add_argument('--rows', type=int, default=1000, help='Transfers to serialize (default: 1000)')
+
+    def handle(self, *args, **options):
+        from apps.production.models import Transfer
+        from apps.production.serializers import TransferSerializer
+        from apps.wineries.models import Winery, WineryMembership
+
+        if orjson is None:
+            raise CommandError('orjson is not installed; nothing to compare')
+
+        wineries = Winery.objects.order_by('-created_at')
+        if options['winery']:
+            winery = wineries.filter(code=options['winery']).first()
+        else:
+            winery = wineries.filter(code__startswith='LOAD-').first()
+        if winery is None:
+            raise CommandError('Winery not found; run generate_load_data first')
+
+        transfers = Transfer.objects.filter(winery=winery).select_related(
+            'source_tank', 'destination_tank', 'source_barrel', 'destination_barrel',
+            'batch', 'wine_lot', 'performed_by',
+        ).order_by('-transfer_date')[:options['rows']]
+        payloads = {
+            f'transfers ({options["rows"]} rows)': TransferSerializer(transfers, many=True).data,
+        }
+
+        membership = WineryMembership.objects.filter(winery=winery, is_active=True).select_related('user').first()
+        client = APIClient()
+        client.force_authenticate(membership.user)
+        client.credentials(HTTP_X_WINERY_ID=str(winery.id))
+        payloads['composition list'] = client.get('/api/v1/ledger/composition/').data
+
+        self.stdout.write(f'Winery {winery.code}, {options["rounds"]} rounds')
+        self.stdout.write(f"  {'payload':<28}{'case':<8}{'stdlib ms':>11}{'orjson ms':>11}{'speedup':>9}")
+        for name, data in payloads.items():
+            body = JSONRenderer().render(data)
+            cases = {
+                'render': (
+                    lambda: JSONRenderer().render(data),
+                    lambda: FastJSONRenderer().render(data),
+                ),
+                'parse': (
+                    lambda: JSONParser().parse(io.BytesIO(body)),
+                    lambda: FastJSONParser().parse(io.BytesIO(body)),
+                ),
+            }
+            for case, (baseline, fast) in cases.items():
+                slow_ms = self._time(baseline, options['rounds'])
+                fast_ms = self._time(fast, options['rounds'])
+                self.stdout.write(
+                    f'  {name:<28}{case:<8}{slow_ms:>11.2f}{fast_ms:>11.2f}{slow_ms / fast_ms:>8.1f}x'
+                )
+            self.stdout.write(f'  {"":<28}size    {len(body) / 1024:>10.0f}K')
+
+    def _time(self, func, rounds):
+        func()  # warm up
+        started = time.perf_counter()
+        for _ in range(rounds):
+            func()
+        return (time.perf_counter() - started) * 1000 / rounds
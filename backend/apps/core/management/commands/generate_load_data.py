@@ -0,0 +1,82 @@
+"""
+Management command to generate large synthetic wineries for benchmarking.
+
+Usage:
+    python manage.py generate_load_data                          # 1 tenant, small preset
+    python manage.py generate_load_data --scale=large            # ~1M+ rows per tenant
+    python manage.py generate_load_data --tenants=3 --seed=7     # Reproducible multi-tenant
+    python manage.py generate_load_data --scale=medium --tanks=500 --transfers-per-year=8000
+    python manage.py generate_load_data --flush                  # Remove generated tenants first
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.core.load_data import SCALE_PRESETS, LoadDataGenerator
+
+
+class Command(BaseCommand):
+    help = 'Generate seeded, reproducible synthetic wineries for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale',
+            choices=sorted(SCALE_PRESETS),
+            default='small',
+            help='Scale preset (default: small)',
+        )
+        parser.add_argument('--tenants', type=int, default=1, help='Number of wineries to generate')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed (default: 42)')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Rows per bulk_create statement (default: 5000)',
+        )
+        parser.add_argument(
+            '--prefix',
+            default='LOAD',
+            help='Winery code prefix used for generated tenants (default: LOAD)',
+        )
+        parser.add_argument(
+            '--password',
+            default='load123',
+            help='Password for the generated owner users (default: load123)',
+        )
+        parser.add_argument(
+            '--flush',
+            action='store_true',
+            help='Delete previously generated tenants with the same prefix first',
+        )
+
+        # Individual scale knobs override the preset
+        for knob in SCALE_PRESETS['small']:
+            parser.add_argument(f"--{knob.replace('_', '-')}", type=int, dest=knob)
+
+    def handle(self, *args, **options):
+        scale = dict(SCALE_PRESETS[options['scale']])
+        for knob in scale:
+            if options.get(knob) is not None:
+                scale[knob] = options[knob]
+
+        generator = LoadDataGenerator(
+            seed=options['seed'],
+            scale=scale,
+            batch_size=options['batch_size'],
+            code_prefix=options['prefix'],
+            password=options['password'],
+            stdout=self.stdout,
+        )
+
+        if options['flush']:
+            removed = generator.flush_existing()
+            self.stdout.write(f'Removed {removed} previously generated winery(s)')
+
+        started = time.monotonic()
+        wineries = generator.generate(tenants=options['tenants'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {len(wineries)} winery(s) in {time.monotonic() - started:.1f}s'
+        ))
+        for winery in wineries:
+            self.stdout.write(f'  {winery.code}  id={winery.id}  login={winery.code.lower()}@example.com')
@@ -0,0 +1,77 @@
+"""
+Management command to maintain the yearly partitions of partitioned models
+(TankLedger, Transfer; see apps.core.partitioning).
+
+Without options it creates the partitions for the current year and the
+next ``--ahead`` years, then lists the partitions. Run it from cron at least
+once a year so new rows never land in the default partition.
+
+Old vintages can be detached: the partition stays as a standalone table
+(e.g. ``ledger_tankledger_y2019``) that queries on the model no longer see,
+optionally moved to a tablespace on cheaper storage, and can be attached
+again later.
+
+Usage:
+    python manage.py manage_partitions
+    python manage.py manage_partitions --ahead=2
+    python manage.py manage_partitions --detach=2019 --tablespace=archive
+    python manage.py manage_partitions --attach=2019 --model=ledger.TankLedger
+"""
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.core.partitioning import (
+    attach_year_partition,
+    detach_year_partition,
+    ensure_year_partitions,
+    is_partitioned,
+    list_partitions,
+    partitioned_models,
+)
+
+
+class Command(BaseCommand):
+    help = 'Create upcoming yearly partitions, or detach/attach a year'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', help='Only this model, e.g. ledger.TankLedger (default: all)')
+        parser.add_argument('--ahead', type=int, default=1, help='Years to create ahead (default: 1)')
+        parser.add_argument('--detach', type=int, metavar='YEAR', help='Detach the partition of YEAR')
+        parser.add_argument('--attach', type=int, metavar='YEAR', help='Re-attach the partition of YEAR')
+        parser.add_argument('--tablespace', help='With --detach: move the detached table to this tablespace')
+
+    def handle(self, *args, **options):
+        if options['model']:
+            try:
+                models = [apps.get_model(options['model'])]
+            except (LookupError, ValueError):
+                raise CommandError(f"Unknown model {options['model']}")
+            if not getattr(models[0], 'partitioning', None):
+                raise CommandError(f"{options['model']} is not partitioned")
+        else:
+            models = partitioned_models()
+
+        for model in models:
+            table = model._meta.db_table
+            if not is_partitioned(connection, table):
+                self.stdout.write(self.style.WARNING(f'{table}: not partitioned yet, run migrate'))
+                continue
+
+            with transaction.atomic():
+                if options['detach']:
+                    name = detach_year_partition(model, options['detach'], options['tablespace'])
+                    self.stdout.write(self.style.SUCCESS(f'{table}: detached {name}'))
+                elif options['attach']:
+                    attach_year_partition(model, options['attach'])
+                    self.stdout.write(self.style.SUCCESS(f"{table}: attached {options['attach']}"))
+                else:
+                    this_year = timezone.now().year
+                    created = ensure_year_partitions(model, range(this_year, this_year + options['ahead'] + 1))
+                    for year in created:
+                        self.stdout.write(self.style.SUCCESS(f'{table}: created partition for {year}'))
+
+            self.stdout.write(f'{table}:')
+            for name, bound, rows in list_partitions(connection, table):
+                self.stdout.write(f'  {name:<36}{rows:>12} rows  {bound}')
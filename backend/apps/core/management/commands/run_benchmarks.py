@@ -0,0 +1,155 @@
+"""
+Management command to benchmark the main API endpoints.
+
+Creates a throwaway test database, generates a synthetic winery for each
+requested size, drives the endpoints through DRF's test client and compares
+latency percentiles and query counts with the stored baseline.
+
+Usage:
+    python manage.py run_benchmarks                              # tiny + small, compare to baseline
+    python manage.py run_benchmarks --sizes=small,medium --iterations=50
+    python manage.py run_benchmarks --only=tank-list,dashboard
+    python manage.py run_benchmarks --update-baseline            # Record new baseline
+    python manage.py run_benchmarks --threshold=40               # Allow 40% p95 slowdown
+"""
+import logging
+import platform
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import (
+    setup_databases, setup_test_environment,
+    teardown_databases, teardown_test_environment,
+)
+from django.utils import timezone
+
+from apps.core.benchmarks import (
+    DEFAULT_BASELINE_PATH, SCENARIOS, BenchmarkRunner,
+    compare, load_baseline, save_baseline,
+)
+from apps.core.load_data import SCALE_PRESETS, LoadDataGenerator
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the main API endpoints against generated datasets'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            default='tiny,small',
+            help=f"Comma separated dataset sizes ({', '.join(SCALE_PRESETS)}; default: tiny,small)",
+        )
+        parser.add_argument('--iterations', type=int, default=20, help='Timed requests per scenario')
+        parser.add_argument('--warmup', type=int, default=2, help='Untimed requests per scenario')
+        parser.add_argument('--seed', type=int, default=42, help='Dataset random seed (default: 42)')
+        parser.add_argument(
+            '--only',
+            help=f"Comma separated scenarios to run ({', '.join(SCENARIOS)})",
+        )
+        parser.add_argument(
+            '--baseline',
+            default=str(DEFAULT_BASELINE_PATH),
+            help='Baseline JSON file (default: backend/benchmarks/baseline.json)',
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=25.0,
+            help='Allowed p95 latency increase in percent (default: 25)',
+        )
+        parser.add_argument(
+            '--update-baseline',
+            action='store_true',
+            help='Write the results to the baseline file instead of comparing',
+        )
+        parser.add_argument(
+            '--keepdb',
+            action='store_true',
+            help='Preserve the test database between runs',
+        )
+
+    def handle(self, *args, **options):
+        sizes = [s.strip() for s in options['sizes'].split(',') if s.strip()]
+        unknown = [s for s in sizes if s not in SCALE_PRESETS]
+        if unknown:
+            raise CommandError(f"Unknown size(s): {', '.join(unknown)}")
+
+        names = None
+        if options['only']:
+            names = {n.strip() for n in options['only'].split(',') if n.strip()}
+            unknown = names - set(SCENARIOS)
+            if unknown:
+                raise CommandError(f"Unknown scenario(s): {', '.join(sorted(unknown))}")
+
+        if options['verbosity'] < 2:
+            # Budget warnings from the instrumentation middleware would flood the output
+            logging.getLogger('apps.core.middleware').setLevel(logging.ERROR)
+
+        setup_test_environment()
+        old_config = setup_databases(
+            verbosity=0, interactive=False, keepdb=options['keepdb'],
+        )
+        try:
+            results = {
+                size: self._run_size(size, names, options)
+                for size in sizes
+            }
+        finally:
+            teardown_databases(old_config, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        if options['update_baseline']:
+            # Keep recorded sizes that were not part of this run
+            recorded = load_baseline(options['baseline'])
+            recorded.update(results)
+            save_baseline(options['baseline'], recorded, {
+                'recorded_at': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'iterations': options['iterations'],
+                'seed': options['seed'],
+            })
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {options['baseline']}"))
+            return
+
+        baseline = load_baseline(options['baseline'])
+        if not baseline:
+            self.stdout.write(self.style.WARNING(
+                'No baseline found; run with --update-baseline to record one'
+            ))
+            return
+
+        regressions = compare(results, baseline, options['threshold'])
+        if regressions:
+            raise CommandError(
+                'Benchmark regressions:\n' + '\n'.join(f'  {r}' for r in regressions)
+            )
+        self.stdout.write(self.style.SUCCESS('No regressions against baseline'))
+
+    def _run_size(self, size, names, options):
+        from apps.wineries.models import WineryMembership, WineryMembershipRole
+
+        generator = LoadDataGenerator(
+            seed=options['seed'],
+            scale=SCALE_PRESETS[size],
+            code_prefix=f'BENCH{size.upper()}',
+            stdout=self.stdout if options['verbosity'] > 1 else None,
+        )
+        generator.flush_existing()
+        winery = generator.generate(tenants=1)[0]
+        owner = WineryMembership.objects.select_related('user').get(
+            winery=winery, role=WineryMembershipRole.WINERY_OWNER,
+        ).user
+
+        runner = BenchmarkRunner(
+            winery, owner, iterations=options['iterations'], warmup=options['warmup'],
+        )
+        results = runner.run(names)
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f'{size}:'))
+        self.stdout.write(f"  {'scenario':<24}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>9}")
+        for name, result in results.items():
+            self.stdout.write(
+                f"  {name:<24}{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}"
+                f"{result['p99_ms']:>10.1f}{result['queries']:>9}"
+            )
+        return results
@@ -0,0 +1,146 @@
+"""
+In-process request metrics registry.
+
+Collects per-view request counts, latency histograms, DB query counts/time
+and serialization time, and renders them in the Prometheus text exposition
+format. Each worker process keeps its own registry, so Prometheus should
+scrape every worker (or aggregate by ``instance``).
+"""
+import threading
+from collections import defaultdict
+
+
+# Latency histogram buckets in seconds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def resolve_view_key(view_func, method):
+    """
+    Build a stable metric key for a resolved view.
+
+    DRF ViewSets are keyed as ``<ViewSet>.<action>`` (e.g. ``MaterialViewSet.list``),
+    plain APIViews as ``<View>.<method>`` and anything else by its dotted path.
+    Returns (key, view_class, action).
+    """
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is None:
+        name = getattr(view_func, '__qualname__', None) or view_func.__class__.__name__
+        return f"{view_func.__module__}.{name}", None, None
+
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get(method.lower(), method.lower())
+    return f"{view_class.__name__}.{action}", view_class, action
+
+
+def get_query_budget(view_class, action):
+    """
+    Return the query budget a view declares for ``action``, or None.
+
+    ``query_budget`` may be an int (applies to every action) or a dict mapping
+    action names to budgets, with an optional ``'*'`` fallback.
+    """
+    budget = getattr(view_class, 'query_budget', None)
+    if budget is None:
+        return None
+    if isinstance(budget, int):
+        return budget
+    return budget.get(action, budget.get('*'))
+
+
+class _ViewStats:
+    __slots__ = (
+        'requests', 'duration_sum', 'buckets', 'db_queries', 'db_time',
+        'serialize_time', 'budget_exceeded', 'status_counts',
+    )
+
+    def __init__(self):
+        self.requests = 0
+        self.duration_sum = 0.0
+        self.buckets = [0] * len(DURATION_BUCKETS)
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.budget_exceeded = 0
+        self.status_counts = defaultdict(int)
+
+
+class MetricsRegistry:
+    """Thread-safe accumulator for request metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = defaultdict(_ViewStats)
+
+    def observe(self, view, method, status_code, duration, db_queries, db_time,
+                serialize_time, budget_exceeded=False):
+        with self._lock:
+            stats = self._stats[(view, method)]
+            stats.requests += 1
+            stats.duration_sum += duration
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    stats.buckets[i] += 1
+            stats.db_queries += db_queries
+            stats.db_time += db_time
+            stats.serialize_time += serialize_time
+            stats.status_counts[f"{status_code // 100}xx"] += 1
+            if budget_exceeded:
+                stats.budget_exceeded += 1
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def render(self):
+        """Render all metrics in the Prometheus text format."""
+        with self._lock:
+            snapshot = sorted(self._stats.items())
+
+        lines = []
+
+        def header(name, kind, help_text):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        header('winery_http_requests_total', 'counter', 'Requests handled, by view and status class.')
+        for (view, method), stats in snapshot:
+            for status_class, count in sorted(stats.status_counts.items()):
+                lines.append(
+                    f'winery_http_requests_total{{view="{view}",method="{method}",status="{status_class}"}} {count}'
+                )
+
+        header('winery_http_request_duration_seconds', 'histogram', 'Total request latency.')
+        for (view, method), stats in snapshot:
+            labels = f'view="{view}",method="{method}"'
+            for bound, count in zip(DURATION_BUCKETS, stats.buckets):
+                lines.append(f'winery_http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'winery_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {stats.requests}')
+            lines.append(f'winery_http_request_duration_seconds_sum{{{labels}}} {stats.duration_sum:.6f}')
+            lines.append(f'winery_http_request_duration_seconds_count{{{labels}}} {stats.requests}')
+
+        header('winery_db_queries_total', 'counter', 'Database queries executed.')
+        for (view, method), stats in snapshot:
+            lines.append(f'winery_db_queries_total{{view="{view}",method="{method}"}} {stats.db_queries}')
+
+        header('winery_db_query_duration_seconds_total', 'counter', 'Time spent executing database queries.')
+        for (view, method), stats in snapshot:
+            lines.append(
+                f'winery_db_query_duration_seconds_total{{view="{view}",method="{method}"}} {stats.db_time:.6f}'
+            )
+
+        header('winery_serialize_duration_seconds_total', 'counter', 'Time spent rendering response bodies.')
+        for (view, method), stats in snapshot:
+            lines.append(
+                f'winery_serialize_duration_seconds_total{{view="{view}",method="{method}"}} {stats.serialize_time:.6f}'
+            )
+
+        header('winery_query_budget_exceeded_total', 'counter', 'Requests that exceeded the view query budget.')
+        for (view, method), stats in snapshot:
+            lines.append(
+                f'winery_query_budget_exceeded_total{{view="{view}",method="{method}"}} {stats.budget_exceeded}'
+            )
+
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
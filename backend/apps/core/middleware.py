@@ -0,0 +1,124 @@
+"""
+Request instrumentation middleware for Winery ERP.
+
+Records, per resolved view, the number of DB queries, time spent in the DB,
+time spent rendering the response body and total request time. Results are
+exposed as a ``Server-Timing`` header and fed into the in-process metrics
+registry served by ``/api/v1/metrics/``.
+"""
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from .metrics import get_query_budget, registry, resolve_view_key
+
+logger = logging.getLogger(__name__)
+
+
+class RequestStats:
+    """Mutable counters collected while a single request is processed."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.render_start = None
+        self.serialize_time = 0.0
+        self.view_key = None
+        self.view_class = None
+        self.action = None
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        """``connection.execute_wrapper`` hook that counts and times queries."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.db_queries += 1
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Middleware that measures DB queries, DB time, serialization time and
+    total latency for each request.
+
+    ViewSets can declare a ``query_budget`` (int, or dict keyed by action);
+    requests exceeding it are logged as warnings and counted in the metrics.
+
+    Should be placed near the top of MIDDLEWARE so the total covers the
+    whole middleware stack.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_INSTRUMENTATION', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.server_timing = getattr(settings, 'SERVER_TIMING_HEADER', True)
+
+    def __call__(self, request):
+        stats = RequestStats()
+        request._request_stats = stats
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(stats.db_wrapper))
+            response = self.get_response(request)
+
+        total = time.perf_counter() - stats.start
+
+        if stats.view_key is None:
+            # Not routed to a view (static files, 404 before resolution, ...)
+            return response
+
+        budget = get_query_budget(stats.view_class, stats.action) if stats.view_class else None
+        budget_exceeded = budget is not None and stats.db_queries > budget
+        if budget_exceeded:
+            logger.warning(
+                'Query budget exceeded for %s: %d queries (budget %d) on %s %s',
+                stats.view_key, stats.db_queries, budget, request.method, request.path,
+            )
+
+        registry.observe(
+            view=stats.view_key,
+            method=request.method,
+            status_code=response.status_code,
+            duration=total,
+            db_queries=stats.db_queries,
+            db_time=stats.db_time,
+            serialize_time=stats.serialize_time,
+            budget_exceeded=budget_exceeded,
+        )
+
+        if self.server_timing:
+            app_time = max(total - stats.db_time - stats.serialize_time, 0.0)
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={stats.db_time * 1000:.1f};desc="{stats.db_queries} queries"',
+                f'app;dur={app_time * 1000:.1f}',
+                f'serialize;dur={stats.serialize_time * 1000:.1f}',
+                f'total;dur={total * 1000:.1f}',
+            ])
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        stats = getattr(request, '_request_stats', None)
+        if stats is not None:
+            stats.view_key, stats.view_class, stats.action = resolve_view_key(view_func, request.method)
+        return None
+
+    def process_template_response(self, request, response):
+        """Time response rendering (DRF renders JSON lazily after the view returns)."""
+        stats = getattr(request, '_request_stats', None)
+        if stats is not None:
+            stats.render_start = time.perf_counter()
+
+            def _render_done(rendered):
+                stats.serialize_time += time.perf_counter() - stats.render_start
+
+            response.add_post_render_callback(_render_done)
+        return response
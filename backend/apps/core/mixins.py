@@ -0,0 +1,106 @@
+"""
+View mixins shared across apps.
+"""
+from django.utils.cache import parse_etags, patch_cache_control
+from rest_framework import status
+from rest_framework.response import Response
+
+from .serializers import (
+    EXPAND_QUERY_PARAM, FIELDS_QUERY_PARAM, SparseFieldsetMixin, get_query_list,
+)
+from .versioning import compute_etag
+
+
+class NotModified(Exception):
+    """Raised from ``initial()`` when the client's cached copy is current."""
+
+
+class SparseFieldsetViewMixin:
+    """
+    Fit ``select_related``/``prefetch_related`` to the fields requested with
+    ``?fields=``/``?expand=``.
+
+    With ``?fields=`` the view's own joins and prefetches are replaced by the
+    ones the remaining fields need, so trimmed responses also skip the
+    queries; ``?expand=`` alone only adds lookups. Requires a serializer using
+    ``SparseFieldsetMixin``.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        request = self.request
+        if request.method != 'GET':
+            return queryset
+
+        requested = get_query_list(request, FIELDS_QUERY_PARAM)
+        if not requested and not get_query_list(request, EXPAND_QUERY_PARAM):
+            return queryset
+
+        serializer = self.get_serializer()
+        if not isinstance(serializer, SparseFieldsetMixin):
+            return queryset
+
+        select, prefetch = serializer.get_related_lookups()
+        if requested:
+            queryset = queryset.select_related(None).prefetch_related(None)
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
+
+
+class ConditionalGetMixin:
+    """
+    ETag / ``If-None-Match`` support driven by per-winery change versions.
+
+    Declare the resources (``app_label.model``) a view renders, either for
+    all actions or per action::
+
+        etag_resources = ('equipment.tank', 'master_data.tankmaterial')
+        etag_resources = {'list': (...), 'retrieve': (...), '*': (...)}
+
+    The ETag is computed from cached version counters only, so a matching
+    ``If-None-Match`` is answered with 304 before the view touches its
+    queryset. Must be listed before the winery mixin so the winery is known.
+    Responses read from the replica (``@read_replica``) are sent without one.
+    """
+    etag_resources = ()
+
+    def get_etag_resources(self):
+        resources = self.etag_resources
+        if isinstance(resources, dict):
+            return resources.get(getattr(self, 'action', None), resources.get('*', ()))
+        return resources
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+
+        self.etag = None
+        if request.method not in ('GET', 'HEAD'):
+            return
+        resources = self.get_etag_resources()
+        if not resources:
+            return
+
+        self.etag = compute_etag(request, resources)
+        if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+        if self.etag in if_none_match or '*' in if_none_match:
+            raise NotModified
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return Response(status=status.HTTP_304_NOT_MODIFIED)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        etag = getattr(self, 'etag', None)
+        if getattr(request, '_read_from_replica', False):
+            # The versions may be ahead of what the replica returned
+            etag = None
+        if etag and response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+            # Clients may store the response but must revalidate before reuse
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
@@ -0,0 +1,143 @@
+"""
+Pagination classes for high-volume list endpoints.
+
+``HighVolumePagination`` keeps the global page-number behaviour by default
+(the frontend tables rely on it) and switches to keyset/cursor pagination
+when the client asks for it with ``?cursor=`` or ``?pagination=cursor``.
+Cursor pages cost the same however deep you scroll: no OFFSET scan and no
+``COUNT(*)`` unless requested with ``?count=exact`` or ``?count=estimate``.
+
+Views opt in with::
+
+    pagination_class = HighVolumePagination
+    cursor_ordering = ('-transfer_date', '-id')
+"""
+import json
+
+from django.db import connections
+from rest_framework.pagination import BasePagination, CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+
+
+# Below this planner estimate an exact COUNT(*) is cheap and more useful
+ESTIMATE_EXACT_BELOW = 1000
+
+
+def estimate_count(queryset):
+    """
+    Return the PostgreSQL planner's row estimate for ``queryset``.
+
+    Falls back to an exact count on other databases and for small results,
+    where the planner is least accurate and counting is cheap anyway.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    estimate = int(plan[0]['Plan']['Plan Rows'])
+    if estimate < ESTIMATE_EXACT_BELOW:
+        return queryset.count()
+    return estimate
+
+
+class CountingCursorPagination(CursorPagination):
+    """
+    Cursor pagination ordered by the view's ``cursor_ordering``, with an
+    optional total count (``?count=exact`` or ``?count=estimate``).
+
+    An explicit ``?ordering=`` parameter still takes precedence.
+    """
+    ordering = '-created_at'
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    count_query_param = 'count'
+
+    def get_ordering(self, request, queryset, view):
+        cursor_ordering = getattr(view, 'cursor_ordering', None)
+        if cursor_ordering and not request.query_params.get('ordering'):
+            return tuple(cursor_ordering)
+        return super().get_ordering(request, queryset, view)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        mode = request.query_params.get(self.count_query_param)
+        if mode == 'exact':
+            self.count = queryset.count()
+        elif mode == 'estimate':
+            self.count = estimate_count(queryset)
+        else:
+            self.count = None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.count,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties'] = {
+            'count': {'type': 'integer', 'nullable': True, 'example': 123},
+            **response_schema['properties'],
+        }
+        return response_schema
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [{
+            'name': self.count_query_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Include a total count: "exact" or "estimate" (cursor mode only).',
+            'schema': {'type': 'string', 'enum': ['exact', 'estimate']},
+        }]
+
+
+class HighVolumePagination(BasePagination):
+    """
+    Page-number pagination by default, cursor pagination on request.
+
+    Cursor mode is selected by ``?pagination=cursor``; the ``next`` and
+    ``previous`` links it returns carry ``?cursor=`` which keeps it selected.
+    """
+    mode_query_param = 'pagination'
+
+    def __init__(self):
+        self.paginator = None
+
+    def uses_cursor(self, request):
+        params = request.query_params
+        return (
+            params.get(self.mode_query_param) == 'cursor' or
+            CountingCursorPagination.cursor_query_param in params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.uses_cursor(request):
+            self.paginator = CountingCursorPagination()
+        else:
+            self.paginator = PageNumberPagination()
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return PageNumberPagination().get_paginated_response_schema(schema)
+
+    def get_schema_operation_parameters(self, view):
+        return PageNumberPagination().get_schema_operation_parameters(view) + [{
+            'name': self.mode_query_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Set to "cursor" for keyset pagination of deep result sets.',
+            'schema': {'type': 'string', 'enum': ['cursor']},
+        }] + CountingCursorPagination().get_schema_operation_parameters(view)
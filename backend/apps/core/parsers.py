@@ -0,0 +1,26 @@
+"""
+Fast JSON parser for the REST API.
+
+Uses orjson when it is installed and falls back to DRF's stdlib parser
+otherwise.
+"""
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+class FastJSONParser(JSONParser):
+    """Drop-in replacement for ``rest_framework.parsers.JSONParser``."""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
@@ -0,0 +1,309 @@
+"""
+Declarative Postgres partitioning by year and winery.
+
+A model opts in by declaring how it is partitioned::
+
+    class TankLedger(models.Model):
+        ...
+        partitioning = YearPartitioning('event_datetime', hash_field='winery', hash_modulus=4)
+
+and a migration converts the existing table::
+
+    PartitionByYear('tankledger', 'event_datetime', hash_field='winery', hash_modulus=4)
+
+The table becomes ``PARTITION BY RANGE (<date column>)`` with one partition
+per calendar year (UTC), ``<table>_y2024``; each year is sub-partitioned by
+``HASH (winery_id)`` into ``<table>_y2024_h0`` ... so per-tenant and
+per-vintage scans both prune. A ``<table>_default`` partition catches rows
+outside the created years; ``manage_partitions`` creates upcoming years
+ahead of time and moves any stray rows out of the default partition.
+
+Postgres requires the primary key of a partitioned table to contain the
+partition keys, so the key becomes ``(id, <date column>, winery_id)``. The
+ORM still treats ``id`` as the primary key (UUIDs are unique in practice),
+but foreign keys *to* a partitioned model cannot be enforced by the
+database: declare them with ``db_constraint=False``. Deletion cascades are
+emulated by Django as before.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import connection as default_connection
+from django.db.migrations.operations.base import Operation
+
+DEFAULT_SUFFIX = 'default'
+
+
+@dataclass(frozen=True)
+class YearPartitioning:
+    """How a model's table is partitioned (see module docstring)."""
+    range_field: str
+    hash_field: str = None
+    hash_modulus: int = 4
+
+    def columns(self, model):
+        range_column = model._meta.get_field(self.range_field).column
+        hash_column = model._meta.get_field(self.hash_field).column if self.hash_field else None
+        return range_column, hash_column
+
+
+def year_partition_name(table, year):
+    return f'{table}_y{year}'
+
+
+def _year_bounds(year):
+    start = datetime(year, 1, 1, tzinfo=dt_timezone.utc)
+    return start, start.replace(year=year + 1)
+
+
+def _bound_clause(year):
+    # DDL takes no bind parameters; the bounds are generated, not user input
+    start, end = _year_bounds(year)
+    return f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+
+
+def _qn(connection, name):
+    return connection.ops.quote_name(name)
+
+
+def is_partitioned(connection, table):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = %s AND c.relnamespace = 'public'::regnamespace",
+            [table],
+        )
+        return cursor.fetchone() is not None
+
+
+def list_partitions(connection, table):
+    """Return ``[(name, bound expression, estimated rows)]`` of the direct partitions of ``table``."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname, pg_get_expr(child.relpartbound, child.oid),
+                   COALESCE((
+                       SELECT SUM(GREATEST(leaf.reltuples, 0))::bigint
+                       FROM pg_partition_tree(child.oid) tree
+                       JOIN pg_class leaf ON leaf.oid = tree.relid
+                       WHERE tree.isleaf
+                   ), 0)
+            FROM pg_inherits i
+            JOIN pg_class parent ON parent.oid = i.inhparent
+            JOIN pg_class child ON child.oid = i.inhrelid
+            WHERE parent.relname = %s
+            ORDER BY child.relname
+            """,
+            [table],
+        )
+        return cursor.fetchall()
+
+
+def create_year_partition(connection, table, range_column, year, hash_column=None, hash_modulus=4):
+    """
+    Create and attach the partition holding ``year``. Rows of that year that
+    landed in the default partition are moved into it first. No-op when the
+    partition already exists.
+    """
+    name = year_partition_name(table, year)
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT to_regclass(%s)', [name])
+        if cursor.fetchone()[0] is not None:
+            return False
+
+        start, end = _year_bounds(year)
+        partition_by = f' PARTITION BY HASH ({_qn(connection, hash_column)})' if hash_column else ''
+        cursor.execute(
+            f'CREATE TABLE {_qn(connection, name)} '
+            f'(LIKE {_qn(connection, table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS){partition_by}'
+        )
+        if hash_column:
+            for remainder in range(hash_modulus):
+                cursor.execute(
+                    f'CREATE TABLE {_qn(connection, f"{name}_h{remainder}")} PARTITION OF '
+                    f'{_qn(connection, name)} FOR VALUES WITH (MODULUS {hash_modulus}, REMAINDER {remainder})'
+                )
+
+        default = f'{table}_{DEFAULT_SUFFIX}'
+        cursor.execute('SELECT to_regclass(%s)', [default])
+        if cursor.fetchone()[0] is not None:
+            cursor.execute(
+                f'WITH moved AS (DELETE FROM {_qn(connection, default)} '
+                f'WHERE {_qn(connection, range_column)} >= %s AND {_qn(connection, range_column)} < %s '
+                f'RETURNING *) INSERT INTO {_qn(connection, name)} SELECT * FROM moved',
+                [start, end],
+            )
+        cursor.execute(
+            f'ALTER TABLE {_qn(connection, table)} ATTACH PARTITION {_qn(connection, name)} '
+            f'{_bound_clause(year)}'
+        )
+    return True
+
+
+def ensure_year_partitions(model, years, connection=None):
+    """Create the partitions of ``years`` for a model declaring ``partitioning``."""
+    connection = connection or default_connection
+    spec = model.partitioning
+    range_column, hash_column = spec.columns(model)
+    return [
+        year for year in years
+        if create_year_partition(
+            connection, model._meta.db_table, range_column, year, hash_column, spec.hash_modulus,
+        )
+    ]
+
+
+def detach_year_partition(model, year, tablespace=None, connection=None):
+    """
+    Detach the partition of ``year``; it stays as a standalone table
+    (``<table>_y<year>``) that can be archived, moved or re-attached.
+    With ``tablespace``, its data files are moved there (e.g. cheaper disks).
+    """
+    connection = connection or default_connection
+    table = model._meta.db_table
+    name = year_partition_name(table, year)
+    with connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE {_qn(connection, table)} DETACH PARTITION {_qn(connection, name)}')
+        if tablespace:
+            cursor.execute(
+                'SELECT relid::regclass::text FROM pg_partition_tree(%s::regclass)', [name],
+            )
+            for (relation,) in cursor.fetchall():
+                cursor.execute(
+                    f'ALTER TABLE {relation} SET TABLESPACE {_qn(connection, tablespace)}'
+                )
+    return name
+
+
+def attach_year_partition(model, year, connection=None):
+    """Re-attach a partition previously detached with ``detach_year_partition``."""
+    connection = connection or default_connection
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'ALTER TABLE {_qn(connection, table)} ATTACH PARTITION '
+            f'{_qn(connection, year_partition_name(table, year))} {_bound_clause(year)}'
+        )
+
+
+def partitioned_models():
+    from django.apps import apps
+
+    return [model for model in apps.get_models() if getattr(model, 'partitioning', None)]
+
+
+def _rebuild_table(schema_editor, table, partition_clause, primary_key, create_partitions):
+    """
+    Recreate ``table`` with the same columns, constraint names and index
+    definitions, optionally partitioned, and copy its rows over. Tables
+    referencing it must not have database-level foreign keys.
+    """
+    connection = schema_editor.connection
+    quoted = _qn(connection, table)
+    old = f'{table}__old'
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype IN ('p', 'f', 'c', 'u')",
+            [table],
+        )
+        constraints = cursor.fetchall()
+        cursor.execute(
+            'SELECT indexdef FROM pg_indexes WHERE tablename = %s AND indexname <> ALL(%s)',
+            [table, [name for name, _, _ in constraints]],
+        )
+        indexes = [row[0] for row in cursor.fetchall()]
+
+    schema_editor.execute(f'ALTER TABLE {quoted} RENAME TO {_qn(connection, old)}')
+    schema_editor.execute(
+        f'CREATE TABLE {quoted} (LIKE {_qn(connection, old)} INCLUDING DEFAULTS){partition_clause}'
+    )
+    create_partitions()
+    schema_editor.execute(f'INSERT INTO {quoted} SELECT * FROM {_qn(connection, old)}')
+    schema_editor.execute(f'DROP TABLE {_qn(connection, old)}')
+
+    for name, kind, definition in constraints:
+        if kind == 'p':
+            definition = f'PRIMARY KEY ({", ".join(_qn(connection, c) for c in primary_key)})'
+        schema_editor.execute(f'ALTER TABLE {quoted} ADD CONSTRAINT {_qn(connection, name)} {definition}')
+    for definition in indexes:
+        # Indexes read from a partitioned parent are declared ON ONLY
+        schema_editor.execute(definition.replace(' ON ONLY ', ' ON ', 1))
+
+
+class PartitionByYear(Operation):
+    """
+    Convert a model's table to yearly range partitions, optionally hash
+    sub-partitioned. Partitions are created for every year with data plus the
+    current and next year. The table is rewritten under an exclusive lock, so
+    run it in a maintenance window on large databases.
+    """
+    reversible = True
+    reduces_to_sql = False
+
+    def __init__(self, model_name, range_field, hash_field=None, hash_modulus=4):
+        self.model_name = model_name
+        self.range_field = range_field
+        self.hash_field = hash_field
+        self.hash_modulus = hash_modulus
+
+    def deconstruct(self):
+        kwargs = {'model_name': self.model_name, 'range_field': self.range_field}
+        if self.hash_field:
+            kwargs['hash_field'] = self.hash_field
+            kwargs['hash_modulus'] = self.hash_modulus
+        return self.__class__.__name__, [], kwargs
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        connection = schema_editor.connection
+        model = to_state.apps.get_model(app_label, self.model_name)
+        table = model._meta.db_table
+        if connection.vendor != 'postgresql' or is_partitioned(connection, table):
+            return
+        spec = YearPartitioning(self.range_field, self.hash_field, self.hash_modulus)
+        range_column, hash_column = spec.columns(model)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT EXTRACT(YEAR FROM MIN({_qn(connection, range_column)}) AT TIME ZONE \'UTC\')::int, '
+                f'EXTRACT(YEAR FROM MAX({_qn(connection, range_column)}) AT TIME ZONE \'UTC\')::int '
+                f'FROM {_qn(connection, table)}'
+            )
+            first, last = cursor.fetchone()
+        this_year = datetime.now(dt_timezone.utc).year
+        years = range(min(first or this_year, this_year), max(last or this_year, this_year + 1) + 1)
+
+        def create_partitions():
+            for year in years:
+                create_year_partition(connection, table, range_column, year, hash_column, self.hash_modulus)
+            schema_editor.execute(
+                f'CREATE TABLE {_qn(connection, f"{table}_{DEFAULT_SUFFIX}")} '
+                f'PARTITION OF {_qn(connection, table)} DEFAULT'
+            )
+
+        primary_key = [model._meta.pk.column, range_column] + ([hash_column] if hash_column else [])
+        _rebuild_table(
+            schema_editor, table, f' PARTITION BY RANGE ({_qn(connection, range_column)})',
+            primary_key, create_partitions,
+        )
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        connection = schema_editor.connection
+        model = from_state.apps.get_model(app_label, self.model_name)
+        table = model._meta.db_table
+        if connection.vendor != 'postgresql' or not is_partitioned(connection, table):
+            return
+        _rebuild_table(schema_editor, table, '', [model._meta.pk.column], lambda: None)
+
+    def describe(self):
+        by = f'year of {self.range_field}'
+        if self.hash_field:
+            by += f' and hash of {self.hash_field}'
+        return f'Partition {self.model_name} by {by}'
+
+    @property
+    def migration_name_fragment(self):
+        return f'partition_{self.model_name.lower()}'
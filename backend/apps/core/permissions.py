@@ -0,0 +1,20 @@
+"""
+Permission classes for operational endpoints.
+"""
+from django.conf import settings
+from django.utils.crypto import constant_time_compare
+from rest_framework.permissions import BasePermission
+
+
+class IsStaffOrMetricsToken(BasePermission):
+    """
+    Allow staff users, or scrapers presenting ``X-Metrics-Token`` matching
+    the METRICS_TOKEN setting.
+    """
+
+    def has_permission(self, request, view):
+        token = getattr(settings, 'METRICS_TOKEN', '')
+        provided = request.headers.get('X-Metrics-Token', '')
+        if token and provided and constant_time_compare(provided, token):
+            return True
+        return bool(request.user and request.user.is_authenticated and request.user.is_staff)
@@ -0,0 +1,60 @@
+"""
+Fast JSON renderer for the REST API.
+
+Uses orjson when it is installed and falls back to DRF's stdlib renderer
+otherwise. Decimals are rendered according to ``settings.JSON_DECIMAL_MODE``:
+``'string'`` (exact, the default) or ``'number'``. The same setting drives
+DRF's ``COERCE_DECIMAL_TO_STRING``, so serializer fields and raw Decimals
+returned from aggregate endpoints come out the same way.
+"""
+import decimal
+
+from django.conf import settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+def decimal_mode():
+    return getattr(settings, 'JSON_DECIMAL_MODE', 'string')
+
+
+class DecimalAwareJSONEncoder(JSONEncoder):
+    """DRF's encoder with Decimal output controlled by JSON_DECIMAL_MODE."""
+
+    def default(self, obj):
+        if isinstance(obj, decimal.Decimal):
+            return str(obj) if decimal_mode() == 'string' else float(obj)
+        return super().default(obj)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Drop-in replacement for ``rest_framework.renderers.JSONRenderer``.
+
+    orjson natively handles UUIDs, datetimes and dicts/lists; anything else
+    (Decimal, lazy strings, querysets, ...) goes through
+    ``DecimalAwareJSONEncoder.default``.
+    """
+    encoder_class = DecimalAwareJSONEncoder
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        renderer_context = renderer_context or {}
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+        if self.get_indent(accepted_media_type, renderer_context):
+            option |= orjson.OPT_INDENT_2
+
+        try:
+            return orjson.dumps(data, default=self.encoder_class().default, option=option)
+        except orjson.JSONEncodeError:
+            # e.g. integers beyond 64 bits; the stdlib encoder copes with those
+            return super().render(data, accepted_media_type, renderer_context)
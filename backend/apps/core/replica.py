@@ -0,0 +1,137 @@
+"""
+Read-replica routing for heavy read endpoints.
+
+With ``DATABASE_REPLICA_URL`` configured, view handlers decorated with
+``@read_replica`` run their queries against the ``replica`` database; all
+other reads and every write stay on ``default``::
+
+    @action(detail=False, methods=['get'])
+    @read_replica
+    def summary(self, request):
+        ...
+
+Authentication and winery resolution happen in ``initial()``, before the
+handler, so they always use the primary.
+
+Read-your-writes: ``ReplicaPinMiddleware`` marks the client after every
+successful write with a short-lived cookie and an ``X-DB-Primary-Until``
+response header (a Unix timestamp). While either is present on a request
+and not yet expired, decorated views read from the primary instead.
+Browsers send the cookie automatically; other clients (cellar tablets)
+echo the header.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_DB_ALIAS = 'replica'
+PIN_COOKIE = 'db_primary_until'
+PIN_HEADER = 'X-DB-Primary-Until'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_use_replica = ContextVar('use_replica', default=False)
+
+
+def replica_configured():
+    return REPLICA_DB_ALIAS in connections.databases
+
+
+@contextmanager
+def use_replica():
+    """Route reads in this block to the replica (when one is configured)."""
+    token = _use_replica.set(True)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Send reads to the replica inside ``use_replica()``, everything else to
+    the primary. Instances loaded from the replica are saved to the primary,
+    and related lookups made from them outside the block read the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if _use_replica.get() and replica_configured():
+            return REPLICA_DB_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return {obj1._state.db, obj2._state.db} <= {DEFAULT_DB_ALIAS, REPLICA_DB_ALIAS}
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica is a physical copy of the primary
+        return db != REPLICA_DB_ALIAS
+
+
+def primary_pinned(request):
+    """True while the client is inside its read-your-writes window."""
+    value = request.COOKIES.get(PIN_COOKIE) or request.headers.get(PIN_HEADER)
+    try:
+        return float(value) > time.time()
+    except (TypeError, ValueError):
+        return False
+
+
+def read_replica(handler):
+    """
+    Run a view handler (``get``, ``list``, an ``@action``...) on the replica
+    unless the client recently wrote. Place it below ``@action``.
+
+    Responses read from the replica carry no ETag (see ``ConditionalGetMixin``):
+    the change versions may already include writes the replica has not
+    replayed yet.
+    """
+    @wraps(handler)
+    def wrapper(view, request, *args, **kwargs):
+        if not replica_configured() or primary_pinned(request):
+            return handler(view, request, *args, **kwargs)
+        request._read_from_replica = True
+        with use_replica():
+            return handler(view, request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaPinMiddleware:
+    """
+    Pin clients to the primary for ``REPLICA_PIN_SECONDS`` after a successful
+    write. Views that only read via POST (e.g. the batch endpoint) opt out
+    with ``pins_primary = False``.
+    """
+
+    def __init__(self, get_response):
+        if not replica_configured():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.pin_seconds = settings.REPLICA_PIN_SECONDS
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and getattr(request, '_pins_primary', True)
+        ):
+            until = f'{time.time() + self.pin_seconds:.3f}'
+            response.set_cookie(
+                PIN_COOKIE, until, max_age=self.pin_seconds,
+                httponly=True, samesite='Lax', secure=request.is_secure(),
+            )
+            response[PIN_HEADER] = until
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+        request._pins_primary = getattr(view_class, 'pins_primary', True)
+        return None
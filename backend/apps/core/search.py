@@ -0,0 +1,111 @@
+"""
+Global quick search across cellar entities, backed by pg_trgm.
+
+Searchable columns carry a GIN trigram index on ``UPPER(column)``::
+
+    class Meta:
+        indexes = [
+            ...
+            *trigram_indexes('tank', 'code', 'name'),
+        ]
+
+The index serves both the quick search below and the ``icontains`` lookups
+that DRF's ``SearchFilter`` compiles to (``UPPER(col) LIKE UPPER('%x%')``),
+so the list endpoints' ``?search=`` stops scanning the table too.
+
+A row matches when the term is a substring of one of its columns or when
+the term is trigram-similar to a word of it (typos, transposed digits);
+results are ranked by ``word_similarity``. Each entity type is a separate
+query, so every one of them can use its indexes; the ``winery_id`` filter
+is combined with the trigram bitmap.
+"""
+from dataclasses import dataclass
+
+from django.apps import apps
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import Cast, Greatest, Upper
+
+MIN_QUERY_LENGTH = 2
+
+
+def trigram_indexes(prefix, *fields):
+    """GIN trigram indexes on ``UPPER(field)``, named ``<prefix>_<field>_trgm``."""
+    return [
+        GinIndex(OpClass(Upper(field), name='gin_trgm_ops'), name=f'{prefix}_{field}_trgm')
+        for field in fields
+    ]
+
+
+@dataclass(frozen=True)
+class Searchable:
+    """An entity type of the quick search."""
+    type: str
+    model: str
+    fields: tuple
+    title: str
+    subtitle: str = None
+
+    def get_model(self):
+        return apps.get_model(self.model)
+
+
+SEARCHABLES = (
+    Searchable('tank', 'equipment.Tank', ('code', 'name'), 'code', 'name'),
+    Searchable('batch', 'harvest.Batch', ('batch_code',), 'batch_code', 'harvest_season__name'),
+    Searchable('wine_lot', 'production.WineLot', ('lot_code', 'name'), 'lot_code', 'name'),
+    Searchable('material', 'inventory.Material', ('name', 'code', 'supplier'), 'name', 'supplier'),
+    Searchable('grower', 'master_data.Grower', ('name',), 'name', 'contact_name'),
+)
+SEARCH_TYPES = tuple(searchable.type for searchable in SEARCHABLES)
+
+
+def _search_one(searchable, winery, term, limit):
+    model = searchable.get_model()
+    upper = {f'_search_{field}': Upper(field) for field in searchable.fields}
+    match = Q()
+    for name in upper:
+        match |= Q(**{f'{name}__contains': term}) | Q(**{f'{name}__trigram_word_similar': term})
+
+    scores = [TrigramWordSimilarity(Value(term), F(name)) for name in upper]
+    score = Greatest(*scores) if len(scores) > 1 else scores[0]
+    values = ['id', searchable.title, 'score']
+    if searchable.subtitle:
+        values.append(searchable.subtitle)
+
+    rows = (
+        model.objects
+        .filter(winery=winery)
+        .alias(**upper)
+        .filter(match)
+        .annotate(score=Cast(score, FloatField()))
+        .order_by('-score', searchable.title)
+        .values(*values)[:limit]
+    )
+    return [
+        {
+            'type': searchable.type,
+            'id': row['id'],
+            'title': row[searchable.title],
+            'subtitle': row.get(searchable.subtitle) or '',
+            'score': round(row['score'], 3),
+        }
+        for row in rows
+    ]
+
+
+def quick_search(winery, query, types=None, limit=5):
+    """
+    Search ``winery``'s entities for ``query``; at most ``limit`` hits per
+    type, all of them ordered by score. ``types`` restricts the entity types
+    (default: all of ``SEARCH_TYPES``).
+    """
+    term = query.strip().upper()
+    results = []
+    for searchable in SEARCHABLES:
+        if types and searchable.type not in types:
+            continue
+        results.extend(_search_one(searchable, winery, term, limit))
+    results.sort(key=lambda hit: -hit['score'])
+    return results
@@ -0,0 +1,136 @@
+"""
+Sparse fieldsets for API serializers.
+
+    GET /api/v1/production/transfers/?fields=id,transfer_date,volume_l
+    GET /api/v1/production/transfers/?fields=id,source_tank&expand=source_tank
+
+``?fields=`` limits the output to the listed fields. ``?expand=`` replaces a
+related primary key with the nested serializer declared for it in
+``Meta.expandable_fields``. Without either parameter the output is unchanged;
+names the serializer does not have are rejected with a 400.
+
+Views using ``SparseFieldsetViewMixin`` (``apps.core.mixins``) rebuild
+``select_related``/``prefetch_related`` from the fields actually rendered.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.utils.module_loading import import_string
+from rest_framework import serializers
+
+
+FIELDS_QUERY_PARAM = 'fields'
+EXPAND_QUERY_PARAM = 'expand'
+
+
+def get_query_list(request, param):
+    """Return the comma separated values of query ``param`` as a set."""
+    if request is None:
+        return set()
+    value = request.query_params.get(param, '')
+    return {item.strip() for item in value.split(',') if item.strip()}
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin honouring ``?fields=`` and ``?expand=`` on GET requests.
+
+    Only the top-level serializer is trimmed; nested serializers render as
+    declared. ``Meta.expandable_fields`` maps field names to serializer
+    classes (or dotted paths, to avoid circular imports).
+    ``Meta.field_lookups`` maps SerializerMethodFields and properties to the
+    relations they read, since those cannot be inferred from ``source``.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is None or request.method != 'GET' or not self._is_top_level():
+            return fields
+
+        expandable = getattr(self.Meta, 'expandable_fields', {})
+        expand = get_query_list(request, EXPAND_QUERY_PARAM)
+        _reject_unknown(EXPAND_QUERY_PARAM, expand - set(expandable))
+        for name in expand:
+            serializer_class = expandable[name]
+            if isinstance(serializer_class, str):
+                serializer_class = import_string(serializer_class)
+            source = getattr(fields.get(name), 'source', None)
+            kwargs = {'source': source} if source and source != name else {}
+            fields[name] = serializer_class(read_only=True, **kwargs)
+
+        requested = get_query_list(request, FIELDS_QUERY_PARAM)
+        if requested:
+            _reject_unknown(FIELDS_QUERY_PARAM, requested - set(fields))
+            keep = requested | expand
+            for name in list(fields):
+                if name not in keep:
+                    fields.pop(name)
+        return fields
+
+    def _is_top_level(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def get_related_lookups(self):
+        """
+        Return ``(select_related, prefetch_related)`` lookups needed to render
+        the current set of fields without per-row queries.
+        """
+        select, prefetch = set(), set()
+        _collect_lookups(self, self.Meta.model, '', False, select, prefetch)
+        return sorted(select), sorted(prefetch)
+
+
+def _reject_unknown(param, names):
+    if names:
+        raise serializers.ValidationError({param: f"Unknown field(s): {', '.join(sorted(names))}."})
+
+
+def _collect_lookups(serializer, model, prefix, in_prefetch, select, prefetch):
+    hints = getattr(getattr(serializer, 'Meta', None), 'field_lookups', {})
+
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if name in hints:
+            for hint in hints[name]:
+                path, _, many = _resolve_relations(model, hint.split('__'), in_prefetch)
+                if path:
+                    (prefetch if many else select).add(prefix + '__'.join(path))
+            continue
+        if field.source == '*':
+            continue
+        # A bare foreign key renders from the local ``<name>_id`` column
+        if isinstance(field, serializers.PrimaryKeyRelatedField) and len(field.source_attrs) == 1:
+            continue
+
+        path, related_model, many = _resolve_relations(model, field.source_attrs, in_prefetch)
+        if not path:
+            continue
+
+        lookup = prefix + '__'.join(path)
+        (prefetch if many else select).add(lookup)
+
+        child = field.child if isinstance(field, serializers.ListSerializer) else field
+        if isinstance(child, serializers.ModelSerializer) and len(path) == len(field.source_attrs):
+            _collect_lookups(child, related_model, lookup + '__', many, select, prefetch)
+
+
+def _resolve_relations(model, attrs, many=False):
+    """
+    Follow ``attrs`` through model relations. Returns the relation path, the
+    model it ends on and whether it crosses a to-many relation.
+    """
+    path = []
+    for attr in attrs:
+        try:
+            model_field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            break
+        if not model_field.is_relation or model_field.related_model is None:
+            break
+        path.append(attr)
+        many = many or model_field.many_to_many or model_field.one_to_many
+        model = model_field.related_model
+    return path, model, many
@@ -0,0 +1,57 @@
+"""
+Test helpers for enforcing per-endpoint query budgets.
+
+Usage:
+    class MaterialApiTests(QueryBudgetTestMixin, APITestCase):
+        def setUp(self):
+            self.client.force_authenticate(self.user)
+            self.client.credentials(HTTP_X_WINERY_ID=str(self.winery.id))
+
+        def test_list_budget(self):
+            self.assertQueryBudget('get', '/api/v1/inventory/materials/')
+"""
+from urllib.parse import urlsplit
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+
+from .metrics import get_query_budget, resolve_view_key
+
+
+class QueryBudgetTestMixin:
+    """
+    TestCase mixin asserting that a request stays within the ``query_budget``
+    declared on the view that serves it.
+
+    Counts every query issued during the request (authentication, winery
+    lookup, view and serialization), which matches what the instrumentation
+    middleware measures in production.
+    """
+
+    def assertQueryBudget(self, method, url, data=None, budget=None, **extra):
+        """
+        Perform ``method`` on ``url`` with ``self.client`` and fail if the
+        number of queries exceeds the view's declared budget.
+
+        Pass ``budget`` to override the declared value. Returns the response.
+        """
+        match = resolve(urlsplit(url).path)
+        view_key, view_class, action = resolve_view_key(match.func, method)
+
+        if budget is None:
+            budget = get_query_budget(view_class, action) if view_class else None
+        if budget is None:
+            self.fail(f'{view_key} does not declare a query budget')
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = getattr(self.client, method.lower())(url, data, **extra)
+
+        if len(ctx) > budget:
+            queries = '\n'.join(
+                f'{i}. {query["sql"]}' for i, query in enumerate(ctx.captured_queries, start=1)
+            )
+            self.fail(
+                f'{view_key} executed {len(ctx)} queries, budget is {budget}:\n{queries}'
+            )
+        return response
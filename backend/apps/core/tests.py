@@ -0,0 +1,860 @@
+import hashlib
+import io
+import json
+import uuid
+import re
+import time
+from contextlib import nullcontext
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import mock
+
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.migrations.loader import MigrationLoader
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.exceptions import ParseError
+from rest_framework.test import APITestCase
+
+from apps.equipment.models import Barrel, Tank
+from apps.inventory.models import Addition, Material, MaterialMovement
+from apps.lab.models import Analysis
+from apps.ledger.models import TankLedger
+from apps.master_data.models import GrapeVariety
+from apps.production.models import Transfer
+from apps.wineries.models import Winery, WineryMembership
+from apps.work_orders.models import WorkOrder, WorkOrderLine
+from .batch import _cache_key
+from .enums import collect_enums, get_enums_document
+from .parsers import FastJSONParser
+from .partitioning import is_partitioned, list_partitions
+from .renderers import FastJSONRenderer
+from .replica import (
+    PIN_COOKIE, PIN_HEADER, REPLICA_DB_ALIAS, ReplicaRouter, read_replica, use_replica,
+)
+from .testing import QueryBudgetTestMixin
+
+
+class QueryBudgetTests(QueryBudgetTestMixin, APITestCase):
+    """
+    Budgeted endpoints stay within their declared query budget. Every list
+    has more rows than any budget, so a per-row query shows up as a failure.
+    """
+
+    ROWS = 25
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.winery = Winery.objects.create(name='Budget', code='BUDGET')
+        cls.user = get_user_model().objects.create_user(
+            email='owner@budget.test', password='x', full_name='Budget Owner',
+        )
+        WineryMembership.objects.create(user=cls.user, winery=cls.winery, role='WINERY_OWNER')
+
+        now = timezone.now()
+        cls.tanks = [
+            Tank.objects.create(
+                winery=cls.winery, code=f'T{i:02}', capacity_l=10000, current_volume_l=Decimal(1000 + i),
+                status='IN_USE',
+            )
+            for i in range(cls.ROWS)
+        ]
+        cls.barrels = [
+            Barrel.objects.create(winery=cls.winery, code=f'B{i:02}', volume_l=225, current_volume_l=Decimal(200))
+            for i in range(cls.ROWS)
+        ]
+        cls.materials = []
+        for i in range(cls.ROWS):
+            material = Material.objects.create(
+                winery=cls.winery, name=f'Material {i:02}', code=f'M{i:02}', category='ADDITIVE', unit='g',
+                low_stock_threshold=Decimal('500'),
+            )
+            # Every other material ends below its threshold
+            MaterialMovement.objects.create(
+                material=material, movement_type='PURCHASE', quantity=Decimal(1000 if i % 2 else 400),
+                location='MAIN_STORAGE', movement_date=now - timedelta(days=30), unit_cost=Decimal('2'),
+            )
+            cls.materials.append(material)
+        for i, tank in enumerate(cls.tanks):
+            Addition.objects.create(
+                winery=cls.winery, material=cls.materials[i], quantity=Decimal('5'), tank=tank,
+                addition_date=now - timedelta(days=i % 7),
+            )
+            Analysis.objects.create(
+                winery=cls.winery, tank=tank, ph=Decimal('3.5'), free_so2_mgl=Decimal('10'), va_gl=Decimal('0.8'),
+                analysis_date=now - timedelta(days=1),
+            )
+        # Bulk inserts: no ledger or volume signals
+        Transfer.objects.bulk_create([
+            Transfer(
+                winery=cls.winery, transfer_date=now - timedelta(hours=i), destination_tank=tank,
+                volume_l=Decimal('100'), performed_by=cls.user,
+            )
+            for i, tank in enumerate(cls.tanks)
+        ])
+        lines = []
+        for i in range(cls.ROWS):
+            order = WorkOrder.objects.create(
+                winery=cls.winery, code=f'WO-{i:02}', assigned_to=cls.user, created_by=cls.user,
+                due_date=now.date(),
+            )
+            lines += [
+                WorkOrderLine(winery=cls.winery, work_order=order, line_no=1, status='COMPLETED'),
+                WorkOrderLine(winery=cls.winery, work_order=order, line_no=2),
+            ]
+        WorkOrderLine.objects.bulk_create(lines)
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+        self.client.credentials(HTTP_X_WINERY_ID=str(self.winery.id))
+
+    def test_material_list(self):
+        response = self.assertQueryBudget('get', '/api/v1/inventory/materials/', {'page_size': 100})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), self.ROWS)
+
+    def test_material_low_stock(self):
+        response = self.assertQueryBudget('get', '/api/v1/inventory/materials/low_stock/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), (self.ROWS + 1) // 2)
+
+    def test_material_forecast(self):
+        response = self.assertQueryBudget('get', '/api/v1/inventory/materials/forecast/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_addition_list(self):
+        response = self.assertQueryBudget('get', '/api/v1/inventory/additions/', {'page_size': 100})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), self.ROWS)
+
+    def test_addition_summary(self):
+        response = self.assertQueryBudget('get', '/api/v1/inventory/additions/summary/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_addition_bulk(self):
+        material = self.materials[1]
+        data = {
+            'material': str(material.id),
+            'dosage_rate': '1',
+            'rate_unit': 'g/hL',
+            'tanks': [str(tank.id) for tank in self.tanks],
+            'barrels': [str(barrel.id) for barrel in self.barrels],
+            'addition_date': timezone.now().isoformat(),
+        }
+        response = self.assertQueryBudget('post', '/api/v1/inventory/additions/bulk/', data, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(
+            Addition.objects.filter(material=material).count(), 2 * self.ROWS + 1,
+        )
+
+    def test_tank_list(self):
+        response = self.assertQueryBudget('get', '/api/v1/equipment/tanks/', {'page_size': 100})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), self.ROWS)
+
+    def test_transfer_list(self):
+        response = self.assertQueryBudget('get', '/api/v1/production/transfers/', {'page_size': 100})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), self.ROWS)
+        self.assertEqual({row['performed_by_name'] for row in response.data['results']}, {'Budget Owner'})
+
+    def test_work_order_list(self):
+        response = self.assertQueryBudget('get', '/api/v1/work-orders/', {'page_size': 100})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), self.ROWS)
+        self.assertEqual(
+            {(row['lines_count'], row['lines_completed'], row['progress_percentage']) for row in response.data['results']},
+            {(2, 1, 50)},
+        )
+
+    def test_work_order_summary(self):
+        response = self.assertQueryBudget('get', '/api/v1/work-orders/summary/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total'], self.ROWS)
+        self.assertEqual(response.data['due_today'], self.ROWS)
+
+    def test_dashboard(self):
+        response = self.assertQueryBudget('get', '/api/v1/wineries/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['stats']['tanks']['total'], self.ROWS)
+        self.assertEqual(len(response.data['top_tanks']), 6)
+
+
+class SparseFieldsetTests(APITestCase):
+    """``?fields=`` trims output and joins, ``?expand=`` nests without per-row queries."""
+
+    URL = '/api/v1/lab/analyses/'
+
+    def setUp(self):
+        self.winery = Winery.objects.create(name='Sparse', code='SPARSE')
+        user = get_user_model().objects.create_user(email='owner@sparse.test', password='x')
+        WineryMembership.objects.create(user=user, winery=self.winery, role='WINERY_OWNER')
+        self.client.force_authenticate(user)
+        self.client.credentials(HTTP_X_WINERY_ID=str(self.winery.id))
+        self._add_analyses(5)
+
+    def _add_analyses(self, count):
+        start = Tank.objects.filter(winery=self.winery).count()
+        for i in range(start, start + count):
+            tank = Tank.objects.create(winery=self.winery, code=f'S{i:02}', capacity_l=1000)
+            Analysis.objects.create(winery=self.winery, tank=tank, ph=Decimal('3.4'))
+
+    def _list(self, **params):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.URL, params)
+        self.assertEqual(response.status_code, 200, response.data)
+        analyses = [query['sql'] for query in ctx.captured_queries if 'FROM "lab_analysis"' in query['sql']]
+        return response.data['results'], len(ctx), analyses[-1]
+
+    def test_fields_trim_output_and_joins(self):
+        rows, _, sql = self._list()
+        self.assertIn('source_display', rows[0])
+        self.assertIn('JOIN', sql)
+
+        rows, _, sql = self._list(fields='id,ph')
+        self.assertEqual({tuple(row) for row in rows}, {('id', 'ph')})
+        self.assertNotIn('JOIN', sql)
+
+        # Only the relations the kept fields read are joined
+        _, _, sql = self._list(fields='id,analyzed_by_name')
+        self.assertIn('JOIN "users"', sql)
+        self.assertNotIn('"equipment_tank"', sql)
+
+    def test_expand_nests_without_per_row_queries(self):
+        rows, queries, sql = self._list(fields='id', expand='tank')
+        self.assertEqual(set(rows[0]), {'id', 'tank'})
+        self.assertEqual(rows[0]['tank']['code'], 'S04')
+        self.assertIn('"equipment_tank"', sql)
+
+        self._add_analyses(10)
+        rows, more_queries, _ = self._list(fields='id', expand='tank')
+        self.assertEqual(len(rows), 15)
+        self.assertEqual(more_queries, queries)
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get(self.URL, {'fields': 'id,nope'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'fields': 'Unknown field(s): nope.'})
+
+        response = self.client.get(self.URL, {'expand': 'wine_lot'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('expand', response.data)
+
+
+class BatchTests(APITestCase):
+    """Sub-requests of /api/v1/batch/ stay inside the caller's user and winery."""
+
+    URL = '/api/v1/batch/'
+    VARIETIES = '/api/v1/master-data/varieties/'
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.winery = Winery.objects.create(name='Batch A', code='BATCH-A')
+        cls.other = Winery.objects.create(name='Batch B', code='BATCH-B')
+        cls.owner = User.objects.create_user(email='owner@batch.test', password='x')
+        cls.staff = User.objects.create_user(email='staff@batch.test', password='x')
+        WineryMembership.objects.create(user=cls.owner, winery=cls.winery, role='WINERY_OWNER')
+        WineryMembership.objects.create(user=cls.owner, winery=cls.other, role='WINERY_OWNER')
+        WineryMembership.objects.create(user=cls.staff, winery=cls.winery, role='CELLAR_STAFF')
+        cls.variety = GrapeVariety.objects.create(winery=cls.winery, name='Merlot')
+        cls.foreign = GrapeVariety.objects.create(winery=cls.other, name='Syrah')
+
+    def setUp(self):
+        cache.clear()
+
+    def _batch(self, user, winery, requests):
+        self.client.force_authenticate(user)
+        return self.client.post(
+            self.URL, {'requests': requests}, format='json', HTTP_X_WINERY_ID=str(winery.id),
+        )
+
+    def _poison(self, user, winery, path):
+        """Replace the cached body for ``path`` so a replay of it is recognizable."""
+        key = _cache_key(SimpleNamespace(winery=winery, user=user), path, '')
+        entry = cache.get(key)
+        self.assertIsNotNone(entry)
+        cache.set(key, {**entry, 'body': 'cached'})
+
+    def test_sub_requests_cannot_reach_another_winery(self):
+        stranger = get_user_model().objects.create_user(email='stranger@batch.test', password='x')
+        WineryMembership.objects.create(user=stranger, winery=self.other, role='WINERY_OWNER')
+
+        response = self._batch(stranger, self.other, [
+            {'id': 'list', 'url': 'master-data/varieties/'},
+            {'id': 'foreign', 'url': f'master-data/varieties/{self.variety.id}/'},
+        ])
+        self.assertEqual(response.status_code, 200)
+        listed, foreign = response.data['responses']
+        self.assertEqual([row['name'] for row in listed['body']['results']], ['Syrah'])
+        self.assertEqual(foreign['status'], 404)
+
+        # A winery the caller is not a member of resolves to no winery at all
+        response = self._batch(stranger, self.winery, [{'url': 'master-data/varieties/'}])
+        self.assertEqual(response.data['responses'][0]['status'], 403)
+
+    def test_rejects_non_get_and_oversized_batches(self):
+        response = self._batch(self.owner, self.winery, [{'url': 'master-data/varieties/', 'method': 'POST'}])
+        self.assertEqual(response.status_code, 400)
+
+        with override_settings(BATCH_MAX_REQUESTS=2):
+            response = self._batch(self.owner, self.winery, [{'url': 'master-data/varieties/'}] * 3)
+        self.assertEqual(response.status_code, 400)
+
+        response = self._batch(self.owner, self.winery, [{'url': 'batch/'}, {'url': '/admin/'}])
+        self.assertEqual([result['status'] for result in response.data['responses']], [400, 400])
+
+    def test_cached_bodies_are_not_shared_across_users_or_wineries(self):
+        requests = [{'url': 'master-data/varieties/'}]
+        self._batch(self.owner, self.winery, requests)
+        self._poison(self.owner, self.winery, self.VARIETIES)
+
+        response = self._batch(self.staff, self.winery, requests)
+        self.assertEqual(response.data['responses'][0]['body']['results'][0]['name'], 'Merlot')
+
+        response = self._batch(self.owner, self.other, requests)
+        self.assertEqual(response.data['responses'][0]['body']['results'][0]['name'], 'Syrah')
+
+        response = self._batch(self.owner, self.winery, requests)
+        self.assertEqual(response.data['responses'][0]['body'], 'cached')
+
+    def test_not_modified_replays_the_cached_body(self):
+        response = self._batch(self.owner, self.winery, [{'url': 'master-data/varieties/'}])
+        first = response.data['responses'][0]
+        self.assertEqual(first['status'], 200)
+        self._poison(self.owner, self.winery, self.VARIETIES)
+
+        response = self._batch(self.owner, self.winery, [
+            {'id': 'revalidate', 'url': 'master-data/varieties/', 'if_none_match': first['etag']},
+            {'id': 'replay', 'url': 'master-data/varieties/'},
+        ])
+        revalidate, replay = response.data['responses']
+        self.assertEqual((revalidate['status'], revalidate['body']), (304, None))
+        self.assertEqual((replay['status'], replay['body'], replay['etag']), (200, 'cached', first['etag']))
+
+
+class ConditionalGetTests(APITestCase):
+    """ETags come from per-winery change versions that move when writes commit."""
+
+    URL = '/api/v1/master-data/varieties/'
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.winery = Winery.objects.create(name='ETag A', code='ETAG-A')
+        cls.other = Winery.objects.create(name='ETag B', code='ETAG-B')
+        cls.owner = User.objects.create_user(email='owner@etag.test', password='x')
+        cls.staff = User.objects.create_user(email='staff@etag.test', password='x')
+        WineryMembership.objects.create(user=cls.owner, winery=cls.winery, role='WINERY_OWNER')
+        WineryMembership.objects.create(user=cls.owner, winery=cls.other, role='WINERY_OWNER')
+        WineryMembership.objects.create(user=cls.staff, winery=cls.winery, role='CELLAR_STAFF')
+        GrapeVariety.objects.create(winery=cls.winery, name='Merlot')
+
+    def setUp(self):
+        cache.clear()
+
+    def _get(self, url=None, user=None, winery=None, **extra):
+        self.client.force_authenticate(user or self.owner)
+        return self.client.get(url or self.URL, HTTP_X_WINERY_ID=str((winery or self.winery).id), **extra)
+
+    def test_matching_if_none_match_gets_304(self):
+        etag = self._get()['ETag']
+        response = self._get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(self._get(HTTP_IF_NONE_MATCH='"stale"').status_code, 200)
+
+    def test_etag_changes_once_a_write_commits(self):
+        etag = self._get()['ETag']
+        with self.captureOnCommitCallbacks() as callbacks:
+            GrapeVariety.objects.create(winery=self.winery, name='Syrah')
+            # Not committed yet: clients keep their copy
+            self.assertEqual(self._get()['ETag'], etag)
+        for callback in callbacks:
+            callback()
+
+        response = self._get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+        # A write in another winery leaves this winery's ETag alone
+        etag = response['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            GrapeVariety.objects.create(winery=self.other, name='Grenache')
+        self.assertEqual(self._get()['ETag'], etag)
+
+    def test_etags_differ_per_winery_and_role(self):
+        owner = self._get()['ETag']
+        self.assertNotEqual(self._get(winery=self.other)['ETag'], owner)
+        self.assertNotEqual(self._get(user=self.staff)['ETag'], owner)
+        self.assertEqual(self._get(user=self.staff, HTTP_IF_NONE_MATCH=owner).status_code, 200)
+
+    def test_replica_reads_carry_no_etag(self):
+        url = '/api/v1/ledger/composition/'
+        self.assertIn('ETag', self._get(url))
+        # Pretend a replica is configured; the reads still go to the test database
+        with mock.patch('apps.core.replica.replica_configured', return_value=True), \
+                mock.patch('apps.core.replica.use_replica', nullcontext):
+            response = self._get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+
+
+class ReplicaRoutingTests(APITestCase):
+    """Decorated reads use the replica unless the client just wrote; writes always use the primary."""
+
+    databases = '__all__'
+    URL = '/api/v1/ledger/composition/'
+    VARIETIES = '/api/v1/master-data/varieties/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.winery = Winery.objects.create(name='Replica', code='REPLICA')
+        cls.owner = get_user_model().objects.create_user(email='owner@replica.test', password='x')
+        WineryMembership.objects.create(user=cls.owner, winery=cls.winery, role='WINERY_OWNER')
+        cls.tank = Tank.objects.create(winery=cls.winery, code='R1', capacity_l=1000)
+
+    def setUp(self):
+        # The replica alias DATABASE_REPLICA_URL configures (a test mirror of
+        # default), served by the test connection so it sees this test's rows
+        replica = {**connections[DEFAULT_DB_ALIAS].settings_dict, 'TEST': {'MIRROR': DEFAULT_DB_ALIAS}}
+        patcher = mock.patch.dict(connections.settings, {REPLICA_DB_ALIAS: replica})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        connections[REPLICA_DB_ALIAS] = connections[DEFAULT_DB_ALIAS]
+        self.addCleanup(connections.__delitem__, REPLICA_DB_ALIAS)
+
+        cache.clear()
+        self.client.force_authenticate(self.owner)
+        self.client.credentials(HTTP_X_WINERY_ID=str(self.winery.id))
+
+    def _read_from_replica(self, **extra):
+        response = self.client.get(self.URL, **extra)
+        self.assertEqual(response.status_code, 200)
+        # Replica reads are sent without an ETag (see ConditionalGetMixin)
+        return 'ETag' not in response
+
+    def test_router_sends_reads_inside_use_replica_to_the_replica(self):
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_read(Tank), DEFAULT_DB_ALIAS)
+        with use_replica():
+            self.assertEqual(router.db_for_read(Tank), REPLICA_DB_ALIAS)
+            self.assertEqual(router.db_for_write(Tank), DEFAULT_DB_ALIAS)
+            self.assertEqual(Tank.objects.get(pk=self.tank.pk)._state.db, REPLICA_DB_ALIAS)
+            with mock.patch('apps.core.replica.replica_configured', return_value=False):
+                self.assertEqual(router.db_for_read(Tank), DEFAULT_DB_ALIAS)
+        self.assertEqual(Tank.objects.get(pk=self.tank.pk)._state.db, DEFAULT_DB_ALIAS)
+        self.assertFalse(router.allow_migrate(REPLICA_DB_ALIAS, 'equipment'))
+
+    def test_writes_inside_a_decorated_handler_go_to_the_primary(self):
+        test = self
+
+        class View:
+            @read_replica
+            def get(self, request):
+                tank = Tank.objects.get(pk=test.tank.pk)
+                read_from = tank._state.db
+                tank.name = 'Renamed'
+                tank.save()
+                created = Tank.objects.create(winery=test.winery, code='R2', capacity_l=500)
+                return read_from, tank._state.db, created._state.db
+
+        request = RequestFactory().get('/')
+        self.assertEqual(View().get(request), (REPLICA_DB_ALIAS, DEFAULT_DB_ALIAS, DEFAULT_DB_ALIAS))
+        self.assertTrue(request._read_from_replica)
+        self.assertEqual(Tank.objects.get(pk=self.tank.pk).name, 'Renamed')
+
+        # A pinned client reads from the primary too
+        Tank.objects.filter(code='R2').delete()
+        request = RequestFactory().get('/', HTTP_X_DB_PRIMARY_UNTIL=f'{time.time() + 60:.3f}')
+        self.assertEqual(View().get(request)[0], DEFAULT_DB_ALIAS)
+        self.assertFalse(hasattr(request, '_read_from_replica'))
+
+    def test_successful_writes_pin_the_client_to_the_primary(self):
+        self.assertTrue(self._read_from_replica())
+
+        response = self.client.post(self.VARIETIES, {'name': 'Merlot'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        until = float(response[PIN_HEADER])
+        self.assertAlmostEqual(until, time.time() + settings.REPLICA_PIN_SECONDS, delta=5)
+        self.assertEqual(response.cookies[PIN_COOKIE].value, response[PIN_HEADER])
+
+        # The client sends the cookie back and reads its own write from the primary
+        self.assertFalse(self._read_from_replica())
+
+    def test_pin_header_is_honoured_until_it_expires(self):
+        self.assertFalse(self._read_from_replica(HTTP_X_DB_PRIMARY_UNTIL=f'{time.time() + 60:.3f}'))
+        self.assertTrue(self._read_from_replica(HTTP_X_DB_PRIMARY_UNTIL=f'{time.time() - 1:.3f}'))
+        self.assertTrue(self._read_from_replica(HTTP_X_DB_PRIMARY_UNTIL='soon'))
+
+    def test_reads_failed_writes_and_batches_do_not_pin(self):
+        self.assertNotIn(PIN_HEADER, self.client.get(self.VARIETIES))
+
+        response = self.client.post(self.VARIETIES, {}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn(PIN_HEADER, response)
+
+        response = self.client.post('/api/v1/batch/', {'requests': [{'id': 'v', 'url': self.VARIETIES}]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(PIN_HEADER, response)
+
+        self.assertNotIn(PIN_COOKIE, self.client.cookies)
+        self.assertTrue(self._read_from_replica())
+
+
+class SearchTests(APITestCase):
+    """Quick search is scoped to the winery, tolerates typos and validates its parameters."""
+
+    URL = '/api/v1/search/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.winery = Winery.objects.create(name='Search', code='SEARCH')
+        cls.other = Winery.objects.create(name='Search B', code='SEARCH-B')
+        cls.user = get_user_model().objects.create_user(email='owner@search.test', password='x')
+        WineryMembership.objects.create(user=cls.user, winery=cls.winery, role='WINERY_OWNER')
+        cls.tank = Tank.objects.create(winery=cls.winery, code='T-01', name='Fermenter', capacity_l=1000)
+        Tank.objects.create(winery=cls.other, code='T-01', name='Fermenter', capacity_l=1000)
+        cls.sulfite = Material.objects.create(
+            winery=cls.winery, name='Potassium Metabisulfite', code='KMBS', category='ADDITIVE',
+            unit='g', supplier='Enartis',
+        )
+        cls.bisulfite = Material.objects.create(
+            winery=cls.winery, name='Ammonium Bisulfite Solution', code='AMBS', category='ADDITIVE', unit='ml',
+        )
+        cls.percent = Material.objects.create(
+            winery=cls.winery, name='Tartaric Acid 100%', code='TA_100', category='ACID', unit='kg',
+        )
+        Material.objects.create(winery=cls.winery, name='Tartaric Acid 1000', code='TA-1000', category='ACID', unit='kg')
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+        self.client.credentials(HTTP_X_WINERY_ID=str(self.winery.id))
+
+    def _search(self, **params):
+        response = self.client.get(self.URL, params)
+        self.assertEqual(response.status_code, 200)
+        return response.data['results']
+
+    def test_results_are_scoped_to_the_winery(self):
+        results = self._search(q='T-01', types='tank')
+        self.assertEqual([(hit['id'], hit['title'], hit['subtitle']) for hit in results], [(self.tank.id, 'T-01', 'Fermenter')])
+
+    def test_typos_match_and_rank_below_exact_words(self):
+        results = self._search(q='metabisulfit', types='material')
+        self.assertEqual(results[0]['id'], self.sulfite.id)
+        self.assertEqual(results[0]['subtitle'], 'Enartis')
+
+        # An exact word scores 1; a misspelt one still finds it, with a lower score
+        exact = self._search(q='bisulfite', types='material')
+        self.assertEqual(exact[0]['id'], self.bisulfite.id)
+        self.assertEqual(exact[0]['score'], 1)
+        typo = self._search(q='bisulfte', types='material')
+        self.assertEqual(typo[0]['id'], self.bisulfite.id)
+        self.assertLess(typo[0]['score'], 1)
+        self.assertEqual(typo, sorted(typo, key=lambda hit: -hit['score']))
+
+    def test_substrings_match_case_insensitively(self):
+        results = self._search(q='sulfite', types='material')
+        self.assertEqual({hit['id'] for hit in results}, {self.sulfite.id, self.bisulfite.id})
+        self.assertEqual(self._search(q='ferment', types='tank')[0]['id'], self.tank.id)
+
+    def test_like_wildcards_are_literal(self):
+        # Unescaped, either would match every row
+        self.assertEqual(self._search(q='%%'), [])
+        self.assertEqual(self._search(q='__'), [])
+        self.assertEqual(self._search(q='100%', types='material')[0]['id'], self.percent.id)
+        self.assertEqual(self._search(q='TA_1', types='material')[0]['id'], self.percent.id)
+
+    def test_types_restrict_the_entity_types(self):
+        self.assertEqual({hit['type'] for hit in self._search(q='T-01')}, {'tank'})
+        self.assertEqual(self._search(q='T-01', types='material,grower'), [])
+
+        response = self.client.get(self.URL, {'q': 'T-01', 'types': 'tank,vessel'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('vessel', response.data['error'])
+
+    def test_limit_is_validated_and_clamped(self):
+        self.assertEqual(len(self._search(q='acid', types='material', limit=1)), 1)
+        self.assertEqual(len(self._search(q='acid', types='material', limit=0)), 1)
+        self.assertEqual(len(self._search(q='acid', types='material', limit=500)), 2)
+        self.assertEqual(self.client.get(self.URL, {'q': 'acid', 'limit': 'abc'}).status_code, 400)
+
+    def test_short_queries_are_rejected(self):
+        self.assertEqual(self.client.get(self.URL, {'q': ' T '}).status_code, 400)
+        self.assertEqual(self.client.get(self.URL).status_code, 400)
+
+
+class EnumsTests(APITestCase):
+    """The enums document is public, cached under its content hash and built without the database."""
+
+    URL = '/api/v1/enums/'
+
+    def test_document_collects_the_choices_of_the_local_apps(self):
+        enums = collect_enums()
+        self.assertEqual(list(enums), sorted(enums))
+        self.assertIn('inventory.MaterialCategory', enums)
+        # Choices declared inside a model carry its name
+        self.assertIn('lab.Analysis.SampleType', enums)
+        self.assertIn({'value': 'RACK', 'label': 'Racking'}, enums['production.TransferActionType'])
+        local = {config.label for config in django_apps.get_app_configs() if config.name.startswith('apps.')}
+        self.assertEqual({key.split('.')[0] for key in enums} - local, set())
+
+    def test_version_is_a_stable_hash_of_the_document(self):
+        version, body = get_enums_document()
+        self.assertEqual(version, hashlib.sha256(body).hexdigest()[:16])
+        self.assertEqual(json.loads(body), collect_enums())
+
+        get_enums_document.cache_clear()
+        self.assertEqual(get_enums_document(), (version, body))
+
+    def test_index_names_the_current_version(self):
+        version, _ = get_enums_document()
+        with self.assertNumQueries(0):
+            response = self.client.get(self.URL, HTTP_AUTHORIZATION='Bearer not-a-token')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'version': version, 'url': f'{self.URL}{version}/'})
+        self.assertEqual(response['ETag'], f'"{version}"')
+        self.assertEqual(response['Cache-Control'], 'public, no-cache')
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.URL, HTTP_IF_NONE_MATCH=f'"{version}"')
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.client.get(self.URL, HTTP_IF_NONE_MATCH='"stale"').status_code, 200)
+
+    def test_document_is_cached_forever_under_its_version(self):
+        version, body = get_enums_document()
+        with self.assertNumQueries(0):
+            response = self.client.get(f'{self.URL}{version}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, body)
+        self.assertEqual(response['ETag'], f'"{version}"')
+        self.assertEqual(
+            sorted(response['Cache-Control'].split(', ')), ['immutable', 'max-age=31536000', 'public'],
+        )
+
+    def test_stale_versions_redirect_to_the_current_one(self):
+        version, _ = get_enums_document()
+        with self.assertNumQueries(0):
+            response = self.client.get(f'{self.URL}0123456789abcdef/')
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response['Location'], f'{self.URL}{version}/')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+
+
+class JSONRenderingTests(TestCase):
+    """Decimals follow JSON_DECIMAL_MODE on every path; orjson failures fall back to the stdlib."""
+
+    class AmountSerializer(serializers.Serializer):
+        amount = serializers.DecimalField(max_digits=6, decimal_places=2)
+
+    def _render(self, data):
+        return json.loads(FastJSONRenderer().render(data))
+
+    def _number_mode(self):
+        rest_framework = {**settings.REST_FRAMEWORK, 'COERCE_DECIMAL_TO_STRING': False}
+        return override_settings(JSON_DECIMAL_MODE='number', REST_FRAMEWORK=rest_framework)
+
+    def test_decimals_are_strings_by_default(self):
+        self.assertEqual(self._render({'total': Decimal('12.50')}), {'total': '12.50'})
+        self.assertEqual(self._render(self.AmountSerializer({'amount': Decimal('3.5')}).data), {'amount': '3.50'})
+
+    def test_number_mode_renders_decimals_as_numbers(self):
+        with self._number_mode():
+            self.assertEqual(self._render({'total': Decimal('12.50')}), {'total': 12.5})
+            self.assertEqual(self._render(self.AmountSerializer({'amount': Decimal('3.5')}).data), {'amount': 3.5})
+
+    def test_stdlib_fallback_renders_the_same(self):
+        data = {'id': uuid.uuid4(), 'total': Decimal('12.50'), 'at': timezone.now(), 'rows': [1, None]}
+        rendered = self._render(data)
+        with mock.patch('apps.core.renderers.orjson', None):
+            self.assertEqual(self._render(data), rendered)
+            with self._number_mode():
+                self.assertEqual(self._render({'total': Decimal('12.50')}), {'total': 12.5})
+
+    def test_integers_beyond_64_bits_fall_back_to_the_stdlib(self):
+        self.assertEqual(FastJSONRenderer().render({'n': 2 ** 70}), b'{"n":1180591620717411303424}')
+
+    def test_malformed_json_is_a_parse_error(self):
+        parser = FastJSONParser()
+        self.assertEqual(parser.parse(io.BytesIO(b'{"volume_l": "10.5"}')), {'volume_l': '10.5'})
+        with self.assertRaises(ParseError):
+            parser.parse(io.BytesIO(b'{"volume_l": '))
+        with mock.patch('apps.core.parsers.orjson', None), self.assertRaises(ParseError):
+            parser.parse(io.BytesIO(b'{"volume_l": '), parser_context={})
+
+
+class PartitionMigrationTests(TestCase):
+    """
+    The partitioning migrations convert populated tables both ways. Runs the
+    migrations' operations directly inside the test transaction, so the
+    schema changes are rolled back afterwards.
+    """
+
+    # In the order they are applied
+    MIGRATIONS = [
+        ('ledger', '0003_partition_tankledger'),
+        ('work_orders', '0004_executed_transfer_without_db_constraint'),
+        ('production', '0004_partition_transfer'),
+    ]
+    YEARS = (2021, 2022, 2023, 2024)
+    TABLES = {
+        TankLedger._meta.db_table: ['id', 'event_datetime', 'winery_id'],
+        Transfer._meta.db_table: ['id', 'transfer_date', 'winery_id'],
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.wineries = [Winery.objects.create(name=f'Vintage {i}', code=f'VINT-{i}') for i in range(3)]
+        transfers, entries, lines = [], [], []
+        for winery in cls.wineries:
+            tank = Tank.objects.create(winery=winery, code='T1', capacity_l=10000)
+            order = WorkOrder.objects.create(winery=winery, code=f'WO-{winery.code}')
+            for year in cls.YEARS:
+                for month in (1, 6, 12):
+                    moment = datetime(year, month, 15, 12, tzinfo=dt_timezone.utc)
+                    transfer = Transfer(
+                        winery=winery, transfer_date=moment, destination_tank=tank, volume_l=Decimal('100'),
+                    )
+                    transfers.append(transfer)
+                    entries.append(TankLedger(
+                        winery=winery, transfer=transfer, tank=tank, event_datetime=moment,
+                        delta_volume_l=Decimal('100'), composition_key_type='UNKNOWN',
+                    ))
+                    lines.append(WorkOrderLine(
+                        winery=winery, work_order=order, line_no=len(lines) + 1, executed_transfer=transfer,
+                    ))
+        # Bulk inserts: no ledger or volume signals
+        Transfer.objects.bulk_create(transfers)
+        TankLedger.objects.bulk_create(entries)
+        WorkOrderLine.objects.bulk_create(lines)
+        cls.rows = len(transfers)
+
+    def _migrate(self, backwards=False):
+        loader = MigrationLoader(connection)
+        migrations = self.MIGRATIONS[::-1] if backwards else self.MIGRATIONS
+        with connection.cursor() as cursor:
+            # Fire the deferred FK checks of the fixture rows; a table with pending ones cannot be dropped
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+        with connection.schema_editor() as schema_editor:
+            for key in migrations:
+                migration = loader.get_migration(*key)
+                if backwards:
+                    migration.unapply(loader.project_state(key, at_end=True), schema_editor)
+                else:
+                    migration.apply(loader.project_state(key, at_end=False), schema_editor)
+
+    def _primary_key(self, table):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT attribute.attname
+                FROM pg_constraint con
+                JOIN LATERAL unnest(con.conkey) WITH ORDINALITY AS key(attnum, position) ON TRUE
+                JOIN pg_attribute attribute
+                    ON attribute.attrelid = con.conrelid AND attribute.attnum = key.attnum
+                WHERE con.conrelid = %s::regclass AND con.contype = 'p'
+                ORDER BY key.position
+                """,
+                [table],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def _explain(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN {sql}', params)
+            return '\n'.join(row[0] for row in cursor.fetchall())
+
+    def _assert_rows_and_joins(self):
+        self.assertEqual(Transfer.objects.count(), self.rows)
+        self.assertEqual(TankLedger.objects.count(), self.rows)
+        winery = self.wineries[1]
+        self.assertEqual(
+            TankLedger.objects.filter(
+                winery=winery, transfer__transfer_date__year=2022, transfer__winery=winery,
+            ).count(),
+            3,
+        )
+        self.assertEqual(
+            WorkOrderLine.objects.filter(
+                executed_transfer__winery=winery, executed_transfer__transfer_date__year=2023,
+            ).count(),
+            3,
+        )
+        line = WorkOrderLine.objects.select_related('executed_transfer').filter(winery=winery).first()
+        self.assertEqual(line.executed_transfer.winery_id, winery.pk)
+
+    def test_migrations_round_trip(self):
+        for table, primary_key in self.TABLES.items():
+            self.assertTrue(is_partitioned(connection, table))
+            self.assertEqual(self._primary_key(table), primary_key)
+
+        self._migrate(backwards=True)
+        for table in self.TABLES:
+            self.assertFalse(is_partitioned(connection, table))
+            self.assertEqual(self._primary_key(table), ['id'])
+        self._assert_rows_and_joins()
+
+        self._migrate()
+        for table, primary_key in self.TABLES.items():
+            self.assertTrue(is_partitioned(connection, table))
+            self.assertEqual(self._primary_key(table), primary_key)
+            partitions = [name for name, *_ in list_partitions(connection, table)]
+            for year in self.YEARS:
+                self.assertIn(f'{table}_y{year}', partitions)
+        self._assert_rows_and_joins()
+
+        # A winery and year filter reads one hash partition of one year
+        winery = self.wineries[2]
+        plan = self._explain(Transfer.objects.filter(
+            winery=winery,
+            transfer_date__gte=datetime(2023, 1, 1, tzinfo=dt_timezone.utc),
+            transfer_date__lt=datetime(2024, 1, 1, tzinfo=dt_timezone.utc),
+        ))
+        scanned = set(re.findall(r'on (production_transfer_\w+)', plan))
+        self.assertEqual(len(scanned), 1, plan)
+        self.assertTrue(scanned.pop().startswith('production_transfer_y2023_h'), plan)
+
+
+class LoadDataTests(TestCase):
+    """Generated tenants come with the derived tables the write path would have filled."""
+
+    def test_derived_inventory_tables_are_populated(self):
+        from apps.inventory.models import AdditionDailyRollup, AdditionMonthlyRollup, LowStockAlert
+        from .load_data import SCALE_PRESETS, LoadDataGenerator
+
+        with self.captureOnCommitCallbacks(execute=True):
+            winery, = LoadDataGenerator(seed=7, scale=SCALE_PRESETS['tiny'], code_prefix='TEST').generate()
+        materials = Material.objects.filter(winery=winery).with_stock()
+
+        # The alerts match what the signal path would have raised
+        low = {material.pk for material in materials if material.current_stock < material.low_stock_threshold}
+        self.assertTrue(low)
+        alerts = LowStockAlert.objects.filter(winery=winery, cleared_at__isnull=True)
+        self.assertEqual(set(alerts.values_list('material_id', flat=True)), low)
+        for material in materials:
+            LowStockAlert.sync(material)
+        self.assertEqual(set(alerts.values_list('material_id', flat=True)), low)
+
+        # Every movement is costed
+        movements = MaterialMovement.objects.filter(material__winery=winery)
+        self.assertTrue(movements.exists())
+        self.assertFalse(movements.filter(balance_quantity__isnull=True).exists())
+
+        # The rollups add up to the additions
+        additions = Addition.objects.filter(winery=winery)
+        expected = (additions.count(), sum(additions.values_list('quantity', flat=True)))
+        for model in (AdditionDailyRollup, AdditionMonthlyRollup):
+            rows = model.objects.filter(winery=winery)
+            self.assertEqual(
+                (sum(rows.values_list('addition_count', flat=True)), sum(rows.values_list('total_quantity', flat=True))),
+                expected,
+            )
@@ -0,0 +1,14 @@
+"""
+URL configuration for core infrastructure endpoints.
+"""
+from django.urls import path
+
+from .views import BatchView, EnumsIndexView, EnumsView, MetricsView, SearchView
+
+urlpatterns = [
+    path('metrics/', MetricsView.as_view(), name='metrics'),
+    path('batch/', BatchView.as_view(), name='batch'),
+    path('search/', SearchView.as_view(), name='search'),
+    path('enums/', EnumsIndexView.as_view(), name='enums'),
+    path('enums/<str:version>/', EnumsView.as_view(), name='enums-detail'),
+]
@@ -0,0 +1,120 @@
+"""
+Per-winery change versions for conditional GETs.
+
+Every tracked model has a version counter per winery (or a ``global`` one
+for models without a winery, e.g. TankMaterial). Counters live in the cache
+and are bumped by post_save/post_delete signals once the transaction
+commits. Views combine the counters of the resources they render into an
+ETag, which lets them answer ``If-None-Match`` with 304 before running the
+main query. See ``ConditionalGetMixin`` in ``apps.core.mixins``.
+
+Apps register their models in ``AppConfig.ready()``::
+
+    track_versions(Tank, Barrel, Equipment)
+    track_versions(MaterialStock, winery_attr='material.winery_id')
+"""
+import hashlib
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+GLOBAL_SCOPE = 'global'
+KEY_PREFIX = 'resver'
+
+
+def _key(scope, resource):
+    return f'{KEY_PREFIX}:{scope}:{resource}'
+
+
+def _seed():
+    # Counters start from the clock so a cache flush never reissues an old version
+    return time.time_ns() // 1000
+
+
+def bump_version(scope, resource):
+    """Increment the version of ``resource`` for ``scope`` (a winery id or 'global')."""
+    key = _key(scope, resource)
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, _seed(), timeout=None):
+            cache.incr(key)
+
+
+def get_versions(scope, resources):
+    """
+    Return ``{resource: (scope version, global version)}``. Missing counters
+    are seeded so subsequent ETags stay stable until the next change.
+    """
+    keys = {}
+    for resource in resources:
+        keys[_key(scope, resource)] = (resource, 0)
+        keys[_key(GLOBAL_SCOPE, resource)] = (resource, 1)
+
+    found = cache.get_many(list(keys))
+    missing = {key: _seed() for key in keys if key not in found}
+    for key, value in missing.items():
+        if not cache.add(key, value, timeout=None):
+            value = cache.get(key, value)
+        found[key] = value
+
+    versions = {resource: [0, 0] for resource in resources}
+    for key, (resource, slot) in keys.items():
+        versions[resource][slot] = found[key]
+    return {resource: tuple(pair) for resource, pair in versions.items()}
+
+
+def compute_etag(request, resources):
+    """
+    Build a strong ETag from the change versions of ``resources`` for the
+    request's winery, plus everything else the response depends on (path and
+    query, winery role, negotiated format and deploy salt).
+    """
+    winery = getattr(request, 'winery', None)
+    scope = str(winery.id) if winery else GLOBAL_SCOPE
+    versions = get_versions(scope, sorted(resources))
+
+    parts = [
+        request.get_full_path(),
+        scope,
+        str(getattr(request, 'winery_role', '') or ''),
+        request.headers.get('Accept', ''),
+        getattr(settings, 'JSON_DECIMAL_MODE', ''),
+        getattr(settings, 'ETAG_SALT', ''),
+        repr(sorted(versions.items())),
+    ]
+    digest = hashlib.blake2b('|'.join(parts).encode(), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def _resolve_winery_id(instance, winery_attr):
+    value = instance
+    for attr in winery_attr.split('.'):
+        value = getattr(value, attr, None)
+        if value is None:
+            return None
+    return value
+
+
+def _on_change(sender, instance, resource, winery_attr, **kwargs):
+    winery_id = _resolve_winery_id(instance, winery_attr)
+    scope = str(winery_id) if winery_id else GLOBAL_SCOPE
+    transaction.on_commit(partial(bump_version, scope, resource), using=kwargs.get('using'))
+
+
+def resource_name(model):
+    """Resource name used for a model's version counter, e.g. 'equipment.tank'."""
+    return model._meta.label_lower
+
+
+def track_versions(*models, winery_attr='winery_id'):
+    """Bump the change version of each model on save and delete."""
+    for model in models:
+        receiver = partial(_on_change, resource=resource_name(model), winery_attr=winery_attr)
+        uid = f'track_versions:{resource_name(model)}'
+        post_save.connect(receiver, sender=model, weak=False, dispatch_uid=uid)
+        post_delete.connect(receiver, sender=model, weak=False, dispatch_uid=uid)
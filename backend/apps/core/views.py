@@ -0,0 +1,176 @@
+"""
+API views for core infrastructure endpoints.
+"""
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified, HttpResponseRedirect, JsonResponse
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+from rest_framework import status
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.wineries.mixins import WineryContextMixin, WineryRequiredMixin
+from .batch import run_batch
+from .enums import get_enums_document
+from .metrics import registry
+from .permissions import IsStaffOrMetricsToken
+from .replica import read_replica
+from .search import MIN_QUERY_LENGTH, SEARCH_TYPES, quick_search
+
+
+class MetricsView(APIView):
+    """
+    Prometheus-style metrics for this worker process.
+
+    GET /api/v1/metrics/
+    """
+    permission_classes = [IsStaffOrMetricsToken]
+
+    def get(self, request):
+        return HttpResponse(
+            registry.render(),
+            content_type='text/plain; version=0.0.4; charset=utf-8',
+        )
+
+
+class BatchView(WineryContextMixin, APIView):
+    """
+    Run several GET requests in one round trip, under a single
+    authentication and winery resolution.
+
+    POST /api/v1/batch/
+        {"requests": [
+            {"id": "tanks", "url": "equipment/tanks/dropdown/"},
+            {"id": "varieties", "url": "/api/v1/master-data/varieties/?is_active=true",
+             "if_none_match": "\"<etag from a previous batch>\""}
+        ]}
+
+    Returns ``{"responses": [{"id", "status", "etag", "body"}, ...]}`` in
+    request order. A sub-request whose ``if_none_match`` still matches gets
+    status 304 and no body.
+    """
+    permission_classes = [IsAuthenticated]
+    pins_primary = False  # Read-only despite POST (see apps.core.replica)
+
+    def post(self, request):
+        items = request.data.get('requests') if isinstance(request.data, dict) else None
+        if not isinstance(items, list) or not items:
+            return Response(
+                {'error': 'requests must be a non-empty list'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(items) > settings.BATCH_MAX_REQUESTS:
+            return Response(
+                {'error': f'At most {settings.BATCH_MAX_REQUESTS} requests per batch'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        for item in items:
+            if not isinstance(item, dict) or not isinstance(item.get('url'), str):
+                return Response(
+                    {'error': 'Each request needs a url'},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            if str(item.get('method', 'GET')).upper() != 'GET':
+                return Response(
+                    {'error': 'Only GET requests can be batched'},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        return Response({'responses': run_batch(request, items)})
+
+
+# One year: the URL changes whenever the content does
+ENUMS_MAX_AGE = 365 * 24 * 60 * 60
+
+
+class EnumsIndexView(APIView):
+    """
+    Current version of the enums document. Public, no database access.
+
+    GET /api/v1/enums/  ->  {"version": "<hash>", "url": "/api/v1/enums/<hash>/"}
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        version, _ = get_enums_document()
+        etag = f'"{version}"'
+        if request.headers.get('If-None-Match') == etag:
+            response = HttpResponseNotModified()
+        else:
+            response = JsonResponse({
+                'version': version,
+                'url': reverse('enums-detail', args=[version]),
+            })
+        response['ETag'] = etag
+        patch_cache_control(response, public=True, no_cache=True)
+        return response
+
+
+class EnumsView(APIView):
+    """
+    All TextChoices of the API as ``{key: [{value, label}, ...]}``, cached
+    forever under its content hash. Outdated versions redirect to the
+    current one.
+
+    GET /api/v1/enums/{version}/
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request, version):
+        current, body = get_enums_document()
+        if version != current:
+            response = HttpResponseRedirect(reverse('enums-detail', args=[current]))
+            patch_cache_control(response, no_cache=True)
+            return response
+
+        response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = f'"{current}"'
+        patch_cache_control(response, public=True, max_age=ENUMS_MAX_AGE, immutable=True)
+        return response
+
+
+# Hits per entity type
+SEARCH_DEFAULT_LIMIT = 5
+SEARCH_MAX_LIMIT = 20
+
+
+class SearchView(WineryRequiredMixin, APIView):
+    """
+    Quick search across tanks, batches, wine lots, materials and growers of
+    the current winery, ranked by trigram similarity (see apps.core.search).
+
+    GET /api/v1/search/?q=merlo
+    GET /api/v1/search/?q=T-01&types=tank,batch&limit=10
+
+    Returns ``{"results": [{"type", "id", "title", "subtitle", "score"}, ...]}``
+    with at most ``limit`` hits per type.
+    """
+    permission_classes = [IsAuthenticated]
+
+    @read_replica
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if len(query) < MIN_QUERY_LENGTH:
+            return Response(
+                {'error': f'q must be at least {MIN_QUERY_LENGTH} characters'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        types = [t for t in request.query_params.get('types', '').split(',') if t]
+        unknown = sorted(set(types) - set(SEARCH_TYPES))
+        if unknown:
+            return Response(
+                {'error': f'Unknown types: {", ".join(unknown)}. Available: {", ".join(SEARCH_TYPES)}'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            limit = int(request.query_params.get('limit', SEARCH_DEFAULT_LIMIT))
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, SEARCH_MAX_LIMIT))
+
+        return Response({'results': quick_search(request.winery, query, types, limit)})
@@ -5,13 +5,18 @@ class EquipmentConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.equipment'
     verbose_name = 'Equipment'
-
-
-
-
-
-
-
-
-
-
+    
+    def ready(self):
+        # Change versions for conditional GETs
+        from apps.core.versioning import track_versions
+        from .models import Tank, Barrel, Equipment
+        
+        track_versions(Tank, Barrel, Equipment)
+        
+        # Delta sync for cellar tablets
+        from apps.sync.registry import register_sync
+        from .serializers import TankSerializer, BarrelSerializer, EquipmentSerializer
+        
+        register_sync('tanks', Tank, TankSerializer, select_related=['material'])
+        register_sync('barrels', Barrel, BarrelSerializer, select_related=['wood_type'])
+        register_sync('equipment', Equipment, EquipmentSerializer)
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0002_convert_to_fk'),
+        ('master_data', '0007_remove_vineyardblock_area_ha_and_more'),
+        ('wineries', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='barrel',
+            index=models.Index(fields=['winery', 'updated_at'], name='equipment_b_winery__222888_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(fields=['winery', 'updated_at'], name='equipment_e_winery__555618_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tank',
+            index=models.Index(fields=['winery', 'updated_at'], name='equipment_t_winery__bd0e88_idx'),
+        ),
+    ]
@@ -7,6 +7,8 @@ import uuid
 from django.db import models
 from django.core.validators import MinValueValidator
 
+from apps.core.search import trigram_indexes
+
 
 class Tank(models.Model):
     """
@@ -73,6 +75,10 @@ class Tank(models.Model):
         verbose_name_plural = 'Tanks'
         ordering = ['code']
         unique_together = ['winery', 'code']
+        indexes = [
+            models.Index(fields=['winery', 'updated_at']),
+            *trigram_indexes('tank', 'code', 'name'),
+        ]
     
     def __str__(self):
         return f"{self.code} - {self.name}" if self.name else self.code
@@ -162,6 +168,9 @@ class Barrel(models.Model):
         verbose_name_plural = 'Barrels'
         ordering = ['code']
         unique_together = ['winery', 'code']
+        indexes = [
+            models.Index(fields=['winery', 'updated_at']),
+        ]
     
     def __str__(self):
         return f"{self.code} ({self.wood_type})"
@@ -229,6 +238,9 @@ class Equipment(models.Model):
         verbose_name_plural = 'Equipment'
         ordering = ['name']
         unique_together = ['winery', 'code']
+        indexes = [
+            models.Index(fields=['winery', 'updated_at']),
+        ]
     
     def __str__(self):
         return f"{self.name} ({self.code})" if self.code else self.name
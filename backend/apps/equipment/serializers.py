@@ -2,6 +2,7 @@
 Serializers for Equipment models.
 """
 from rest_framework import serializers
+from apps.core.serializers import SparseFieldsetMixin
 from .models import Tank, Barrel, Equipment
 
 
@@ -24,7 +25,7 @@ class TankSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class TankListSerializer(serializers.ModelSerializer):
+class TankListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Lightweight serializer for tank lists and dropdowns."""
     fill_percentage = serializers.ReadOnlyField()
     material_name = serializers.CharField(source='material.name', read_only=True, allow_null=True)
@@ -68,7 +69,7 @@ class BarrelSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class BarrelListSerializer(serializers.ModelSerializer):
+class BarrelListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Lightweight serializer for barrel lists."""
     age_years = serializers.ReadOnlyField()
     wood_type_name = serializers.CharField(source='wood_type.name', read_only=True, allow_null=True)
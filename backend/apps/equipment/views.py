@@ -8,6 +8,7 @@ from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Sum, Count, Q
 
+from apps.core.mixins import ConditionalGetMixin, SparseFieldsetViewMixin
 from apps.wineries.mixins import WineryRequiredMixin
 from .models import Tank, Barrel, Equipment
 from .serializers import (
@@ -17,7 +18,7 @@ from .serializers import (
 )
 
 
-class TankViewSet(WineryRequiredMixin, viewsets.ModelViewSet):
+class TankViewSet(ConditionalGetMixin, SparseFieldsetViewMixin, WineryRequiredMixin, viewsets.ModelViewSet):
     """
     API endpoint for managing tanks.
     
@@ -35,6 +36,8 @@ class TankViewSet(WineryRequiredMixin, viewsets.ModelViewSet):
     search_fields = ['code', 'name', 'location']
     ordering_fields = ['code', 'name', 'capacity_l', 'current_volume_l', 'status']
     ordering = ['code']
+    query_budget = {'list': 3, 'retrieve': 2, 'dropdown': 2}
+    etag_resources = ('equipment.tank', 'master_data.tankmaterial')
     
     def get_queryset(self):
         """Filter by current winery."""
@@ -103,7 +106,7 @@ class TankViewSet(WineryRequiredMixin, viewsets.ModelViewSet):
         })
 
 
-class BarrelViewSet(WineryRequiredMixin, viewsets.ModelViewSet):
+class BarrelViewSet(ConditionalGetMixin, SparseFieldsetViewMixin, WineryRequiredMixin, viewsets.ModelViewSet):
     """
     API endpoint for managing barrels.
     
@@ -121,6 +124,8 @@ class BarrelViewSet(WineryRequiredMixin, viewsets.ModelViewSet):
     search_fields = ['code', 'cooper', 'location']
     ordering_fields = ['code', 'wood_type', 'vintage_year', 'use_count']
     ordering = ['code']
+    query_budget = {'list': 3, 'retrieve': 2, 'dropdown': 2}
+    etag_resources = ('equipment.barrel', 'master_data.woodtype')
     
     def get_queryset(self):
         """Filter by current winery."""
@@ -142,7 +147,7 @@ class BarrelViewSet(WineryRequiredMixin, viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def dropdown(self, request):
         """Get compact list for dropdowns - only active barrels."""
-        queryset = self.get_queryset().filter(is_active=True)
+        queryset = self.get_queryset().filter(is_active=True).select_related('wood_type')
         serializer = BarrelDropdownSerializer(queryset, many=True)
         return Response(serializer.data)
     
@@ -185,7 +190,7 @@ class BarrelViewSet(WineryRequiredMixin, viewsets.ModelViewSet):
         })
 
 
-class EquipmentViewSet(WineryRequiredMixin, viewsets.ModelViewSet):
+class EquipmentViewSet(ConditionalGetMixin, WineryRequiredMixin, viewsets.ModelViewSet):
     """
     API endpoint for managing equipment.
     
@@ -203,6 +208,7 @@ class EquipmentViewSet(WineryRequiredMixin, viewsets.ModelViewSet):
     search_fields = ['name', 'code', 'manufacturer', 'model', 'serial_number']
     ordering_fields = ['name', 'code', 'equipment_type', 'status']
     ordering = ['name']
+    etag_resources = ('equipment.equipment',)
     
     def get_queryset(self):
         """Filter by current winery."""
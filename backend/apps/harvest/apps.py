@@ -8,13 +8,21 @@ class HarvestConfig(AppConfig):
     
     def ready(self):
         import apps.harvest.signals  # noqa
-
-
-
-
-
-
-
-
-
-
+        
+        # Change versions for conditional GETs
+        from apps.core.versioning import track_versions
+        from .models import HarvestSeason, Batch, BatchSource
+        
+        track_versions(HarvestSeason, Batch, BatchSource)
+        
+        # Delta sync for cellar tablets (sources are nested in batches)
+        from apps.sync.registry import register_sync, touch_parent_on_change
+        from .serializers import HarvestSeasonSerializer, BatchSerializer
+        
+        register_sync('harvest_seasons', HarvestSeason, HarvestSeasonSerializer)
+        register_sync(
+            'batches', Batch, BatchSerializer,
+            select_related=['harvest_season', 'initial_tank'],
+            prefetch_related=['sources__variety', 'sources__vineyard_block__grower'],
+        )
+        touch_parent_on_change(BatchSource, 'batch')
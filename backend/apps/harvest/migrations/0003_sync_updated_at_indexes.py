@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0003_sync_updated_at_indexes'),
+        ('harvest', '0002_alter_batch_must_volume_l'),
+        ('wineries', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='batch',
+            index=models.Index(fields=['winery', 'updated_at'], name='harvest_bat_winery__92d341_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='harvestseason',
+            index=models.Index(fields=['winery', 'updated_at'], name='harvest_har_winery__e45f2b_idx'),
+        ),
+    ]
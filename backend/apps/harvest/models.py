@@ -9,6 +9,8 @@ from django.db import models
 from django.db.models import Sum
 from django.core.validators import MinValueValidator
 
+from apps.core.search import trigram_indexes
+
 
 class HarvestSeason(models.Model):
     """
@@ -43,6 +45,9 @@ class HarvestSeason(models.Model):
         verbose_name_plural = 'Harvest Seasons'
         ordering = ['-year']
         unique_together = ['winery', 'year']
+        indexes = [
+            models.Index(fields=['winery', 'updated_at']),
+        ]
     
     def __str__(self):
         return self.name or f"Harvest {self.year}"
@@ -143,6 +148,10 @@ class Batch(models.Model):
         verbose_name_plural = 'Batches'
         ordering = ['-intake_date', '-created_at']
         unique_together = ['winery', 'batch_code']
+        indexes = [
+            models.Index(fields=['winery', 'updated_at']),
+            *trigram_indexes('batch', 'batch_code'),
+        ]
     
     def __str__(self):
         return f"{self.batch_code}"
@@ -266,7 +275,7 @@ class BatchSource(models.Model):
         self.batch.grape_weight_kg = self.batch.sources.aggregate(
             total=Sum('weight_kg')
         )['total'] or 0
-        self.batch.save(update_fields=['grape_weight_kg'])
+        self.batch.save(update_fields=['grape_weight_kg', 'updated_at'])
 
 
 
@@ -3,6 +3,7 @@ Serializers for Harvest models.
 """
 from rest_framework import serializers
 from django.db import transaction
+from apps.core.serializers import SparseFieldsetMixin
 from .models import HarvestSeason, Batch, BatchSource
 
 
@@ -112,7 +113,7 @@ class BatchSerializer(serializers.ModelSerializer):
         return variety.name if variety else None
 
 
-class BatchListSerializer(serializers.ModelSerializer):
+class BatchListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Lightweight serializer for batch lists."""
     season_year = serializers.IntegerField(source='harvest_season.year', read_only=True)
     tank_code = serializers.CharField(source='initial_tank.code', read_only=True, allow_null=True)
@@ -126,6 +127,9 @@ class BatchListSerializer(serializers.ModelSerializer):
             'source_type', 'tank_code', 'grape_weight_kg', 'must_volume_l',
             'stage', 'source_count', 'primary_variety_name'
         ]
+        field_lookups = {
+            'source_count': ['sources'],
+        }
     
     def get_primary_variety_name(self, obj):
         variety = obj.primary_variety
@@ -160,7 +164,7 @@ class BatchCreateSerializer(serializers.ModelSerializer):
             total_weight += source.weight_kg
         
         batch.grape_weight_kg = total_weight
-        batch.save(update_fields=['grape_weight_kg'])
+        batch.save(update_fields=['grape_weight_kg', 'updated_at'])
         
         return batch
 
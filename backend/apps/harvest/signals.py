@@ -15,7 +15,7 @@ def update_tank_status_on_batch_create(sender, instance, created, **kwargs):
         tank = instance.initial_tank
         if tank.status == 'EMPTY':
             tank.status = 'IN_USE'
-            tank.save(update_fields=['status'])
+            tank.save(update_fields=['status', 'updated_at'])
 
 
 @receiver(post_save, sender=Batch)
@@ -51,6 +51,6 @@ def create_ledger_entry_on_batch_create(sender, instance, created, **kwargs):
     # Update the tank's current volume
     tank = instance.initial_tank
     tank.current_volume_l += instance.must_volume_l
-    tank.save(update_fields=['current_volume_l'])
+    tank.save(update_fields=['current_volume_l', 'updated_at'])
 
 
@@ -8,6 +8,8 @@ from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Sum, Count
 
+from apps.core.mixins import SparseFieldsetViewMixin
+from apps.core.replica import read_replica
 from apps.wineries.mixins import WineryRequiredMixin
 from .models import HarvestSeason, Batch, BatchSource
 from .serializers import (
@@ -67,7 +69,7 @@ class HarvestSeasonViewSet(WineryRequiredMixin, viewsets.ModelViewSet):
         return Response({'detail': 'No active season found'}, status=404)
 
 
-class BatchViewSet(WineryRequiredMixin, viewsets.ModelViewSet):
+class BatchViewSet(SparseFieldsetViewMixin, WineryRequiredMixin, viewsets.ModelViewSet):
     """
     API endpoint for managing batches.
     
@@ -84,6 +86,7 @@ class BatchViewSet(WineryRequiredMixin, viewsets.ModelViewSet):
     search_fields = ['batch_code', 'notes']
     ordering_fields = ['batch_code', 'intake_date', 'grape_weight_kg', 'stage']
     ordering = ['-intake_date', '-created_at']
+    query_budget = {'list': 4, 'retrieve': 4}
     
     def get_queryset(self):
         winery = getattr(self.request, 'winery', None)
@@ -106,6 +109,7 @@ class BatchViewSet(WineryRequiredMixin, viewsets.ModelViewSet):
         serializer.save()
     
     @action(detail=False, methods=['get'])
+    @read_replica
     def summary(self, request):
         """Get batch summary statistics."""
         queryset = self.get_queryset()
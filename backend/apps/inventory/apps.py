@@ -11,4 +11,13 @@ class InventoryConfig(AppConfig):
             import apps.inventory.signals  # noqa: F401
         except ImportError:
             pass
-
+        
+        # Change versions for conditional GETs
+        from apps.core.versioning import track_versions
+        from .models import Material, MaterialStock, MaterialMovement, Addition
+        
+        track_versions(Material, Addition)
+        track_versions(MaterialStock, MaterialMovement, winery_attr='material.winery_id')
+        
+        # Background jobs
+        from . import jobs  # noqa: F401
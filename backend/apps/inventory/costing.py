@@ -0,0 +1,270 @@
+"""
+Material costing at a running weighted average.
+
+Every movement is valued as it arrives (``record_movement``, called from the
+movement signal):
+
+- priced receipts (a positive movement with ``unit_cost``, normally a
+  purchase) blend their price into the material's average cost;
+- every other change in stock (usage, waste, returns, unpriced receipts) is
+  valued at the current average;
+- transfers between locations leave the total, and so the value, unchanged.
+
+Each movement stores its value change and the balance after it
+(``balance_quantity``, ``balance_unit_cost``), and ``MaterialCost`` holds the
+material's current balance. A backdated movement therefore only replays the
+movements dated after it, starting from the balance of the movement just
+before (``recompute_material``), with one bulk update for the rows whose
+values changed. Edited and deleted movements replay the same way from the
+earlier of their old and new dates.
+
+Additions are costed through the usage movement they book (bulk additions
+share one movement and split its value by quantity), and their cost is
+attributed to batches and wine lots by ``AdditionCostAllocation`` rows: tank
+additions are split by the tank's ledger composition at the addition date.
+"""
+from collections import defaultdict
+from decimal import Decimal
+from functools import partial
+
+from django.db import connection, transaction
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Cast, NullIf
+
+from apps.core.versioning import bump_version, resource_name
+
+from .models import (
+    Addition, AdditionCostAllocation, MaterialCost, MaterialMovement, MovementType,
+)
+
+ZERO = Decimal('0')
+UNIT_COST = Decimal('0.0001')
+VALUE = Decimal('0.0001')
+MONEY = Decimal('0.01')
+SHARE = Decimal('0.00000001')
+
+# Order in which movements are applied
+MOVEMENT_ORDER = ('movement_date', 'created_at', 'id')
+
+
+def stock_delta(movement):
+    """Change of the material's total stock (see MaterialStock.apply_deltas)."""
+    delta = movement.quantity
+    if movement.movement_type == MovementType.TRANSFER and movement.destination_location:
+        delta += abs(movement.quantity)
+    return delta
+
+
+def apply_movement(balance, movement):
+    """
+    Apply ``movement`` to ``balance`` (``(quantity, average cost)``) and
+    return ``(new balance, value change)``; the value is None while the
+    material's cost is unknown.
+    """
+    quantity, average = balance
+    delta = stock_delta(movement)
+    if delta > 0 and movement.unit_cost is not None:
+        # Stock of unknown cost takes the price of the first priced receipt
+        held = max(quantity, ZERO) if average is not None else ZERO
+        average = ((held * (average or ZERO) + delta * movement.unit_cost) / (held + delta)).quantize(UNIT_COST)
+        value = delta * movement.unit_cost
+    elif delta == 0:
+        value = ZERO
+    elif average is not None:
+        value = delta * average
+    else:
+        value = None
+    if value is not None:
+        value = value.quantize(VALUE)
+    return (max(quantity + delta, ZERO), average), value
+
+
+def record_movement(movement):
+    """
+    Cost a newly created movement: incrementally when it is the latest of
+    its material, otherwise by recomputing the material from its date.
+    """
+    with transaction.atomic():
+        cost, created = MaterialCost.objects.select_for_update().get_or_create(
+            material_id=movement.material_id,
+            defaults={'winery_id': movement.material.winery_id},
+        )
+        if created or (cost.costed_through is not None and movement.movement_date < cost.costed_through):
+            # First costed movement of an existing history, or a backdated one
+            since = None if created else movement.movement_date
+            recompute_material(movement.material, since=since, cost=cost)
+            return
+
+        (quantity, average), value = apply_movement((cost.quantity, cost.average_cost), movement)
+        MaterialMovement.objects.filter(pk=movement.pk).update(
+            cost_value=value, balance_quantity=quantity, balance_unit_cost=average,
+        )
+        movement.cost_value, movement.balance_quantity, movement.balance_unit_cost = value, quantity, average
+
+        cost.quantity, cost.average_cost, cost.costed_through = quantity, average, movement.movement_date
+        cost.save(update_fields=['quantity', 'average_cost', 'costed_through', 'updated_at'])
+        if movement.movement_type == MovementType.USAGE:
+            cost_additions(MaterialMovement.objects.filter(pk=movement.pk))
+
+
+def recompute_material(material, since=None, cost=None):
+    """
+    Re-cost ``material``'s movements dated ``since`` or later (all of them
+    when ``since`` is None), starting from the balance of the movement just
+    before. Returns the number of movements whose values changed.
+    """
+    with transaction.atomic():
+        if cost is None:
+            cost, _ = MaterialCost.objects.select_for_update().get_or_create(
+                material_id=material.pk, defaults={'winery_id': material.winery_id},
+            )
+
+        movements = MaterialMovement.objects.filter(material_id=material.pk)
+        balance = (ZERO, None)
+        if since is not None:
+            previous = (
+                movements.filter(movement_date__lt=since)
+                .order_by(*(f'-{field}' for field in MOVEMENT_ORDER))
+                .values_list('balance_quantity', 'balance_unit_cost')
+                .first()
+            )
+            if previous is not None and previous[0] is None:
+                since = None  # Earlier history was never costed: replay everything
+            else:
+                balance = previous or balance
+                movements = movements.filter(movement_date__gte=since)
+
+        changed = []
+        costed_through = cost.costed_through if since is not None else None
+        fields = [
+            'id', 'movement_type', 'quantity', 'destination_location', 'unit_cost', 'movement_date',
+            'cost_value', 'balance_quantity', 'balance_unit_cost',
+        ]
+        for movement in movements.order_by(*MOVEMENT_ORDER).only(*fields).iterator(chunk_size=2000):
+            balance, value = apply_movement(balance, movement)
+            costed = (value, balance[0], balance[1])
+            if (movement.cost_value, movement.balance_quantity, movement.balance_unit_cost) != costed:
+                movement.cost_value, movement.balance_quantity, movement.balance_unit_cost = costed
+                changed.append(movement)
+            costed_through = max(costed_through, movement.movement_date) if costed_through else movement.movement_date
+
+        save_costs(changed)
+        cost.quantity, cost.average_cost = balance
+        cost.costed_through = costed_through
+        cost.save(update_fields=['quantity', 'average_cost', 'costed_through', 'updated_at'])
+        if changed:
+            cost_additions(movements.filter(movement_type=MovementType.USAGE))
+            # Raw and queryset updates send no post_save: bump the change versions ourselves
+            for model in (MaterialMovement, Addition):
+                transaction.on_commit(partial(bump_version, str(material.winery_id), resource_name(model)))
+        return len(changed)
+
+
+def save_costs(movements):
+    """
+    Write the costing columns of ``movements``. One parameterised UPDATE
+    executed for all rows (pipelined by psycopg) rather than ``bulk_update``,
+    whose CASE expressions grow with the batch and dominate full recomputes.
+    """
+    if not movements:
+        return
+    table = connection.ops.quote_name(MaterialMovement._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'UPDATE {table} SET cost_value = %s, balance_quantity = %s, balance_unit_cost = %s WHERE id = %s',
+            [
+                (movement.cost_value, movement.balance_quantity, movement.balance_unit_cost, movement.pk)
+                for movement in movements
+            ],
+        )
+
+
+def recompute_winery(winery, progress=None):
+    """Re-cost every material of ``winery`` from scratch."""
+    from .models import Material
+
+    materials = list(Material.objects.filter(winery=winery).order_by('name'))
+    changed = 0
+    for index, material in enumerate(materials, start=1):
+        changed += recompute_material(material)
+        if progress:
+            progress(index, len(materials), material.name)
+    return {'materials': len(materials), 'movements_changed': changed}
+
+
+def cost_additions(movements):
+    """
+    Price the additions booked by ``movements`` (a queryset) at their
+    share of the movement's value, pro rata by quantity, and re-price
+    their cost allocations. Two set-based UPDATEs.
+    """
+    unit_value = (
+        MaterialMovement.objects
+        .filter(pk=OuterRef('movement_id'))
+        .values(unit_value=F('cost_value') / NullIf(F('quantity'), Value(ZERO)))
+    )
+    Addition.objects.filter(movement__in=movements).update(
+        cost=Cast(Subquery(unit_value) * F('quantity'), DecimalField(max_digits=12, decimal_places=2)),
+    )
+    addition_cost = Addition.objects.filter(pk=OuterRef('addition_id')).values('cost')
+    AdditionCostAllocation.objects.filter(addition__movement__in=movements).update(
+        cost=Cast(F('share') * Subquery(addition_cost), DecimalField(max_digits=12, decimal_places=2)),
+    )
+
+
+def allocate_additions(additions):
+    """
+    Create the (unpriced) cost allocations of new additions. Tank additions
+    are split by the tank's ledger composition at the addition date, with
+    one grouped ledger query per distinct date; additions to a wine lot or
+    batch go to it in full.
+    """
+    from apps.ledger.models import CompositionKeyType, TankLedger
+
+    tanks_by_date = defaultdict(set)
+    for addition in additions:
+        if addition.tank_id:
+            tanks_by_date[addition.addition_date].add(addition.tank_id)
+    compositions = defaultdict(list)
+    for moment, tank_ids in tanks_by_date.items():
+        rows = (
+            TankLedger.objects
+            .filter(winery_id=additions[0].winery_id, tank_id__in=tank_ids, event_datetime__lte=moment)
+            .values('tank_id', 'composition_key_type', 'composition_key_id', 'composition_key_label')
+            .annotate(volume=Sum('delta_volume_l'))
+            .filter(volume__gt=0)
+            .order_by()
+        )
+        for row in rows:
+            compositions[row['tank_id'], moment].append(row)
+
+    allocations = []
+    for addition in additions:
+        rows = []
+        if addition.tank_id:
+            composition = compositions.get((addition.tank_id, addition.addition_date), [])
+            total = sum(entry['volume'] for entry in composition)
+            rows = [
+                (
+                    entry['composition_key_type'], entry['composition_key_id'],
+                    entry['composition_key_label'], entry['volume'], (entry['volume'] / total).quantize(SHARE),
+                )
+                for entry in composition
+            ]
+            if not rows:
+                rows = [(CompositionKeyType.UNKNOWN, None, f'Tank {addition.tank.code}', None, Decimal('1'))]
+        elif addition.wine_lot_id:
+            rows = [(CompositionKeyType.WINE_LOT, addition.wine_lot_id, addition.wine_lot.lot_code, None, Decimal('1'))]
+        elif addition.batch_id:
+            rows = [(CompositionKeyType.BATCH, addition.batch_id, addition.batch.batch_code, None, Decimal('1'))]
+        elif addition.barrel_id:
+            rows = [(CompositionKeyType.UNKNOWN, None, f'Barrel {addition.barrel.code}', None, Decimal('1'))]
+        allocations.extend(
+            AdditionCostAllocation(
+                winery_id=addition.winery_id, addition_id=addition.pk,
+                composition_key_type=key_type, composition_key_id=key_id,
+                composition_key_label=label[:100], volume_l=volume, share=share,
+            )
+            for key_type, key_id, label, volume, share in rows
+        )
+    AdditionCostAllocation.objects.bulk_create(allocations, batch_size=1000)
@@ -0,0 +1,187 @@
+"""
+Dosage arithmetic for additions: how much of a material a dosage rate
+(e.g. 30 g/hL of bentonite) takes for a volume of wine, in the
+material's own unit.
+
+``plan_doses`` computes the doses of one material for many vessels in one
+NumPy pass, by one of the ``METHODS``:
+
+- ``rate``: the rate is of the product itself;
+- ``active``: the rate is of the material's active ingredient, divided by
+  its ``active_fraction`` (e.g. 0.576 g of SO₂ per g of potassium
+  metabisulfite);
+- ``free_so2``: raise each vessel's free SO₂ to a target in mg/L;
+- ``molecular_so2``: raise each vessel's molecular SO₂ to a target in
+  mg/L; at a given pH that takes a free SO₂ of
+  target x (1 + 10^(pH - 1.81)).
+
+SO₂ targets start from the latest analysis of each vessel that has both
+pH and free SO₂ (``so2_readings``) and dose the SO₂ missing, converted to
+product through the active fraction.
+"""
+from decimal import Decimal
+
+import numpy as np
+from django.db.models import OuterRef, Subquery
+
+from .models import ActiveIngredient, MaterialUnit
+
+QUANTITY = Decimal('0.001')
+
+# Rate unit -> (dimension, grams or millilitres per litre of wine per 1 unit of rate)
+RATE_UNITS = {
+    'mg/L': ('mass', Decimal('0.001')),
+    'g/hL': ('mass', Decimal('0.01')),
+    'g/L': ('mass', Decimal('1')),
+    'mL/hL': ('volume', Decimal('0.01')),
+    'mL/L': ('volume', Decimal('1')),
+}
+
+# Material unit -> (dimension, grams or millilitres per unit)
+MATERIAL_UNITS = {
+    MaterialUnit.GRAM: ('mass', Decimal('1')),
+    MaterialUnit.KILOGRAM: ('mass', Decimal('1000')),
+    MaterialUnit.MILLILITER: ('volume', Decimal('1')),
+    MaterialUnit.LITER: ('volume', Decimal('1000')),
+}
+
+METHODS = ('rate', 'active', 'free_so2', 'molecular_so2')
+SO2_METHODS = ('free_so2', 'molecular_so2')
+
+# pKa of SO₂ used for molecular SO₂ (as Analysis.molecular_so2)
+SO2_PKA = 1.81
+
+
+def rate_factor(material_unit, rate_unit):
+    """
+    Material units needed per litre of wine per 1 unit of ``rate_unit``;
+    raises ValueError when the two cannot be converted (mass rate for a
+    liquid material, counted units, ...).
+    """
+    if rate_unit not in RATE_UNITS:
+        raise ValueError(f"Unknown rate unit '{rate_unit}'")
+    if material_unit not in MATERIAL_UNITS:
+        raise ValueError(f"Materials measured in '{material_unit}' cannot be dosed by rate")
+    rate_dimension, per_litre = RATE_UNITS[rate_unit]
+    unit_dimension, unit_size = MATERIAL_UNITS[material_unit]
+    if rate_dimension != unit_dimension:
+        raise ValueError(f"A {rate_unit} rate cannot be converted to {material_unit}")
+    return per_litre / unit_size
+
+
+def dose_quantity(volume_l, rate, factor):
+    """Quantity (in material units) for ``volume_l`` litres at ``rate``."""
+    return (Decimal(volume_l) * rate * factor).quantize(QUANTITY)
+
+
+def method_factor(material, method, rate_unit):
+    """
+    Material units per litre of wine per 1 unit of rate (per mg/L of SO₂
+    for SO₂ targets) when dosing ``material`` by ``method``; raises
+    ValueError when the material does not support it.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown dosage method '{method}'")
+    if method in SO2_METHODS:
+        if material.active_ingredient != ActiveIngredient.SO2:
+            raise ValueError(f"{material.name} has no SO₂ active ingredient")
+        rate_unit = 'mg/L'
+    factor = rate_factor(material.unit, rate_unit)
+    if method != 'rate':
+        if not material.active_fraction:
+            raise ValueError(f"{material.name} has no active fraction")
+        factor /= material.active_fraction
+    return factor
+
+
+def so2_readings(winery, vessels):
+    """
+    ``{(field, vessel id): (pH, free SO₂, analysis date)}`` from the latest
+    analysis with both values of each of ``vessels`` (``(field, vessel)``
+    pairs): one query per vessel kind, each vessel reading its latest
+    analysis through the ``(vessel, -analysis_date)`` index.
+    """
+    from apps.lab.models import Analysis
+
+    ids = {}
+    for field, vessel in vessels:
+        ids.setdefault(field, []).append(vessel.pk)
+    readings = {}
+    for field, vessel_ids in ids.items():
+        latest = Analysis.objects.filter(
+            ph__isnull=False, free_so2_mgl__isnull=False, **{field: OuterRef('pk')},
+        ).order_by('-analysis_date', '-id')
+        rows = (
+            Analysis._meta.get_field(field).related_model.objects
+            .filter(winery=winery, pk__in=vessel_ids)
+            .annotate(
+                reading_ph=Subquery(latest.values('ph')[:1]),
+                reading_free_so2=Subquery(latest.values('free_so2_mgl')[:1]),
+                reading_date=Subquery(latest.values('analysis_date')[:1]),
+            )
+            .filter(reading_date__isnull=False)
+            .values_list('pk', 'reading_ph', 'reading_free_so2', 'reading_date')
+        )
+        readings.update(((field, vessel_id), reading) for vessel_id, *reading in rows)
+    return readings
+
+
+def plan_doses(material, method, rate, rate_unit, vessels, readings=None):
+    """
+    Doses of ``material`` for ``vessels`` (``(field, vessel)`` pairs, by
+    current volume) in one vectorised pass. ``rate`` is the product or
+    active ingredient rate in ``rate_unit``, or the SO₂ target in mg/L
+    (``readings`` from ``so2_readings``). Returns one dict per vessel;
+    vessels with nothing to add have ``status`` 'at_target' (or
+    'no_analysis') and no ``quantity``.
+    """
+    factor = float(method_factor(material, method, rate_unit))
+    volumes = np.array([float(vessel.current_volume_l) for _, vessel in vessels])
+    ph = free = molecular = np.full(len(vessels), np.nan)
+
+    if method in SO2_METHODS:
+        found = [(readings or {}).get((field, vessel.pk)) for field, vessel in vessels]
+        ph = np.array([float(reading[0]) if reading else np.nan for reading in found])
+        free = np.array([float(reading[1]) if reading else np.nan for reading in found])
+        ratio = 1 + 10 ** (ph - SO2_PKA)  # free / molecular SO₂ at each pH
+        molecular = free / ratio
+        target = float(rate) * ratio if method == 'molecular_so2' else np.full(len(vessels), float(rate))
+        doses = np.clip(target - free, 0, None)  # mg/L of SO₂, NaN without an analysis
+        dose_unit = 'mg/L SO₂'
+        kind = 'molecular' if method == 'molecular_so2' else 'free'
+        target_note = f' ({kind} SO₂ target {Decimal(rate).normalize():f} mg/L)'
+    else:
+        doses = np.full(len(vessels), float(rate))
+        dose_unit = rate_unit if method == 'rate' else f'{rate_unit} {material.get_active_ingredient_display()}'
+        target_note = ''
+    quantities = np.round(volumes * doses * factor, 3)
+
+    plan = []
+    for i, (field, vessel) in enumerate(vessels):
+        if np.isnan(doses[i]):
+            status = 'no_analysis'
+        elif quantities[i] <= 0:
+            status = 'at_target'
+        else:
+            status = 'dose'
+        reading = (readings or {}).get((field, vessel.pk))
+        dose = None if np.isnan(doses[i]) else round(float(doses[i]), 4)
+        if method in SO2_METHODS:
+            dosage_rate = f'{doses[i]:.1f} {dose_unit}{target_note}'
+        else:
+            dosage_rate = f'{Decimal(rate).normalize():f} {dose_unit}'
+        plan.append({
+            'field': field,
+            'vessel': vessel,
+            'volume_l': vessel.current_volume_l,
+            'ph': None if np.isnan(ph[i]) else float(ph[i]),
+            'free_so2_mgl': None if np.isnan(free[i]) else float(free[i]),
+            'molecular_so2_mgl': None if np.isnan(molecular[i]) else round(float(molecular[i]), 2),
+            'analysis_date': reading[2] if reading else None,
+            'dose': dose,
+            'dose_unit': dose_unit,
+            'quantity': Decimal(f'{quantities[i]:.3f}') if status == 'dose' else None,
+            'dosage_rate': dosage_rate if status == 'dose' else '',
+            'status': status,
+        })
+    return plan
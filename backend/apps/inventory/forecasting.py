@@ -0,0 +1,238 @@
+"""
+Material consumption forecasting: when will each material run out?
+
+Consumption (USAGE and WASTE movements, which include the usage booked by
+additions) over a lookback window is held as a materials x days NumPy
+matrix. Days inside one of the winery's harvest season windows
+(``HarvestSeason.start_date``-``end_date``) are the harvest phase, the rest
+are off-season, and each material gets a daily rate per phase. The
+projection applies, for every future day, the rate of that day's phase
+(future harvests repeat the latest season's window every year) and finds
+the first day the cumulative consumption exceeds the current stock, for
+all materials at once.
+
+The matrix is cached per winery and lookback. It is rebuilt when the day
+changes (the window slides) and otherwise refreshed incrementally: each
+request folds in only the movements created since the cached build, so a
+new movement costs one small query instead of a rebuild. ``created_at`` is
+set at save time, not at commit, so the refresh re-reads an ``OVERLAP``
+window before the last build and skips the movement ids it has already
+folded; a transaction committing later than that is picked up by the next
+daily rebuild. Deleting a movement drops the cache (see ``invalidate``).
+"""
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Material, MaterialMovement, MaterialStock, MovementType
+
+CONSUMPTION_TYPES = (MovementType.USAGE, MovementType.WASTE)
+LOOKBACK_CHOICES = (90, 180, 365, 730)
+DEFAULT_LOOKBACK_DAYS = 365
+DEFAULT_HORIZON_DAYS = 365
+MAX_HORIZON_DAYS = 1095
+CACHE_TIMEOUT = 60 * 60 * 24
+# How long a movement may stay uncommitted after its created_at
+OVERLAP = timedelta(minutes=10)
+
+
+def _cache_key(winery_id, lookback_days):
+    return f'inventory:forecast:{winery_id}:{lookback_days}'
+
+
+def invalidate(winery_id):
+    """Drop the cached consumption series of a winery."""
+    cache.delete_many([_cache_key(winery_id, days) for days in LOOKBACK_CHOICES])
+
+
+def _consumption_movements(winery, tz, start, end):
+    """Consumption movements dated in ``[start, end)``."""
+    return MaterialMovement.objects.filter(
+        material__winery=winery,
+        movement_type__in=CONSUMPTION_TYPES,
+        movement_date__gte=datetime.combine(start, datetime.min.time(), tzinfo=tz),
+        movement_date__lt=datetime.combine(end, datetime.min.time(), tzinfo=tz),
+    ).order_by()
+
+
+def _daily_consumption(movements, tz):
+    """Consumption per ``(material_id, day)`` of ``movements``, one grouped query."""
+    return list(
+        movements.values_list('material_id', TruncDate('movement_date', tzinfo=tz))
+        .annotate(total=Sum('quantity'))
+    )
+
+
+def _recent_movements(movements, tz, created_after):
+    """``(id, material_id, day, quantity, created_at)`` of movements created after ``created_at``."""
+    return list(
+        movements.filter(created_at__gt=created_after)
+        .values_list('id', 'material_id', TruncDate('movement_date', tzinfo=tz), 'quantity', 'created_at')
+    )
+
+
+def _fold(series, rows):
+    """Add grouped consumption ``rows`` to the cached ``series`` in place."""
+    index = series['index']
+    new = [material_id for material_id, *_ in rows if material_id not in index]
+    for material_id in dict.fromkeys(new):
+        index[material_id] = len(index)
+    if len(index) > series['usage'].shape[0]:
+        grow = len(index) - series['usage'].shape[0]
+        series['usage'] = np.vstack([series['usage'], np.zeros((grow, series['usage'].shape[1]))])
+    if rows:
+        material_rows = np.fromiter((index[row[0]] for row in rows), dtype=np.intp, count=len(rows))
+        days = np.fromiter(((row[1] - series['start']).days for row in rows), dtype=np.intp, count=len(rows))
+        # Consumption movements are negative
+        amounts = np.fromiter((-float(row[2]) for row in rows), dtype=float, count=len(rows))
+        np.add.at(series['usage'], (material_rows, days), amounts)
+
+
+def consumption_series(winery, lookback_days, today):
+    """
+    The cached ``{'start', 'index', 'usage', 'through', 'recent'}``
+    consumption series of the ``lookback_days`` before ``today``:
+    ``usage[index[material_id], d]`` is the consumption on day ``start + d``.
+    Movements created up to ``through`` are folded in; ``recent`` maps the
+    ids of those folded after it to their ``created_at``.
+    """
+    tz = ZoneInfo(winery.timezone or 'UTC')
+    start = today - timedelta(days=lookback_days)
+    key = _cache_key(winery.pk, lookback_days)
+    series = cache.get(key)
+    movements = _consumption_movements(winery, tz, start, today)
+
+    if series is None or series['start'] != start:
+        through = timezone.now() - OVERLAP
+        series = {
+            'start': start, 'index': {}, 'usage': np.zeros((0, lookback_days)),
+            'through': through, 'recent': {},
+        }
+        rows = _daily_consumption(movements.filter(created_at__lte=through), tz)
+        recent = _recent_movements(movements, tz, through)
+    else:
+        recent = _recent_movements(movements, tz, series['through'])
+        rows = []
+        if all(row[0] in series['recent'] for row in recent):
+            return series
+
+    rows += [row[1:4] for row in recent if row[0] not in series['recent']]
+    # Movements older than the overlap window are settled: stop tracking their ids
+    through = max(series['through'], timezone.now() - OVERLAP)
+    series['through'] = through
+    series['recent'] = {row[0]: row[4] for row in recent if row[4] > through}
+    _fold(series, rows)
+    cache.set(key, series, CACHE_TIMEOUT)
+    return series
+
+
+def _shift_year(day, years):
+    try:
+        return day.replace(year=day.year + years)
+    except ValueError:  # 29 February
+        return day.replace(year=day.year + years, day=28)
+
+
+def harvest_mask(windows, start, days):
+    """Boolean array: is ``start + d`` inside one of the ``(start, end)`` windows?"""
+    mask = np.zeros(days, dtype=bool)
+    for window_start, window_end in windows:
+        first = max((window_start - start).days, 0)
+        last = min((window_end - start).days + 1, days)
+        if first < last:
+            mask[first:last] = True
+    return mask
+
+
+def harvest_windows(winery, until):
+    """The winery's harvest windows, the latest repeated yearly through ``until``."""
+    from apps.harvest.models import HarvestSeason
+
+    windows = list(
+        HarvestSeason.objects.filter(
+            winery=winery, start_date__isnull=False, end_date__isnull=False,
+        ).order_by('start_date').values_list('start_date', 'end_date')
+    )
+    if windows:
+        latest_start, latest_end = windows[-1]
+        for years in range(1, until.year - latest_start.year + 1):
+            windows.append((_shift_year(latest_start, years), _shift_year(latest_end, years)))
+    return windows
+
+
+def forecast(winery, lookback_days=DEFAULT_LOOKBACK_DAYS, horizon_days=DEFAULT_HORIZON_DAYS, today=None):
+    """
+    Consumption rates and projected stock-out (and reorder, when the
+    material has a low-stock threshold) dates of ``winery``'s active
+    materials. Materials running out soonest come first.
+    """
+    if today is None:
+        today = datetime.now(ZoneInfo(winery.timezone or 'UTC')).date()
+    series = consumption_series(winery, lookback_days, today)
+    windows = harvest_windows(winery, today + timedelta(days=horizon_days))
+
+    materials = list(
+        Material.objects.filter(winery=winery, is_active=True)
+        .order_by('name')
+        .values_list('id', 'name', 'unit', 'low_stock_threshold')
+    )
+    stock = dict(
+        MaterialStock.objects.filter(material__winery=winery, material__is_active=True)
+        .order_by().values_list('material_id').annotate(total=Sum('quantity'))
+    )
+
+    # Materials x lookback days (zero rows for materials never consumed)
+    rows = np.array([series['index'].get(material_id, -1) for material_id, *_ in materials], dtype=np.intp)
+    usage = np.zeros((len(materials), lookback_days))
+    known = rows >= 0
+    usage[known] = series['usage'][rows[known]]
+
+    past = harvest_mask(windows, series['start'], lookback_days)
+    overall_rate = usage.sum(axis=1) / lookback_days
+    harvest_days, off_days = past.sum(), lookback_days - past.sum()
+    harvest_rate = usage[:, past].sum(axis=1) / harvest_days if harvest_days else overall_rate
+    off_rate = usage[:, ~past].sum(axis=1) / off_days if off_days else overall_rate
+
+    # Projected cumulative consumption, day by day from today
+    future = harvest_mask(windows, today, horizon_days)
+    cumulative = np.cumsum(np.where(future, harvest_rate[:, None], off_rate[:, None]), axis=1)
+    on_hand = np.array([float(stock.get(material_id, 0)) for material_id, *_ in materials])
+    thresholds = np.array([float(threshold or 0) for *_, threshold in materials])
+
+    def first_day(level):
+        reached = cumulative >= np.maximum(level, 0)[:, None]
+        return np.where(reached.any(axis=1), reached.argmax(axis=1), -1)
+
+    stockout_days = first_day(on_hand)
+    reorder_days = first_day(on_hand - thresholds)
+
+    results = []
+    for i, (material_id, name, unit, threshold) in enumerate(materials):
+        stockout = int(stockout_days[i]) if on_hand[i] > 0 or overall_rate[i] > 0 else -1
+        reorder = int(reorder_days[i]) if threshold is not None else -1
+        results.append({
+            'material_id': material_id,
+            'name': name,
+            'unit': unit,
+            'current_stock': round(float(on_hand[i]), 3),
+            'daily_rate': round(float(overall_rate[i]), 4),
+            'harvest_daily_rate': round(float(harvest_rate[i]), 4),
+            'off_season_daily_rate': round(float(off_rate[i]), 4),
+            'days_until_stockout': stockout if stockout >= 0 else None,
+            'stockout_date': today + timedelta(days=stockout) if stockout >= 0 else None,
+            'reorder_date': today + timedelta(days=reorder) if reorder >= 0 else None,
+        })
+    results.sort(key=lambda row: (row['stockout_date'] or date.max, row['name']))
+    return {
+        'as_of': today,
+        'lookback_days': lookback_days,
+        'horizon_days': horizon_days,
+        'harvest_phase_today': bool(future[0]) if horizon_days else False,
+        'seasonal': bool(windows),
+        'materials': results,
+    }
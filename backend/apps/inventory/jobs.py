@@ -0,0 +1,20 @@
+"""
+Background jobs of the inventory app (see apps.jobs.registry).
+"""
+from django.db import OperationalError
+
+from apps.jobs.registry import register_job
+from .costing import recompute_winery
+from .models import AdditionDailyRollup
+
+
+@register_job('inventory.recompute_costs', max_retries=2, retry_on=(OperationalError,))
+def recompute_costs(job):
+    """Re-cost every material movement of the winery from scratch."""
+    return recompute_winery(job.winery, progress=job.set_progress)
+
+
+@register_job('inventory.rebuild_addition_rollups', max_retries=2, retry_on=(OperationalError,))
+def rebuild_addition_rollups(job):
+    """Rebuild the winery's daily addition rollups from its additions."""
+    return {'rows': AdditionDailyRollup.rebuild(job.winery)}
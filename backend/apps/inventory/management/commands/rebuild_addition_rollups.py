@@ -0,0 +1,40 @@
+"""
+Management command to backfill (or repair) the daily addition rollups
+behind the addition summary and usage reports.
+
+Usage:
+    python manage.py rebuild_addition_rollups                    # All wineries
+    python manage.py rebuild_addition_rollups --winery=<uuid>    # Specific winery
+"""
+from django.core.management.base import BaseCommand
+
+from apps.wineries.models import Winery
+from apps.inventory.models import AdditionDailyRollup
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily addition rollups from the addition history'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--winery',
+            type=str,
+            help='UUID of specific winery to rebuild (default: all)',
+        )
+    
+    def handle(self, *args, **options):
+        winery_id = options.get('winery')
+        
+        if winery_id:
+            wineries = Winery.objects.filter(id=winery_id)
+            if not wineries.exists():
+                self.stderr.write(self.style.ERROR(f'Winery {winery_id} not found'))
+                return
+        else:
+            wineries = Winery.objects.all()
+        
+        for winery in wineries:
+            rows = AdditionDailyRollup.rebuild(winery)
+            self.stdout.write(f"  {winery.name}: {rows} rollup rows")
+        
+        self.stdout.write(self.style.SUCCESS('Done!'))
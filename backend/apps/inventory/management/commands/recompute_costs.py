@@ -0,0 +1,42 @@
+"""
+Management command to recompute material costs from the movement history.
+
+Usage:
+    python manage.py recompute_costs                    # All wineries
+    python manage.py recompute_costs --winery=<uuid>    # Specific winery
+"""
+from django.core.management.base import BaseCommand
+
+from apps.wineries.models import Winery
+from apps.inventory.costing import recompute_winery
+
+
+class Command(BaseCommand):
+    help = 'Recompute weighted average material costs from movement history'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--winery',
+            type=str,
+            help='UUID of specific winery to recompute (default: all)',
+        )
+    
+    def handle(self, *args, **options):
+        winery_id = options.get('winery')
+        
+        if winery_id:
+            wineries = Winery.objects.filter(id=winery_id)
+            if not wineries.exists():
+                self.stderr.write(self.style.ERROR(f'Winery {winery_id} not found'))
+                return
+        else:
+            wineries = Winery.objects.all()
+        
+        for winery in wineries:
+            result = recompute_winery(winery)
+            self.stdout.write(
+                f"  {winery.name}: {result['materials']} materials, "
+                f"{result['movements_changed']} movements re-costed"
+            )
+        
+        self.stdout.write(self.style.SUCCESS('Done!'))
@@ -0,0 +1,63 @@
+"""
+Management command to check stock levels against the movement ledger.
+
+Usage:
+    python manage.py reconcile_stock                    # All wineries, report only
+    python manage.py reconcile_stock --winery=<uuid>    # Specific winery
+    python manage.py reconcile_stock --repair           # Add the drift to the stock rows
+"""
+from django.core.management.base import BaseCommand
+
+from apps.wineries.models import Winery
+from apps.inventory.models import MaterialStock
+
+
+class Command(BaseCommand):
+    help = 'Recompute stock levels from movements and report (or repair) drift'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--winery',
+            type=str,
+            help='UUID of specific winery to reconcile (default: all)',
+        )
+        parser.add_argument(
+            '--repair',
+            action='store_true',
+            help='Add the difference to drifted stock rows so they match the movement balances',
+        )
+        parser.add_argument(
+            '--verbose-rows',
+            action='store_true',
+            help='List every drifted row instead of a per-winery summary',
+        )
+    
+    def handle(self, *args, **options):
+        repair = options['repair']
+        winery_id = options.get('winery')
+        
+        if winery_id:
+            wineries = Winery.objects.filter(id=winery_id)
+            if not wineries.exists():
+                self.stderr.write(self.style.ERROR(f'Winery {winery_id} not found'))
+                return
+        else:
+            wineries = Winery.objects.all()
+        
+        if not repair:
+            self.stdout.write(self.style.WARNING('REPORT ONLY - pass --repair to fix drifted rows'))
+        
+        total = 0
+        for winery in wineries:
+            drift = MaterialStock.reconcile(winery, repair=repair)
+            total += len(drift)
+            self.stdout.write(f'  {winery.name}: {len(drift)} drifted stock row(s)')
+            if options['verbose_rows']:
+                for row in drift:
+                    self.stdout.write(
+                        f"    {row['material_name']} @ {row['location']}: "
+                        f"recorded {row['recorded']}, expected {row['expected']}"
+                    )
+        
+        verb = 'Repaired' if repair else 'Found'
+        self.stdout.write(self.style.SUCCESS(f'Done! {verb} {total} drifted stock row(s)'))
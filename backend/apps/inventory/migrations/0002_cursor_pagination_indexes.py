@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0002_convert_to_fk'),
+        ('harvest', '0002_alter_batch_must_volume_l'),
+        ('inventory', '0001_initial'),
+        ('production', '0001_initial'),
+        ('wineries', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='addition',
+            name='inventory_a_winery__c63db6_idx',
+        ),
+        migrations.AddIndex(
+            model_name='addition',
+            index=models.Index(fields=['winery', '-addition_date', '-id'], name='inventory_a_winery__65e94d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='materialmovement',
+            index=models.Index(fields=['-movement_date', '-id'], name='inventory_m_movemen_788ea1_idx'),
+        ),
+    ]
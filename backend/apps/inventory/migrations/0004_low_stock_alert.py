@@ -0,0 +1,70 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:59
+
+import django.db.models.deletion
+import uuid
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def open_current_alerts(apps, schema_editor):
+    """Raise alerts for materials already below their threshold"""
+    Material = apps.get_model('inventory', 'Material')
+    MaterialStock = apps.get_model('inventory', 'MaterialStock')
+    LowStockAlert = apps.get_model('inventory', 'LowStockAlert')
+    totals = (
+        MaterialStock.objects
+        .filter(material=models.OuterRef('pk'))
+        .order_by()
+        .values('material')
+        .annotate(total=models.Sum('quantity'))
+        .values('total')
+    )
+    low = (
+        Material.objects
+        .filter(is_active=True, low_stock_threshold__isnull=False)
+        .annotate(stock=Coalesce(
+            models.Subquery(totals), models.Value(Decimal('0')),
+            output_field=models.DecimalField(max_digits=12, decimal_places=3),
+        ))
+        .filter(stock__lt=models.F('low_stock_threshold'))
+    )
+    LowStockAlert.objects.bulk_create([
+        LowStockAlert(
+            winery_id=material.winery_id, material_id=material.pk,
+            threshold=material.low_stock_threshold, current_stock=material.stock,
+        )
+        for material in low.iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_trigram_search_indexes'),
+        ('wineries', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LowStockAlert',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('threshold', models.DecimalField(decimal_places=2, help_text='Threshold crossed', max_digits=10)),
+                ('current_stock', models.DecimalField(decimal_places=3, help_text='Stock at last update', max_digits=12)),
+                ('raised_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('cleared_at', models.DateTimeField(blank=True, help_text='When stock recovered; null while open', null=True)),
+                ('material', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='low_stock_alerts', to='inventory.material')),
+                ('winery', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='low_stock_alerts', to='wineries.winery')),
+            ],
+            options={
+                'db_table': 'inventory_low_stock_alert',
+                'ordering': ['-raised_at'],
+                'indexes': [models.Index(condition=models.Q(('cleared_at__isnull', True)), fields=['winery', '-raised_at'], name='inventory_open_low_stock_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('cleared_at__isnull', True)), fields=('material',), name='inventory_one_open_low_stock_alert')],
+            },
+        ),
+        migrations.RunPython(open_current_alerts, migrations.RunPython.noop),
+    ]
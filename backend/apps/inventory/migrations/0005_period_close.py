@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:03
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0004_low_stock_alert'),
+        ('wineries', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryPeriodClose',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('close_date', models.DateField(help_text='Last day of the closed period')),
+                ('period_end', models.DateTimeField(help_text='End of close_date in the winery time zone (exclusive)')),
+                ('notes', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('closed_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='inventory_period_closes', to=settings.AUTH_USER_MODEL)),
+                ('winery', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inventory_period_closes', to='wineries.winery')),
+            ],
+            options={
+                'db_table': 'inventory_period_close',
+                'ordering': ['-close_date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('location', models.CharField(choices=[('MAIN_STORAGE', 'Main Storage'), ('CELLAR', 'Cellar'), ('LAB', 'Laboratory'), ('BOTTLING_LINE', 'Bottling Line'), ('WAREHOUSE', 'Warehouse'), ('OTHER', 'Other')], max_length=20)),
+                ('quantity', models.DecimalField(decimal_places=3, max_digits=12)),
+                ('unit_cost', models.DecimalField(blank=True, decimal_places=4, help_text='Moving average purchase cost; null when no priced purchase is known', max_digits=12, null=True)),
+                ('value', models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True)),
+                ('material', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_snapshots', to='inventory.material')),
+                ('period_close', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='inventory.inventoryperiodclose')),
+                ('winery', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_snapshots', to='wineries.winery')),
+            ],
+            options={
+                'db_table': 'inventory_stock_snapshot',
+                'ordering': ['material__name', 'location'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='inventoryperiodclose',
+            index=models.Index(fields=['winery', '-period_end'], name='inventory_p_winery__95e3b4_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='inventoryperiodclose',
+            unique_together={('winery', 'close_date')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='stocksnapshot',
+            unique_together={('period_close', 'material', 'location')},
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:07
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_period_close'),
+        ('wineries', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='addition',
+            name='cost',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='Cost of the material added; null while unknown', max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='materialmovement',
+            name='addition',
+            field=models.OneToOneField(blank=True, help_text='Addition that booked this usage', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='movement', to='inventory.addition'),
+        ),
+        migrations.AddField(
+            model_name='materialmovement',
+            name='balance_quantity',
+            field=models.DecimalField(blank=True, decimal_places=3, help_text='Costed stock of the material after this movement', max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='materialmovement',
+            name='balance_unit_cost',
+            field=models.DecimalField(blank=True, decimal_places=4, help_text='Weighted average unit cost after this movement', max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='materialmovement',
+            name='cost_value',
+            field=models.DecimalField(blank=True, decimal_places=4, help_text='Change in stock value (negative for removals); null while the cost is unknown', max_digits=14, null=True),
+        ),
+        migrations.CreateModel(
+            name='MaterialCost',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('quantity', models.DecimalField(decimal_places=3, default=0, max_digits=12)),
+                ('average_cost', models.DecimalField(blank=True, decimal_places=4, max_digits=12, null=True)),
+                ('costed_through', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('material', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='cost', to='inventory.material')),
+                ('winery', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='material_costs', to='wineries.winery')),
+            ],
+            options={
+                'db_table': 'inventory_material_cost',
+            },
+        ),
+        migrations.CreateModel(
+            name='AdditionCostAllocation',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('composition_key_type', models.CharField(help_text='BATCH, WINE_LOT or UNKNOWN (ledger key)', max_length=20)),
+                ('composition_key_id', models.UUIDField(blank=True, null=True)),
+                ('composition_key_label', models.CharField(blank=True, max_length=100)),
+                ('volume_l', models.DecimalField(blank=True, decimal_places=2, help_text='Volume of this key in the tank at the addition date', max_digits=10, null=True)),
+                ('share', models.DecimalField(decimal_places=8, help_text='Fraction of the addition', max_digits=9)),
+                ('cost', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('addition', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cost_allocations', to='inventory.addition')),
+                ('winery', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='addition_cost_allocations', to='wineries.winery')),
+            ],
+            options={
+                'db_table': 'inventory_addition_cost_allocation',
+                'indexes': [models.Index(fields=['winery', 'composition_key_type', 'composition_key_id'], name='inventory_a_winery__ab46ad_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0006_costing'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='materialmovement',
+            name='addition',
+        ),
+        migrations.AddField(
+            model_name='addition',
+            name='movement',
+            field=models.ForeignKey(blank=True, help_text='Usage movement booked for this addition', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='additions', to='inventory.materialmovement'),
+        ),
+    ]
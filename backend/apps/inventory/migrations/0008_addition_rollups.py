@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:27
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0007_addition_movement'),
+        ('wineries', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdditionDailyRollup',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('day', models.DateField(help_text='Addition date in the winery time zone')),
+                ('vessel_type', models.CharField(blank=True, choices=[('TANK', 'Tank'), ('BARREL', 'Barrel'), ('WINE_LOT', 'Wine Lot'), ('BATCH', 'Batch')], help_text='Blank for additions without a target', max_length=10)),
+                ('vessel_id', models.UUIDField(blank=True, null=True)),
+                ('vessel_label', models.CharField(blank=True, help_text='Vessel code at the last addition', max_length=50)),
+                ('addition_count', models.PositiveIntegerField(default=0)),
+                ('total_quantity', models.DecimalField(decimal_places=3, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('material', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='addition_rollups', to='inventory.material')),
+                ('winery', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='addition_rollups', to='wineries.winery')),
+            ],
+            options={
+                'db_table': 'inventory_addition_daily_rollup',
+                'ordering': ['-day'],
+                'indexes': [models.Index(fields=['winery', 'day'], name='inventory_a_winery__92f6f5_idx'), models.Index(fields=['winery', 'vessel_type', 'vessel_id', 'day'], name='inventory_a_winery__703ce5_idx')],
+                'constraints': [models.UniqueConstraint(fields=('winery', 'material', 'day', 'vessel_type', 'vessel_id'), name='inventory_addition_rollup_key', nulls_distinct=False)],
+            },
+        ),
+        migrations.CreateModel(
+            name='AdditionMonthlyRollup',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('month', models.DateField(help_text='First day of the month')),
+                ('addition_count', models.PositiveIntegerField(default=0)),
+                ('total_quantity', models.DecimalField(decimal_places=3, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('material', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='addition_monthly_rollups', to='inventory.material')),
+                ('winery', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='addition_monthly_rollups', to='wineries.winery')),
+            ],
+            options={
+                'db_table': 'inventory_addition_monthly_rollup',
+                'ordering': ['-month'],
+                'constraints': [models.UniqueConstraint(fields=('winery', 'material', 'month'), name='inventory_addition_monthly_rollup_key')],
+            },
+        ),
+    ]
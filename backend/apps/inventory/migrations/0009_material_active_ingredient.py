@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:30
+
+import django.core.validators
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0008_addition_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='material',
+            name='active_fraction',
+            field=models.DecimalField(blank=True, decimal_places=4, help_text='Active ingredient per unit of product (e.g. 0.576 for potassium metabisulfite as SO₂)', max_digits=5, null=True, validators=[django.core.validators.MinValueValidator(Decimal('0.0001')), django.core.validators.MaxValueValidator(Decimal('1'))]),
+        ),
+        migrations.AddField(
+            model_name='material',
+            name='active_ingredient',
+            field=models.CharField(blank=True, choices=[('SO2', 'Sulfur Dioxide (SO₂)'), ('OTHER', 'Other')], help_text='Active ingredient, for dosing by active ingredient or SO₂ target', max_length=10),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0009_material_active_ingredient'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='materialmovement',
+            name='inventory_m_materia_e8f19b_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='materialmovement',
+            name='inventory_m_movemen_788ea1_idx',
+        ),
+        migrations.AddIndex(
+            model_name='materialmovement',
+            index=models.Index(fields=['material', '-movement_date', '-id'], name='inventory_m_materia_73b90b_idx'),
+        ),
+    ]
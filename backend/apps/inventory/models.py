@@ -1,5 +1,15 @@
-from django.db import models
-from django.core.validators import MinValueValidator
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+from functools import partial
+from zoneinfo import ZoneInfo
+
+from django.db import connection, models, transaction
+from django.db.models.functions import Abs, Coalesce, TruncDate
+from django.utils import timezone
+from django.core.validators import MaxValueValidator, MinValueValidator
+from apps.core.search import trigram_indexes
+from apps.core.versioning import bump_version, resource_name
 from apps.wineries.models import Winery
 from apps.users.models import User
 import uuid
@@ -31,6 +41,45 @@ class MaterialUnit(models.TextChoices):
     PACK = 'pack', 'Pack'
 
 
+class ActiveIngredient(models.TextChoices):
+    """Active ingredient a material is dosed by (see apps.inventory.dosage)"""
+    SO2 = 'SO2', 'Sulfur Dioxide (SO₂)'
+    OTHER = 'OTHER', 'Other'
+
+
+class MaterialQuerySet(models.QuerySet):
+    def with_stock(self):
+        """
+        Annotate ``current_stock`` (total over all locations) and ``low_stock``
+        so lists need no per-material aggregate; ``get_current_stock()`` and
+        ``is_low_stock()`` use the annotations when present.
+        """
+        totals = (
+            MaterialStock.objects
+            .filter(material=models.OuterRef('pk'))
+            .order_by()
+            .values('material')
+            .annotate(total=models.Sum('quantity'))
+            .values('total')
+        )
+        return self.annotate(
+            current_stock=Coalesce(
+                models.Subquery(totals), models.Value(Decimal('0')),
+                output_field=models.DecimalField(max_digits=12, decimal_places=3),
+            ),
+        ).annotate(
+            low_stock=models.Case(
+                models.When(
+                    low_stock_threshold__isnull=False,
+                    current_stock__lt=models.F('low_stock_threshold'),
+                    then=models.Value(True),
+                ),
+                default=models.Value(False),
+                output_field=models.BooleanField(),
+            ),
+        )
+
+
 class Material(models.Model):
     """
     Winery materials/supplies (SO₂, yeast, enzymes, etc.)
@@ -71,11 +120,29 @@ class Material(models.Model):
         help_text='Alert when stock falls below this level'
     )
     
+    # Dosage: rates of the active ingredient are converted to product quantities
+    active_ingredient = models.CharField(
+        max_length=10,
+        choices=ActiveIngredient.choices,
+        blank=True,
+        help_text='Active ingredient, for dosing by active ingredient or SO₂ target'
+    )
+    active_fraction = models.DecimalField(
+        max_digits=5,
+        decimal_places=4,
+        validators=[MinValueValidator(Decimal('0.0001')), MaxValueValidator(Decimal('1'))],
+        null=True,
+        blank=True,
+        help_text='Active ingredient per unit of product (e.g. 0.576 for potassium metabisulfite as SO₂)'
+    )
+    
     # Tracking
     is_active = models.BooleanField(default=True, help_text='Is this material still in use?')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = MaterialQuerySet.as_manager()
+    
     class Meta:
         db_table = 'inventory_material'
         ordering = ['name']
@@ -83,6 +150,7 @@ class Material(models.Model):
         indexes = [
             models.Index(fields=['winery', 'category']),
             models.Index(fields=['winery', 'is_active']),
+            *trigram_indexes('material', 'name', 'code', 'supplier'),
         ]
     
     def __str__(self):
@@ -90,6 +158,8 @@ class Material(models.Model):
     
     def get_current_stock(self):
         """Calculate current total stock across all locations"""
+        if hasattr(self, 'current_stock'):  # Annotated by with_stock()
+            return self.current_stock
         total = self.stock_locations.aggregate(
             total=models.Sum('quantity')
         )['total'] or 0
@@ -97,6 +167,8 @@ class Material(models.Model):
     
     def is_low_stock(self):
         """Check if current stock is below threshold"""
+        if hasattr(self, 'low_stock'):  # Annotated by with_stock()
+            return self.low_stock
         if self.low_stock_threshold is None:
             return False
         return self.get_current_stock() < self.low_stock_threshold
@@ -149,6 +221,129 @@ class MaterialStock(models.Model):
     
     def __str__(self):
         return f"{self.material.name} @ {self.get_location_display()}: {self.quantity} {self.material.unit}"
+    
+    @classmethod
+    def apply_deltas(cls, material, deltas):
+        """
+        Add ``{location: delta}`` to ``material``'s stock with one
+        ``INSERT ... ON CONFLICT DO UPDATE``: missing rows are created and
+        quantities are clamped at zero. Rows are written in location order,
+        so concurrent movements neither lose updates nor deadlock. Returns
+        ``{location: new quantity}``.
+        """
+        locations = sorted(deltas)
+        table = connection.ops.quote_name(cls._meta.db_table)
+        values = ', '.join(['(%s, %s::numeric)'] * len(locations))
+        params = [item for location in locations for item in (location, deltas[location])]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                WITH deltas (location, delta) AS (VALUES {values})
+                INSERT INTO {table} AS stock (id, material_id, location, quantity, updated_at)
+                SELECT gen_random_uuid(), %s, location, GREATEST(delta, 0), now()
+                FROM deltas ORDER BY location
+                ON CONFLICT (material_id, location) DO UPDATE SET
+                    quantity = GREATEST(
+                        stock.quantity
+                        + (SELECT delta FROM deltas WHERE deltas.location = EXCLUDED.location),
+                        0
+                    ),
+                    updated_at = EXCLUDED.updated_at
+                RETURNING location, quantity
+                """,
+                params + [material.pk],
+            )
+            result = dict(cursor.fetchall())
+        
+        # Raw SQL sends no post_save: bump the change version ourselves
+        transaction.on_commit(partial(bump_version, str(material.winery_id), resource_name(cls)))
+        return result
+
+    @classmethod
+    def reconcile(cls, winery, repair=False):
+        """
+        Compare ``winery``'s stock rows with the balances of its movement
+        ledger and return the rows that drifted, as dicts with ``recorded``
+        and ``expected`` quantities (``movement_total`` is the unclamped
+        sum; ``expected`` clamps it at zero like the write path does).
+
+        The balances come from one grouped query over the movements (plus
+        the transfer destinations), full-joined with the stock rows. With
+        ``repair``, each drifted row gets the difference added through
+        ``apply_deltas`` and the low-stock alerts of the affected materials
+        are re-synced.
+        """
+        movement_table = connection.ops.quote_name(MaterialMovement._meta.db_table)
+        material_table = connection.ops.quote_name(Material._meta.db_table)
+        stock_table = connection.ops.quote_name(cls._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                WITH balances AS (
+                    SELECT material_id, location, SUM(delta) AS total
+                    FROM (
+                        SELECT movement.material_id, movement.location, movement.quantity AS delta
+                        FROM {movement_table} movement
+                        JOIN {material_table} material ON material.id = movement.material_id
+                        WHERE material.winery_id = %(winery)s
+                        UNION ALL
+                        SELECT movement.material_id, movement.destination_location, ABS(movement.quantity)
+                        FROM {movement_table} movement
+                        JOIN {material_table} material ON material.id = movement.material_id
+                        WHERE material.winery_id = %(winery)s
+                            AND movement.movement_type = %(transfer)s
+                            AND movement.destination_location IS NOT NULL
+                    ) deltas
+                    GROUP BY material_id, location
+                ),
+                stock AS (
+                    SELECT stock.material_id, stock.location, stock.quantity
+                    FROM {stock_table} stock
+                    JOIN {material_table} material ON material.id = stock.material_id
+                    WHERE material.winery_id = %(winery)s
+                )
+                SELECT
+                    COALESCE(balances.material_id, stock.material_id),
+                    COALESCE(balances.location, stock.location),
+                    stock.quantity,
+                    COALESCE(balances.total, 0)
+                FROM balances
+                FULL OUTER JOIN stock
+                    ON stock.material_id = balances.material_id AND stock.location = balances.location
+                WHERE COALESCE(stock.quantity, 0) <> GREATEST(COALESCE(balances.total, 0), 0)
+                """,
+                {'winery': winery.pk, 'transfer': MovementType.TRANSFER},
+            )
+            rows = cursor.fetchall()
+
+        names = dict(
+            Material.objects.filter(pk__in={row[0] for row in rows}).values_list('id', 'name')
+        )
+        drift = [
+            {
+                'material_id': material_id,
+                'material_name': names.get(material_id, ''),
+                'location': location,
+                'recorded': recorded,
+                'expected': max(total, Decimal('0')),
+                'movement_total': total,
+            }
+            for material_id, location, recorded, total in sorted(
+                rows, key=lambda row: (names.get(row[0], ''), row[1])
+            )
+        ]
+
+        if repair and drift:
+            # Apply the drift as deltas rather than absolute quantities, so a
+            # movement committed since the balances were read is not lost
+            deltas = defaultdict(dict)
+            for row in drift:
+                deltas[row['material_id']][row['location']] = row['expected'] - (row['recorded'] or Decimal('0'))
+            with transaction.atomic():
+                for material in Material.objects.filter(pk__in=deltas):
+                    cls.apply_deltas(material, deltas[material.pk])
+                    LowStockAlert.sync(material)
+        return drift
 
 
 class MovementType(models.TextChoices):
@@ -216,6 +411,28 @@ class MaterialMovement(models.Model):
     )
     notes = models.TextField(blank=True, help_text='Additional notes')
     
+    # Costing (maintained by apps.inventory.costing)
+    cost_value = models.DecimalField(
+        max_digits=14,
+        decimal_places=4,
+        null=True,
+        blank=True,
+        help_text='Change in stock value (negative for removals); null while the cost is unknown'
+    )
+    balance_quantity = models.DecimalField(
+        max_digits=12,
+        decimal_places=3,
+        null=True,
+        blank=True,
+        help_text='Costed stock of the material after this movement'
+    )
+    balance_unit_cost = models.DecimalField(
+        max_digits=12,
+        decimal_places=4,
+        null=True,
+        blank=True,
+        help_text='Weighted average unit cost after this movement'
+    )
     # User tracking
     created_by = models.ForeignKey(
         User,
@@ -229,12 +446,28 @@ class MaterialMovement(models.Model):
         db_table = 'inventory_material_movement'
         ordering = ['-movement_date', '-created_at']
         indexes = [
-            models.Index(fields=['material', '-movement_date']),
+            models.Index(fields=['material', '-movement_date', '-id']),
             models.Index(fields=['movement_type']),
         ]
     
     def __str__(self):
         return f"{self.get_movement_type_display()}: {self.quantity} {self.material.unit} of {self.material.name}"
+    
+    def save(self, *args, **kwargs):
+        # Closed periods are immutable (see InventoryPeriodClose)
+        winery_id = self.material.winery_id
+        InventoryPeriodClose.check_open(winery_id, self.movement_date)
+        if not self._state.adding:
+            stored = MaterialMovement.objects.filter(pk=self.pk).values_list('movement_date', flat=True).first()
+            if stored is not None:
+                InventoryPeriodClose.check_open(winery_id, stored)
+            # Costs are replayed from the earlier of the stored and new dates (see signals)
+            self._stored_movement_date = stored
+        super().save(*args, **kwargs)
+    
+    def delete(self, *args, **kwargs):
+        InventoryPeriodClose.check_open(self.material.winery_id, self.movement_date)
+        return super().delete(*args, **kwargs)
 
 
 class Addition(models.Model):
@@ -319,6 +552,26 @@ class Addition(models.Model):
         help_text='Calculated dosage rate (e.g., 50 mg/L SO₂)'
     )
     
+    # Usage movement that took the material out of stock; bulk additions
+    # share one, and its value is split over them by quantity
+    movement = models.ForeignKey(
+        MaterialMovement,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='additions',
+        help_text='Usage movement booked for this addition'
+    )
+    
+    # Material cost at the weighted average of the addition date (apps.inventory.costing)
+    cost = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        help_text='Cost of the material added; null while unknown'
+    )
+    
     # User tracking
     added_by = models.ForeignKey(
         User,
@@ -333,7 +586,7 @@ class Addition(models.Model):
         db_table = 'inventory_addition'
         ordering = ['-addition_date', '-created_at']
         indexes = [
-            models.Index(fields=['winery', '-addition_date']),
+            models.Index(fields=['winery', '-addition_date', '-id']),
             models.Index(fields=['material']),
             models.Index(fields=['tank']),
             models.Index(fields=['barrel']),
@@ -355,9 +608,757 @@ class Addition(models.Model):
             return f"Batch {self.batch.batch_code}"
         return "Unknown target"
     
+    @classmethod
+    def create_bulk(cls, winery, material, doses, addition_date, user, purpose='', notes='', dosage_rate=''):
+        """
+        Record one addition per ``(vessel field, vessel, quantity, volume_l)``
+        in ``doses`` (vessel field ``'tank'`` or ``'barrel'``; an optional
+        fifth item overrides ``dosage_rate`` for that vessel) and book their
+        total as a single usage movement, in one transaction: one stock
+        update, one costing pass, set-based pricing of the additions and one
+        rollup upsert instead of a movement and its signals per vessel.
+        """
+        from . import costing
+        
+        total = sum((dose[2] for dose in doses), Decimal('0'))
+        with transaction.atomic():
+            movement = MaterialMovement.objects.create(
+                material=material,
+                movement_type=MovementType.USAGE,
+                quantity=-total,
+                location=StockLocation.MAIN_STORAGE,
+                movement_date=addition_date,
+                notes=f"Used in {len(doses)} vessels: {purpose or 'No purpose specified'}",
+                created_by=user,
+            )
+            additions = cls.objects.bulk_create(
+                [
+                    cls(
+                        winery=winery, material=material, movement=movement,
+                        quantity=quantity, target_volume_l=volume_l,
+                        addition_date=addition_date, purpose=purpose, notes=notes,
+                        dosage_rate=rate[0] if rate else dosage_rate, added_by=user, **{field: vessel},
+                    )
+                    for field, vessel, quantity, volume_l, *rate in doses
+                ],
+                batch_size=1000,
+            )
+            costing.allocate_additions(additions)
+            costing.cost_additions(MaterialMovement.objects.filter(pk=movement.pk))
+            AdditionDailyRollup.record(winery.pk, additions, tz=ZoneInfo(winery.timezone or 'UTC'))
+            
+            # bulk_create sends no post_save: bump the change version ourselves
+            transaction.on_commit(partial(bump_version, str(winery.pk), resource_name(cls)))
+        return movement, additions
+    
     def clean(self):
         """Validate that exactly one target is specified"""
         from django.core.exceptions import ValidationError
         targets = [self.tank, self.barrel, self.wine_lot, self.batch]
         if sum(1 for t in targets if t is not None) != 1:
             raise ValidationError('Addition must have exactly one target (tank, barrel, wine lot, or batch)')
+
+
+class LowStockAlert(models.Model):
+    """
+    Low-stock alert state, kept current by the stock write path: ``sync()``
+    raises an alert when a material's stock drops below its
+    ``low_stock_threshold``, refreshes it while it stays low and clears it
+    once stock is back up (or the threshold is removed). Alert feeds read
+    open alerts from here instead of aggregating stock per material.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    winery = models.ForeignKey(
+        Winery,
+        on_delete=models.CASCADE,
+        related_name='low_stock_alerts'
+    )
+    material = models.ForeignKey(
+        Material,
+        on_delete=models.CASCADE,
+        related_name='low_stock_alerts'
+    )
+    threshold = models.DecimalField(max_digits=10, decimal_places=2, help_text='Threshold crossed')
+    current_stock = models.DecimalField(max_digits=12, decimal_places=3, help_text='Stock at last update')
+    raised_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    cleared_at = models.DateTimeField(null=True, blank=True, help_text='When stock recovered; null while open')
+    
+    class Meta:
+        db_table = 'inventory_low_stock_alert'
+        ordering = ['-raised_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['material'],
+                condition=models.Q(cleared_at__isnull=True),
+                name='inventory_one_open_low_stock_alert',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['winery', '-raised_at'],
+                condition=models.Q(cleared_at__isnull=True),
+                name='inventory_open_low_stock_idx',
+            ),
+        ]
+    
+    def __str__(self):
+        state = 'cleared' if self.cleared_at else 'open'
+        return f"Low stock: {self.material.name} ({self.current_stock} < {self.threshold}, {state})"
+    
+    @classmethod
+    def sync(cls, material):
+        """
+        Raise, refresh or clear ``material``'s alert after its stock,
+        threshold or active flag changed. The material row is locked so
+        concurrent movements cannot open two alerts.
+        """
+        with transaction.atomic():
+            threshold, is_active = (
+                Material.objects.select_for_update()
+                .filter(pk=material.pk)
+                .values_list('low_stock_threshold', 'is_active')
+                .get()
+            )
+            stock = MaterialStock.objects.filter(material_id=material.pk).aggregate(
+                total=models.Sum('quantity')
+            )['total'] or Decimal('0')
+            alert = cls.objects.filter(material_id=material.pk, cleared_at__isnull=True).first()
+            is_low = is_active and threshold is not None and stock < threshold
+            
+            if is_low and alert is None:
+                cls.objects.create(
+                    winery_id=material.winery_id, material_id=material.pk,
+                    threshold=threshold, current_stock=stock,
+                )
+            elif is_low:
+                if (alert.current_stock, alert.threshold) != (stock, threshold):
+                    alert.current_stock = stock
+                    alert.threshold = threshold
+                    alert.save(update_fields=['current_stock', 'threshold', 'updated_at'])
+            elif alert is not None:
+                alert.current_stock = stock
+                alert.cleared_at = timezone.now()
+                alert.save(update_fields=['current_stock', 'cleared_at', 'updated_at'])
+
+
+class InventoryPeriodClose(models.Model):
+    """
+    A closed inventory period. Closing writes one ``StockSnapshot`` per
+    material and location holding the stock at the end of ``close_date``
+    (in the winery's time zone) and locks movements dated before that
+    boundary. Each close starts from the previous close's snapshots and only
+    adds the movements of its own period, and as-of stock queries read the
+    nearest snapshot plus the movements since (``stock_as_of``), so neither
+    replays the whole movement history.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    winery = models.ForeignKey(
+        Winery,
+        on_delete=models.CASCADE,
+        related_name='inventory_period_closes'
+    )
+    close_date = models.DateField(help_text='Last day of the closed period')
+    period_end = models.DateTimeField(help_text='End of close_date in the winery time zone (exclusive)')
+    notes = models.TextField(blank=True)
+    
+    closed_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='inventory_period_closes'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'inventory_period_close'
+        ordering = ['-close_date']
+        unique_together = ['winery', 'close_date']
+        indexes = [
+            models.Index(fields=['winery', '-period_end']),
+        ]
+    
+    def __str__(self):
+        return f"Inventory closed through {self.close_date}"
+    
+    @staticmethod
+    def end_of_day(winery, day):
+        """Start of the day after ``day`` in the winery's time zone."""
+        tz = ZoneInfo(winery.timezone or 'UTC')
+        return datetime.combine(day + timedelta(days=1), datetime.min.time(), tzinfo=tz)
+    
+    @classmethod
+    def latest(cls, winery, before=None):
+        """The most recent close of ``winery`` (ending at or before ``before``)."""
+        closes = cls.objects.filter(winery=winery)
+        if before is not None:
+            closes = closes.filter(period_end__lte=before)
+        return closes.order_by('-period_end').first()
+    
+    @classmethod
+    def check_open(cls, winery_id, moment):
+        """Raise ``ValidationError`` when ``moment`` falls in a closed period."""
+        from django.core.exceptions import ValidationError
+        
+        latest = (
+            cls.objects.filter(winery_id=winery_id)
+            .order_by('-period_end')
+            .values_list('period_end', 'close_date')
+            .first()
+        )
+        if latest is not None and moment < latest[0]:
+            raise ValidationError(
+                f'Inventory is closed through {latest[1]}; movements before then cannot be changed.'
+            )
+    
+    @classmethod
+    def close(cls, winery, close_date, user=None, notes=''):
+        """
+        Close the period ending on ``close_date`` and write its snapshots.
+        Raises ``ValidationError`` when the date is not after the last close
+        or the period has not ended yet.
+        """
+        from django.core.exceptions import ValidationError
+        
+        period_end = cls.end_of_day(winery, close_date)
+        if period_end > timezone.now():
+            raise ValidationError('The period has not ended yet.')
+        
+        with transaction.atomic():
+            # Serialize closes of the same winery
+            Winery.objects.select_for_update().filter(pk=winery.pk).get()
+            previous = cls.latest(winery)
+            if previous and previous.close_date >= close_date:
+                raise ValidationError(f'Inventory is already closed through {previous.close_date}.')
+            
+            quantities, unit_costs = StockSnapshot.carry_forward(
+                winery, previous, period_end, with_costs=True,
+            )
+            period = cls.objects.create(
+                winery=winery, close_date=close_date, period_end=period_end,
+                notes=notes, closed_by=user,
+            )
+            StockSnapshot.objects.bulk_create([
+                StockSnapshot(
+                    period_close=period,
+                    winery=winery,
+                    material_id=material_id,
+                    location=location,
+                    quantity=quantity,
+                    unit_cost=unit_costs.get(material_id),
+                    value=(
+                        (quantity * unit_costs[material_id]).quantize(Decimal('0.01'))
+                        if unit_costs.get(material_id) is not None else None
+                    ),
+                )
+                for (material_id, location), quantity in sorted(quantities.items())
+            ], batch_size=1000)
+        return period
+
+
+class StockSnapshot(models.Model):
+    """
+    Closing stock of one material at one location for an
+    ``InventoryPeriodClose``, valued at the material's moving average
+    purchase cost.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    period_close = models.ForeignKey(
+        InventoryPeriodClose,
+        on_delete=models.CASCADE,
+        related_name='snapshots'
+    )
+    winery = models.ForeignKey(
+        Winery,
+        on_delete=models.CASCADE,
+        related_name='stock_snapshots'
+    )
+    material = models.ForeignKey(
+        Material,
+        on_delete=models.CASCADE,
+        related_name='stock_snapshots'
+    )
+    location = models.CharField(max_length=20, choices=StockLocation.choices)
+    quantity = models.DecimalField(max_digits=12, decimal_places=3)
+    unit_cost = models.DecimalField(
+        max_digits=12, decimal_places=4, null=True, blank=True,
+        help_text='Moving average purchase cost; null when no priced purchase is known'
+    )
+    value = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+    
+    class Meta:
+        db_table = 'inventory_stock_snapshot'
+        ordering = ['material__name', 'location']
+        unique_together = ['period_close', 'material', 'location']
+    
+    def __str__(self):
+        return f"{self.material.name} @ {self.get_location_display()}: {self.quantity} ({self.period_close.close_date})"
+    
+    @staticmethod
+    def movement_deltas(winery, start, end):
+        """
+        Net stock change per ``(material_id, location)`` of the movements
+        dated in ``[start, end)`` (``start`` None: from the beginning), as
+        grouped queries. Transfers also credit their destination.
+        """
+        movements = MaterialMovement.objects.filter(material__winery=winery, movement_date__lt=end)
+        if start is not None:
+            movements = movements.filter(movement_date__gte=start)
+        
+        deltas = defaultdict(Decimal)
+        rows = movements.order_by().values_list('material_id', 'location').annotate(
+            total=models.Sum('quantity')
+        )
+        for material_id, location, total in rows:
+            deltas[material_id, location] += total
+        rows = (
+            movements.filter(movement_type=MovementType.TRANSFER, destination_location__isnull=False)
+            .order_by()
+            .values_list('material_id', 'destination_location')
+            .annotate(total=models.Sum(Abs('quantity')))
+        )
+        for material_id, location, total in rows:
+            deltas[material_id, location] += total
+        return deltas
+    
+    @classmethod
+    def carry_forward(cls, winery, previous, end, with_costs=False):
+        """
+        Stock per ``(material_id, location)`` at ``end``: the snapshots of
+        ``previous`` (an ``InventoryPeriodClose`` or None) plus the movements
+        since. With ``with_costs``, also returns the weighted average unit
+        cost per material at ``end``.
+        """
+        start = previous.period_end if previous else None
+        quantities = defaultdict(Decimal)
+        unit_costs = {}
+        if previous:
+            for material_id, location, quantity, unit_cost in previous.snapshots.values_list(
+                'material_id', 'location', 'quantity', 'unit_cost',
+            ):
+                quantities[material_id, location] = quantity
+                if unit_cost is not None:
+                    unit_costs[material_id] = unit_cost
+        
+        for key, delta in cls.movement_deltas(winery, start, end).items():
+            quantities[key] += delta
+        if not with_costs:
+            return quantities
+        
+        # Average cost after each material's last movement of the period
+        # (see apps.inventory.costing); materials without one keep theirs
+        movements = MaterialMovement.objects.filter(
+            material__winery=winery, movement_date__lt=end, balance_unit_cost__isnull=False,
+        )
+        if start is not None:
+            movements = movements.filter(movement_date__gte=start)
+        rows = movements.order_by(
+            'material_id', '-movement_date', '-created_at', '-id',
+        ).distinct('material_id').values_list('material_id', 'balance_unit_cost')
+        unit_costs.update(rows)
+        return quantities, unit_costs
+    
+    @classmethod
+    def stock_as_of(cls, winery, at):
+        """
+        Stock per ``(material_id, location)`` at the moment ``at``, from the
+        latest close ending at or before it plus the movements since.
+        Returns ``(quantities, period_close)``.
+        """
+        previous = InventoryPeriodClose.latest(winery, before=at)
+        return cls.carry_forward(winery, previous, at), previous
+
+
+class MaterialCost(models.Model):
+    """
+    Running weighted average cost of a material, updated as movements
+    arrive (see apps.inventory.costing). ``costed_through`` is the date of
+    the latest movement applied: an older (backdated) movement triggers a
+    recompute from that date instead of an incremental update.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    winery = models.ForeignKey(
+        Winery,
+        on_delete=models.CASCADE,
+        related_name='material_costs'
+    )
+    material = models.OneToOneField(
+        Material,
+        on_delete=models.CASCADE,
+        related_name='cost'
+    )
+    quantity = models.DecimalField(max_digits=12, decimal_places=3, default=0)
+    average_cost = models.DecimalField(max_digits=12, decimal_places=4, null=True, blank=True)
+    costed_through = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'inventory_material_cost'
+    
+    def __str__(self):
+        return f"{self.material.name}: {self.quantity} @ {self.average_cost}"
+    
+    @property
+    def stock_value(self):
+        if self.average_cost is None:
+            return None
+        return (self.quantity * self.average_cost).quantize(Decimal('0.01'))
+
+
+class AdditionCostAllocation(models.Model):
+    """
+    Share of an addition's cost attributed to a batch or wine lot. Tank
+    additions are split by the tank's ledger composition at the addition
+    date; additions to a lot or batch are attributed to it in full.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    winery = models.ForeignKey(
+        Winery,
+        on_delete=models.CASCADE,
+        related_name='addition_cost_allocations'
+    )
+    addition = models.ForeignKey(
+        Addition,
+        on_delete=models.CASCADE,
+        related_name='cost_allocations'
+    )
+    composition_key_type = models.CharField(max_length=20, help_text='BATCH, WINE_LOT or UNKNOWN (ledger key)')
+    composition_key_id = models.UUIDField(null=True, blank=True)
+    composition_key_label = models.CharField(max_length=100, blank=True)
+    volume_l = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, blank=True,
+        help_text='Volume of this key in the tank at the addition date'
+    )
+    share = models.DecimalField(max_digits=9, decimal_places=8, help_text='Fraction of the addition')
+    cost = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    
+    class Meta:
+        db_table = 'inventory_addition_cost_allocation'
+        indexes = [
+            models.Index(fields=['winery', 'composition_key_type', 'composition_key_id']),
+        ]
+    
+    def __str__(self):
+        return f"{self.composition_key_label or self.composition_key_type}: {self.cost}"
+
+
+class AdditionTarget(models.TextChoices):
+    """Kind of vessel an addition went into"""
+    TANK = 'TANK', 'Tank'
+    BARREL = 'BARREL', 'Barrel'
+    WINE_LOT = 'WINE_LOT', 'Wine Lot'
+    BATCH = 'BATCH', 'Batch'
+
+
+def winery_timezone(winery_id):
+    """Time zone of the winery ``winery_id`` (UTC when unset or gone)."""
+    name = Winery.objects.filter(pk=winery_id).values_list('timezone', flat=True).first()
+    return ZoneInfo(name or 'UTC')
+
+
+def _add_to_rollups(model, key, columns, rows):
+    """
+    Add ``rows`` (tuples of ``columns`` followed by an addition count and
+    quantity) to ``model``'s rollup rows with one ``INSERT ... ON CONFLICT
+    DO UPDATE`` on the unique ``key`` fields, in key order so concurrent
+    writers do not deadlock. Non-key columns take the new value.
+    """
+    if not rows:
+        return
+    rows = sorted(rows, key=lambda row: tuple(str(value or '') for value in row))
+    key_columns = [model._meta.get_field(field).column for field in key]
+    table = connection.ops.quote_name(model._meta.db_table)
+    names = ', '.join(columns)
+    values = ', '.join([f"(gen_random_uuid(), {', '.join(['%s'] * (len(columns) + 2))}, now())"] * len(rows))
+    replaced = ''.join(f'{column} = EXCLUDED.{column}, ' for column in columns if column not in key_columns)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {table} AS rollup (id, {names}, addition_count, total_quantity, updated_at)
+            VALUES {values}
+            ON CONFLICT ({', '.join(key_columns)}) DO UPDATE SET
+                {replaced}addition_count = rollup.addition_count + EXCLUDED.addition_count,
+                total_quantity = rollup.total_quantity + EXCLUDED.total_quantity,
+                updated_at = EXCLUDED.updated_at
+            """,
+            [value for row in rows for value in row],
+        )
+
+
+def _lock_rollups(model, keys):
+    """
+    Lock ``model``'s rollup rows with the field values ``keys`` (dicts),
+    creating empty rows for missing keys first. Waits for transactions
+    that are adding to those rows, so a recount that follows sees their
+    additions and cannot overwrite their totals.
+    """
+    model.objects.bulk_create([model(**key) for key in keys], ignore_conflicts=True)
+    matching = models.Q()
+    for key in keys:
+        matching |= models.Q(**{
+            field if value is not None else f'{field}__isnull': value if value is not None else True
+            for field, value in key.items()
+        })
+    order = [models.F(field).asc(nulls_first=True) for field in keys[0]]
+    list(model.objects.filter(matching).order_by(*order).select_for_update().values_list('pk', flat=True))
+
+
+class AdditionMonthlyRollup(models.Model):
+    """
+    Additions per winery, material and month (in the winery's time zone),
+    maintained with ``AdditionDailyRollup``. All-time addition totals read
+    these rows, which grow with materials x months rather than with
+    vessels x days.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    winery = models.ForeignKey(
+        Winery,
+        on_delete=models.CASCADE,
+        related_name='addition_monthly_rollups'
+    )
+    material = models.ForeignKey(
+        Material,
+        on_delete=models.CASCADE,
+        related_name='addition_monthly_rollups'
+    )
+    month = models.DateField(help_text='First day of the month')
+    addition_count = models.PositiveIntegerField(default=0)
+    total_quantity = models.DecimalField(max_digits=14, decimal_places=3, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'inventory_addition_monthly_rollup'
+        ordering = ['-month']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['winery', 'material', 'month'],
+                name='inventory_addition_monthly_rollup_key',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.month:%Y-%m} {self.material.name}: {self.total_quantity}"
+
+
+class AdditionDailyRollup(models.Model):
+    """
+    Additions per winery, material, day (in the winery's time zone) and
+    vessel, kept current by the addition write path together with
+    ``AdditionMonthlyRollup``: new additions are added with one upsert per
+    table (``record()``) and edited or deleted ones recount their keys
+    (``refresh()``). Addition summaries and usage reports aggregate these
+    rows instead of the addition table.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    winery = models.ForeignKey(
+        Winery,
+        on_delete=models.CASCADE,
+        related_name='addition_rollups'
+    )
+    material = models.ForeignKey(
+        Material,
+        on_delete=models.CASCADE,
+        related_name='addition_rollups'
+    )
+    day = models.DateField(help_text='Addition date in the winery time zone')
+    vessel_type = models.CharField(
+        max_length=10, choices=AdditionTarget.choices, blank=True,
+        help_text='Blank for additions without a target'
+    )
+    vessel_id = models.UUIDField(null=True, blank=True)
+    vessel_label = models.CharField(max_length=50, blank=True, help_text='Vessel code at the last addition')
+    addition_count = models.PositiveIntegerField(default=0)
+    total_quantity = models.DecimalField(max_digits=14, decimal_places=3, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    # (vessel type, Addition field, code field of the vessel)
+    TARGET_FIELDS = (
+        (AdditionTarget.TANK, 'tank', 'code'),
+        (AdditionTarget.BARREL, 'barrel', 'code'),
+        (AdditionTarget.WINE_LOT, 'wine_lot', 'lot_code'),
+        (AdditionTarget.BATCH, 'batch', 'batch_code'),
+    )
+    
+    class Meta:
+        db_table = 'inventory_addition_daily_rollup'
+        ordering = ['-day']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['winery', 'material', 'day', 'vessel_type', 'vessel_id'],
+                nulls_distinct=False,
+                name='inventory_addition_rollup_key',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['winery', 'day']),
+            models.Index(fields=['winery', 'vessel_type', 'vessel_id', 'day']),
+        ]
+    
+    def __str__(self):
+        return f"{self.day} {self.material.name} → {self.vessel_label or 'no target'}: {self.total_quantity}"
+    
+    @classmethod
+    def key(cls, addition, tz):
+        """``(material_id, day, vessel_type, vessel_id)`` rollup key of ``addition``."""
+        day = timezone.localtime(addition.addition_date, tz).date()
+        for vessel_type, field, _ in cls.TARGET_FIELDS:
+            vessel_id = getattr(addition, f'{field}_id')
+            if vessel_id:
+                return addition.material_id, day, vessel_type, vessel_id
+        return addition.material_id, day, '', None
+    
+    @classmethod
+    def label(cls, addition):
+        """Code of ``addition``'s vessel."""
+        for _, field, code in cls.TARGET_FIELDS:
+            if getattr(addition, f'{field}_id'):
+                return getattr(getattr(addition, field), code)[:50]
+        return ''
+    
+    @classmethod
+    def record(cls, winery_id, additions, tz=None):
+        """Add new ``additions`` (all of one winery) to their daily and monthly rows."""
+        tz = tz or winery_timezone(winery_id)
+        days, months = {}, defaultdict(lambda: [0, Decimal('0')])
+        for addition in additions:
+            key = cls.key(addition, tz)
+            _, count, quantity = days.get(key, (None, 0, Decimal('0')))
+            days[key] = (cls.label(addition), count + 1, quantity + addition.quantity)
+            month = months[key[0], key[1].replace(day=1)]
+            month[0] += 1
+            month[1] += addition.quantity
+        
+        _add_to_rollups(
+            cls,
+            ['winery', 'material', 'day', 'vessel_type', 'vessel_id'],
+            ['winery_id', 'material_id', 'day', 'vessel_type', 'vessel_id', 'vessel_label'],
+            [(winery_id, *key, *totals) for key, totals in days.items()],
+        )
+        _add_to_rollups(
+            AdditionMonthlyRollup,
+            ['winery', 'material', 'month'],
+            ['winery_id', 'material_id', 'month'],
+            [(winery_id, *key, *totals) for key, totals in months.items()],
+        )
+    
+    @classmethod
+    def refresh(cls, winery_id, additions, tz=None):
+        """
+        Recount the daily and monthly rows of ``additions`` (as edited,
+        deleted or before an edit) from the addition table, one aggregate
+        per key. The rows are locked before counting so additions recorded
+        concurrently are neither missed nor counted twice. Only reads key
+        columns, so it is safe for additions whose vessel was deleted with
+        them.
+        """
+        tz = tz or winery_timezone(winery_id)
+        keys = sorted({cls.key(addition, tz) for addition in additions}, key=str)
+        months = sorted({(key[0], key[1].replace(day=1)) for key in keys}, key=str)
+        
+        def local_midnight(day):
+            return datetime.combine(day, datetime.min.time(), tzinfo=tz)
+        
+        with transaction.atomic():
+            _lock_rollups(cls, [
+                {'winery_id': winery_id, 'material_id': material_id, 'day': day,
+                 'vessel_type': vessel_type, 'vessel_id': vessel_id}
+                for material_id, day, vessel_type, vessel_id in keys
+            ])
+            _lock_rollups(AdditionMonthlyRollup, [
+                {'winery_id': winery_id, 'material_id': material_id, 'month': month}
+                for material_id, month in months
+            ])
+            
+            for material_id, day, vessel_type, vessel_id in keys:
+                matching = Addition.objects.filter(
+                    winery_id=winery_id, material_id=material_id,
+                    addition_date__gte=local_midnight(day), addition_date__lt=local_midnight(day + timedelta(days=1)),
+                )
+                label = models.Value('')
+                for target, field, code in cls.TARGET_FIELDS:
+                    if target == vessel_type:
+                        matching = matching.filter(**{f'{field}_id': vessel_id})
+                        label = models.Max(f'{field}__{code}')
+                    else:
+                        matching = matching.filter(**{f'{field}__isnull': True})
+                totals = matching.aggregate(count=models.Count('id'), quantity=models.Sum('quantity'), label=label)
+            
+                rows = cls.objects.filter(
+                    winery_id=winery_id, material_id=material_id, day=day, vessel_type=vessel_type,
+                    **({'vessel_id': vessel_id} if vessel_id else {'vessel_id__isnull': True}),
+                )
+                if not totals['count']:
+                    rows.delete()
+                    continue
+                rows.update(
+                    vessel_label=(totals['label'] or '')[:50], addition_count=totals['count'],
+                    total_quantity=totals['quantity'], updated_at=timezone.now(),
+                )
+            
+            for material_id, month in months:
+                next_month = (month + timedelta(days=32)).replace(day=1)
+                totals = Addition.objects.filter(
+                    winery_id=winery_id, material_id=material_id,
+                    addition_date__gte=local_midnight(month), addition_date__lt=local_midnight(next_month),
+                ).aggregate(count=models.Count('id'), quantity=models.Sum('quantity'))
+                rows = AdditionMonthlyRollup.objects.filter(winery_id=winery_id, material_id=material_id, month=month)
+                if not totals['count']:
+                    rows.delete()
+                    continue
+                rows.update(addition_count=totals['count'], total_quantity=totals['quantity'], updated_at=timezone.now())
+    
+    @classmethod
+    def rebuild(cls, winery):
+        """
+        Replace ``winery``'s daily and monthly rollups with a fresh
+        aggregate of its additions (backfill and repair), with one grouped
+        query per vessel kind. Returns the number of daily rows.
+        """
+        tz = ZoneInfo(winery.timezone or 'UTC')
+        additions = Addition.objects.filter(winery=winery).order_by()
+        rows = []
+        for vessel_type, field, code in cls.TARGET_FIELDS:
+            grouped = additions.filter(**{f'{field}__isnull': False}).values_list(
+                'material_id', TruncDate('addition_date', tzinfo=tz), f'{field}_id',
+            ).annotate(label=models.Max(f'{field}__{code}'), count=models.Count('id'), quantity=models.Sum('quantity'))
+            rows.extend(
+                (material_id, day, vessel_type, vessel_id, label[:50], count, quantity)
+                for material_id, day, vessel_id, label, count, quantity in grouped
+            )
+        untargeted = additions.filter(
+            **{f'{field}__isnull': True for _, field, _ in cls.TARGET_FIELDS}
+        ).values_list('material_id', TruncDate('addition_date', tzinfo=tz)).annotate(
+            count=models.Count('id'), quantity=models.Sum('quantity'),
+        )
+        rows.extend((material_id, day, '', None, '', count, quantity) for material_id, day, count, quantity in untargeted)
+        
+        months = defaultdict(lambda: [0, Decimal('0')])
+        for material_id, day, *_, count, quantity in rows:
+            month = months[material_id, day.replace(day=1)]
+            month[0] += count
+            month[1] += quantity
+        
+        with transaction.atomic():
+            cls.objects.filter(winery=winery).delete()
+            AdditionMonthlyRollup.objects.filter(winery=winery).delete()
+            cls.objects.bulk_create(
+                [
+                    cls(
+                        winery=winery, material_id=material_id, day=day, vessel_type=vessel_type,
+                        vessel_id=vessel_id, vessel_label=label, addition_count=count, total_quantity=quantity,
+                    )
+                    for material_id, day, vessel_type, vessel_id, label, count, quantity in rows
+                ],
+                batch_size=2000,
+            )
+            AdditionMonthlyRollup.objects.bulk_create(
+                [
+                    AdditionMonthlyRollup(
+                        winery=winery, material_id=material_id, month=month,
+                        addition_count=count, total_quantity=quantity,
+                    )
+                    for (material_id, month), (count, quantity) in months.items()
+                ],
+                batch_size=2000,
+            )
+        return len(rows)
@@ -1,8 +1,25 @@
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework import serializers
-from .models import Material, MaterialStock, MaterialMovement, Addition
+from apps.core.serializers import SparseFieldsetMixin
+from apps.equipment.models import Barrel, Tank
+from .dosage import METHODS, RATE_UNITS, SO2_METHODS, method_factor, plan_doses, so2_readings
+from .models import (
+    Material, MaterialStock, MaterialMovement, Addition, LowStockAlert,
+    InventoryPeriodClose, StockSnapshot, MaterialCost, AdditionCostAllocation,
+)
+
 
+def validate_period_open(material, moment, field):
+    """Reject dates inside a closed inventory period"""
+    try:
+        InventoryPeriodClose.check_open(material.winery_id, moment)
+    except DjangoValidationError as exc:
+        raise serializers.ValidationError({field: exc.messages})
 
-class MaterialListSerializer(serializers.ModelSerializer):
+
+class MaterialListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for material list view"""
     current_stock = serializers.SerializerMethodField()
     is_low_stock = serializers.SerializerMethodField()
@@ -32,14 +49,17 @@ class MaterialDetailSerializer(serializers.ModelSerializer):
     category_display = serializers.CharField(source='get_category_display', read_only=True)
     unit_display = serializers.CharField(source='get_unit_display', read_only=True)
     stock_by_location = serializers.SerializerMethodField()
+    average_cost = serializers.SerializerMethodField()
+    stock_value = serializers.SerializerMethodField()
     
     class Meta:
         model = Material
         fields = [
             'id', 'winery', 'name', 'code', 'category', 'category_display',
             'unit', 'unit_display', 'supplier', 'notes',
-            'low_stock_threshold', 'current_stock', 'is_low_stock',
-            'stock_by_location', 'is_active', 'created_at', 'updated_at'
+            'low_stock_threshold', 'active_ingredient', 'active_fraction',
+            'current_stock', 'is_low_stock', 'stock_by_location', 'average_cost', 'stock_value',
+            'is_active', 'created_at', 'updated_at'
         ]
         read_only_fields = ['winery', 'created_at', 'updated_at']
     
@@ -58,6 +78,20 @@ class MaterialDetailSerializer(serializers.ModelSerializer):
             }
             for stock in obj.stock_locations.all()
         ]
+    
+    def _cost(self, obj):
+        try:
+            return obj.cost
+        except MaterialCost.DoesNotExist:
+            return None
+    
+    def get_average_cost(self, obj):
+        cost = self._cost(obj)
+        return float(cost.average_cost) if cost and cost.average_cost is not None else None
+    
+    def get_stock_value(self, obj):
+        cost = self._cost(obj)
+        return float(cost.stock_value) if cost and cost.stock_value is not None else None
 
 
 class MaterialCreateUpdateSerializer(serializers.ModelSerializer):
@@ -66,7 +100,7 @@ class MaterialCreateUpdateSerializer(serializers.ModelSerializer):
         model = Material
         fields = [
             'name', 'code', 'category', 'unit', 'supplier',
-            'notes', 'low_stock_threshold', 'is_active'
+            'notes', 'low_stock_threshold', 'active_ingredient', 'active_fraction', 'is_active'
         ]
 
 
@@ -101,7 +135,7 @@ class MaterialStockSerializer(serializers.ModelSerializer):
         read_only_fields = ['updated_at']
 
 
-class MaterialMovementListSerializer(serializers.ModelSerializer):
+class MaterialMovementListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for movement list"""
     material_name = serializers.CharField(source='material.name', read_only=True)
     material_unit = serializers.CharField(source='material.unit', read_only=True)
@@ -117,7 +151,7 @@ class MaterialMovementListSerializer(serializers.ModelSerializer):
             'movement_type', 'movement_type_display', 'quantity',
             'location', 'location_display', 'destination_location',
             'destination_location_display', 'movement_date',
-            'reference_number', 'unit_cost', 'notes',
+            'reference_number', 'unit_cost', 'cost_value', 'notes',
             'created_by', 'created_by_name', 'created_at'
         ]
     
@@ -138,6 +172,12 @@ class MaterialMovementCreateSerializer(serializers.ModelSerializer):
         ]
     
     def validate(self, data):
+        # Movements of closed periods are locked, before and after the change
+        material = data.get('material') or self.instance.material
+        if self.instance is not None:
+            validate_period_open(self.instance.material, self.instance.movement_date, 'movement_date')
+        validate_period_open(material, data.get('movement_date') or self.instance.movement_date, 'movement_date')
+        
         # Validate that TRANSFER has destination_location
         if data['movement_type'] == 'TRANSFER' and not data.get('destination_location'):
             raise serializers.ValidationError({
@@ -153,7 +193,7 @@ class MaterialMovementCreateSerializer(serializers.ModelSerializer):
         return data
 
 
-class AdditionListSerializer(serializers.ModelSerializer):
+class AdditionListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for addition list"""
     material_name = serializers.CharField(source='material.name', read_only=True)
     material_unit = serializers.CharField(source='material.unit', read_only=True)
@@ -166,9 +206,22 @@ class AdditionListSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'material', 'material_name', 'material_unit', 'material_category',
             'quantity', 'target_display', 'tank', 'barrel', 'wine_lot', 'batch',
-            'addition_date', 'purpose', 'dosage_rate', 'target_volume_l',
+            'addition_date', 'purpose', 'dosage_rate', 'target_volume_l', 'cost',
             'added_by', 'added_by_name', 'created_at'
         ]
+        field_lookups = {
+            'target_display': ['tank', 'barrel', 'wine_lot', 'batch'],
+        }
+
+
+class AdditionCostAllocationSerializer(serializers.ModelSerializer):
+    """Serializer for the batch/lot shares of an addition's cost"""
+    class Meta:
+        model = AdditionCostAllocation
+        fields = [
+            'composition_key_type', 'composition_key_id', 'composition_key_label',
+            'volume_l', 'share', 'cost'
+        ]
 
 
 class AdditionDetailSerializer(serializers.ModelSerializer):
@@ -181,6 +234,7 @@ class AdditionDetailSerializer(serializers.ModelSerializer):
     barrel_code = serializers.CharField(source='barrel.code', read_only=True)
     wine_lot_code = serializers.CharField(source='wine_lot.code', read_only=True)
     batch_code = serializers.CharField(source='batch.batch_code', read_only=True)
+    cost_allocations = AdditionCostAllocationSerializer(many=True, read_only=True)
     
     class Meta:
         model = Addition
@@ -189,10 +243,10 @@ class AdditionDetailSerializer(serializers.ModelSerializer):
             'quantity', 'tank', 'tank_code', 'barrel', 'barrel_code',
             'wine_lot', 'wine_lot_code', 'batch', 'batch_code',
             'target_display', 'addition_date', 'purpose', 'notes',
-            'target_volume_l', 'dosage_rate', 'added_by', 'added_by_name',
-            'created_at', 'updated_at'
+            'target_volume_l', 'dosage_rate', 'cost', 'cost_allocations',
+            'added_by', 'added_by_name', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['winery', 'created_at', 'updated_at']
+        read_only_fields = ['winery', 'cost', 'created_at', 'updated_at']
 
 
 class AdditionCreateSerializer(serializers.ModelSerializer):
@@ -215,5 +269,136 @@ class AdditionCreateSerializer(serializers.ModelSerializer):
         if target_count > 1:
             raise serializers.ValidationError('You can only specify one target (tank, barrel, wine lot, or batch)')
         
+        # The addition books a usage movement on its date
+        if self.instance is None:
+            validate_period_open(data['material'], data['addition_date'], 'addition_date')
+        
+        return data
+
+
+class AdditionBulkCreateSerializer(serializers.Serializer):
+    """
+    Serializer for adding one material to many tanks and barrels; each
+    vessel's quantity comes from its current volume and the dosage method
+    (see apps.inventory.dosage). The validated ``plan`` holds every
+    vessel's dose and ``doses`` those to commit.
+    """
+    MAX_VESSELS = 1000
+    
+    material = serializers.PrimaryKeyRelatedField(queryset=Material.objects.all())
+    method = serializers.ChoiceField(choices=list(METHODS), default='rate')
+    dosage_rate = serializers.DecimalField(
+        max_digits=10, decimal_places=3, min_value=Decimal('0.001'),
+        help_text='Product or active ingredient rate, or the SO₂ target in mg/L'
+    )
+    rate_unit = serializers.ChoiceField(choices=list(RATE_UNITS), required=False)
+    tanks = serializers.ListField(child=serializers.UUIDField(), required=False, default=list)
+    barrels = serializers.ListField(child=serializers.UUIDField(), required=False, default=list)
+    addition_date = serializers.DateTimeField()
+    purpose = serializers.CharField(max_length=200, required=False, allow_blank=True, default='')
+    notes = serializers.CharField(required=False, allow_blank=True, default='')
+    preview = serializers.BooleanField(required=False, default=False)
+    
+    def validate(self, data):
+        winery = self.context['request'].winery
+        material = data['material']
+        if material.winery_id != winery.id:
+            raise serializers.ValidationError({'material': 'Material not found'})
+        
+        tank_ids, barrel_ids = set(data['tanks']), set(data['barrels'])
+        if not tank_ids and not barrel_ids:
+            raise serializers.ValidationError('You must specify at least one tank or barrel')
+        if len(tank_ids) + len(barrel_ids) > self.MAX_VESSELS:
+            raise serializers.ValidationError(f'At most {self.MAX_VESSELS} vessels per request')
+        
+        method = data['method']
+        if method not in SO2_METHODS and not data.get('rate_unit'):
+            raise serializers.ValidationError({'rate_unit': f'Required for the {method} method'})
+        try:
+            method_factor(material, method, data.get('rate_unit'))
+        except ValueError as exc:
+            raise serializers.ValidationError({'rate_unit' if method == 'rate' else 'method': str(exc)})
+        
+        validate_period_open(material, data['addition_date'], 'addition_date')
+        
+        vessels = []
+        for field, model, ids in (('tank', Tank, tank_ids), ('barrel', Barrel, barrel_ids)):
+            if not ids:
+                continue
+            found = list(model.objects.filter(winery=winery, pk__in=ids).only('id', 'code', 'current_volume_l'))
+            if len(found) != len(ids):
+                missing = sorted(str(pk) for pk in ids - {vessel.pk for vessel in found})
+                raise serializers.ValidationError({f'{field}s': f'Not found: {", ".join(missing)}'})
+            empty = sorted(vessel.code for vessel in found if vessel.current_volume_l <= 0)
+            if empty:
+                raise serializers.ValidationError({f'{field}s': f'Empty: {", ".join(empty)}'})
+            vessels.extend((field, vessel) for vessel in sorted(found, key=lambda vessel: vessel.code))
+        
+        readings = so2_readings(winery, vessels) if method in SO2_METHODS else None
+        data['plan'] = plan_doses(
+            material, method, data['dosage_rate'], data.get('rate_unit'), vessels, readings,
+        )
+        data['doses'] = [
+            (row['field'], row['vessel'], row['quantity'], row['volume_l'], row['dosage_rate'])
+            for row in data['plan'] if row['quantity'] is not None
+        ]
+        if not data['doses'] and not data['preview']:
+            raise serializers.ValidationError('No vessel needs an addition')
         return data
 
+
+class DosePlanSerializer(serializers.Serializer):
+    """One vessel of a bulk addition preview"""
+    vessel_type = serializers.CharField(source='field')
+    vessel_id = serializers.UUIDField(source='vessel.id')
+    code = serializers.CharField(source='vessel.code')
+    volume_l = serializers.DecimalField(max_digits=10, decimal_places=2)
+    ph = serializers.FloatField(allow_null=True)
+    free_so2_mgl = serializers.FloatField(allow_null=True)
+    molecular_so2_mgl = serializers.FloatField(allow_null=True)
+    analysis_date = serializers.DateTimeField(allow_null=True)
+    dose = serializers.FloatField(allow_null=True)
+    dose_unit = serializers.CharField()
+    quantity = serializers.DecimalField(max_digits=12, decimal_places=3, allow_null=True)
+    dosage_rate = serializers.CharField()
+    status = serializers.CharField()
+
+
+class LowStockAlertSerializer(serializers.ModelSerializer):
+    """Serializer for low-stock alerts"""
+    material_name = serializers.CharField(source='material.name', read_only=True)
+    material_unit = serializers.CharField(source='material.unit', read_only=True)
+    
+    class Meta:
+        model = LowStockAlert
+        fields = [
+            'id', 'material', 'material_name', 'material_unit',
+            'threshold', 'current_stock', 'raised_at', 'updated_at', 'cleared_at'
+        ]
+
+
+class InventoryPeriodCloseSerializer(serializers.ModelSerializer):
+    """Serializer for inventory period closes"""
+    closed_by_name = serializers.CharField(source='closed_by.full_name', read_only=True)
+    
+    class Meta:
+        model = InventoryPeriodClose
+        fields = [
+            'id', 'close_date', 'period_end', 'notes',
+            'closed_by', 'closed_by_name', 'created_at'
+        ]
+        read_only_fields = ['period_end', 'closed_by', 'created_at']
+
+
+class StockSnapshotSerializer(serializers.ModelSerializer):
+    """Serializer for closing stock snapshots"""
+    material_name = serializers.CharField(source='material.name', read_only=True)
+    material_unit = serializers.CharField(source='material.unit', read_only=True)
+    location_display = serializers.CharField(source='get_location_display', read_only=True)
+    
+    class Meta:
+        model = StockSnapshot
+        fields = [
+            'id', 'material', 'material_name', 'material_unit',
+            'location', 'location_display', 'quantity', 'unit_cost', 'value'
+        ]
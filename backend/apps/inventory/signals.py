@@ -1,50 +1,76 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.db import transaction
-from .models import MaterialMovement, Addition, MaterialStock
+from django.db.models import QuerySet
+from apps.wineries.models import Winery
+from . import costing, forecasting
+from .models import AdditionDailyRollup, LowStockAlert, Material, MaterialMovement, Addition, MaterialStock
 
 
 @receiver(post_save, sender=MaterialMovement)
 def update_stock_on_movement(sender, instance, created, **kwargs):
     """
-    Automatically update MaterialStock when a MaterialMovement is created or updated
+    Automatically update MaterialStock when a MaterialMovement is created.
+    
+    Stock rows are upserted atomically in the database (see
+    MaterialStock.apply_deltas), so concurrent movements never lose updates.
+    The movement is then costed at the material's weighted average (see
+    apps.inventory.costing).
     """
     if not created:
         return  # Only process new movements
     
+    # quantity is negative for removals (and for transfers out of the source)
+    deltas = {instance.location: instance.quantity}
+    if instance.movement_type == 'TRANSFER' and instance.destination_location:
+        # Transfers also credit the destination, in the same statement
+        destination = instance.destination_location
+        deltas[destination] = deltas.get(destination, 0) + abs(instance.quantity)
+    
     with transaction.atomic():
-        # Get or create stock record for the location
-        stock, _ = MaterialStock.objects.get_or_create(
-            material=instance.material,
-            location=instance.location,
-            defaults={'quantity': 0}
-        )
-        
-        # Update stock based on movement type
-        if instance.movement_type == 'TRANSFER':
-            # For transfers, we need to update both source and destination
-            # Decrease from source location
-            stock.quantity += instance.quantity  # quantity should be negative for transfers out
-            stock.save(update_fields=['quantity'])
-            
-            # Increase at destination (if specified)
-            if instance.destination_location:
-                dest_stock, _ = MaterialStock.objects.get_or_create(
-                    material=instance.material,
-                    location=instance.destination_location,
-                    defaults={'quantity': 0}
-                )
-                dest_stock.quantity += abs(instance.quantity)  # Add positive quantity
-                dest_stock.save(update_fields=['quantity'])
-        else:
-            # For other movement types, just update the stock
-            stock.quantity += instance.quantity
-            stock.save(update_fields=['quantity'])
-        
-        # Ensure stock doesn't go negative
-        if stock.quantity < 0:
-            stock.quantity = 0
-            stock.save(update_fields=['quantity'])
+        MaterialStock.apply_deltas(instance.material, deltas)
+        LowStockAlert.sync(instance.material)
+        costing.record_movement(instance)
+
+
+@receiver(post_save, sender=MaterialMovement)
+def recost_on_movement_edit(sender, instance, created, **kwargs):
+    """
+    Re-cost the material from the earlier of the movement's stored and new
+    dates when an existing movement is edited: its quantity, price or date
+    change the balance of every movement after it
+    """
+    if created:
+        return
+    stored = getattr(instance, '_stored_movement_date', None) or instance.movement_date
+    costing.recompute_material(instance.material, since=min(stored, instance.movement_date))
+
+
+@receiver(post_delete, sender=MaterialMovement)
+def recost_on_movement_delete(sender, instance, origin=None, **kwargs):
+    """Re-cost the material from a deleted movement's date"""
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if origin is not None and origin_model is not MaterialMovement:
+        return  # Deleted along with its material or winery, whose costs go too
+    costing.recompute_material(instance.material, since=instance.movement_date)
+
+
+@receiver([post_save, post_delete], sender=MaterialMovement)
+def invalidate_forecast_on_movement_change(sender, instance, created=False, **kwargs):
+    """
+    Drop the cached consumption forecast when a movement is edited or
+    deleted; new movements are folded in incrementally on the next read
+    (see apps.inventory.forecasting)
+    """
+    if created:
+        return
+    forecasting.invalidate(instance.material.winery_id)
+
+
+@receiver(post_save, sender=Material)
+def sync_low_stock_alert_on_material(sender, instance, **kwargs):
+    """Raise or clear the low-stock alert when the threshold or active flag changes"""
+    LowStockAlert.sync(instance)
 
 
 @receiver(post_save, sender=Addition)
@@ -57,7 +83,7 @@ def create_movement_on_addition(sender, instance, created, **kwargs):
         return  # Only process new additions
     
     # Create a USAGE movement to track the stock reduction
-    MaterialMovement.objects.create(
+    movement = MaterialMovement.objects.create(
         material=instance.material,
         movement_type='USAGE',
         quantity=-instance.quantity,  # Negative because it's being used
@@ -66,4 +92,43 @@ def create_movement_on_addition(sender, instance, created, **kwargs):
         notes=f"Used in {instance.get_target_display()}: {instance.purpose or 'No purpose specified'}",
         created_by=instance.added_by
     )
+    
+    # Link the movement, then price the addition and its lot shares from it
+    Addition.objects.filter(pk=instance.pk).update(movement=movement)
+    instance.movement = movement
+    costing.allocate_additions([instance])
+    costing.cost_additions(MaterialMovement.objects.filter(pk=movement.pk))
+
+
+@receiver(pre_save, sender=Addition)
+def remember_addition_rollup_key(sender, instance, **kwargs):
+    """Keep the stored row of an edited addition, whose old rollup key is recounted"""
+    if instance._state.adding:
+        return
+    instance._rollup_previous = (
+        Addition.objects.filter(pk=instance.pk)
+        .only('material_id', 'addition_date', 'tank_id', 'barrel_id', 'wine_lot_id', 'batch_id')
+        .first()
+    )
+
+
+@receiver(post_save, sender=Addition)
+def update_rollup_on_addition(sender, instance, created, **kwargs):
+    """
+    Keep AdditionDailyRollup current: a new addition is added to its row,
+    an edited one recounts its old and new rows (bulk additions are
+    recorded by Addition.create_bulk)
+    """
+    if created:
+        AdditionDailyRollup.record(instance.winery_id, [instance])
+        return
+    previous = getattr(instance, '_rollup_previous', None)
+    AdditionDailyRollup.refresh(instance.winery_id, [instance] + ([previous] if previous else []))
+
 
+@receiver(post_delete, sender=Addition)
+def update_rollup_on_addition_delete(sender, instance, origin=None, **kwargs):
+    """Recount the rollup row of a deleted addition"""
+    if isinstance(origin, Winery):
+        return  # The winery's rollups are deleted with it
+    AdditionDailyRollup.refresh(instance.winery_id, [instance])
@@ -1,3 +1,937 @@
-from django.test import TestCase
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from time import sleep
+from unittest import mock
+from zoneinfo import ZoneInfo
 
-# Create your tests here.
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, Sum
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.core.versioning import get_versions
+from apps.equipment.models import Tank
+from apps.lab.models import Analysis
+from apps.users.models import User
+from apps.wineries.models import Winery, WineryMembership
+from . import costing, forecasting
+from .dosage import dose_quantity, plan_doses, rate_factor, so2_readings
+from .models import (
+    Addition, AdditionDailyRollup, AdditionMonthlyRollup, InventoryPeriodClose, LowStockAlert, Material,
+    MaterialCost, MaterialMovement, MaterialStock, StockSnapshot,
+)
+
+
+class ConcurrentStockUpdateTests(TransactionTestCase):
+    """Stock totals must match the movement ledger under parallel writes."""
+
+    WORKERS = 8
+    MOVEMENTS_PER_WORKER = 25
+
+    def setUp(self):
+        self.winery = Winery.objects.create(name='Concurrency', code='CONC')
+        self.material = Material.objects.create(
+            winery=self.winery, name='Potassium Metabisulfite', category='ADDITIVE', unit='g',
+        )
+        # Enough opening stock that no movement is clamped at zero
+        self._move('PURCHASE', Decimal('10000'), 'MAIN_STORAGE')
+
+    def _move(self, movement_type, quantity, location, destination=None):
+        MaterialMovement.objects.create(
+            material=self.material, movement_type=movement_type, quantity=quantity,
+            location=location, destination_location=destination, movement_date=timezone.now(),
+        )
+
+    def _worker(self, index):
+        try:
+            for i in range(self.MOVEMENTS_PER_WORKER):
+                if i % 3 == 0:
+                    self._move('PURCHASE', Decimal('2.5'), 'MAIN_STORAGE')
+                elif i % 3 == 1:
+                    self._move('USAGE', Decimal('-1.25'), 'MAIN_STORAGE')
+                else:
+                    self._move('TRANSFER', Decimal('-1'), 'MAIN_STORAGE', 'CELLAR')
+        finally:
+            connection.close()
+
+    def test_parallel_movements_do_not_lose_updates(self):
+        with ThreadPoolExecutor(max_workers=self.WORKERS) as pool:
+            list(pool.map(self._worker, range(self.WORKERS)))
+
+        expected = defaultdict(Decimal)
+        for movement in MaterialMovement.objects.filter(material=self.material):
+            expected[movement.location] += movement.quantity
+            if movement.destination_location:
+                expected[movement.destination_location] += abs(movement.quantity)
+
+        stock = dict(
+            MaterialStock.objects.filter(material=self.material).values_list('location', 'quantity')
+        )
+        self.assertEqual(stock, dict(expected))
+        self.assertEqual(
+            MaterialStock.objects.filter(material=self.material).aggregate(total=Sum('quantity'))['total'],
+            sum(expected.values()),
+        )
+        self.assertEqual(
+            MaterialMovement.objects.filter(material=self.material).count(),
+            1 + self.WORKERS * self.MOVEMENTS_PER_WORKER,
+        )
+
+    def test_removal_from_empty_location_clamps_at_zero(self):
+        self._move('WASTE', Decimal('-5'), 'LAB')
+        self._move('TRANSFER', Decimal('-20000'), 'MAIN_STORAGE', 'WAREHOUSE')
+
+        stock = dict(
+            MaterialStock.objects.filter(material=self.material).values_list('location', 'quantity')
+        )
+        self.assertEqual(stock['LAB'], 0)
+        self.assertEqual(stock['MAIN_STORAGE'], 0)
+        self.assertEqual(stock['WAREHOUSE'], Decimal('20000'))
+
+
+class MaterialStockListTests(TestCase):
+    """Material lists read stock from one annotated query, however many materials there are."""
+
+    def setUp(self):
+        self.winery = Winery.objects.create(name='Stock lists', code='STOCKLIST')
+        user = User.objects.create_user(email='owner@stocklist.test', password='x')
+        WineryMembership.objects.create(user=user, winery=self.winery, role='WINERY_OWNER')
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        self.client.credentials(HTTP_X_WINERY_ID=str(self.winery.id))
+        self.materials = 0
+        self._add_materials(4)
+
+    def _add_materials(self, count):
+        """Cycle through: low, above threshold, no stock at all, no threshold."""
+        for _ in range(count):
+            n = self.materials
+            self.materials += 1
+            kind = n % 4
+            material = Material.objects.create(
+                winery=self.winery, name=f'Material {n:02}', code=f'S{n:02}', category='ADDITIVE', unit='g',
+                low_stock_threshold=None if kind == 3 else Decimal('100'),
+            )
+            if kind == 2:
+                continue
+            for location, quantity in (('MAIN_STORAGE', '30'), ('CELLAR', '40' if kind == 0 else '90.5')):
+                MaterialMovement.objects.create(
+                    material=material, movement_type='PURCHASE', quantity=Decimal(quantity),
+                    location=location, movement_date=timezone.now(),
+                )
+
+    def _get(self, action=''):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(f'/api/v1/inventory/materials/{action}', {'page_size': 100})
+        self.assertEqual(response.status_code, 200)
+        data = response.data
+        return (data['results'] if isinstance(data, dict) else data), len(ctx)
+
+    def _expected(self):
+        """Stock and low flag computed per material, without the annotations."""
+        return {
+            str(material.pk): (float(material.get_current_stock()), material.is_low_stock())
+            for material in Material.objects.filter(winery=self.winery)
+        }
+
+    def test_list_and_low_stock_match_per_material_totals(self):
+        expected = self._expected()
+        self.assertEqual(
+            sorted(expected.values()),
+            [(0.0, True), (70.0, True), (120.5, False), (120.5, False)],
+        )
+        rows, _ = self._get()
+        self.assertEqual({row['id']: (row['current_stock'], row['is_low_stock']) for row in rows}, expected)
+
+        rows, _ = self._get('low_stock/')
+        self.assertEqual(
+            {row['id'] for row in rows}, {pk for pk, (_, is_low) in expected.items() if is_low},
+        )
+
+    def test_dropdown_has_current_stock(self):
+        rows, _ = self._get('dropdown/')
+        expected = self._expected()
+        self.assertEqual(
+            {row['id']: Decimal(row['current_stock']) for row in rows},
+            {pk: Decimal(str(stock)) for pk, (stock, _) in expected.items()},
+        )
+
+    def test_queries_do_not_grow_with_materials(self):
+        actions = ('', 'low_stock/', 'dropdown/')
+        before = {action: self._get(action)[1] for action in actions}
+        self._add_materials(12)
+        after = {action: self._get(action) for action in actions}
+        self.assertEqual(len(after[''][0]), 16)
+        self.assertEqual({action: queries for action, (_, queries) in after.items()}, before)
+
+
+class LowStockAlertTests(TestCase):
+    """Alerts follow a material's stock, threshold and active flag; one open alert at a time."""
+
+    URL = '/api/v1/inventory/low-stock-alerts/'
+
+    def setUp(self):
+        self.winery = Winery.objects.create(name='Alerts', code='ALERTS')
+        user = User.objects.create_user(email='owner@alerts.test', password='x')
+        WineryMembership.objects.create(user=user, winery=self.winery, role='WINERY_OWNER')
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        self.client.credentials(HTTP_X_WINERY_ID=str(self.winery.id))
+        self.material = Material.objects.create(
+            winery=self.winery, name='Bentonite', code='BENT', category='FINING_AGENT', unit='kg',
+        )
+        self._move('PURCHASE', '80')
+        self.material.low_stock_threshold = Decimal('50')
+        self.material.save()
+
+    def _move(self, movement_type, quantity):
+        MaterialMovement.objects.create(
+            material=self.material, movement_type=movement_type, quantity=Decimal(quantity),
+            location='MAIN_STORAGE', movement_date=timezone.now(),
+        )
+
+    def _alerts(self):
+        return LowStockAlert.objects.filter(material=self.material).order_by('raised_at')
+
+    def test_alert_is_raised_when_stock_drops_below_the_threshold(self):
+        self.assertFalse(self._alerts().exists())
+        self._move('USAGE', '-20')
+        self.assertFalse(self._alerts().exists())
+
+        self._move('USAGE', '-20')
+        alert = self._alerts().get()
+        self.assertIsNone(alert.cleared_at)
+        self.assertEqual((alert.current_stock, alert.threshold), (Decimal('40'), Decimal('50')))
+        self.assertEqual(alert.winery, self.winery)
+
+    def test_open_alert_is_refreshed_while_stock_stays_low(self):
+        self._move('USAGE', '-40')
+        self._move('USAGE', '-15')
+        self.material.low_stock_threshold = Decimal('60')
+        self.material.save()
+
+        alert = self._alerts().get()
+        self.assertIsNone(alert.cleared_at)
+        self.assertEqual((alert.current_stock, alert.threshold), (Decimal('25'), Decimal('60')))
+
+    def test_alert_clears_when_stock_recovers(self):
+        self._move('USAGE', '-40')
+        self._move('PURCHASE', '30')
+        alert = self._alerts().get()
+        self.assertIsNotNone(alert.cleared_at)
+        self.assertEqual(alert.current_stock, Decimal('70'))
+
+        # Dropping again opens a new alert; the cleared one is kept
+        self._move('USAGE', '-30')
+        cleared, current = self._alerts()
+        self.assertIsNotNone(cleared.cleared_at)
+        self.assertIsNone(current.cleared_at)
+
+    def test_alert_clears_when_the_threshold_is_removed_or_the_material_deactivated(self):
+        self._move('USAGE', '-40')
+        self.material.low_stock_threshold = None
+        self.material.save()
+        self.assertIsNotNone(self._alerts().get().cleared_at)
+
+        self.material.low_stock_threshold = Decimal('50')
+        self.material.save()
+        self.assertEqual(self._alerts().filter(cleared_at__isnull=True).count(), 1)
+
+        self.material.is_active = False
+        self.material.save()
+        self.assertFalse(self._alerts().filter(cleared_at__isnull=True).exists())
+
+    def test_only_one_alert_is_open_per_material(self):
+        self._move('USAGE', '-40')
+        self._move('USAGE', '-5')
+        LowStockAlert.sync(self.material)
+        self.assertEqual(self._alerts().count(), 1)
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            LowStockAlert.objects.create(
+                winery=self.winery, material=self.material, threshold=Decimal('50'), current_stock=Decimal('35'),
+            )
+
+    def test_feed_lists_open_alerts_unless_cleared_ones_are_included(self):
+        self._move('USAGE', '-40')
+        self._move('PURCHASE', '40')
+        self._move('USAGE', '-40')
+        other = Winery.objects.create(name='Other alerts', code='ALERTS-B')
+        Material.objects.create(
+            winery=other, name='Bentonite', code='BENT', category='FINING_AGENT', unit='kg',
+            low_stock_threshold=Decimal('50'),
+        )
+
+        response = self.client.get(self.URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['cleared_at'] for row in response.data['results']], [None])
+
+        response = self.client.get(self.URL, {'include_cleared': 'true'})
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertEqual(len(self.client.get(self.URL, {'include_cleared': 'no'}).data['results']), 1)
+
+
+class MovementCursorPaginationTests(TestCase):
+    """Material movements page by (-movement_date, -id) with an optional count."""
+
+    URL = '/api/v1/inventory/movements/'
+
+    def setUp(self):
+        self.winery = Winery.objects.create(name='Cursor', code='CURSOR')
+        user = User.objects.create_user(email='owner@cursor.test', password='x')
+        WineryMembership.objects.create(user=user, winery=self.winery, role='WINERY_OWNER')
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        self.client.credentials(HTTP_X_WINERY_ID=str(self.winery.id))
+
+        self.material = Material.objects.create(winery=self.winery, name='Bentonite', category='FINING_AGENT', unit='kg')
+        other = Material.objects.create(winery=self.winery, name='Yeast', code='Y', category='YEAST', unit='g')
+        now = timezone.now()
+        # Pairs share a movement date, so pages must break ties on id
+        for index in range(7):
+            MaterialMovement.objects.create(
+                material=self.material, movement_type='PURCHASE', quantity=Decimal('1'),
+                location='MAIN_STORAGE', movement_date=now - timedelta(days=index // 2),
+            )
+        MaterialMovement.objects.create(
+            material=other, movement_type='PURCHASE', quantity=Decimal('1'),
+            location='MAIN_STORAGE', movement_date=now,
+        )
+
+    def test_cursor_pages_follow_the_movement_order(self):
+        expected = [
+            str(pk) for pk in MaterialMovement.objects.filter(material=self.material)
+            .order_by('-movement_date', '-id').values_list('pk', flat=True)
+        ]
+        seen = []
+        response = self.client.get(self.URL, {'pagination': 'cursor', 'page_size': 3, 'material': self.material.pk})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            self.assertIsNone(response.data['count'])
+            seen += [row['id'] for row in response.data['results']]
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(seen, expected)
+
+    def test_count_is_only_computed_on_request(self):
+        for mode in ('exact', 'estimate'):
+            response = self.client.get(self.URL, {'pagination': 'cursor', 'page_size': 3, 'count': mode})
+            self.assertEqual(response.data['count'], 8)
+            response = self.client.get(
+                self.URL, {'pagination': 'cursor', 'count': mode, 'material': self.material.pk},
+            )
+            self.assertEqual(response.data['count'], 7)
+
+    def test_material_pages_are_served_by_the_index(self):
+        queryset = MaterialMovement.objects.filter(material=self.material).order_by('-movement_date', '-id')[:3]
+        with connection.cursor() as cursor:
+            # A handful of rows would otherwise be read in full and sorted
+            cursor.execute('SET LOCAL enable_seqscan = off; SET LOCAL enable_bitmapscan = off')
+            plan = queryset.explain()
+        self.assertIn('Index Scan using inventory_m_materia_73b90b_idx', plan)
+        self.assertNotIn('Sort', plan)
+
+
+class PeriodCloseTests(TestCase):
+    """Closed periods freeze their movements and anchor as-of stock queries."""
+
+    def setUp(self):
+        # Twelve or thirteen hours ahead of UTC, so local and UTC days differ
+        self.winery = Winery.objects.create(name='Close', code='CLOSE', timezone='Pacific/Auckland')
+        self.tz = ZoneInfo(self.winery.timezone)
+        self.material = Material.objects.create(
+            winery=self.winery, name='Tartaric Acid', category='ACID', unit='g',
+        )
+        self.day = timezone.localdate(timezone=self.tz) - timedelta(days=10)
+        self.user = User.objects.create_user(email='owner@close.test', password='x')
+        WineryMembership.objects.create(user=self.user, winery=self.winery, role='WINERY_OWNER')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.client.credentials(HTTP_X_WINERY_ID=str(self.winery.id))
+
+        self.purchase = self._move('PURCHASE', '100', self._local(-2, 10))
+        self.usage = self._move('USAGE', '-30', self._local(0, 23, 30))
+        self.late_purchase = self._move('PURCHASE', '50', self._local(1, 0, 30))
+
+    def _local(self, days, hour, minute=0):
+        """Winery-local datetime ``days`` after ``self.day``."""
+        return datetime.combine(self.day + timedelta(days=days), time(hour, minute), tzinfo=self.tz)
+
+    def _move(self, movement_type, quantity, moment):
+        return MaterialMovement.objects.create(
+            material=self.material, movement_type=movement_type, quantity=Decimal(quantity),
+            location='MAIN_STORAGE', movement_date=moment,
+        )
+
+    def _as_of(self, **params):
+        response = self.client.get('/api/v1/inventory/stock/as_of/', params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return sum(Decimal(str(row['quantity'])) for row in response.data['stock']), response.data['from_close']
+
+    def test_as_of_before_at_and_after_the_period_end(self):
+        period = InventoryPeriodClose.close(self.winery, self.day, user=self.user)
+        self.assertEqual(period.period_end, self._local(1, 0))
+        self.assertEqual(
+            list(period.snapshots.values_list('location', 'quantity')), [('MAIN_STORAGE', Decimal('70'))],
+        )
+
+        before = self._as_of(at=(period.period_end - timedelta(minutes=20)).isoformat())
+        self.assertEqual(before, (Decimal('70'), None))
+        quantity, from_close = self._as_of(at=period.period_end.isoformat())
+        self.assertEqual((quantity, from_close['id']), (Decimal('70'), str(period.id)))
+        quantity, from_close = self._as_of(at=self._local(2, 0).isoformat())
+        self.assertEqual((quantity, from_close['id']), (Decimal('120'), str(period.id)))
+
+    def test_movements_before_the_close_are_frozen(self):
+        InventoryPeriodClose.close(self.winery, self.day)
+
+        with self.assertRaises(DjangoValidationError):
+            self._move('ADJUSTMENT', '5', self._local(0, 12))
+        self.usage.quantity = Decimal('-20')
+        with self.assertRaises(DjangoValidationError):
+            self.usage.save()
+        with self.assertRaises(DjangoValidationError):
+            self.usage.delete()
+        # Nor can an open movement be moved into the closed period
+        self.late_purchase.movement_date = self._local(0, 12)
+        with self.assertRaises(DjangoValidationError):
+            self.late_purchase.save()
+
+        response = self.client.post('/api/v1/inventory/movements/', {
+            'material': str(self.material.id), 'movement_type': 'ADJUSTMENT', 'quantity': '5',
+            'location': 'MAIN_STORAGE', 'movement_date': self._local(0, 12).isoformat(),
+        })
+        self.assertEqual(response.status_code, 400)
+        response = self.client.delete(f'/api/v1/inventory/movements/{self.usage.id}/')
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(MaterialMovement.objects.filter(pk=self.usage.pk).exists())
+
+        # Movements after the close stay editable
+        self.late_purchase.refresh_from_db()
+        self.late_purchase.quantity = Decimal('60')
+        self.late_purchase.save()
+
+    def test_close_follows_the_last_close_and_the_period_end(self):
+        InventoryPeriodClose.close(self.winery, self.day)
+
+        for close_date in (self.day, self.day - timedelta(days=1)):
+            with self.assertRaises(DjangoValidationError):
+                InventoryPeriodClose.close(self.winery, close_date)
+        response = self.client.post(
+            '/api/v1/inventory/period-closes/', {'close_date': timezone.localdate(timezone=self.tz).isoformat()},
+        )
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post(
+            '/api/v1/inventory/period-closes/', {'close_date': (self.day + timedelta(days=1)).isoformat()},
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        snapshot = StockSnapshot.objects.get(period_close_id=response.data['id'])
+        self.assertEqual(snapshot.quantity, Decimal('120'))
+
+    def test_snapshots_filter_by_material(self):
+        period = InventoryPeriodClose.close(self.winery, self.day)
+        url = f'/api/v1/inventory/period-closes/{period.id}/snapshots/'
+
+        response = self.client.get(url, {'material': str(self.material.id)})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 1)
+        response = self.client.get(url, {'material': 'bad'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('material', response.data)
+
+    def test_only_the_latest_close_can_be_reopened(self):
+        first = InventoryPeriodClose.close(self.winery, self.day - timedelta(days=1))
+        latest = InventoryPeriodClose.close(self.winery, self.day)
+
+        response = self.client.delete(f'/api/v1/inventory/period-closes/{first.id}/')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.delete(f'/api/v1/inventory/period-closes/{latest.id}/')
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(StockSnapshot.objects.filter(period_close_id=latest.id).exists())
+
+        # The usage is open again; the earlier purchase is still closed
+        self.usage.quantity = Decimal('-20')
+        self.usage.save()
+        with self.assertRaises(DjangoValidationError):
+            self.purchase.delete()
+
+    def test_naive_at_is_read_in_the_winery_time_zone(self):
+        self.assertEqual(self._as_of(at=self._local(0, 23, 45).replace(tzinfo=None).isoformat())[0], Decimal('70'))
+        self.assertEqual(self._as_of(at=self._local(1, 1).replace(tzinfo=None).isoformat())[0], Decimal('120'))
+        self.assertEqual(self._as_of(date=self.day.isoformat())[0], Decimal('70'))
+
+    def test_impossible_dates_are_rejected(self):
+        for params in ({'date': '2025-02-30'}, {'at': '2025-02-30T10:00:00'}, {'at': 'yesterday'}):
+            response = self.client.get('/api/v1/inventory/stock/as_of/', params)
+            self.assertEqual(response.status_code, 400, params)
+
+
+class MaterialCostingTests(TestCase):
+    """Weighted average costs, including movements entered out of order."""
+
+    def setUp(self):
+        self.winery = Winery.objects.create(name='Costing', code='COST')
+        self.material = Material.objects.create(
+            winery=self.winery, name='Oak Chips', category='ADDITIVE', unit='g',
+        )
+        self.now = timezone.now()
+
+    def _move(self, movement_type, quantity, days_ago, unit_cost=None):
+        return MaterialMovement.objects.create(
+            material=self.material, movement_type=movement_type, quantity=Decimal(quantity),
+            location='MAIN_STORAGE', movement_date=self.now - timedelta(days=days_ago),
+            unit_cost=Decimal(unit_cost) if unit_cost else None,
+        )
+
+    def test_purchases_blend_into_the_average(self):
+        self._move('PURCHASE', '100', 10, '2')
+        usage = self._move('USAGE', '-40', 8)
+        self._move('PURCHASE', '60', 5, '4')
+
+        cost = MaterialCost.objects.get(material=self.material)
+        self.assertEqual(cost.quantity, Decimal('120'))
+        self.assertEqual(cost.average_cost, Decimal('3'))
+        usage.refresh_from_db()
+        self.assertEqual(usage.cost_value, Decimal('-80'))
+
+    def test_backdated_purchase_recosts_later_movements(self):
+        self._move('PURCHASE', '100', 10, '2')
+        usage = self._move('USAGE', '-40', 8)
+        self._move('PURCHASE', '60', 5, '4')
+        self._move('PURCHASE', '100', 9, '1')
+
+        usage.refresh_from_db()
+        self.assertEqual(usage.cost_value, Decimal('-60'))
+        self.assertEqual(usage.balance_unit_cost, Decimal('1.5'))
+        cost = MaterialCost.objects.get(material=self.material)
+        self.assertEqual(cost.quantity, Decimal('220'))
+        self.assertEqual(cost.average_cost, Decimal('2.1818'))
+
+    def test_editing_a_purchase_recosts_later_movements(self):
+        purchase = self._move('PURCHASE', '100', 10, '2')
+        usage = self._move('USAGE', '-40', 8)
+        self._move('PURCHASE', '60', 5, '4')
+
+        purchase.unit_cost = Decimal('3')
+        purchase.save()
+        usage.refresh_from_db()
+        self.assertEqual(usage.cost_value, Decimal('-120'))
+        cost = MaterialCost.objects.get(material=self.material)
+        self.assertEqual(cost.average_cost, Decimal('3.5'))
+
+        # Moved after the usage, the purchase no longer prices it
+        purchase.movement_date = self.now - timedelta(days=6)
+        purchase.save()
+        usage.refresh_from_db()
+        self.assertIsNone(usage.cost_value)
+        self.assertEqual(MaterialCost.objects.get(material=self.material).average_cost, Decimal('3.375'))
+
+    def test_deleting_a_movement_recosts_the_material(self):
+        first = self._move('PURCHASE', '100', 10, '2')
+        self._move('PURCHASE', '100', 9, '4')
+        usage = self._move('USAGE', '-40', 8)
+
+        first.delete()
+        usage.refresh_from_db()
+        self.assertEqual(usage.cost_value, Decimal('-160'))
+        cost = MaterialCost.objects.get(material=self.material)
+        self.assertEqual((cost.quantity, cost.average_cost), (Decimal('60'), Decimal('4')))
+
+        MaterialMovement.objects.filter(material=self.material).delete()
+        cost.refresh_from_db()
+        self.assertEqual((cost.quantity, cost.average_cost), (Decimal('0'), None))
+
+    def test_recompute_bumps_the_movement_version(self):
+        self._move('PURCHASE', '100', 10, '2')
+        self._move('USAGE', '-40', 8)
+        MaterialMovement.objects.filter(material=self.material).update(cost_value=None)
+        resource = 'inventory.materialmovement'
+        before = get_versions(str(self.winery.pk), [resource])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            result = costing.recompute_winery(self.winery)
+
+        self.assertEqual(result['movements_changed'], 2)
+        self.assertNotEqual(get_versions(str(self.winery.pk), [resource]), before)
+
+    def test_costs_reject_impossible_dates(self):
+        user = User.objects.create_user(email='owner@costing.test', password='x')
+        WineryMembership.objects.create(user=user, winery=self.winery, role='WINERY_OWNER')
+        client = APIClient()
+        client.force_authenticate(user)
+        client.credentials(HTTP_X_WINERY_ID=str(self.winery.id))
+
+        response = client.get('/api/v1/inventory/additions/costs/', {'date_from': '2025-02-30'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_addition_takes_the_cost_of_its_usage(self):
+        self._move('PURCHASE', '100', 10, '2.5')
+        addition = Addition.objects.create(
+            winery=self.winery, material=self.material, quantity=Decimal('10'),
+            addition_date=self.now,
+        )
+
+        addition.refresh_from_db()
+        self.assertEqual(addition.cost, Decimal('25.00'))
+        self.assertEqual(addition.movement.cost_value, Decimal('-25'))
+
+
+class StockReconciliationTests(TestCase):
+    """Stock rows are checked, and repaired, against the movement ledger."""
+
+    def setUp(self):
+        self.winery = Winery.objects.create(name='Reconcile', code='RECO')
+        self.material = Material.objects.create(
+            winery=self.winery, name='Bentonite', category='ADDITIVE', unit='g',
+        )
+        for movement_type, quantity, location, destination in (
+            ('PURCHASE', '500', 'MAIN_STORAGE', None),
+            ('USAGE', '-120', 'MAIN_STORAGE', None),
+            ('TRANSFER', '-80', 'MAIN_STORAGE', 'CELLAR'),
+        ):
+            MaterialMovement.objects.create(
+                material=self.material, movement_type=movement_type, quantity=Decimal(quantity),
+                location=location, destination_location=destination, movement_date=timezone.now(),
+            )
+
+    def test_consistent_stock_has_no_drift(self):
+        self.assertEqual(MaterialStock.reconcile(self.winery), [])
+
+    def test_drift_is_reported_and_repaired(self):
+        MaterialStock.objects.filter(material=self.material, location='MAIN_STORAGE').update(quantity=0)
+        MaterialStock.objects.filter(material=self.material, location='CELLAR').delete()
+
+        drift = MaterialStock.reconcile(self.winery)
+        self.assertEqual(
+            {(row['location'], row['recorded'], row['expected']) for row in drift},
+            {('MAIN_STORAGE', Decimal('0'), Decimal('300')), ('CELLAR', None, Decimal('80'))},
+        )
+
+        MaterialStock.reconcile(self.winery, repair=True)
+        self.assertEqual(MaterialStock.reconcile(self.winery), [])
+        self.assertEqual(
+            dict(MaterialStock.objects.filter(material=self.material).values_list('location', 'quantity')),
+            {'MAIN_STORAGE': Decimal('300'), 'CELLAR': Decimal('80')},
+        )
+
+    def test_repair_keeps_movements_committed_after_the_check(self):
+        MaterialStock.objects.filter(material=self.material, location='MAIN_STORAGE').update(quantity=0)
+        apply_deltas = MaterialStock.apply_deltas
+
+        def purchase_then_apply(material, deltas):
+            # A purchase lands between the balance query and the repair
+            MaterialMovement.objects.bulk_create([MaterialMovement(
+                material=self.material, movement_type='PURCHASE', quantity=Decimal('50'),
+                location='MAIN_STORAGE', movement_date=timezone.now(),
+            )])
+            MaterialStock.objects.filter(material=self.material, location='MAIN_STORAGE').update(
+                quantity=F('quantity') + 50,
+            )
+            return apply_deltas(material, deltas)
+
+        with mock.patch.object(MaterialStock, 'apply_deltas', side_effect=purchase_then_apply):
+            MaterialStock.reconcile(self.winery, repair=True)
+
+        self.assertEqual(MaterialStock.reconcile(self.winery), [])
+        self.assertEqual(
+            MaterialStock.objects.get(material=self.material, location='MAIN_STORAGE').quantity, Decimal('350'),
+        )
+
+    def test_endpoint_reports_exact_quantities(self):
+        user = User.objects.create_user(email='owner@reconcile.test', password='x')
+        WineryMembership.objects.create(user=user, winery=self.winery, role='WINERY_OWNER')
+        client = APIClient()
+        client.force_authenticate(user)
+        client.credentials(HTTP_X_WINERY_ID=str(self.winery.id))
+        MaterialStock.objects.filter(material=self.material, location='MAIN_STORAGE').update(quantity=Decimal('0.1'))
+
+        response = client.get('/api/v1/inventory/stock/reconcile/')
+        self.assertEqual(response.status_code, 200)
+        row, = response.json()['drift']
+        # Decimals as strings (JSON_DECIMAL_MODE), not floats
+        self.assertEqual(
+            (row['recorded'], row['expected'], row['movement_total']), ('0.100', '300.000', '300.000'),
+        )
+
+        response = client.post('/api/v1/inventory/stock/reconcile/')
+        self.assertEqual(response.data['drift_count'], 1)
+        self.assertEqual(MaterialStock.reconcile(self.winery), [])
+
+
+class BulkAdditionTests(TestCase):
+    """A bulk addition books every vessel's dose as one usage movement."""
+
+    def setUp(self):
+        self.winery = Winery.objects.create(name='Bulk', code='BULK')
+        self.material = Material.objects.create(
+            winery=self.winery, name='Potassium Metabisulfite', category='STABILIZER', unit='kg',
+        )
+        MaterialMovement.objects.create(
+            material=self.material, movement_type='PURCHASE', quantity=Decimal('25'),
+            location='MAIN_STORAGE', movement_date=timezone.now() - timedelta(days=1), unit_cost=Decimal('8'),
+        )
+        self.tanks = [
+            Tank.objects.create(winery=self.winery, code=f'T{i}', capacity_l=10000, current_volume_l=volume)
+            for i, volume in enumerate([Decimal('5000'), Decimal('2500')])
+        ]
+
+    def test_doses_follow_volume_and_share_one_movement(self):
+        factor = rate_factor(self.material.unit, 'g/hL')
+        doses = [
+            ('tank', tank, dose_quantity(tank.current_volume_l, Decimal('20'), factor), tank.current_volume_l)
+            for tank in self.tanks
+        ]
+        movement, additions = Addition.create_bulk(
+            self.winery, self.material, doses, timezone.now(), None, purpose='SO2 round',
+        )
+
+        self.assertEqual([addition.quantity for addition in additions], [Decimal('1'), Decimal('0.5')])
+        self.assertEqual(movement.quantity, Decimal('-1.5'))
+        self.assertEqual(Addition.objects.filter(movement=movement).count(), 2)
+        self.assertEqual(
+            MaterialStock.objects.get(material=self.material, location='MAIN_STORAGE').quantity,
+            Decimal('23.5'),
+        )
+        self.assertEqual(
+            sorted(Addition.objects.filter(movement=movement).values_list('cost', flat=True)),
+            [Decimal('4.00'), Decimal('8.00')],
+        )
+
+    def test_rate_units_must_match_the_material(self):
+        with self.assertRaises(ValueError):
+            rate_factor(self.material.unit, 'mL/hL')
+
+
+class ConsumptionForecastTests(TestCase):
+    """Stock-out dates follow the consumption rate of each harvest phase."""
+
+    def setUp(self):
+        self.winery = Winery.objects.create(name='Forecast', code='FCST')
+        self.material = Material.objects.create(
+            winery=self.winery, name='Yeast', category='YEAST', unit='g', low_stock_threshold=Decimal('50'),
+        )
+        self.today = timezone.localdate()
+        MaterialMovement.objects.create(
+            material=self.material, movement_type='PURCHASE', quantity=Decimal('2000'),
+            location='MAIN_STORAGE', movement_date=timezone.now() - timedelta(days=100),
+        )
+        # 10 g a day over the last 90 days
+        for days_ago in range(1, 91):
+            self._use(Decimal('10'), days_ago)
+
+    def _use(self, quantity, days_ago):
+        return MaterialMovement.objects.create(
+            material=self.material, movement_type='USAGE', quantity=-quantity,
+            location='MAIN_STORAGE', movement_date=timezone.now() - timedelta(days=days_ago),
+        )
+
+    def _row(self):
+        result = forecasting.forecast(self.winery, lookback_days=90, horizon_days=365, today=self.today)
+        return result['materials'][0]
+
+    def test_stockout_from_daily_rate(self):
+        row = self._row()
+        self.assertAlmostEqual(row['daily_rate'], 10)
+        # 1100 g left at 10 g a day
+        self.assertEqual(row['days_until_stockout'], 109)
+        self.assertEqual(row['reorder_date'], self.today + timedelta(days=104))
+
+    def test_new_movements_are_folded_into_the_cached_series(self):
+        self._row()
+        self._use(Decimal('900'), 2)
+        self.assertAlmostEqual(self._row()['daily_rate'], 20)
+
+    def test_late_commits_are_folded_once(self):
+        self._row()
+        # Saved before the last refresh but committed after it
+        MaterialMovement.objects.filter(pk=self._use(Decimal('450'), 2).pk).update(
+            created_at=timezone.now() - timedelta(minutes=5),
+        )
+        self.assertAlmostEqual(self._row()['daily_rate'], 15)
+        self.assertAlmostEqual(self._row()['daily_rate'], 15)
+
+    def test_forecast_is_sent_without_an_etag(self):
+        user = User.objects.create_user(email='owner@forecast.test', password='x')
+        WineryMembership.objects.create(user=user, winery=self.winery, role='WINERY_OWNER')
+        client = APIClient()
+        client.force_authenticate(user)
+        client.credentials(HTTP_X_WINERY_ID=str(self.winery.id))
+
+        self.assertIn('ETag', client.get('/api/v1/inventory/materials/'))
+        response = client.get('/api/v1/inventory/materials/forecast/')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+
+
+class AdditionRollupTests(TestCase):
+    """Daily addition rollups follow additions as they are written."""
+
+    def setUp(self):
+        self.winery = Winery.objects.create(name='Rollup', code='ROLL')
+        self.material = Material.objects.create(
+            winery=self.winery, name='Tartaric Acid', category='ACID', unit='g',
+        )
+        self.tanks = [
+            Tank.objects.create(winery=self.winery, code=f'R{i}', capacity_l=5000, current_volume_l=Decimal('1000'))
+            for i in range(2)
+        ]
+        self.now = timezone.now()
+
+    def _add(self, tank, quantity):
+        return Addition.objects.create(
+            winery=self.winery, material=self.material, tank=tank,
+            quantity=Decimal(quantity), addition_date=self.now,
+        )
+
+    def _rollups(self):
+        return {
+            row.vessel_label: (row.addition_count, row.total_quantity)
+            for row in AdditionDailyRollup.objects.filter(winery=self.winery)
+        }
+
+    def test_writes_keep_rollups_current(self):
+        first = self._add(self.tanks[0], '10')
+        self._add(self.tanks[0], '5')
+        Addition.create_bulk(
+            self.winery, self.material,
+            [('tank', tank, Decimal('2'), tank.current_volume_l) for tank in self.tanks], self.now, None,
+        )
+        self.assertEqual(self._rollups(), {'R0': (3, Decimal('17')), 'R1': (1, Decimal('2'))})
+
+        first.tank = self.tanks[1]
+        first.save()
+        self.assertEqual(self._rollups(), {'R0': (2, Decimal('7')), 'R1': (2, Decimal('12'))})
+
+        first.delete()
+        self.assertEqual(self._rollups(), {'R0': (2, Decimal('7')), 'R1': (1, Decimal('2'))})
+        self.assertEqual(
+            list(AdditionMonthlyRollup.objects.filter(winery=self.winery).values_list('addition_count', 'total_quantity')),
+            [(3, Decimal('9'))],
+        )
+
+    def test_rebuild_matches_maintained_rollups(self):
+        self._add(self.tanks[0], '10')
+        self._add(self.tanks[1], '4')
+        maintained = self._rollups()
+        AdditionDailyRollup.objects.filter(winery=self.winery).delete()
+
+        AdditionDailyRollup.rebuild(self.winery)
+        self.assertEqual(self._rollups(), maintained)
+
+    def test_rollup_reports_reject_malformed_filters(self):
+        user = User.objects.create_user(email='owner@rollup.test', password='x')
+        WineryMembership.objects.create(user=user, winery=self.winery, role='WINERY_OWNER')
+        client = APIClient()
+        client.force_authenticate(user)
+        client.credentials(HTTP_X_WINERY_ID=str(self.winery.id))
+
+        for action in ('usage_trend', 'vessel_usage'):
+            response = client.get(f'/api/v1/inventory/additions/{action}/', {'date_to': '2025-02-30'})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('date_to', response.data)
+            response = client.get(f'/api/v1/inventory/additions/{action}/', {'material': 'bad'})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('material', response.data)
+        response = client.get('/api/v1/inventory/additions/vessel_usage/', {'vessel_id': 'bad'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('vessel_id', response.data)
+        response = client.get('/api/v1/inventory/additions/vessel_usage/', {'vessel_id': str(self.tanks[0].id)})
+        self.assertEqual(response.status_code, 200)
+
+
+class ConcurrentAdditionRollupTests(TransactionTestCase):
+    """A recount does not overwrite additions recorded by a concurrent transaction."""
+
+    def setUp(self):
+        self.winery = Winery.objects.create(name='Rollup race', code='RACE')
+        self.material = Material.objects.create(
+            winery=self.winery, name='Tartaric Acid', category='ACID', unit='g',
+        )
+        self.tank = Tank.objects.create(winery=self.winery, code='T1', capacity_l=5000)
+        self.now = timezone.now()
+        self.edited = self._add('10')
+
+    def _add(self, quantity):
+        return Addition.objects.create(
+            winery=self.winery, material=self.material, tank=self.tank,
+            quantity=Decimal(quantity), addition_date=self.now,
+        )
+
+    def _add_and_commit_late(self, recorded, editing):
+        try:
+            with transaction.atomic():
+                self._add('5')
+                recorded.set()
+                editing.wait(5)
+                sleep(0.3)  # Let the edit reach its recount first
+        finally:
+            connection.close()
+
+    def test_recount_waits_for_concurrent_additions(self):
+        recorded, editing = threading.Event(), threading.Event()
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            future = pool.submit(self._add_and_commit_late, recorded, editing)
+            recorded.wait(5)
+            editing.set()
+            self.edited.quantity = Decimal('20')
+            self.edited.save()
+            future.result()
+
+        for model in (AdditionDailyRollup, AdditionMonthlyRollup):
+            self.assertEqual(
+                list(model.objects.filter(winery=self.winery).values_list('addition_count', 'total_quantity')),
+                [(2, Decimal('25'))],
+            )
+
+
+class DosagePlanTests(TestCase):
+    """Doses by active ingredient and SO₂ target, for many vessels at once."""
+
+    def setUp(self):
+        self.winery = Winery.objects.create(name='Dosage', code='DOSE')
+        self.material = Material.objects.create(
+            winery=self.winery, name='Potassium Metabisulfite', category='STABILIZER', unit='g',
+            active_ingredient='SO2', active_fraction=Decimal('0.5'),
+        )
+        self.tanks = [
+            Tank.objects.create(winery=self.winery, code=f'D{i}', capacity_l=5000, current_volume_l=Decimal('1000'))
+            for i in range(3)
+        ]
+        # pH 3.81: free SO₂ is 101 x molecular
+        for tank, free_so2 in ((self.tanks[0], '20.5'), (self.tanks[1], '60')):
+            Analysis.objects.create(
+                winery=self.winery, tank=tank, ph=Decimal('3.81'), free_so2_mgl=Decimal(free_so2),
+            )
+
+    def _plan(self, method, rate, rate_unit=None):
+        vessels = [('tank', tank) for tank in self.tanks]
+        readings = so2_readings(self.winery, vessels)
+        return plan_doses(self.material, method, Decimal(rate), rate_unit, vessels, readings)
+
+    def test_molecular_so2_target_from_latest_analysis(self):
+        plan = self._plan('molecular_so2', '0.5')
+
+        self.assertEqual([row['status'] for row in plan], ['dose', 'at_target', 'no_analysis'])
+        # 50.5 mg/L free needed, 30 mg/L of SO₂ to add: 30 g of SO₂, 60 g of product
+        self.assertEqual(plan[0]['dose'], 30)
+        self.assertEqual(plan[0]['quantity'], Decimal('60.000'))
+
+    def test_active_ingredient_rate_and_commit(self):
+        plan = self._plan('active', '2', 'g/hL')
+        self.assertEqual([row['quantity'] for row in plan], [Decimal('40.000')] * 3)
+
+        doses = [(row['field'], row['vessel'], row['quantity'], row['volume_l'], row['dosage_rate']) for row in plan]
+        movement, _ = Addition.create_bulk(self.winery, self.material, doses, timezone.now(), None)
+        self.assertEqual(movement.quantity, Decimal('-120'))
+        self.assertEqual(
+            set(Addition.objects.filter(movement=movement).values_list('dosage_rate', flat=True)),
+            {'2 g/hL Sulfur Dioxide (SO₂)'},
+        )
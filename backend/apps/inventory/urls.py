@@ -7,6 +7,8 @@ router.register(r'materials', views.MaterialViewSet, basename='material')
 router.register(r'stock', views.MaterialStockViewSet, basename='materialstock')
 router.register(r'movements', views.MaterialMovementViewSet, basename='materialmovement')
 router.register(r'additions', views.AdditionViewSet, basename='addition')
+router.register(r'low-stock-alerts', views.LowStockAlertViewSet, basename='lowstockalert')
+router.register(r'period-closes', views.InventoryPeriodCloseViewSet, basename='inventoryperiodclose')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -1,20 +1,51 @@
-from rest_framework import viewsets, filters, status
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+
+from rest_framework import mixins, viewsets, filters, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Sum, Q, Count
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Sum, Q, Count, Max, Min
+from django.db.models.functions import Coalesce, TruncWeek
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 
+from apps.core.mixins import ConditionalGetMixin, SparseFieldsetViewMixin
+from apps.core.pagination import HighVolumePagination
 from apps.wineries.mixins import WineryRequiredMixin
-from .models import Material, MaterialStock, MaterialMovement, Addition
+from apps.wineries.permissions import IsWineryOwnerOrReadOnly
+from .models import (
+    Material, MaterialStock, MaterialMovement, Addition, LowStockAlert,
+    InventoryPeriodClose, StockSnapshot, AdditionCostAllocation, AdditionDailyRollup, AdditionMonthlyRollup,
+    AdditionTarget,
+)
 from .serializers import (
     MaterialListSerializer, MaterialDetailSerializer, MaterialCreateUpdateSerializer,
     MaterialDropdownSerializer, MaterialStockSerializer,
     MaterialMovementListSerializer, MaterialMovementCreateSerializer,
-    AdditionListSerializer, AdditionDetailSerializer, AdditionCreateSerializer
+    AdditionListSerializer, AdditionDetailSerializer, AdditionCreateSerializer, AdditionBulkCreateSerializer,
+    DosePlanSerializer,
+    LowStockAlertSerializer, InventoryPeriodCloseSerializer, StockSnapshotSerializer
 )
 
 
-class MaterialViewSet(WineryRequiredMixin, viewsets.ModelViewSet):
+def _uuid_param(request, param):
+    """Query parameter ``param`` as a UUID (None when absent); a 400 when malformed."""
+    value = request.query_params.get(param)
+    if not value:
+        return None
+    try:
+        return uuid.UUID(value)
+    except ValueError:
+        raise ValidationError({param: 'Must be a valid UUID.'})
+
+
+class MaterialViewSet(ConditionalGetMixin, SparseFieldsetViewMixin, WineryRequiredMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing materials/supplies
     """
@@ -24,6 +55,12 @@ class MaterialViewSet(WineryRequiredMixin, viewsets.ModelViewSet):
     search_fields = ['name', 'code', 'supplier']
     ordering_fields = ['name', 'category', 'created_at']
     ordering = ['name']
+    query_budget = {'list': 4, 'retrieve': 5, 'dropdown': 3, 'low_stock': 3, 'stock_history': 4, 'forecast': 6}
+    etag_resources = {
+        '*': ('inventory.material', 'inventory.materialstock', 'inventory.materialmovement'),
+        # Depends on today's date and the harvest seasons as well
+        'forecast': (),
+    }
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -36,7 +73,9 @@ class MaterialViewSet(WineryRequiredMixin, viewsets.ModelViewSet):
     
     def get_queryset(self):
         queryset = super().get_queryset()
-        queryset = queryset.prefetch_related('stock_locations')
+        queryset = queryset.filter(winery=self.request.winery).with_stock()
+        if self.action == 'retrieve':
+            queryset = queryset.select_related('cost').prefetch_related('stock_locations')
         return queryset
     
     def perform_create(self, serializer):
@@ -53,14 +92,40 @@ class MaterialViewSet(WineryRequiredMixin, viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def low_stock(self, request):
         """Get materials with low stock levels"""
-        materials = []
-        for material in self.get_queryset().filter(is_active=True, low_stock_threshold__isnull=False):
-            if material.is_low_stock():
-                materials.append(material)
-        
+        materials = self.get_queryset().filter(is_active=True, low_stock=True)
         serializer = MaterialListSerializer(materials, many=True)
         return Response(serializer.data)
     
+    @action(detail=False, methods=['get'])
+    def forecast(self, request):
+        """
+        Consumption rates and projected stock-out dates per material.
+        
+        ?lookback_days= (90, 180, 365 or 730; default 365) sets the history
+        the rates come from, ?horizon_days= (1-1095; default 365) how far
+        ahead to project. Rates are split by harvest phase (harvest season
+        windows vs. the rest of the year).
+        """
+        from . import forecasting
+        
+        try:
+            lookback_days = int(request.query_params.get('lookback_days', forecasting.DEFAULT_LOOKBACK_DAYS))
+            horizon_days = int(request.query_params.get('horizon_days', forecasting.DEFAULT_HORIZON_DAYS))
+        except ValueError:
+            return Response({'error': 'lookback_days and horizon_days must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        if lookback_days not in forecasting.LOOKBACK_CHOICES:
+            return Response(
+                {'error': f'lookback_days must be one of: {", ".join(map(str, forecasting.LOOKBACK_CHOICES))}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not 1 <= horizon_days <= forecasting.MAX_HORIZON_DAYS:
+            return Response(
+                {'error': f'horizon_days must be between 1 and {forecasting.MAX_HORIZON_DAYS}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return Response(forecasting.forecast(request.winery, lookback_days, horizon_days))
+    
     @action(detail=True, methods=['get'])
     def stock_history(self, request, pk=None):
         """Get stock movement history for a material"""
@@ -97,6 +162,7 @@ class MaterialStockViewSet(WineryRequiredMixin, viewsets.ReadOnlyModelViewSet):
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['material', 'location']
     ordering = ['material__name', 'location']
+    query_budget = {'list': 3, 'retrieve': 2}
     
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -107,6 +173,70 @@ class MaterialStockViewSet(WineryRequiredMixin, viewsets.ReadOnlyModelViewSet):
         
         return queryset
     
+    @action(detail=False, methods=['get', 'post'], permission_classes=[IsWineryOwnerOrReadOnly])
+    def reconcile(self, request):
+        """
+        Stock rows that drifted from the movement ledger (GET), or repair
+        them back to the movement balances (POST).
+        """
+        repair = request.method == 'POST'
+        drift = MaterialStock.reconcile(request.winery, repair=repair)
+        # Quantities stay Decimals, rendered as JSON_DECIMAL_MODE says
+        return Response({
+            'repaired': repair,
+            'drift_count': len(drift),
+            'drift': drift,
+        })
+    
+    @action(detail=False, methods=['get'])
+    def as_of(self, request):
+        """
+        Stock per material and location at a past moment, from the nearest
+        period close snapshot plus the movements since.
+        
+        ?date=2025-12-31 (end of that day, winery time zone) or ?at=<ISO datetime>;
+        optional ?material=<id>.
+        """
+        winery = request.winery
+        at = None
+        try:
+            if request.query_params.get('at'):
+                at = parse_datetime(request.query_params['at'])
+                if at is not None and timezone.is_naive(at):
+                    at = timezone.make_aware(at, ZoneInfo(winery.timezone or 'UTC'))
+            elif request.query_params.get('date'):
+                day = parse_date(request.query_params['date'])
+                at = InventoryPeriodClose.end_of_day(winery, day) if day else None
+            else:
+                return Response({'error': 'date or at parameter is required'}, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError:  # Well formed but not a real date, e.g. 2025-02-30
+            pass
+        if at is None:
+            return Response({'error': 'Invalid date or at parameter'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        quantities, period_close = StockSnapshot.stock_as_of(winery, at)
+        materials = Material.objects.filter(winery=winery).in_bulk(
+            {material_id for material_id, _ in quantities}
+        )
+        material_filter = request.query_params.get('material')
+        stock = [
+            {
+                'material': material_id,
+                'material_name': materials[material_id].name,
+                'material_unit': materials[material_id].unit,
+                'location': location,
+                'quantity': quantity,
+            }
+            for (material_id, location), quantity in quantities.items()
+            if material_filter is None or str(material_id) == material_filter
+        ]
+        stock.sort(key=lambda row: (row['material_name'], row['location']))
+        return Response({
+            'at': at,
+            'from_close': InventoryPeriodCloseSerializer(period_close).data if period_close else None,
+            'stock': stock,
+        })
+    
     @action(detail=False, methods=['get'])
     def locations(self, request):
         """Get available stock locations"""
@@ -117,7 +247,7 @@ class MaterialStockViewSet(WineryRequiredMixin, viewsets.ReadOnlyModelViewSet):
         ])
 
 
-class MaterialMovementViewSet(WineryRequiredMixin, viewsets.ModelViewSet):
+class MaterialMovementViewSet(SparseFieldsetViewMixin, WineryRequiredMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing material movements
     """
@@ -127,6 +257,9 @@ class MaterialMovementViewSet(WineryRequiredMixin, viewsets.ModelViewSet):
     search_fields = ['reference_number', 'notes']
     ordering_fields = ['movement_date', 'created_at']
     ordering = ['-movement_date', '-created_at']
+    pagination_class = HighVolumePagination
+    cursor_ordering = ('-movement_date', '-id')
+    query_budget = {'list': 3, 'retrieve': 2}
     
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
@@ -145,6 +278,12 @@ class MaterialMovementViewSet(WineryRequiredMixin, viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
     
+    def perform_destroy(self, instance):
+        try:
+            instance.delete()
+        except DjangoValidationError as exc:
+            raise ValidationError({'movement_date': exc.messages})
+    
     @action(detail=False, methods=['get'])
     def types(self, request):
         """Get available movement types"""
@@ -155,7 +294,7 @@ class MaterialMovementViewSet(WineryRequiredMixin, viewsets.ModelViewSet):
         ])
 
 
-class AdditionViewSet(WineryRequiredMixin, viewsets.ModelViewSet):
+class AdditionViewSet(SparseFieldsetViewMixin, WineryRequiredMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing additions to tanks/barrels
     """
@@ -165,6 +304,10 @@ class AdditionViewSet(WineryRequiredMixin, viewsets.ModelViewSet):
     search_fields = ['purpose', 'notes']
     ordering_fields = ['addition_date', 'created_at']
     ordering = ['-addition_date', '-created_at']
+    pagination_class = HighVolumePagination
+    cursor_ordering = ('-addition_date', '-id')
+    query_budget = {'list': 3, 'retrieve': 3, 'by_tank': 2, 'by_barrel': 2, 'summary': 4, 'costs': 3, 'bulk': 36,
+                    'usage_trend': 3, 'vessel_usage': 3}
     
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
@@ -178,11 +321,73 @@ class AdditionViewSet(WineryRequiredMixin, viewsets.ModelViewSet):
         queryset = queryset.select_related(
             'material', 'tank', 'barrel', 'wine_lot', 'batch', 'added_by'
         )
+        if self.action == 'retrieve':
+            queryset = queryset.prefetch_related('cost_allocations')
+        
+        # Filter by winery
+        queryset = queryset.filter(winery=self.request.winery)
+        
         return queryset
     
     def perform_create(self, serializer):
         serializer.save(winery=self.request.winery, added_by=self.request.user)
     
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Add one material to many tanks and barrels.
+        
+        Body: material, method, dosage_rate, rate_unit, tanks and/or
+        barrels (lists of ids), addition_date, purpose, notes, preview.
+        Methods (apps.inventory.dosage): rate (dosage_rate of the product
+        in mg/L, g/hL, g/L, mL/hL or mL/L), active (rate of the material's
+        active ingredient), free_so2 and molecular_so2 (dosage_rate is the
+        target in mg/L, from each vessel's latest pH and free SO₂). Each
+        vessel's quantity follows its current volume.
+        
+        With preview=true the per-vessel plan is returned and nothing is
+        written; otherwise the vessels needing a dose get their additions
+        and one aggregated usage movement, in one transaction.
+        """
+        serializer = AdditionBulkCreateSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        material = data['material']
+        total = sum((dose[2] for dose in data['doses']), Decimal('0'))
+        
+        if data['preview']:
+            on_hand = MaterialStock.objects.filter(material=material).aggregate(
+                total=Sum('quantity')
+            )['total'] or Decimal('0')
+            return Response({
+                'material': material.id,
+                'unit': material.unit,
+                'method': data['method'],
+                'vessel_count': len(data['plan']),
+                'addition_count': len(data['doses']),
+                'total_quantity': total,
+                'stock_on_hand': on_hand,
+                'sufficient_stock': on_hand >= total,
+                'vessels': DosePlanSerializer(data['plan'], many=True).data,
+            })
+        
+        movement, _ = Addition.create_bulk(
+            request.winery, material, data['doses'], data['addition_date'], request.user,
+            purpose=data['purpose'], notes=data['notes'],
+        )
+        additions = self.get_queryset().filter(movement=movement).order_by('tank__code', 'barrel__code')
+        return Response({
+            'movement': movement.id,
+            'addition_count': len(data['doses']),
+            'total_quantity': -movement.quantity,
+            'skipped': [
+                {'vessel_type': row['field'], 'vessel_id': row['vessel'].id, 'code': row['vessel'].code,
+                 'status': row['status']}
+                for row in data['plan'] if row['quantity'] is None
+            ],
+            'additions': AdditionListSerializer(additions, many=True).data,
+        }, status=status.HTTP_201_CREATED)
+    
     @action(detail=False, methods=['get'])
     def by_tank(self, request):
         """Get all additions for a specific tank"""
@@ -207,22 +412,22 @@ class AdditionViewSet(WineryRequiredMixin, viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def summary(self, request):
-        """Get addition summary statistics"""
-        queryset = self.get_queryset()
+        """Get addition summary statistics (from the addition rollups)"""
+        monthly = AdditionMonthlyRollup.objects.filter(winery=request.winery)
+        week_ago = timezone.localdate(timezone=ZoneInfo(request.winery.timezone or 'UTC')) - timedelta(days=7)
         
         # Total additions
-        total_additions = queryset.count()
+        total_additions = monthly.aggregate(total=Coalesce(Sum('addition_count'), 0))['total']
         
         # Additions this week
-        from django.utils import timezone
-        from datetime import timedelta
-        week_ago = timezone.now() - timedelta(days=7)
-        additions_this_week = queryset.filter(addition_date__gte=week_ago).count()
+        additions_this_week = AdditionDailyRollup.objects.filter(
+            winery=request.winery, day__gt=week_ago
+        ).aggregate(total=Coalesce(Sum('addition_count'), 0))['total']
         
         # Most used materials
-        most_used = queryset.values('material__name').annotate(
-            total_quantity=Sum('quantity'),
-            usage_count=Count('id')
+        most_used = monthly.values('material__name').annotate(
+            total_quantity=Sum('total_quantity'),
+            usage_count=Sum('addition_count')
         ).order_by('-usage_count')[:5]
         
         return Response({
@@ -230,3 +435,285 @@ class AdditionViewSet(WineryRequiredMixin, viewsets.ModelViewSet):
             'additions_this_week': additions_this_week,
             'most_used_materials': list(most_used)
         })
+    
+    def _rollup_period(self, request):
+        """Daily rollups of the winery in ?date_from= / ?date_to= (YYYY-MM-DD)"""
+        rollups = AdditionDailyRollup.objects.filter(winery=request.winery)
+        for param, lookup in (('date_from', 'day__gte'), ('date_to', 'day__lte')):
+            value = request.query_params.get(param)
+            if value:
+                try:
+                    day = parse_date(value)
+                except ValueError:  # Well formed but not a real date, e.g. 2025-02-30
+                    day = None
+                if day is None:
+                    raise ValidationError({param: 'Must be a date (YYYY-MM-DD).'})
+                rollups = rollups.filter(**{lookup: day})
+        material = _uuid_param(request, 'material')
+        if material:
+            rollups = rollups.filter(material_id=material)
+        return rollups
+    
+    @action(detail=False, methods=['get'])
+    def usage_trend(self, request):
+        """
+        Quantity and number of additions per material per week (weeks start
+        on Monday) over the last ?weeks= weeks (default 12, at most 104).
+        Optional ?material= restricts to one material.
+        """
+        try:
+            weeks = int(request.query_params.get('weeks', 12))
+        except ValueError:
+            weeks = 0
+        if not 1 <= weeks <= 104:
+            return Response({'error': 'weeks must be between 1 and 104'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        today = timezone.localdate(timezone=ZoneInfo(request.winery.timezone or 'UTC'))
+        start = today - timedelta(days=today.weekday(), weeks=weeks - 1)
+        rows = self._rollup_period(request).filter(day__gte=start).values(
+            'material_id', 'material__name', 'material__unit', week=TruncWeek('day'),
+        ).annotate(
+            addition_count=Sum('addition_count'), total_quantity=Sum('total_quantity'),
+        ).order_by('material__name', 'week')
+        
+        return Response({
+            'weeks': weeks,
+            'start': start,
+            'results': [
+                {
+                    'material_id': row['material_id'],
+                    'material_name': row['material__name'],
+                    'unit': row['material__unit'],
+                    'week': row['week'],
+                    'addition_count': row['addition_count'],
+                    'total_quantity': row['total_quantity'],
+                }
+                for row in rows
+            ],
+        })
+    
+    @action(detail=False, methods=['get'])
+    def vessel_usage(self, request):
+        """
+        Material used per vessel: additions, quantity and first/last day per
+        vessel and material, paginated. Optional ?vessel_type= (tank, barrel,
+        wine_lot, batch), ?vessel_id=, ?material=, ?date_from= and ?date_to=.
+        """
+        rollups = self._rollup_period(request).exclude(vessel_type='')
+        vessel_type = request.query_params.get('vessel_type')
+        if vessel_type:
+            if vessel_type.upper() not in AdditionTarget.values:
+                return Response(
+                    {'error': 'vessel_type must be one of: tank, barrel, wine_lot, batch'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            rollups = rollups.filter(vessel_type=vessel_type.upper())
+        vessel_id = _uuid_param(request, 'vessel_id')
+        if vessel_id:
+            rollups = rollups.filter(vessel_id=vessel_id)
+        
+        rows = rollups.values(
+            'vessel_type', 'vessel_id', 'material_id', 'material__name', 'material__unit',
+        ).annotate(
+            vessel_label=Max('vessel_label'),
+            addition_count=Sum('addition_count'),
+            total_quantity=Sum('total_quantity'),
+            first_day=Min('day'),
+            last_day=Max('day'),
+        ).order_by('vessel_type', 'vessel_label', 'vessel_id', 'material__name')
+        
+        paginator = PageNumberPagination()
+        page = paginator.paginate_queryset(rows, request, view=self)
+        return paginator.get_paginated_response([
+            {
+                'vessel_type': row['vessel_type'],
+                'vessel_id': row['vessel_id'],
+                'vessel_label': row['vessel_label'],
+                'material_id': row['material_id'],
+                'material_name': row['material__name'],
+                'unit': row['material__unit'],
+                'addition_count': row['addition_count'],
+                'total_quantity': row['total_quantity'],
+                'first_day': row['first_day'],
+                'last_day': row['last_day'],
+            }
+            for row in page
+        ])
+    
+    @action(detail=False, methods=['get'])
+    def costs(self, request):
+        """
+        Addition costs per tank, batch or wine lot (?group_by=, default
+        batch) with the cost per litre of their current volume.
+        
+        Batch and wine lot costs come from the cost allocations (tank
+        additions split by the tank's composition at the addition date);
+        their volume is the ledger volume of the key. Optional ?date_from=
+        and ?date_to= (YYYY-MM-DD) restrict the additions.
+        """
+        from apps.ledger.models import CompositionKeyType, TankLedger
+        
+        group_by = request.query_params.get('group_by', 'batch')
+        if group_by not in ('tank', 'batch', 'wine_lot'):
+            return Response(
+                {'error': 'group_by must be one of: tank, batch, wine_lot'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        additions = Addition.objects.filter(winery=request.winery)
+        for param, lookup in (('date_from', 'addition_date__date__gte'), ('date_to', 'addition_date__date__lte')):
+            value = request.query_params.get(param)
+            if value:
+                try:
+                    day = parse_date(value)
+                except ValueError:  # Well formed but not a real date, e.g. 2025-02-30
+                    day = None
+                if day is None:
+                    return Response(
+                        {'error': f'{param} must be a date (YYYY-MM-DD)'},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                additions = additions.filter(**{lookup: day})
+        
+        def per_litre(cost, volume):
+            if cost is None or not volume or volume <= 0:
+                return None
+            return round(float(cost / volume), 4)
+        
+        if group_by == 'tank':
+            rows = additions.filter(tank__isnull=False).values(
+                'tank_id', 'tank__code', 'tank__current_volume_l'
+            ).annotate(
+                total_cost=Sum('cost'), addition_count=Count('id')
+            ).order_by('tank__code')
+            results = [
+                {
+                    'id': row['tank_id'],
+                    'label': row['tank__code'],
+                    'addition_count': row['addition_count'],
+                    'total_cost': row['total_cost'],
+                    'volume_l': row['tank__current_volume_l'],
+                    'cost_per_l': per_litre(row['total_cost'], row['tank__current_volume_l']),
+                }
+                for row in rows
+            ]
+        else:
+            key_type = CompositionKeyType.BATCH if group_by == 'batch' else CompositionKeyType.WINE_LOT
+            rows = list(
+                AdditionCostAllocation.objects.filter(
+                    winery=request.winery, composition_key_type=key_type, addition__in=additions,
+                ).values(
+                    'composition_key_id', 'composition_key_label'
+                ).annotate(
+                    total_cost=Sum('cost'), addition_count=Count('addition_id', distinct=True)
+                ).order_by('composition_key_label')
+            )
+            volumes = dict(
+                TankLedger.objects.filter(
+                    winery=request.winery, composition_key_type=key_type,
+                    composition_key_id__in=[row['composition_key_id'] for row in rows],
+                ).values('composition_key_id').annotate(
+                    volume=Sum('delta_volume_l')
+                ).order_by().values_list('composition_key_id', 'volume')
+            )
+            results = [
+                {
+                    'id': row['composition_key_id'],
+                    'label': row['composition_key_label'],
+                    'addition_count': row['addition_count'],
+                    'total_cost': row['total_cost'],
+                    'volume_l': volumes.get(row['composition_key_id']),
+                    'cost_per_l': per_litre(row['total_cost'], volumes.get(row['composition_key_id'])),
+                }
+                for row in rows
+            ]
+        
+        return Response({'group_by': group_by, 'results': results})
+
+
+class LowStockAlertViewSet(WineryRequiredMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Low-stock alert feed (maintained by the stock write path).
+    
+    Open alerts by default; ?include_cleared=true adds cleared ones.
+    """
+    queryset = LowStockAlert.objects.all()
+    serializer_class = LowStockAlertSerializer
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['material']
+    query_budget = {'list': 4, 'retrieve': 2}
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        queryset = queryset.select_related('material').filter(winery=self.request.winery)
+        include_cleared = self.request.query_params.get('include_cleared', '').lower() in ('true', '1')
+        if self.action == 'list' and not include_cleared:
+            queryset = queryset.filter(cleared_at__isnull=True)
+        return queryset
+
+
+class InventoryPeriodCloseViewSet(
+    WineryRequiredMixin,
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.CreateModelMixin,
+    mixins.DestroyModelMixin,
+    viewsets.GenericViewSet,
+):
+    """
+    Inventory period closes with their closing stock snapshots.
+    
+    POST {"close_date": "2025-12-31"} closes the period and locks movements
+    dated before the end of that day; DELETE reopens the most recent close.
+    """
+    queryset = InventoryPeriodClose.objects.all()
+    serializer_class = InventoryPeriodCloseSerializer
+    permission_classes = [IsWineryOwnerOrReadOnly]
+    query_budget = {'list': 4, 'retrieve': 3, 'snapshots': 5}
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        return queryset.select_related('closed_by').filter(winery=self.request.winery)
+    
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            period = InventoryPeriodClose.close(
+                request.winery,
+                serializer.validated_data['close_date'],
+                user=request.user,
+                notes=serializer.validated_data.get('notes', ''),
+            )
+        except DjangoValidationError as exc:
+            return Response({'error': ' '.join(exc.messages)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(period).data, status=status.HTTP_201_CREATED)
+    
+    def destroy(self, request, *args, **kwargs):
+        period = self.get_object()
+        if InventoryPeriodClose.latest(request.winery).pk != period.pk:
+            return Response(
+                {'error': 'Only the most recent close can be reopened.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        period.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    
+    @action(detail=True, methods=['get'])
+    def snapshots(self, request, pk=None):
+        """Closing stock per material and location, with value"""
+        period = self.get_object()
+        queryset = period.snapshots.select_related('material')
+        material = _uuid_param(request, 'material')
+        if material:
+            queryset = queryset.filter(material_id=material)
+        totals = queryset.aggregate(total_value=Sum('value'))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            response = self.get_paginated_response(StockSnapshotSerializer(page, many=True).data)
+            response.data['total_value'] = totals['total_value']
+            return response
+        return Response({
+            'results': StockSnapshotSerializer(queryset, many=True).data,
+            'total_value': totals['total_value'],
+        })
@@ -0,0 +1,15 @@
+from django.contrib import admin
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['kind', 'status', 'winery', 'progress_current', 'progress_total', 'attempts', 'created_at']
+    list_filter = ['status', 'kind', 'winery']
+    search_fields = ['kind', 'error']
+    ordering = ['-created_at']
+    readonly_fields = [
+        'id', 'winery', 'kind', 'params', 'status', 'progress_current', 'progress_total',
+        'progress_message', 'result', 'error', 'attempts', 'created_by',
+        'created_at', 'started_at', 'finished_at', 'updated_at',
+    ]
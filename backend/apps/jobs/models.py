@@ -0,0 +1,147 @@
+"""
+Models for background jobs.
+"""
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+# Minimum seconds between progress reports of a running job
+PROGRESS_INTERVAL = 1.0
+
+
+def _progress_key(job_id):
+    return f'job:{job_id}:progress'
+
+
+def _cancel_key(job_id):
+    return f'job:{job_id}:cancel'
+
+
+class JobCancelled(Exception):
+    """Raised from ``Job.set_progress()`` after a cancel was requested."""
+
+
+class JobStatus(models.TextChoices):
+    """Lifecycle of a job."""
+    PENDING = 'PENDING', 'Pending'        # Queued, or waiting for a retry
+    RUNNING = 'RUNNING', 'Running'
+    SUCCEEDED = 'SUCCEEDED', 'Succeeded'
+    FAILED = 'FAILED', 'Failed'
+    CANCELLED = 'CANCELLED', 'Cancelled'
+
+
+class Job(models.Model):
+    """
+    One run of a registered job (see ``apps.jobs.registry``), with its
+    parameters, progress and outcome. Created by ``enqueue()`` and updated
+    by the worker executing it.
+    """
+    FINISHED_STATUSES = (JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    winery = models.ForeignKey(
+        'wineries.Winery',
+        on_delete=models.CASCADE,
+        related_name='jobs',
+        null=True,
+        blank=True,
+        help_text='Winery the job works on; empty for system-wide jobs'
+    )
+    kind = models.CharField(max_length=100, help_text='Registered job name, e.g. ledger.rebuild')
+    params = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    status = models.CharField(
+        max_length=20,
+        choices=JobStatus.choices,
+        default=JobStatus.PENDING,
+    )
+    
+    # Progress, reported by the job while it runs
+    progress_current = models.PositiveIntegerField(default=0)
+    progress_total = models.PositiveIntegerField(null=True, blank=True)
+    progress_message = models.CharField(max_length=255, blank=True)
+    
+    # Outcome
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    cancel_requested = models.BooleanField(default=False)
+    
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='jobs'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['winery', '-created_at']),
+            models.Index(fields=['status', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} ({self.status})"
+    
+    @property
+    def is_finished(self):
+        return self.status in self.FINISHED_STATUSES
+    
+    @property
+    def progress_percent(self):
+        if self.status == JobStatus.SUCCEEDED:
+            return 100
+        if not self.progress_total:
+            return None
+        return min(100, round(self.progress_current * 100 / self.progress_total))
+    
+    def set_progress(self, current, total=None, message=''):
+        """
+        Report progress from inside the job, and raise ``JobCancelled`` once
+        a cancel was requested; long loops should call it on every item.
+        
+        Progress goes to the cache rather than the row: jobs usually run in
+        a transaction, so row updates would only become visible at the end.
+        Reports are throttled to one per ``PROGRESS_INTERVAL``; the final
+        values are saved on the row when the job finishes.
+        """
+        self.progress_current = current
+        if total is not None:
+            self.progress_total = total
+        if message:
+            self.progress_message = message[:255]
+        
+        now = time.monotonic()
+        if now - getattr(self, '_progress_reported', 0.0) < PROGRESS_INTERVAL:
+            return
+        self._progress_reported = now
+        cache.set(
+            _progress_key(self.pk),
+            (self.progress_current, self.progress_total, self.progress_message),
+            timeout=settings.JOBS_TIME_LIMIT,
+        )
+        if cache.get(_cancel_key(self.pk)):
+            raise JobCancelled
+    
+    def load_live_progress(self):
+        """Overlay the progress last reported by a running job."""
+        if self.status == JobStatus.RUNNING:
+            reported = cache.get(_progress_key(self.pk))
+            if reported:
+                self.progress_current, self.progress_total, self.progress_message = reported
+    
+    def request_cancel(self):
+        """Cancel a queued job now, or ask a running one to stop at its next progress report."""
+        Job.objects.filter(pk=self.pk, status=JobStatus.PENDING).update(status=JobStatus.CANCELLED)
+        Job.objects.filter(pk=self.pk).update(cancel_requested=True)
+        cache.set(_cancel_key(self.pk), True, timeout=settings.JOBS_TIME_LIMIT)
+        self.refresh_from_db()
@@ -0,0 +1,75 @@
+"""
+Registry of job types.
+
+Apps declare jobs in a ``jobs.py`` module imported from ``AppConfig.ready()``::
+
+    @register_job('ledger.rebuild', max_retries=2, retry_on=(OperationalError,))
+    def rebuild(job, clear: bool = False):
+        for i, transfer in enumerate(transfers):
+            job.set_progress(i, total)
+            ...
+        return {'entries': created}
+
+A job function receives its ``Job`` (``job.winery``, ``job.created_by``) and
+the job's ``params`` as keyword arguments, checked against the function's
+signature and the types it annotates (``bool``, ``int``, ``float``, ``str``
+as they come out of JSON); its return value (JSON
+serializable) becomes ``job.result``. ``job.set_progress()`` records
+progress and raises ``JobCancelled`` once a cancel was requested.
+"""
+import inspect
+
+registry = {}
+
+
+class JobType:
+    """A registered job function and how it is run."""
+
+    def __init__(self, name, func, max_retries=0, retry_on=(), retry_backoff=30,
+                 admin_only=True, startable=True, description=''):
+        self.name = name
+        self.func = func
+        self.max_retries = max_retries
+        self.retry_on = tuple(retry_on)
+        self.retry_backoff = retry_backoff
+        self.admin_only = admin_only
+        self.startable = startable
+        self.description = description
+
+    def check_params(self, params):
+        """
+        Raise TypeError unless ``params`` match the job function's keyword
+        arguments and the types they are annotated with.
+        """
+        signature = inspect.signature(self.func, eval_str=True)
+        signature.bind(None, **params)
+        for name, value in params.items():
+            annotation = signature.parameters[name].annotation
+            if annotation is inspect.Parameter.empty:
+                continue
+            # JSON true/false must not pass for a number, nor 1/0 for a flag
+            if isinstance(value, bool) != (annotation is bool) or not isinstance(value, annotation):
+                raise TypeError(f'{name} must be of type {annotation.__name__}, got {type(value).__name__}')
+
+    def retry_delay(self, attempt):
+        """Exponential backoff: retry_backoff, 2x, 4x... seconds."""
+        return self.retry_backoff * 2 ** (attempt - 1)
+
+
+def register_job(name, max_retries=0, retry_on=(), retry_backoff=30, admin_only=True, startable=True):
+    """
+    Register the decorated function as job ``name``.
+
+    ``retry_on`` lists exception types that are retried up to ``max_retries``
+    times with exponential backoff; other exceptions fail the job. Jobs with
+    ``startable=False`` can only be enqueued from code, not through the API;
+    ``admin_only`` jobs can only be started by winery admins.
+    """
+    def decorator(func):
+        registry[name] = JobType(
+            name, func, max_retries=max_retries, retry_on=retry_on, retry_backoff=retry_backoff,
+            admin_only=admin_only, startable=startable,
+            description=inspect.getdoc(func) or '',
+        )
+        return func
+    return decorator
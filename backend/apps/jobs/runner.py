@@ -0,0 +1,114 @@
+"""
+Enqueueing and executing jobs.
+
+``enqueue()`` records a ``Job`` and hands its id to the Celery task
+``jobs.run`` once the surrounding transaction commits. With ``JOBS_EAGER``
+the job runs in-process right away, retries included (without waiting), and
+``enqueue()`` returns it finished. ``execute()`` is what the worker runs.
+"""
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Job, JobCancelled, JobStatus
+from .registry import registry
+
+logger = logging.getLogger(__name__)
+
+
+class RetryJob(Exception):
+    """Raised by ``execute()`` when the job should run again after ``countdown`` seconds."""
+
+    def __init__(self, countdown):
+        super().__init__(countdown)
+        self.countdown = countdown
+
+
+def enqueue(kind, winery=None, user=None, **params):
+    """Create a job of registered type ``kind`` and queue it. Returns the ``Job``."""
+    from .tasks import run_job
+
+    job_type = registry[kind]
+    job_type.check_params(params)
+    job = Job.objects.create(kind=kind, winery=winery, created_by=user, params=params)
+    if settings.JOBS_EAGER:
+        while True:
+            try:
+                execute(job.id)
+                break
+            except RetryJob:
+                continue
+        job.refresh_from_db()
+    else:
+        transaction.on_commit(lambda: run_job.delay(str(job.id)))
+    return job
+
+
+def _finish(job, status, **fields):
+    # Persist the last reported progress along with the outcome
+    fields = {
+        'progress_current': job.progress_current,
+        'progress_total': job.progress_total,
+        'progress_message': job.progress_message,
+        **fields,
+    }
+    fields.update(status=status, finished_at=timezone.now(), updated_at=timezone.now())
+    Job.objects.filter(pk=job.pk).update(**fields)
+
+
+def execute(job_id):
+    """
+    Run one attempt of a job. Jobs already finished (or cancelled while
+    queued) are skipped; a job left RUNNING by a worker that died is run
+    again. Raises ``RetryJob`` when a retryable error occurred.
+    """
+    try:
+        job = Job.objects.select_related('winery', 'created_by').get(pk=job_id)
+    except Job.DoesNotExist:
+        logger.warning('Job %s no longer exists', job_id)
+        return
+    if job.is_finished:
+        return
+    if job.cancel_requested:
+        _finish(job, JobStatus.CANCELLED)
+        return
+
+    job_type = registry.get(job.kind)
+    if job_type is None:
+        _finish(job, JobStatus.FAILED, error=f'Unknown job type {job.kind}')
+        return
+
+    job.attempts += 1
+    job.status = JobStatus.RUNNING
+    job.started_at = job.started_at or timezone.now()
+    Job.objects.filter(pk=job.pk).update(
+        status=job.status, attempts=job.attempts, started_at=job.started_at, updated_at=timezone.now(),
+    )
+
+    try:
+        result = job_type.func(job, **job.params)
+    except JobCancelled:
+        _finish(job, JobStatus.CANCELLED)
+    except job_type.retry_on as exc:
+        if job.attempts > job_type.max_retries:
+            logger.exception('Job %s (%s) failed after %d attempts', job.pk, job.kind, job.attempts)
+            _finish(job, JobStatus.FAILED, error=f'{type(exc).__name__}: {exc}')
+            return
+        countdown = job_type.retry_delay(job.attempts)
+        logger.warning('Job %s (%s) attempt %d failed, retrying in %ds: %s',
+                       job.pk, job.kind, job.attempts, countdown, exc)
+        Job.objects.filter(pk=job.pk).update(
+            status=JobStatus.PENDING, error=f'{type(exc).__name__}: {exc}', updated_at=timezone.now(),
+        )
+        raise RetryJob(countdown) from exc
+    except Exception as exc:
+        logger.exception('Job %s (%s) failed', job.pk, job.kind)
+        _finish(job, JobStatus.FAILED, error=f'{type(exc).__name__}: {exc}')
+    else:
+        total = job.progress_total if job.progress_total is not None else job.progress_current
+        _finish(
+            job, JobStatus.SUCCEEDED, result=result, error='',
+            progress_current=total, progress_total=total,
+        )
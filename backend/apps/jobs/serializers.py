@@ -0,0 +1,41 @@
+from rest_framework import serializers
+
+from .models import Job
+from .registry import registry
+
+
+class JobSerializer(serializers.ModelSerializer):
+    """Status, progress and outcome of a job."""
+    progress_percent = serializers.IntegerField(read_only=True, allow_null=True)
+    created_by_name = serializers.CharField(source='created_by.get_full_name', read_only=True, default=None)
+    
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'kind', 'params', 'status',
+            'progress_current', 'progress_total', 'progress_percent', 'progress_message',
+            'result', 'error', 'attempts', 'cancel_requested',
+            'created_by', 'created_by_name', 'created_at', 'started_at', 'finished_at', 'updated_at',
+        ]
+        read_only_fields = fields
+    
+    def to_representation(self, instance):
+        instance.load_live_progress()
+        return super().to_representation(instance)
+
+
+class JobCreateSerializer(serializers.Serializer):
+    """Start a registered job: ``{"kind": "ledger.rebuild", "params": {"clear": true}}``."""
+    kind = serializers.CharField()
+    params = serializers.DictField(required=False, default=dict)
+    
+    def validate(self, attrs):
+        job_type = registry.get(attrs['kind'])
+        if job_type is None or not job_type.startable:
+            raise serializers.ValidationError({'kind': f"Unknown job type {attrs['kind']}"})
+        try:
+            job_type.check_params(attrs['params'])
+        except TypeError as exc:
+            raise serializers.ValidationError({'params': str(exc)})
+        attrs['job_type'] = job_type
+        return attrs
@@ -0,0 +1,15 @@
+"""
+Celery task executing background jobs; see ``apps.jobs.runner``.
+"""
+from celery import shared_task
+
+from .runner import RetryJob, execute
+
+
+@shared_task(bind=True, name='jobs.run', max_retries=None)
+def run_job(self, job_id):
+    try:
+        execute(job_id)
+    except RetryJob as exc:
+        # Attempts are counted on the Job; Celery only schedules the retry
+        raise self.retry(countdown=exc.countdown, exc=exc)
@@ -0,0 +1,113 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import OperationalError
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from apps.wineries.models import Winery, WineryMembership
+from .models import Job, JobStatus
+from .registry import JobType, registry
+from .runner import enqueue, execute
+
+
+def _flaky(job):
+    raise OperationalError('connection lost')
+
+
+def _cancellable(job, items=3):
+    Job.objects.get(pk=job.pk).request_cancel()
+    for index in range(items):
+        job.set_progress(index, items)
+    return {'items': items}
+
+
+TEST_JOBS = {
+    'tests.flaky': JobType('tests.flaky', _flaky, max_retries=2, retry_on=(OperationalError,)),
+    'tests.cancellable': JobType('tests.cancellable', _cancellable),
+}
+
+
+@override_settings(JOBS_EAGER=True)
+@mock.patch.dict(registry, TEST_JOBS)
+class JobTests(APITestCase):
+    """Jobs are validated, run with retries and can be cancelled."""
+
+    URL = '/api/v1/jobs/'
+
+    def setUp(self):
+        self.winery = Winery.objects.create(name='Jobs', code='JOBS')
+        self.owner = get_user_model().objects.create_user(email='owner@jobs.test', password='x')
+        self.staff = get_user_model().objects.create_user(email='staff@jobs.test', password='x')
+        WineryMembership.objects.create(user=self.owner, winery=self.winery, role='WINERY_OWNER')
+        WineryMembership.objects.create(user=self.staff, winery=self.winery, role='CELLAR_STAFF')
+        self.client.force_authenticate(self.owner)
+        self.client.credentials(HTTP_X_WINERY_ID=str(self.winery.id))
+
+    def test_started_job_runs_to_success(self):
+        response = self.client.post(self.URL, {'kind': 'ledger.integrity_scan'}, format='json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], JobStatus.SUCCEEDED)
+        self.assertEqual(response.data['attempts'], 1)
+        self.assertEqual(response.data['progress_percent'], 100)
+        self.assertIn('issues', response.data['result'])
+
+        response = self.client.get(f"{self.URL}{response.data['id']}/")
+        self.assertEqual(response.data['status'], JobStatus.SUCCEEDED)
+
+    def test_unknown_params_are_rejected(self):
+        response = self.client.post(
+            self.URL, {'kind': 'ledger.rebuild', 'params': {'wipe': True}}, format='json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('params', response.data)
+        self.assertEqual(self.client.post(self.URL, {'kind': 'tests.nope'}, format='json').status_code, 400)
+        self.assertFalse(Job.objects.exists())
+
+    def test_params_must_have_their_annotated_types(self):
+        for clear in ('false', 0, None):
+            response = self.client.post(
+                self.URL, {'kind': 'ledger.rebuild', 'params': {'clear': clear}}, format='json',
+            )
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('clear must be of type bool', str(response.data['params']))
+        self.assertFalse(Job.objects.exists())
+
+        response = self.client.post(self.URL, {'kind': 'ledger.rebuild', 'params': {'clear': False}}, format='json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], JobStatus.SUCCEEDED)
+
+    def test_retryable_errors_fail_after_max_retries(self):
+        job = enqueue('tests.flaky', winery=self.winery)
+        self.assertEqual(job.status, JobStatus.FAILED)
+        self.assertEqual(job.attempts, 3)
+        self.assertEqual(job.error, 'OperationalError: connection lost')
+
+    def test_pending_job_is_cancelled_before_it_runs(self):
+        with override_settings(JOBS_EAGER=False):
+            job = enqueue('tests.cancellable', winery=self.winery)
+        self.assertEqual(job.status, JobStatus.PENDING)
+
+        response = self.client.post(f'{self.URL}{job.id}/cancel/')
+        self.assertEqual(response.data['status'], JobStatus.CANCELLED)
+
+        execute(job.id)
+        job.refresh_from_db()
+        self.assertEqual(job.status, JobStatus.CANCELLED)
+        self.assertEqual(job.attempts, 0)
+        self.assertEqual(self.client.post(f'{self.URL}{job.id}/cancel/').status_code, 400)
+
+    def test_running_job_stops_at_its_next_progress_report(self):
+        job = enqueue('tests.cancellable', winery=self.winery)
+        self.assertEqual(job.status, JobStatus.CANCELLED)
+        self.assertEqual(job.attempts, 1)
+        self.assertIsNone(job.result)
+
+    def test_admin_only_jobs_need_a_winery_admin(self):
+        self.client.force_authenticate(self.staff)
+        response = self.client.post(self.URL, {'kind': 'ledger.rebuild'}, format='json')
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Job.objects.exists())
+
+        response = self.client.post(self.URL, {'kind': 'ledger.integrity_scan'}, format='json')
+        self.assertEqual(response.status_code, 202)
@@ -0,0 +1,70 @@
+"""
+API for starting and following background jobs.
+"""
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from apps.wineries.mixins import WineryRequiredMixin
+from apps.wineries.permissions import IsWineryAdmin
+from .models import Job
+from .registry import registry
+from .runner import enqueue
+from .serializers import JobCreateSerializer, JobSerializer
+
+
+class JobViewSet(WineryRequiredMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin,
+                 viewsets.GenericViewSet):
+    """
+    Background jobs of the current winery.
+    
+    POST /api/v1/jobs/                 {"kind": "ledger.integrity_scan", "params": {}}
+        Queue a job; responds 202 with the job
+    GET  /api/v1/jobs/?status=RUNNING&kind=ledger.rebuild
+    GET  /api/v1/jobs/{id}/
+        Poll status, progress and result
+    POST /api/v1/jobs/{id}/cancel/
+        Cancel a queued job, or ask a running one to stop
+    GET  /api/v1/jobs/kinds/
+        Job types that can be started
+    """
+    serializer_class = JobSerializer
+    permission_classes = [IsAuthenticated]
+    filterset_fields = ['status', 'kind']
+    
+    def get_queryset(self):
+        return Job.objects.filter(winery=self.request.winery).select_related('created_by')
+    
+    def create(self, request):
+        serializer = JobCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job_type = serializer.validated_data['job_type']
+        if job_type.admin_only and not IsWineryAdmin().has_permission(request, self):
+            return Response(
+                {'error': IsWineryAdmin.message},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+        
+        job = enqueue(
+            job_type.name, winery=request.winery, user=request.user,
+            **serializer.validated_data['params'],
+        )
+        return Response(JobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        job = self.get_object()
+        if job.is_finished:
+            return Response({'error': f'Job already {job.status.lower()}'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        job.request_cancel()
+        return Response(JobSerializer(job).data)
+    
+    @action(detail=False, methods=['get'])
+    def kinds(self, request):
+        return Response([
+            {'kind': job_type.name, 'description': job_type.description, 'admin_only': job_type.admin_only}
+            for job_type in sorted(registry.values(), key=lambda t: t.name)
+            if job_type.startable
+        ])
@@ -5,11 +5,16 @@ class LabConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.lab'
     verbose_name = 'Lab Analyses'
-
-
-
-
-
-
-
-
+    
+    def ready(self):
+        # Change versions for conditional GETs
+        from apps.core.versioning import track_versions
+        from .models import Analysis
+        
+        track_versions(Analysis)
+        
+        # Delta sync for cellar tablets
+        from apps.sync.registry import register_sync
+        from .serializers import AnalysisSerializer
+        
+        register_sync('analyses', Analysis, AnalysisSerializer)
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0002_convert_to_fk'),
+        ('harvest', '0002_alter_batch_must_volume_l'),
+        ('lab', '0001_initial'),
+        ('production', '0001_initial'),
+        ('wineries', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='analysis',
+            name='lab_analysi_winery__d7252a_idx',
+        ),
+        migrations.AddIndex(
+            model_name='analysis',
+            index=models.Index(fields=['winery', '-analysis_date', '-id'], name='lab_analysi_winery__a22b78_idx'),
+        ),
+    ]
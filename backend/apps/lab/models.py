@@ -223,7 +223,8 @@ class Analysis(models.Model):
         verbose_name_plural = 'Analyses'
         ordering = ['-analysis_date']
         indexes = [
-            models.Index(fields=['winery', '-analysis_date']),
+            models.Index(fields=['winery', '-analysis_date', '-id']),
+            models.Index(fields=['winery', 'updated_at']),
             models.Index(fields=['tank', '-analysis_date']),
             models.Index(fields=['barrel', '-analysis_date']),
             models.Index(fields=['wine_lot', '-analysis_date']),
@@ -1,8 +1,9 @@
 from rest_framework import serializers
+from apps.core.serializers import SparseFieldsetMixin
 from .models import Analysis
 
 
-class AnalysisSerializer(serializers.ModelSerializer):
+class AnalysisSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Full analysis serializer with all fields."""
     
     source_display = serializers.CharField(source='get_source_display', read_only=True)
@@ -46,6 +47,13 @@ class AnalysisSerializer(serializers.ModelSerializer):
             'source_display', 'molecular_so2', 'potential_alcohol', 'bound_so2', 'mlf_progress',
         ]
         read_only_fields = ['id', 'winery', 'created_at', 'updated_at']
+        expandable_fields = {
+            'tank': 'apps.equipment.serializers.TankDropdownSerializer',
+            'barrel': 'apps.equipment.serializers.BarrelDropdownSerializer',
+        }
+        field_lookups = {
+            'source_display': ['tank', 'barrel', 'wine_lot', 'batch'],
+        }
 
 
 class AnalysisCreateSerializer(serializers.ModelSerializer):
@@ -95,7 +103,7 @@ class AnalysisCreateSerializer(serializers.ModelSerializer):
         return data
 
 
-class AnalysisListSerializer(serializers.ModelSerializer):
+class AnalysisListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Compact serializer for list views."""
     
     source_display = serializers.CharField(source='get_source_display', read_only=True)
@@ -113,6 +121,13 @@ class AnalysisListSerializer(serializers.ModelSerializer):
             'alcohol_abv',
             'analyzed_by_name',
         ]
+        expandable_fields = {
+            'tank': 'apps.equipment.serializers.TankDropdownSerializer',
+            'barrel': 'apps.equipment.serializers.BarrelDropdownSerializer',
+        }
+        field_lookups = {
+            'source_display': ['tank', 'barrel', 'wine_lot', 'batch'],
+        }
 
 
 class AnalysisQuickEntrySerializer(serializers.ModelSerializer):
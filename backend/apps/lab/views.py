@@ -5,6 +5,9 @@ from rest_framework.permissions import IsAuthenticated
 from django_filters import rest_framework as filters
 from django.db.models import Avg, Min, Max, Count
 
+from apps.core.mixins import SparseFieldsetViewMixin
+from apps.core.pagination import HighVolumePagination
+from apps.core.replica import read_replica
 from apps.wineries.mixins import WineryContextMixin
 from apps.wineries.permissions import IsWineryMember
 from .models import Analysis
@@ -35,7 +38,7 @@ class AnalysisFilter(filters.FilterSet):
         }
 
 
-class AnalysisViewSet(WineryContextMixin, viewsets.ModelViewSet):
+class AnalysisViewSet(SparseFieldsetViewMixin, WineryContextMixin, viewsets.ModelViewSet):
     """
     API endpoint for lab analyses.
     
@@ -54,6 +57,9 @@ class AnalysisViewSet(WineryContextMixin, viewsets.ModelViewSet):
     search_fields = ['notes']
     ordering_fields = ['analysis_date', 'created_at']
     ordering = ['-analysis_date']
+    pagination_class = HighVolumePagination
+    cursor_ordering = ('-analysis_date', '-id')
+    query_budget = {'list': 3, 'retrieve': 2}
     
     def get_queryset(self):
         if not hasattr(self.request, 'winery') or not self.request.winery:
@@ -189,6 +195,7 @@ class AnalysisViewSet(WineryContextMixin, viewsets.ModelViewSet):
         return Response(data)
     
     @action(detail=False, methods=['get'])
+    @read_replica
     def summary(self, request):
         """
         Get summary statistics for analyses.
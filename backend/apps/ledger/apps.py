@@ -9,8 +9,12 @@ class LedgerConfig(AppConfig):
     def ready(self):
         # Import signals when app is ready
         from . import signals  # noqa: F401
-
-
-
-
-
+        
+        # Change versions for conditional GETs
+        from apps.core.versioning import track_versions
+        from .models import TankLedger
+        
+        track_versions(TankLedger)
+        
+        # Background jobs
+        from . import jobs  # noqa: F401
@@ -0,0 +1,27 @@
+"""
+Background jobs of the ledger app (see apps.jobs.registry).
+"""
+import io
+
+from django.db import OperationalError
+
+from apps.jobs.registry import register_job
+from .models import TankLedger
+
+
+@register_job('ledger.rebuild', max_retries=2, retry_on=(OperationalError,))
+def rebuild_ledger(job, clear: bool = False):
+    """Rebuild the winery's tank ledger from its transfer history."""
+    from .management.commands.rebuild_ledger import Command
+
+    command = Command(stdout=io.StringIO())
+    entries, transfers = command._rebuild_winery(
+        job.winery, dry_run=False, clear=clear, progress=job.set_progress,
+    )
+    return {'transfers': transfers, 'entries_created': entries}
+
+
+@register_job('ledger.integrity_scan', admin_only=False, max_retries=2, retry_on=(OperationalError,))
+def integrity_scan(job):
+    """Check every active tank's ledger composition against its volume."""
+    return TankLedger.check_integrity(job.winery, progress=job.set_progress)
@@ -65,8 +65,11 @@ class Command(BaseCommand):
             f'Done! Processed {total_transfers} transfers, created {total_entries} ledger entries'
         ))
     
-    def _rebuild_winery(self, winery, dry_run, clear):
-        """Rebuild ledger for a single winery."""
+    def _rebuild_winery(self, winery, dry_run, clear, progress=None):
+        """
+        Rebuild ledger for a single winery. ``progress(done, total)`` is
+        called after each transfer (used by the ``ledger.rebuild`` job).
+        """
         self.stdout.write(f'  Processing winery: {winery.name}...')
         
         # Get all transfers for this winery, ordered by date
@@ -81,9 +84,13 @@ class Command(BaseCommand):
             self.stdout.write(f'    Cleared {deleted} existing entries')
         
         entries_created = 0
+        total = transfers.count()
         
         with transaction.atomic():
-            for transfer in transfers:
+            for index, transfer in enumerate(transfers, start=1):
+                if progress:
+                    progress(index - 1, total)
+                
                 # Skip if ledger entries already exist (unless clearing)
                 if not clear and TankLedger.objects.filter(transfer=transfer).exists():
                     continue
@@ -95,8 +102,8 @@ class Command(BaseCommand):
                 # Rollback in dry-run mode
                 transaction.set_rollback(True)
         
-        self.stdout.write(f'    {transfers.count()} transfers, {entries_created} entries')
-        return entries_created, transfers.count()
+        self.stdout.write(f'    {total} transfers, {entries_created} entries')
+        return entries_created, total
     
     def _create_entries_for_transfer(self, transfer, dry_run):
         """Create ledger entries for a single transfer."""
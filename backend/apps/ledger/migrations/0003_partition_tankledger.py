@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+import apps.core.partitioning
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ledger', '0002_tankledger_batch_alter_tankledger_event_datetime_and_more'),
+        ('production', '0003_sync_updated_at_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tankledger',
+            name='transfer',
+            field=models.ForeignKey(blank=True, db_constraint=False, help_text='The transfer event that created this entry', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='production.transfer'),
+        ),
+        apps.core.partitioning.PartitionByYear(
+            model_name='tankledger',
+            range_field='event_datetime',
+            hash_field='winery',
+            hash_modulus=4,
+        ),
+    ]
@@ -9,6 +9,8 @@ from decimal import Decimal
 from django.db import models
 from django.core.validators import MinValueValidator
 
+from apps.core.partitioning import YearPartitioning
+
 
 class CompositionKeyType(models.TextChoices):
     """Types of composition keys for the ledger."""
@@ -50,6 +52,7 @@ class TankLedger(models.Model):
         related_name='ledger_entries',
         null=True,
         blank=True,
+        db_constraint=False,  # Transfer is partitioned; cascades are emulated by Django
         help_text='The transfer event that created this entry'
     )
     batch = models.ForeignKey(
@@ -104,6 +107,9 @@ class TankLedger(models.Model):
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    # Yearly range partitions, hash sub-partitioned by winery (apps.core.partitioning)
+    partitioning = YearPartitioning('event_datetime', hash_field='winery', hash_modulus=4)
     
     class Meta:
         ordering = ['event_datetime', 'created_at']
@@ -134,16 +140,29 @@ class TankLedger(models.Model):
             'has_integrity_issues': bool,
         }
         """
-        from django.db.models import Sum, F
-        from apps.harvest.models import Batch
+        return cls.get_tank_compositions([tank], as_of=as_of)[tank.pk]
+    
+    @classmethod
+    def get_tank_compositions(cls, tanks, as_of=None):
+        """
+        Calculate the composition of several tanks in a constant number of
+        queries. Returns ``{tank_id: composition}`` with the same shape as
+        ``get_tank_composition``; tanks without ledger entries get an empty
+        composition.
+        """
+        from django.db.models import Prefetch, Sum
+        from apps.harvest.models import Batch, BatchSource
+        
+        tank_ids = [tank.pk for tank in tanks]
         
-        # Get ledger entries for this tank
-        entries = cls.objects.filter(tank=tank)
+        # Get ledger entries for these tanks
+        entries = cls.objects.filter(tank_id__in=tank_ids)
         if as_of:
             entries = entries.filter(event_datetime__lte=as_of)
         
-        # Aggregate by composition key
+        # Aggregate by tank and composition key
         composition = entries.values(
+            'tank_id',
             'composition_key_type',
             'composition_key_id',
             'composition_key_label'
@@ -151,29 +170,60 @@ class TankLedger(models.Model):
             volume=Sum('delta_volume_l')
         )
         
-        total_volume = Decimal('0')
-        unknown_volume = Decimal('0')
-        by_batch = []
-        has_integrity_issues = False
+        state = {
+            tank_id: {
+                'total_volume': Decimal('0'),
+                'unknown_volume': Decimal('0'),
+                'by_batch': [],
+                'has_integrity_issues': False,
+            }
+            for tank_id in tank_ids
+        }
         
         for entry in composition:
+            tank_state = state[entry['tank_id']]
             volume = entry['volume'] or Decimal('0')
             
             # Check for negative volumes (integrity issue)
             if volume < 0:
-                has_integrity_issues = True
+                tank_state['has_integrity_issues'] = True
             
-            total_volume += volume
+            tank_state['total_volume'] += volume
             
             if entry['composition_key_type'] == CompositionKeyType.UNKNOWN:
-                unknown_volume += volume
+                tank_state['unknown_volume'] += volume
             elif entry['composition_key_type'] == CompositionKeyType.BATCH:
-                by_batch.append({
+                tank_state['by_batch'].append({
                     'batch_id': entry['composition_key_id'],
                     'label': entry['composition_key_label'],
                     'volume_l': volume,
                 })
         
+        # Load every referenced batch with its sources once
+        batch_ids = {
+            batch_entry['batch_id']
+            for tank_state in state.values()
+            for batch_entry in tank_state['by_batch']
+        }
+        batches = Batch.objects.filter(id__in=batch_ids).prefetch_related(
+            Prefetch(
+                'sources',
+                queryset=BatchSource.objects.select_related('variety', 'vineyard_block__grower'),
+            )
+        ) if batch_ids else []
+        batches = {batch.id: batch for batch in batches}
+        
+        return {
+            tank_id: cls._build_composition(tank_state, batches)
+            for tank_id, tank_state in state.items()
+        }
+    
+    @staticmethod
+    def _build_composition(tank_state, batches):
+        total_volume = tank_state['total_volume']
+        unknown_volume = tank_state['unknown_volume']
+        by_batch = tank_state['by_batch']
+        
         # Calculate percentages and get variety/vineyard breakdown
         by_variety = {}
         by_vineyard = {}
@@ -187,40 +237,38 @@ class TankLedger(models.Model):
                 batch_entry['percentage'] = Decimal('0')
             
             # Get batch details for variety/vineyard breakdown
-            try:
-                batch = Batch.objects.prefetch_related(
-                    'sources__variety', 'sources__vineyard_block__grower'
-                ).get(id=batch_entry['batch_id'])
+            batch = batches.get(batch_entry['batch_id'])
+            if batch is None:
+                continue
+            
+            sources = batch.sources.all()
+            total_batch_weight = sum(s.weight_kg for s in sources)
+            for source in sources:
+                # Calculate proportional volume from this batch
+                source_proportion = Decimal('1')
+                if total_batch_weight > 0:
+                    source_proportion = Decimal(str(source.weight_kg)) / Decimal(str(total_batch_weight))
+                
+                source_volume = batch_entry['volume_l'] * source_proportion
                 
-                for source in batch.sources.all():
-                    # Calculate proportional volume from this batch
-                    source_proportion = Decimal('1')
-                    total_batch_weight = sum(s.weight_kg for s in batch.sources.all())
-                    if total_batch_weight > 0:
-                        source_proportion = Decimal(str(source.weight_kg)) / Decimal(str(total_batch_weight))
-                    
-                    source_volume = batch_entry['volume_l'] * source_proportion
-                    
-                    # Variety breakdown
-                    variety_name = source.variety.name
-                    if variety_name in by_variety:
-                        by_variety[variety_name] += source_volume
+                # Variety breakdown
+                variety_name = source.variety.name
+                if variety_name in by_variety:
+                    by_variety[variety_name] += source_volume
+                else:
+                    by_variety[variety_name] = source_volume
+                
+                # Vineyard breakdown
+                if source.vineyard_block:
+                    vineyard_key = f"{source.vineyard_block.name}|{source.vineyard_block.grower.name if source.vineyard_block.grower else 'Unknown'}"
+                    if vineyard_key in by_vineyard:
+                        by_vineyard[vineyard_key]['volume_l'] += source_volume
                     else:
-                        by_variety[variety_name] = source_volume
-                    
-                    # Vineyard breakdown
-                    if source.vineyard_block:
-                        vineyard_key = f"{source.vineyard_block.name}|{source.vineyard_block.grower.name if source.vineyard_block.grower else 'Unknown'}"
-                        if vineyard_key in by_vineyard:
-                            by_vineyard[vineyard_key]['volume_l'] += source_volume
-                        else:
-                            by_vineyard[vineyard_key] = {
-                                'vineyard': source.vineyard_block.name,
-                                'grower': source.vineyard_block.grower.name if source.vineyard_block.grower else 'Unknown',
-                                'volume_l': source_volume,
-                            }
-            except Batch.DoesNotExist:
-                pass
+                        by_vineyard[vineyard_key] = {
+                            'vineyard': source.vineyard_block.name,
+                            'grower': source.vineyard_block.grower.name if source.vineyard_block.grower else 'Unknown',
+                            'volume_l': source_volume,
+                        }
         
         # Convert variety dict to list with percentages
         variety_list = []
@@ -250,10 +298,55 @@ class TankLedger(models.Model):
             'by_vineyard': vineyard_list,
             'unknown_volume_l': unknown_volume,
             'unknown_percentage': round((unknown_volume / total_volume) * 100, 2) if total_volume > 0 else Decimal('0'),
-            'has_integrity_issues': has_integrity_issues or unknown_volume > 0,
+            'has_integrity_issues': tank_state['has_integrity_issues'] or unknown_volume > 0,
+        }
+    
+    @classmethod
+    def check_integrity(cls, winery, progress=None):
+        """
+        Find active tanks whose ledger composition has unknown or negative
+        volume, or disagrees with the tank's current volume by more than 1 L.
+        
+        ``progress(done, total)`` is called after each tank (used by the
+        ``ledger.integrity_scan`` background job).
+        """
+        from apps.equipment.models import Tank
+        
+        tanks = list(Tank.objects.filter(winery=winery, is_active=True))
+        compositions = cls.get_tank_compositions(tanks)
+        
+        issues = []
+        for index, tank in enumerate(tanks, start=1):
+            composition = compositions[tank.pk]
+            
+            ledger_volume = composition['total_volume_l']
+            tank_volume = tank.current_volume_l
+            volume_mismatch = ledger_volume - tank_volume
+            
+            has_issues = (
+                composition['has_integrity_issues'] or
+                abs(volume_mismatch) > Decimal('1')  # Allow 1L tolerance
+            )
+            
+            if has_issues:
+                issues.append({
+                    'tank_id': str(tank.id),
+                    'tank_code': tank.code,
+                    'has_unknown_volume': composition['unknown_volume_l'] > 0,
+                    'unknown_volume_l': composition['unknown_volume_l'],
+                    'unknown_percentage': composition['unknown_percentage'],
+                    'has_negative_composition': any(
+                        b['volume_l'] < 0 for b in composition['by_batch']
+                    ),
+                    'ledger_volume_l': ledger_volume,
+                    'tank_current_volume_l': tank_volume,
+                    'volume_mismatch_l': volume_mismatch,
+                })
+            if progress:
+                progress(index, len(tanks))
+        
+        return {
+            'total_tanks': len(tanks),
+            'tanks_with_issues': len(issues),
+            'issues': issues,
         }
-
-
-
-
-
@@ -47,7 +47,7 @@ def create_ledger_entries(sender, instance, created, **kwargs):
         # Update destination tank status to IN_USE if it receives volume
         if transfer.destination_tank.status == 'EMPTY' and transfer.volume_l > 0:
             transfer.destination_tank.status = 'IN_USE'
-            transfer.destination_tank.save(update_fields=['status'])
+            transfer.destination_tank.save(update_fields=['status', 'updated_at'])
 
 
 def _create_outflow_entries(transfer):
@@ -213,7 +213,7 @@ def _update_tank_status_if_empty(tank):
     if tank.current_volume_l <= 0 and tank.status == 'IN_USE':
         tank.status = 'EMPTY'
         tank.current_volume_l = 0  # Ensure it's exactly 0, not negative
-        tank.save(update_fields=['status', 'current_volume_l'])
+        tank.save(update_fields=['status', 'current_volume_l', 'updated_at'])
         print(f'[Signal] Tank {tank.code} marked as EMPTY (volume: {tank.current_volume_l}L)')
 
 
@@ -6,13 +6,15 @@ Provides endpoints for:
 - Integrity checks
 - Ledger history
 """
-from decimal import Decimal
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.db.models import Sum
 
+from apps.core.mixins import ConditionalGetMixin
+from apps.core.pagination import HighVolumePagination
+from apps.core.replica import read_replica
 from apps.wineries.mixins import WineryContextMixin
 from apps.wineries.permissions import IsWineryMember
 from apps.equipment.models import Tank
@@ -24,7 +26,7 @@ from .serializers import (
 )
 
 
-class TankCompositionViewSet(WineryContextMixin, viewsets.ViewSet):
+class TankCompositionViewSet(ConditionalGetMixin, WineryContextMixin, viewsets.ViewSet):
     """
     API endpoint for tank composition queries.
     
@@ -36,9 +38,19 @@ class TankCompositionViewSet(WineryContextMixin, viewsets.ViewSet):
     
     GET /api/v1/ledger/composition/integrity/
         Returns integrity issues across all tanks
+    
+    GET /api/v1/ledger/composition/{tank_id}/history/?pagination=cursor
+        Returns ledger entries for a tank, newest first, cursor paginated
     """
     permission_classes = [IsAuthenticated, IsWineryMember]
+    query_budget = {'retrieve': 4, 'history': 5}
+    cursor_ordering = ('-event_datetime', '-id')
+    etag_resources = (
+        'equipment.tank', 'ledger.tankledger', 'harvest.batch', 'harvest.batchsource',
+        'master_data.grapevariety', 'master_data.vineyardblock', 'master_data.grower',
+    )
     
+    @read_replica
     def list(self, request):
         """Get composition summary for all tanks."""
         if not hasattr(request, 'winery') or not request.winery:
@@ -97,51 +109,20 @@ class TankCompositionViewSet(WineryContextMixin, viewsets.ViewSet):
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
+    @read_replica
     def integrity(self, request):
-        """Check integrity across all tanks."""
+        """
+        Check integrity across all tanks. Compositions are built in bulk, so
+        this answers inline; the ``ledger.integrity_scan`` job runs the same
+        check in the background for scheduled scans.
+        """
         if not hasattr(request, 'winery') or not request.winery:
             return Response({'error': 'Winery context required'}, status=400)
         
-        tanks = Tank.objects.filter(
-            winery=request.winery,
-            is_active=True
-        )
-        
-        issues = []
-        for tank in tanks:
-            composition = TankLedger.get_tank_composition(tank)
-            
-            ledger_volume = composition['total_volume_l']
-            tank_volume = tank.current_volume_l
-            volume_mismatch = ledger_volume - tank_volume
-            
-            has_issues = (
-                composition['has_integrity_issues'] or
-                abs(volume_mismatch) > Decimal('1')  # Allow 1L tolerance
-            )
-            
-            if has_issues:
-                issues.append({
-                    'tank_id': str(tank.id),
-                    'tank_code': tank.code,
-                    'has_unknown_volume': composition['unknown_volume_l'] > 0,
-                    'unknown_volume_l': composition['unknown_volume_l'],
-                    'unknown_percentage': composition['unknown_percentage'],
-                    'has_negative_composition': any(
-                        b['volume_l'] < 0 for b in composition['by_batch']
-                    ),
-                    'ledger_volume_l': ledger_volume,
-                    'tank_current_volume_l': tank_volume,
-                    'volume_mismatch_l': volume_mismatch,
-                })
-        
-        return Response({
-            'total_tanks': tanks.count(),
-            'tanks_with_issues': len(issues),
-            'issues': issues,
-        })
+        return Response(TankLedger.check_integrity(request.winery))
     
     @action(detail=True, methods=['get'])
+    @read_replica
     def history(self, request, pk=None):
         """Get ledger history for a specific tank."""
         if not hasattr(request, 'winery') or not request.winery:
@@ -152,13 +133,19 @@ class TankCompositionViewSet(WineryContextMixin, viewsets.ViewSet):
         except Tank.DoesNotExist:
             return Response({'error': 'Tank not found'}, status=404)
         
-        limit = int(request.query_params.get('limit', 100))
-        
+        # Filtering on winery too lets the (winery, tank, event_datetime) index serve the scan
         entries = TankLedger.objects.filter(
-            tank=tank
-        ).select_related('transfer').order_by('-event_datetime')[:limit]
+            winery=request.winery, tank=tank
+        ).select_related('transfer').order_by('-event_datetime')
+        
+        paginator = HighVolumePagination()
+        if paginator.uses_cursor(request):
+            page = paginator.paginate_queryset(entries, request, view=self)
+            serializer = TankLedgerEntrySerializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
         
-        serializer = TankLedgerEntrySerializer(entries, many=True)
+        limit = int(request.query_params.get('limit', 100))
+        serializer = TankLedgerEntrySerializer(entries[:limit], many=True)
         return Response(serializer.data)
 
 
@@ -5,13 +5,11 @@ class MasterDataConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.master_data'
     verbose_name = 'Master Data'
-
-
-
-
-
-
-
-
-
-
+    
+    def ready(self):
+        # Change versions for conditional GETs
+        from apps.core.versioning import track_versions
+        from .models import GrapeVariety, Grower, VineyardBlock, VineyardVariety, TankMaterial, WoodType
+        
+        track_versions(GrapeVariety, Grower, VineyardBlock, TankMaterial, WoodType)
+        track_versions(VineyardVariety, winery_attr='vineyard.winery_id')
@@ -7,6 +7,8 @@ import uuid
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 
+from apps.core.search import trigram_indexes
+
 
 class GrapeVariety(models.Model):
     """
@@ -76,6 +78,9 @@ class Grower(models.Model):
         verbose_name_plural = 'Growers'
         ordering = ['name']
         unique_together = ['winery', 'name']
+        indexes = [
+            *trigram_indexes('grower', 'name'),
+        ]
     
     def __str__(self):
         return self.name
@@ -9,6 +9,7 @@ from rest_framework.response import Response
 from django.db.models import Count
 from django_filters.rest_framework import DjangoFilterBackend
 
+from apps.core.mixins import ConditionalGetMixin
 from apps.wineries.mixins import WineryRequiredMixin
 from .models import GrapeVariety, Grower, VineyardBlock, TankMaterial, WoodType
 from .serializers import (
@@ -20,7 +21,7 @@ from .serializers import (
 )
 
 
-class GrapeVarietyViewSet(WineryRequiredMixin, viewsets.ModelViewSet):
+class GrapeVarietyViewSet(ConditionalGetMixin, WineryRequiredMixin, viewsets.ModelViewSet):
     """
     API endpoint for managing grape varieties.
     
@@ -38,6 +39,7 @@ class GrapeVarietyViewSet(WineryRequiredMixin, viewsets.ModelViewSet):
     search_fields = ['name', 'code']
     ordering_fields = ['name', 'code', 'created_at']
     ordering = ['name']
+    etag_resources = ('master_data.grapevariety',)
     
     def get_queryset(self):
         """Filter by current winery from middleware."""
@@ -64,7 +66,7 @@ class GrapeVarietyViewSet(WineryRequiredMixin, viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class GrowerViewSet(WineryRequiredMixin, viewsets.ModelViewSet):
+class GrowerViewSet(ConditionalGetMixin, WineryRequiredMixin, viewsets.ModelViewSet):
     """
     API endpoint for managing growers.
     
@@ -82,6 +84,7 @@ class GrowerViewSet(WineryRequiredMixin, viewsets.ModelViewSet):
     search_fields = ['name', 'contact_name', 'email']
     ordering_fields = ['name', 'created_at']
     ordering = ['name']
+    etag_resources = ('master_data.grower', 'master_data.vineyardblock')
     
     def get_queryset(self):
         """Filter by current winery and annotate with vineyard count."""
@@ -118,7 +121,7 @@ class GrowerViewSet(WineryRequiredMixin, viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class VineyardBlockViewSet(WineryRequiredMixin, viewsets.ModelViewSet):
+class VineyardBlockViewSet(ConditionalGetMixin, WineryRequiredMixin, viewsets.ModelViewSet):
     """
     API endpoint for managing vineyard blocks.
     
@@ -136,6 +139,10 @@ class VineyardBlockViewSet(WineryRequiredMixin, viewsets.ModelViewSet):
     search_fields = ['name', 'code', 'region', 'subregion', 'grower__name']
     ordering_fields = ['name', 'grower__name', 'region', 'created_at']
     ordering = ['grower__name', 'name']
+    etag_resources = (
+        'master_data.vineyardblock', 'master_data.vineyardvariety',
+        'master_data.grower', 'master_data.grapevariety',
+    )
     
     def get_queryset(self):
         """Filter by current winery with related data."""
@@ -175,7 +182,7 @@ class IsSuperuserOrReadOnly(permissions.BasePermission):
         return request.user and request.user.is_superuser
 
 
-class TankMaterialViewSet(viewsets.ModelViewSet):
+class TankMaterialViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     API endpoint for managing tank materials.
     Global list shared across all wineries.
@@ -196,6 +203,7 @@ class TankMaterialViewSet(viewsets.ModelViewSet):
     search_fields = ['name', 'code']
     ordering_fields = ['sort_order', 'name', 'created_at']
     ordering = ['sort_order', 'name']
+    etag_resources = ('master_data.tankmaterial',)
     
     def get_serializer_class(self):
         """Use lightweight serializer for list view."""
@@ -211,7 +219,7 @@ class TankMaterialViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class WoodTypeViewSet(viewsets.ModelViewSet):
+class WoodTypeViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     API endpoint for managing barrel wood types.
     Global list shared across all wineries.
@@ -232,6 +240,7 @@ class WoodTypeViewSet(viewsets.ModelViewSet):
     search_fields = ['name', 'code', 'origin_country']
     ordering_fields = ['sort_order', 'name', 'created_at']
     ordering = ['sort_order', 'name']
+    etag_resources = ('master_data.woodtype',)
     
     def get_serializer_class(self):
         """Use lightweight serializer for list view."""
@@ -5,3 +5,19 @@ class ProductionConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.production'
     verbose_name = 'Production'
+    
+    def ready(self):
+        # Change versions for conditional GETs
+        from apps.core.versioning import track_versions
+        from .models import Transfer, WineLot, LotBatchLink
+        
+        track_versions(Transfer, WineLot)
+        track_versions(LotBatchLink, winery_attr='wine_lot.winery_id')
+        
+        # Delta sync for cellar tablets (batch links are nested in lots)
+        from apps.sync.registry import register_sync, touch_parent_on_change
+        from .serializers import TransferSerializer, WineLotSerializer
+        
+        register_sync('transfers', Transfer, TransferSerializer)
+        register_sync('wine_lots', WineLot, WineLotSerializer)
+        touch_parent_on_change(LotBatchLink, 'wine_lot')
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0002_convert_to_fk'),
+        ('harvest', '0002_alter_batch_must_volume_l'),
+        ('production', '0001_initial'),
+        ('wineries', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='transfer',
+            name='production__winery__fb3097_idx',
+        ),
+        migrations.AddIndex(
+            model_name='transfer',
+            index=models.Index(fields=['winery', '-transfer_date', '-id'], name='production__winery__e61f40_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0003_sync_updated_at_indexes'),
+        ('harvest', '0003_sync_updated_at_indexes'),
+        ('production', '0002_cursor_pagination_indexes'),
+        ('wineries', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transfer',
+            index=models.Index(fields=['winery', 'updated_at'], name='production__winery__e0989c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='winelot',
+            index=models.Index(fields=['winery', 'updated_at'], name='production__winery__f8f62f_idx'),
+        ),
+    ]
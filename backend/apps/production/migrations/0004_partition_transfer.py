@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:37
+
+from django.db import migrations
+
+import apps.core.partitioning
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        # Foreign keys to Transfer must be dropped before it is partitioned
+        ('ledger', '0003_partition_tankledger'),
+        ('production', '0003_sync_updated_at_indexes'),
+        ('work_orders', '0004_executed_transfer_without_db_constraint'),
+    ]
+
+    operations = [
+        apps.core.partitioning.PartitionByYear(
+            model_name='transfer',
+            range_field='transfer_date',
+            hash_field='winery',
+            hash_modulus=4,
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:56
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+import django.db.models.functions.text
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0004_trigram_search_indexes'),
+        ('production', '0004_partition_transfer'),
+        ('wineries', '0001_initial'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='winelot',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('lot_code'), name='gin_trgm_ops'), name='winelot_lot_code_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='winelot',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='gin_trgm_ops'), name='winelot_name_trgm'),
+        ),
+    ]
@@ -3,6 +3,8 @@ from django.db import models
 from django.core.validators import MinValueValidator
 from django.utils import timezone
 
+from apps.core.partitioning import YearPartitioning
+from apps.core.search import trigram_indexes
 from apps.wineries.models import Winery
 from apps.equipment.models import Tank, Barrel
 from apps.harvest.models import Batch
@@ -119,11 +121,15 @@ class Transfer(models.Model):
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    # Yearly range partitions, hash sub-partitioned by winery (apps.core.partitioning)
+    partitioning = YearPartitioning('transfer_date', hash_field='winery', hash_modulus=4)
     
     class Meta:
         ordering = ['-transfer_date']
         indexes = [
-            models.Index(fields=['winery', '-transfer_date']),
+            models.Index(fields=['winery', '-transfer_date', '-id']),
+            models.Index(fields=['winery', 'updated_at']),
             models.Index(fields=['source_tank']),
             models.Index(fields=['destination_tank']),
         ]
@@ -240,6 +246,8 @@ class WineLot(models.Model):
         indexes = [
             models.Index(fields=['winery', 'status']),
             models.Index(fields=['vintage']),
+            models.Index(fields=['winery', 'updated_at']),
+            *trigram_indexes('winelot', 'lot_code', 'name'),
         ]
     
     def __str__(self):
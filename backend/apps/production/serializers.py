@@ -1,8 +1,9 @@
 from rest_framework import serializers
+from apps.core.serializers import SparseFieldsetMixin
 from .models import Transfer, TransferActionType, WineLot, WineLotStatus, LotBatchLink
 
 
-class TransferSerializer(serializers.ModelSerializer):
+class TransferSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for Transfer model."""
     action_type_display = serializers.CharField(source='get_action_type_display', read_only=True)
     source_tank_name = serializers.CharField(source='source_tank.name', read_only=True, allow_null=True)
@@ -33,6 +34,12 @@ class TransferSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at',
         ]
         read_only_fields = ['id', 'winery', 'created_at', 'updated_at']
+        expandable_fields = {
+            'source_tank': 'apps.equipment.serializers.TankDropdownSerializer',
+            'destination_tank': 'apps.equipment.serializers.TankDropdownSerializer',
+            'source_barrel': 'apps.equipment.serializers.BarrelDropdownSerializer',
+            'destination_barrel': 'apps.equipment.serializers.BarrelDropdownSerializer',
+        }
 
 
 class TransferCreateSerializer(serializers.ModelSerializer):
@@ -118,18 +125,18 @@ class TransferCreateSerializer(serializers.ModelSerializer):
         # Decrease source volume
         if transfer.source_tank:
             transfer.source_tank.current_volume_l -= volume
-            transfer.source_tank.save(update_fields=['current_volume_l'])
+            transfer.source_tank.save(update_fields=['current_volume_l', 'updated_at'])
         elif transfer.source_barrel:
             transfer.source_barrel.current_volume_l -= volume
-            transfer.source_barrel.save(update_fields=['current_volume_l'])
+            transfer.source_barrel.save(update_fields=['current_volume_l', 'updated_at'])
         
         # Increase destination volume
         if transfer.destination_tank:
             transfer.destination_tank.current_volume_l += volume
-            transfer.destination_tank.save(update_fields=['current_volume_l'])
+            transfer.destination_tank.save(update_fields=['current_volume_l', 'updated_at'])
         elif transfer.destination_barrel:
             transfer.destination_barrel.current_volume_l += volume
-            transfer.destination_barrel.save(update_fields=['current_volume_l'])
+            transfer.destination_barrel.save(update_fields=['current_volume_l', 'updated_at'])
 
 
 class LotBatchLinkSerializer(serializers.ModelSerializer):
@@ -146,7 +153,7 @@ class LotBatchLinkSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
 
-class WineLotSerializer(serializers.ModelSerializer):
+class WineLotSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for WineLot model."""
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     current_tank_code = serializers.CharField(source='current_tank.code', read_only=True, allow_null=True)
@@ -168,6 +175,9 @@ class WineLotSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at',
         ]
         read_only_fields = ['id', 'winery', 'created_at', 'updated_at']
+        field_lookups = {
+            'batch_varieties': ['batch_links__batch__sources__variety'],
+        }
     
     def get_batch_varieties(self, obj):
         return obj.batch_varieties
@@ -3,6 +3,9 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters import rest_framework as filters
 
+from apps.core.mixins import SparseFieldsetViewMixin
+from apps.core.pagination import HighVolumePagination
+from apps.core.replica import read_replica
 from apps.wineries.mixins import WineryContextMixin
 from apps.wineries.permissions import IsWineryMember
 from .models import Transfer, WineLot, LotBatchLink
@@ -31,7 +34,7 @@ class TransferFilter(filters.FilterSet):
         fields = ['action_type', 'source_tank', 'destination_tank', 'batch', 'wine_lot']
 
 
-class TransferViewSet(WineryContextMixin, viewsets.ModelViewSet):
+class TransferViewSet(SparseFieldsetViewMixin, WineryContextMixin, viewsets.ModelViewSet):
     """
     API endpoint for wine transfers.
     
@@ -42,6 +45,9 @@ class TransferViewSet(WineryContextMixin, viewsets.ModelViewSet):
     search_fields = ['notes']
     ordering_fields = ['transfer_date', 'volume_l', 'created_at']
     ordering = ['-transfer_date']
+    pagination_class = HighVolumePagination
+    cursor_ordering = ('-transfer_date', '-id')
+    query_budget = {'list': 3, 'retrieve': 2}
     
     def get_queryset(self):
         if not hasattr(self.request, 'winery') or not self.request.winery:
@@ -64,6 +70,7 @@ class TransferViewSet(WineryContextMixin, viewsets.ModelViewSet):
         return Response(TRANSFER_ACTION_CHOICES)
     
     @action(detail=False, methods=['get'])
+    @read_replica
     def summary(self, request):
         """Return transfer summary statistics."""
         qs = self.get_queryset()
@@ -111,7 +118,7 @@ class WineLotFilter(filters.FilterSet):
         fields = ['status', 'vintage', 'wine_type', 'current_tank', 'current_barrel']
 
 
-class WineLotViewSet(WineryContextMixin, viewsets.ModelViewSet):
+class WineLotViewSet(SparseFieldsetViewMixin, WineryContextMixin, viewsets.ModelViewSet):
     """
     API endpoint for wine lots.
     
@@ -123,6 +130,7 @@ class WineLotViewSet(WineryContextMixin, viewsets.ModelViewSet):
     search_fields = ['lot_code', 'name', 'wine_type', 'notes']
     ordering_fields = ['lot_code', 'vintage', 'current_volume_l', 'created_at']
     ordering = ['-vintage', 'lot_code']
+    query_budget = {'list': 4, 'retrieve': 3}
     
     def get_queryset(self):
         if not hasattr(self.request, 'winery') or not self.request.winery:
@@ -130,7 +138,7 @@ class WineLotViewSet(WineryContextMixin, viewsets.ModelViewSet):
         
         return WineLot.objects.filter(winery=self.request.winery).select_related(
             'current_tank', 'current_barrel'
-        ).prefetch_related('batch_links__batch')
+        ).prefetch_related('batch_links__batch__sources__variety')
     
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
@@ -143,6 +151,7 @@ class WineLotViewSet(WineryContextMixin, viewsets.ModelViewSet):
         return Response(WINE_LOT_STATUS_CHOICES)
     
     @action(detail=False, methods=['get'])
+    @read_replica
     def summary(self, request):
         """Return wine lot summary statistics."""
         qs = self.get_queryset()
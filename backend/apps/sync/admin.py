@@ -0,0 +1,11 @@
+from django.contrib import admin
+from .models import Tombstone
+
+
+@admin.register(Tombstone)
+class TombstoneAdmin(admin.ModelAdmin):
+    list_display = ['resource', 'object_id', 'winery', 'deleted_at']
+    list_filter = ['resource', 'winery']
+    search_fields = ['object_id']
+    ordering = ['-deleted_at']
+    readonly_fields = ['id', 'winery', 'resource', 'object_id', 'deleted_at']
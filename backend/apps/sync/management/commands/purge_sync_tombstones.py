@@ -0,0 +1,34 @@
+"""
+Management command to delete sync tombstones past the retention window.
+
+Clients whose token is older than the window get 410 from the sync API and
+resync from scratch, so older tombstones are never read. Run daily.
+
+Usage:
+    python manage.py purge_sync_tombstones
+    python manage.py purge_sync_tombstones --days=60
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.sync.models import Tombstone
+
+
+class Command(BaseCommand):
+    help = 'Delete sync tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.SYNC_TOMBSTONE_RETENTION_DAYS,
+            help=f'Retention in days (default: {settings.SYNC_TOMBSTONE_RETENTION_DAYS})',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        deleted, _ = Tombstone.objects.filter(deleted_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} tombstones older than {cutoff:%Y-%m-%d}'))
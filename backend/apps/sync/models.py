@@ -0,0 +1,35 @@
+"""
+Models for the delta-sync API.
+"""
+import uuid
+
+from django.db import models
+
+
+class Tombstone(models.Model):
+    """
+    Record of a deleted object, so incremental syncs can report deletions.
+    Written by the post_delete handler of every registered sync resource
+    and purged after ``SYNC_TOMBSTONE_RETENTION_DAYS``.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    winery = models.ForeignKey(
+        'wineries.Winery',
+        on_delete=models.CASCADE,
+        related_name='sync_tombstones',
+        # Deleting a winery writes tombstones for its cascaded rows after
+        # the winery's own tombstones were collected; don't fail on those.
+        db_constraint=False,
+    )
+    resource = models.CharField(max_length=50)
+    object_id = models.UUIDField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['deleted_at']
+        indexes = [
+            models.Index(fields=['winery', 'deleted_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.resource} {self.object_id} deleted {self.deleted_at:%Y-%m-%d %H:%M}"
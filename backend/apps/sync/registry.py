@@ -0,0 +1,90 @@
+"""
+Registry of resources served by the delta-sync API.
+
+Apps register the models a tablet keeps offline in ``AppConfig.ready()``::
+
+    register_sync('tanks', Tank, TankSerializer)
+    register_sync('batches', Batch, BatchSerializer, prefetch_related=['sources__variety'])
+
+Registered models must have a ``winery`` foreign key and an ``updated_at``
+timestamp (indexed together with the winery). Registration also records a
+``Tombstone`` whenever an instance is deleted.
+
+Rows rendered nested inside a registered resource (e.g. batch sources in a
+batch) must bump the parent's ``updated_at`` when they change::
+
+    touch_parent_on_change(BatchSource, 'batch')
+"""
+from functools import partial
+
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+registry = {}
+
+
+class SyncResource:
+    """A model exposed through ``/api/v1/sync/`` and how to serialize it."""
+
+    def __init__(self, name, model, serializer_class, select_related=(), prefetch_related=()):
+        self.name = name
+        self.model = model
+        self.serializer_class = serializer_class
+        self.select_related = set(select_related)
+        self.prefetch_related = set(prefetch_related)
+
+    def get_queryset(self, winery):
+        select, prefetch = set(self.select_related), set(self.prefetch_related)
+        serializer = self.serializer_class(context={})
+        if hasattr(serializer, 'get_related_lookups'):
+            extra_select, extra_prefetch = serializer.get_related_lookups()
+            select.update(extra_select)
+            prefetch.update(extra_prefetch)
+
+        queryset = self.model.objects.filter(winery=winery).order_by('updated_at', 'id')
+        if select:
+            queryset = queryset.select_related(*sorted(select))
+        if prefetch:
+            queryset = queryset.prefetch_related(*sorted(prefetch))
+        return queryset
+
+    def serialize(self, queryset, request):
+        return self.serializer_class(queryset, many=True, context={'request': request}).data
+
+
+def _record_tombstone(sender, instance, resource, **kwargs):
+    from .models import Tombstone
+
+    if instance.winery_id:
+        Tombstone.objects.using(kwargs.get('using')).create(
+            winery_id=instance.winery_id, resource=resource, object_id=instance.pk,
+        )
+
+
+def register_sync(name, model, serializer_class, select_related=(), prefetch_related=()):
+    """Expose ``model`` as sync resource ``name`` and start recording its deletions."""
+    registry[name] = SyncResource(
+        name, model, serializer_class,
+        select_related=select_related, prefetch_related=prefetch_related,
+    )
+    post_delete.connect(
+        partial(_record_tombstone, resource=name),
+        sender=model, weak=False, dispatch_uid=f'sync_tombstone:{name}',
+    )
+
+
+def _touch_parent(sender, instance, parent_attr, **kwargs):
+    parent_field = sender._meta.get_field(parent_attr)
+    parent_id = getattr(instance, parent_field.attname)
+    if parent_id:
+        parent_field.related_model.objects.using(kwargs.get('using')).filter(
+            pk=parent_id,
+        ).update(updated_at=timezone.now())
+
+
+def touch_parent_on_change(model, parent_attr):
+    """Bump ``updated_at`` of the ``parent_attr`` row whenever ``model`` is saved or deleted."""
+    receiver = partial(_touch_parent, parent_attr=parent_attr)
+    uid = f'sync_touch:{model._meta.label_lower}:{parent_attr}'
+    post_save.connect(receiver, sender=model, weak=False, dispatch_uid=uid)
+    post_delete.connect(receiver, sender=model, weak=False, dispatch_uid=uid)
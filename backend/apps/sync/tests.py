@@ -0,0 +1,127 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.equipment.models import Tank
+from apps.wineries.models import Winery, WineryMembership
+from .models import Tombstone
+from .tokens import make_token
+
+
+class DeltaSyncTests(APITestCase):
+    """A sync token returns what changed since it was issued, and only for its winery."""
+
+    URL = '/api/v1/sync/'
+
+    def setUp(self):
+        self.winery = Winery.objects.create(name='Sync A', code='SYNC-A')
+        self.other = Winery.objects.create(name='Sync B', code='SYNC-B')
+        self.user = get_user_model().objects.create_user(email='tablet@sync.test', password='x')
+        for winery in (self.winery, self.other):
+            WineryMembership.objects.create(user=self.user, winery=winery, role='CELLAR_STAFF')
+        self.client.force_authenticate(self.user)
+
+        self.now = timezone.now()
+        self.issued_at = self.now - timedelta(hours=1)
+        overlap = timedelta(seconds=settings.SYNC_OVERLAP_SECONDS)
+        self.tanks = {}
+        for code, updated_at in (
+            ('OLD', self.issued_at - overlap - timedelta(seconds=1)),
+            ('OVERLAP', self.issued_at - overlap / 2),
+            ('NEW', self.now),
+        ):
+            tank = Tank.objects.create(winery=self.winery, code=code, capacity_l=1000)
+            # auto_now ignores explicit values on save
+            Tank.objects.filter(pk=tank.pk).update(updated_at=updated_at)
+            self.tanks[code] = tank
+
+    def _sync(self, winery=None, **params):
+        return self.client.get(
+            self.URL, {'resources': 'tanks', **params}, HTTP_X_WINERY_ID=str((winery or self.winery).id),
+        )
+
+    def test_full_sync_then_only_changes_since_the_token(self):
+        response = self._sync()
+        self.assertTrue(response.data['full'])
+        self.assertEqual(len(response.data['changes']['tanks']), 3)
+
+        response = self._sync(since=make_token(self.winery, self.issued_at))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data['full'])
+        # OVERLAP was saved before the token was issued, but may have committed after it
+        self.assertEqual([row['code'] for row in response.data['changes']['tanks']], ['OVERLAP', 'NEW'])
+
+        # The returned token is the starting point of the next sync
+        response = self._sync(since=response.data['token'])
+        self.assertEqual([row['code'] for row in response.data['changes']['tanks']], ['NEW'])
+
+    def test_large_syncs_continue_from_the_last_row(self):
+        response = self._sync(limit=2)
+        self.assertTrue(response.data['has_more'])
+        self.assertTrue(response.data['full'])
+        self.assertEqual([row['code'] for row in response.data['changes']['tanks']], ['OLD', 'OVERLAP'])
+
+        # Rows changed while paging move behind the cursor and still arrive
+        Tank.objects.filter(pk=self.tanks['OLD'].pk).update(updated_at=timezone.now())
+        response = self._sync(limit=2, since=response.data['token'])
+        self.assertFalse(response.data['has_more'])
+        self.assertTrue(response.data['full'])
+        self.assertEqual([row['code'] for row in response.data['changes']['tanks']], ['NEW', 'OLD'])
+
+        # The last token starts the next sync from the moment the first page was built
+        response = self._sync(since=response.data['token'])
+        self.assertFalse(response.data['full'])
+        self.assertEqual([row['code'] for row in response.data['changes']['tanks']], ['NEW', 'OLD'])
+
+    def test_incremental_pages_report_deletions_once(self):
+        deleted_id = str(self.tanks['OLD'].pk)
+        self.tanks['OLD'].delete()
+        response = self._sync(limit=1, since=make_token(self.winery, self.issued_at))
+        self.assertTrue(response.data['has_more'])
+        self.assertFalse(response.data['full'])
+        self.assertEqual([row['code'] for row in response.data['changes']['tanks']], ['OVERLAP'])
+        self.assertEqual(response.data['deleted']['tanks'], [deleted_id])
+
+        response = self._sync(limit=1, since=response.data['token'])
+        self.assertFalse(response.data['has_more'])
+        self.assertEqual([row['code'] for row in response.data['changes']['tanks']], ['NEW'])
+        self.assertEqual(response.data['deleted']['tanks'], [])
+
+    @override_settings(SYNC_PAGE_SIZE=2, SYNC_MAX_PAGE_SIZE=2)
+    def test_page_size_has_a_default_and_a_maximum(self):
+        self.assertTrue(self._sync().data['has_more'])
+        self.assertEqual(len(self._sync(limit=1000).data['changes']['tanks']), 2)
+        self.assertEqual(self._sync(limit='all').status_code, 400)
+
+    def test_deletions_are_reported_as_tombstones(self):
+        token = make_token(self.winery, self.issued_at)
+        deleted_id = str(self.tanks['OLD'].pk)
+        self.tanks['OLD'].delete()
+        self.assertTrue(Tombstone.objects.filter(resource='tanks', object_id=deleted_id).exists())
+
+        response = self._sync(since=token)
+        self.assertEqual(response.data['deleted']['tanks'], [deleted_id])
+        self.assertNotIn(deleted_id, [row['id'] for row in response.data['changes']['tanks']])
+
+        # A full sync has no deletions to report
+        self.assertEqual(self._sync().data['deleted']['tanks'], [])
+
+    def test_expired_token_requires_a_full_sync(self):
+        issued_at = self.now - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS, hours=1)
+        response = self._sync(since=make_token(self.winery, issued_at))
+        self.assertEqual(response.status_code, 410)
+
+    def test_tampered_token_is_rejected(self):
+        token = make_token(self.winery, self.issued_at)
+        tampered = token[:-1] + ('A' if token[-1] != 'A' else 'B')
+        self.assertEqual(self._sync(since=tampered).status_code, 400)
+        self.assertEqual(self._sync(since='not-a-token').status_code, 400)
+
+    def test_token_of_another_winery_is_rejected(self):
+        token = make_token(self.winery, self.issued_at)
+        response = self._sync(winery=self.other, since=token)
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,88 @@
+"""
+Opaque sync tokens.
+
+A token is a signed ``(winery id, timestamp)`` pair marking the moment a
+sync response was built. Since ``updated_at`` is set when a row is saved
+rather than when its transaction commits, the next sync looks back
+``SYNC_OVERLAP_SECONDS`` before that moment; clients upsert by id, so a
+record delivered twice is harmless.
+
+A sync larger than one page hands out continuation tokens instead. They
+carry the moment the sync started (which becomes the issue time of the
+token handed out with the last page), the lower bound it syncs from and,
+per resource, the ``(updated_at, id)`` of the last row delivered, or None
+once the resource is exhausted.
+"""
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core import signing
+
+SALT = 'apps.sync.token'
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+# since and cursors are None for a token that starts the next sync
+SyncToken = namedtuple('SyncToken', ['issued_at', 'since', 'cursors'])
+
+
+class InvalidToken(Exception):
+    """The token is malformed, tampered with or issued for another winery."""
+
+
+def _to_micros(value):
+    # Exact, unlike timestamp(): cursors must match updated_at to the microsecond
+    return (value - _EPOCH) // _MICROSECOND
+
+
+def _from_micros(micros):
+    return _EPOCH + micros * _MICROSECOND
+
+
+def make_token(winery, issued_at, since=None, cursors=None):
+    """
+    Token for the next sync or, with ``cursors``, for the next page of the
+    sync that started at ``issued_at`` from ``since`` (None: a full sync).
+    """
+    payload = {'w': str(winery.id), 't': _to_micros(issued_at)}
+    if cursors is not None:
+        payload['s'] = _to_micros(since) if since else None
+        payload['c'] = {
+            name: [_to_micros(cursor[0]), str(cursor[1])] if cursor else None
+            for name, cursor in cursors.items()
+        }
+    return signing.dumps(payload, salt=SALT, compress=False)
+
+
+def read_token(token, winery):
+    """Return the ``SyncToken`` a token was made from, with aware datetimes."""
+    try:
+        payload = signing.loads(token, salt=SALT)
+    except signing.BadSignature as exc:
+        raise InvalidToken('Invalid sync token') from exc
+    if payload.get('w') != str(winery.id) or not isinstance(payload.get('t'), int):
+        raise InvalidToken('Sync token was issued for another winery')
+    issued_at = _from_micros(payload['t'])
+    if 'c' not in payload:
+        return SyncToken(issued_at, None, None)
+
+    since = payload.get('s')
+    cursors = {}
+    for name, cursor in payload['c'].items():
+        if cursor is not None:
+            micros, object_id = cursor
+            cursor = (_from_micros(micros), object_id)
+        cursors[name] = cursor
+    return SyncToken(issued_at, _from_micros(since) if since is not None else None, cursors)
+
+
+def changes_since(issued_at):
+    """Lower bound for ``updated_at``/``deleted_at`` when syncing from a token."""
+    return issued_at - timedelta(seconds=settings.SYNC_OVERLAP_SECONDS)
+
+
+def is_expired(issued_at, now):
+    """Tombstones older than the retention window are gone; a full sync is needed."""
+    return issued_at < now - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
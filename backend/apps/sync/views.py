@@ -0,0 +1,118 @@
+"""
+Delta-sync API for offline clients (cellar tablets).
+"""
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.core.serializers import get_query_list
+from apps.wineries.mixins import WineryRequiredMixin
+from .models import Tombstone
+from .registry import registry
+from .tokens import InvalidToken, changes_since, is_expired, make_token, read_token
+
+
+class SyncView(WineryRequiredMixin, APIView):
+    """
+    Records created, updated or deleted since a sync token.
+
+    GET /api/v1/sync/
+        Full snapshot of every resource plus a token for the next sync
+    GET /api/v1/sync/?since=<token>
+        Only records changed since the token, and ids of deleted records
+    GET /api/v1/sync/?since=<token>&resources=tanks,barrels
+        Restrict the sync to some resources
+    GET /api/v1/sync/?limit=200
+        At most ``limit`` rows per resource (default ``SYNC_PAGE_SIZE``)
+
+    Rows come in ``(updated_at, id)`` order. While ``has_more`` is true, the
+    token continues the same sync from the last row of each resource; the
+    token of the last page starts the next sync. Deletions come with the
+    first page.
+
+    A token only covers the resources it was requested with, so clients
+    syncing resources separately keep one token per selection. Responds 410
+    when the token is older than the tombstone retention window; the client
+    must then discard its copy and sync from scratch.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        winery = request.winery
+        now = timezone.now()
+
+        requested = get_query_list(request, 'resources')
+        unknown = requested - set(registry)
+        if unknown:
+            return Response(
+                {'error': f"Unknown resources: {', '.join(sorted(unknown))}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        resources = [r for name, r in registry.items() if not requested or name in requested]
+
+        try:
+            limit = int(request.query_params.get('limit', settings.SYNC_PAGE_SIZE))
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, settings.SYNC_MAX_PAGE_SIZE))
+
+        # A new sync starts now; a continued one keeps its start and lower bound
+        started_at, synced_from, cursors = now, None, {}
+        token = request.query_params.get('since')
+        if token:
+            try:
+                parsed = read_token(token, winery)
+            except InvalidToken as exc:
+                return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+            if parsed.cursors is None:
+                synced_from = parsed.issued_at
+            else:
+                started_at, synced_from, cursors = parsed
+            if synced_from is not None and is_expired(synced_from, now):
+                return Response(
+                    {'error': 'Sync token expired; perform a full sync'},
+                    status=status.HTTP_410_GONE,
+                )
+        since = changes_since(synced_from) if synced_from is not None else None
+
+        changes, next_cursors = {}, {}
+        for resource in resources:
+            if resource.name in cursors and cursors[resource.name] is None:
+                changes[resource.name], next_cursors[resource.name] = [], None
+                continue
+            queryset = resource.get_queryset(winery)
+            if since is not None:
+                queryset = queryset.filter(updated_at__gte=since)
+            if cursors.get(resource.name):
+                updated_at, last_id = cursors[resource.name]
+                queryset = queryset.filter(Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, id__gt=last_id))
+            rows = list(queryset[:limit + 1])
+            page = rows[:limit]
+            changes[resource.name] = resource.serialize(page, request)
+            next_cursors[resource.name] = (page[-1].updated_at, page[-1].pk) if len(rows) > limit else None
+        has_more = any(next_cursors.values())
+
+        deleted = {resource.name: [] for resource in resources}
+        if since is not None and not cursors:
+            tombstones = Tombstone.objects.filter(
+                winery=winery, deleted_at__gte=since, resource__in=list(deleted),
+            ).values_list('resource', 'object_id')
+            for name, object_id in tombstones:
+                deleted[name].append(str(object_id))
+
+        if has_more:
+            token = make_token(winery, started_at, synced_from, next_cursors)
+        else:
+            token = make_token(winery, started_at)
+        return Response({
+            'token': token,
+            'has_more': has_more,
+            'full': since is None,
+            'server_time': now,
+            'changes': changes,
+            'deleted': deleted,
+        })
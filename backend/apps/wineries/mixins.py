@@ -20,6 +20,11 @@ class WineryContextMixin:
         # First, perform authentication so we have request.user
         self.perform_authentication(request)
         
+        # Sub-requests of /api/v1/batch/ carry the batch's resolved membership
+        if getattr(request._request, '_winery_resolved', False):
+            super().initial(request, *args, **kwargs)
+            return
+        
         # Initialize winery context
         request.winery = None
         request.winery_role = None
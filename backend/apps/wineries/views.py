@@ -10,6 +10,8 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from apps.core.replica import read_replica
+
 from .models import Winery, WineryMembership
 from .mixins import WineryContextMixin
 from .permissions import IsWineryAdmin, IsWineryMember
@@ -179,7 +181,9 @@ class DashboardView(WineryContextMixin, APIView):
     - alerts: Low SO2, high VA alerts
     """
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 19
 
+    @read_replica
     def get(self, request):
         # Ensure winery context is set
         if not getattr(request, 'winery', None):
@@ -207,45 +211,65 @@ class DashboardView(WineryContextMixin, APIView):
         
         # Tanks
         tanks_qs = Tank.objects.filter(winery=winery)
-        tanks_total = tanks_qs.count()
-        tanks_active = tanks_qs.filter(status='IN_USE').count()
-        tanks_empty = tanks_qs.filter(status='EMPTY').count()
-        total_capacity = tanks_qs.aggregate(total=Sum('capacity_l'))['total'] or 0
-        total_volume = tanks_qs.aggregate(total=Sum('current_volume_l'))['total'] or 0
+        tank_stats = tanks_qs.aggregate(
+            total=Count('id'),
+            active=Count('id', filter=Q(status='IN_USE')),
+            empty=Count('id', filter=Q(status='EMPTY')),
+            capacity=Sum('capacity_l'),
+            volume=Sum('current_volume_l'),
+        )
+        tanks_total = tank_stats['total']
+        tanks_active = tank_stats['active']
+        tanks_empty = tank_stats['empty']
+        total_capacity = tank_stats['capacity'] or 0
+        total_volume = tank_stats['volume'] or 0
         
         # Barrels
         barrels_qs = Barrel.objects.filter(winery=winery)
-        barrels_total = barrels_qs.count()
-        barrels_in_use = barrels_qs.filter(status='IN_USE').count()
+        barrel_stats = barrels_qs.aggregate(
+            total=Count('id'),
+            in_use=Count('id', filter=Q(status='IN_USE')),
+        )
+        barrels_total = barrel_stats['total']
+        barrels_in_use = barrel_stats['in_use']
         
         # Batches
         batches_qs = Batch.objects.filter(winery=winery)
-        batches_total = batches_qs.count()
-        batches_this_season = batches_qs.filter(
-            harvest_season__is_active=True
-        ).count()
+        batch_stats = batches_qs.aggregate(
+            total=Count('id'),
+            this_season=Count('id', filter=Q(harvest_season__is_active=True)),
+        )
+        batches_total = batch_stats['total']
+        batches_this_season = batch_stats['this_season']
         
         # Wine Lots
         lots_qs = WineLot.objects.filter(winery=winery)
-        lots_total = lots_qs.count()
-        lots_active = lots_qs.filter(status='ACTIVE').count()
+        lot_stats = lots_qs.aggregate(
+            total=Count('id'),
+            active=Count('id', filter=Q(status='ACTIVE')),
+        )
+        lots_total = lot_stats['total']
+        lots_active = lot_stats['active']
         
         # Transfers
         transfers_qs = Transfer.objects.filter(winery=winery)
-        transfers_total = transfers_qs.count()
-        transfers_today = transfers_qs.filter(
-            transfer_date__date=today
-        ).count()
-        transfers_this_week = transfers_qs.filter(
-            transfer_date__date__gte=week_ago
-        ).count()
+        transfer_stats = transfers_qs.aggregate(
+            total=Count('id'),
+            today=Count('id', filter=Q(transfer_date__date=today)),
+            this_week=Count('id', filter=Q(transfer_date__date__gte=week_ago)),
+        )
+        transfers_total = transfer_stats['total']
+        transfers_today = transfer_stats['today']
+        transfers_this_week = transfer_stats['this_week']
         
         # Analyses
         analyses_qs = Analysis.objects.filter(winery=winery)
-        analyses_total = analyses_qs.count()
-        analyses_this_week = analyses_qs.filter(
-            analysis_date__gte=week_ago
-        ).count()
+        analysis_stats = analyses_qs.aggregate(
+            total=Count('id'),
+            this_week=Count('id', filter=Q(analysis_date__gte=week_ago)),
+        )
+        analyses_total = analysis_stats['total']
+        analyses_this_week = analysis_stats['this_week']
         
         # Varieties count
         from apps.master_data.models import GrapeVariety
@@ -291,7 +315,8 @@ class DashboardView(WineryContextMixin, APIView):
 
         # === RECENT TRANSFERS ===
         recent_transfers = []
-        for t in transfers_qs.order_by('-transfer_date')[:5]:
+        recent = transfers_qs.select_related('source_tank', 'destination_tank')
+        for t in recent.order_by('-transfer_date')[:5]:
             recent_transfers.append({
                 'id': str(t.id),
                 'action_type': t.action_type,
@@ -304,7 +329,8 @@ class DashboardView(WineryContextMixin, APIView):
 
         # === RECENT ANALYSES ===
         recent_analyses = []
-        for a in analyses_qs.order_by('-analysis_date')[:5]:
+        analyses_with_source = analyses_qs.select_related('tank', 'barrel', 'wine_lot', 'batch')
+        for a in analyses_with_source.order_by('-analysis_date')[:5]:
             recent_analyses.append({
                 'id': str(a.id),
                 'source_display': a.get_source_display(),
@@ -315,21 +341,29 @@ class DashboardView(WineryContextMixin, APIView):
                 'free_so2_mgl': float(a.free_so2_mgl) if a.free_so2_mgl else None,
             })
 
+        # Compositions for the top tanks and the integrity check, in one pass
+        filled_tanks = list(tanks_qs.filter(status='IN_USE').order_by('-current_volume_l')[:6])
+        tanks_with_wine = list(tanks_qs.filter(current_volume_l__gt=0)[:10])  # Limit for performance
+        try:
+            from apps.ledger.models import TankLedger
+            compositions = TankLedger.get_tank_compositions(
+                {t.pk: t for t in filled_tanks + tanks_with_wine}.values()
+            )
+        except ImportError:
+            # Ledger app not available
+            compositions = {}
+
         # === TOP TANKS BY FILL ===
         top_tanks = []
-        for t in tanks_qs.filter(status='IN_USE').order_by('-current_volume_l')[:6]:
+        for t in filled_tanks:
             fill_pct = (t.current_volume_l / t.capacity_l * 100) if t.capacity_l > 0 else 0
             
             # Get dominant variety from tank composition
             dominant_variety = None
-            try:
-                from apps.ledger.models import TankLedger
-                composition = TankLedger.get_tank_composition(t)
-                if composition['by_variety']:
-                    # Get the variety with the highest percentage
-                    dominant_variety = max(composition['by_variety'], key=lambda x: x['percentage'])['variety']
-            except (ImportError, Exception):
-                pass
+            composition = compositions.get(t.pk)
+            if composition and composition['by_variety']:
+                # Get the variety with the highest percentage
+                dominant_variety = max(composition['by_variety'], key=lambda x: x['percentage'])['variety']
             
             top_tanks.append({
                 'id': str(t.id),
@@ -345,7 +379,7 @@ class DashboardView(WineryContextMixin, APIView):
         alerts = []
         
         # Low SO2 alerts (free SO2 < 20 mg/L in recent analyses)
-        low_so2_analyses = analyses_qs.filter(
+        low_so2_analyses = analyses_with_source.filter(
             free_so2_mgl__lt=20,
             analysis_date__gte=week_ago
         ).order_by('-analysis_date')[:5]
@@ -360,7 +394,7 @@ class DashboardView(WineryContextMixin, APIView):
             })
         
         # High VA alerts (VA > 0.6 g/L)
-        high_va_analyses = analyses_qs.filter(
+        high_va_analyses = analyses_with_source.filter(
             va_gl__gt=0.6,
             analysis_date__gte=week_ago
         ).order_by('-analysis_date')[:5]
@@ -375,45 +409,41 @@ class DashboardView(WineryContextMixin, APIView):
             })
         
         # Composition integrity alerts (tanks with unknown composition)
+        for tank in tanks_with_wine:
+            composition = compositions.get(tank.pk)
+            if composition and composition['unknown_volume_l'] > 0:
+                pct = composition['unknown_percentage']
+                alerts.append({
+                    'type': 'warning',
+                    'category': 'unknown_composition',
+                    'message': f'Tank {tank.code} has {pct:.1f}% unknown origin',
+                    'date': timezone.now().isoformat(),
+                    'source_id': str(tank.id),
+                })
+        
+        # Low stock alerts
         try:
-            from apps.ledger.models import TankLedger
-            from apps.inventory.models import Material
-            
-            # Check tanks with wine for unknown composition
-            tanks_with_wine = tanks_qs.filter(current_volume_l__gt=0)
-            for tank in tanks_with_wine[:10]:  # Limit for performance
-                composition = TankLedger.get_tank_composition(tank)
-                if composition['unknown_volume_l'] > 0:
-                    pct = composition['unknown_percentage']
-                    alerts.append({
-                        'type': 'warning',
-                        'category': 'unknown_composition',
-                        'message': f'Tank {tank.code} has {pct:.1f}% unknown origin',
-                        'date': timezone.now().isoformat(),
-                        'source_id': str(tank.id),
-                    })
+            from apps.inventory.models import LowStockAlert
             
-            # Low stock alerts
-            low_stock_materials = Material.objects.filter(
+            low_stock_alerts = LowStockAlert.objects.filter(
                 winery=winery,
-                is_active=True,
-                low_stock_threshold__isnull=False
-            )
+                cleared_at__isnull=True,
+            ).select_related('material')
             
-            for material in low_stock_materials:
-                current_stock = material.get_current_stock()
-                if current_stock < material.low_stock_threshold:
-                    alert_type = 'danger' if current_stock == 0 else 'warning'
-                    stock_str = f'{current_stock} {material.unit}' if current_stock > 0 else 'Out of stock'
-                    alerts.append({
-                        'type': alert_type,
-                        'category': 'low_stock',
-                        'message': f'Low stock: {material.name} ({stock_str})',
-                        'date': timezone.now().isoformat(),
-                        'source_id': str(material.id),
-                    })
+            for low_stock_alert in low_stock_alerts:
+                material = low_stock_alert.material
+                current_stock = low_stock_alert.current_stock
+                alert_type = 'danger' if current_stock == 0 else 'warning'
+                stock_str = f'{current_stock} {material.unit}' if current_stock > 0 else 'Out of stock'
+                alerts.append({
+                    'type': alert_type,
+                    'category': 'low_stock',
+                    'message': f'Low stock: {material.name} ({stock_str})',
+                    'date': low_stock_alert.raised_at.isoformat(),
+                    'source_id': str(material.id),
+                })
         except ImportError:
-            # Ledger app not available
+            # Inventory app not available
             pass
 
         return Response({
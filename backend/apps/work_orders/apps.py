@@ -5,8 +5,21 @@ class WorkOrdersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.work_orders'
     verbose_name = 'Work Orders'
-
-
-
-
-
+    
+    def ready(self):
+        # Change versions for conditional GETs
+        from apps.core.versioning import track_versions
+        from .models import WorkOrder, WorkOrderLine
+        
+        track_versions(WorkOrder, WorkOrderLine)
+        
+        # Delta sync for cellar tablets; line changes move the order's progress
+        from apps.sync.registry import register_sync, touch_parent_on_change
+        from .serializers import WorkOrderSerializer, WorkOrderLineSerializer
+        
+        register_sync('work_orders', WorkOrder, WorkOrderSerializer)
+        register_sync(
+            'work_order_lines', WorkOrderLine, WorkOrderLineSerializer,
+            select_related=['work_order', 'target_tank', 'target_barrel', 'from_tank', 'to_tank', 'executed_by'],
+        )
+        touch_parent_on_change(WorkOrderLine, 'work_order')
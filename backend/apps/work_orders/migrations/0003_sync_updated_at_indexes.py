@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0003_sync_updated_at_indexes'),
+        ('lab', '0003_sync_updated_at_indexes'),
+        ('production', '0003_sync_updated_at_indexes'),
+        ('wineries', '0001_initial'),
+        ('work_orders', '0002_title_optional'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='workorder',
+            index=models.Index(fields=['winery', 'updated_at'], name='work_orders_winery__d047d6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workorderline',
+            index=models.Index(fields=['winery', 'updated_at'], name='work_orders_winery__4b5651_idx'),
+        ),
+    ]
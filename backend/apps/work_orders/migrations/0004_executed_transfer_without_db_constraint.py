@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('production', '0003_sync_updated_at_indexes'),
+        ('work_orders', '0003_sync_updated_at_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='workorderline',
+            name='executed_transfer',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='work_order_line', to='production.transfer'),
+        ),
+    ]
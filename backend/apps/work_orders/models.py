@@ -148,6 +148,7 @@ class WorkOrder(models.Model):
             models.Index(fields=['winery', 'status']),
             models.Index(fields=['winery', 'assigned_to', 'status']),
             models.Index(fields=['scheduled_for']),
+            models.Index(fields=['winery', 'updated_at']),
         ]
     
     def __str__(self):
@@ -224,7 +225,7 @@ class WorkOrder(models.Model):
                                                       '1 ', '2 ', '3 ', '4 ', '5 ',
                                                       '6 ', '7 ', '8 ', '9 ')):
             self.title = self.generate_title_from_lines()
-            self.save(update_fields=['title'])
+            self.save(update_fields=['title', 'updated_at'])
     
     def _generate_code(self):
         """Generate a unique work order code."""
@@ -246,16 +247,19 @@ class WorkOrder(models.Model):
         
         return f"{prefix}-001"
     
+    @property
+    def lines_completed(self):
+        """Number of completed or skipped lines (uses prefetched ``lines``)."""
+        done = (WorkOrderLineStatus.COMPLETED, WorkOrderLineStatus.SKIPPED)
+        return sum(1 for line in self.lines.all() if line.status in done)
+    
     @property
     def progress_percentage(self):
-        """Calculate completion percentage based on lines."""
-        total = self.lines.count()
+        """Calculate completion percentage based on lines (uses prefetched ``lines``)."""
+        total = len(self.lines.all())
         if total == 0:
             return 0
-        completed = self.lines.filter(
-            status__in=[WorkOrderLineStatus.COMPLETED, WorkOrderLineStatus.SKIPPED]
-        ).count()
-        return round((completed / total) * 100)
+        return round((self.lines_completed / total) * 100)
     
     @property
     def lines_summary(self):
@@ -421,6 +425,7 @@ class WorkOrderLine(models.Model):
         on_delete=models.SET_NULL,
         null=True,
         blank=True,
+        db_constraint=False,  # Transfer is partitioned
         related_name='work_order_line'
     )
     executed_analysis = models.ForeignKey(
@@ -448,6 +453,7 @@ class WorkOrderLine(models.Model):
         ordering = ['work_order', 'line_no']
         indexes = [
             models.Index(fields=['work_order', 'status']),
+            models.Index(fields=['winery', 'updated_at']),
         ]
     
     def __str__(self):
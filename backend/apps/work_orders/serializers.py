@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from django.utils import timezone
+from apps.core.serializers import SparseFieldsetMixin
 from .models import (
     WorkOrder, WorkOrderLine,
     WorkOrderStatus, WorkOrderPriority,
@@ -56,7 +57,7 @@ class WorkOrderLineCreateSerializer(serializers.ModelSerializer):
         ]
 
 
-class WorkOrderSerializer(serializers.ModelSerializer):
+class WorkOrderSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for work orders (list/retrieve)."""
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     priority_display = serializers.CharField(source='get_priority_display', read_only=True)
@@ -89,14 +90,18 @@ class WorkOrderSerializer(serializers.ModelSerializer):
             'verified_by', 'verified_at',
             'created_at', 'updated_at'
         ]
+        field_lookups = {
+            'progress_percentage': ['lines'],
+            'lines_count': ['lines'],
+            'lines_completed': ['lines'],
+        }
     
     def get_lines_count(self, obj):
-        return obj.lines.count()
+        # len() of the prefetched lines; .count() and .filter() would query per row
+        return len(obj.lines.all())
     
     def get_lines_completed(self, obj):
-        return obj.lines.filter(
-            status__in=[WorkOrderLineStatus.COMPLETED, WorkOrderLineStatus.SKIPPED]
-        ).count()
+        return obj.lines_completed
 
 
 class WorkOrderDetailSerializer(WorkOrderSerializer):
@@ -148,7 +153,7 @@ class WorkOrderCreateSerializer(serializers.ModelSerializer):
         # Auto-generate title from lines if not provided
         if not validated_data.get('title') or validated_data.get('title') == 'New Work Order':
             work_order.title = work_order.generate_title_from_lines()
-            work_order.save(update_fields=['title'])
+            work_order.save(update_fields=['title', 'updated_at'])
         
         return work_order
     
@@ -176,7 +181,7 @@ class WorkOrderCreateSerializer(serializers.ModelSerializer):
             # Auto-generate title if it was empty
             if title_was_empty:
                 instance.title = instance.generate_title_from_lines()
-                instance.save(update_fields=['title'])
+                instance.save(update_fields=['title', 'updated_at'])
         
         return instance
 
@@ -16,6 +16,7 @@ from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 
+from apps.core.mixins import SparseFieldsetViewMixin
 from apps.wineries.mixins import WineryContextMixin
 from apps.wineries.permissions import IsWineryMember
 from .models import (
@@ -30,7 +31,7 @@ from .serializers import (
 )
 
 
-class WorkOrderViewSet(WineryContextMixin, viewsets.ModelViewSet):
+class WorkOrderViewSet(SparseFieldsetViewMixin, WineryContextMixin, viewsets.ModelViewSet):
     """
     ViewSet for Work Orders.
     
@@ -52,6 +53,7 @@ class WorkOrderViewSet(WineryContextMixin, viewsets.ModelViewSet):
     search_fields = ['code', 'title', 'description']
     ordering_fields = ['code', 'scheduled_for', 'due_date', 'priority', 'created_at']
     ordering = ['-created_at']
+    query_budget = {'list': 4, 'retrieve': 5, 'summary': 8}
     
     def get_queryset(self):
         if not hasattr(self.request, 'winery') or not self.request.winery:
@@ -222,6 +224,7 @@ class WorkOrderLineViewSet(WineryContextMixin, viewsets.ModelViewSet):
     filterset_fields = ['work_order', 'status', 'line_type']
     ordering_fields = ['line_no', 'created_at']
     ordering = ['work_order', 'line_no']
+    query_budget = {'list': 3, 'retrieve': 2}
     
     def get_queryset(self):
         if not hasattr(self.request, 'winery') or not self.request.winery:
@@ -0,0 +1,15 @@
+"""
+Celery application for Winery ERP background jobs (see apps.jobs).
+
+Start a worker with:
+    celery -A config worker -l info
+"""
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.development')
+
+app = Celery('winery_erp')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
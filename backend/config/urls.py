@@ -52,6 +52,15 @@ api_v1_patterns = [
     # Inventory (Phase 2 - Sprint 2.5)
     path('inventory/', include('apps.inventory.urls')),
     
+    # Delta sync for offline clients
+    path('sync/', include('apps.sync.urls')),
+    
+    # Background jobs
+    path('jobs/', include('apps.jobs.urls')),
+    
+    # Operational metrics and batched GETs
+    path('', include('apps.core.urls')),
+    
     # Packaging (Phase 3)
     # path('packaging-skus/', include('apps.packaging.urls.skus')),
     # path('bottling-runs/', include('apps.packaging.urls.bottling')),
@@ -3,6 +3,7 @@ import { HttpClient, HttpParams } from '@angular/common/http';
 import { Observable } from 'rxjs';
 import { map } from 'rxjs/operators';
 import { environment } from '../../../environments/environment';
+import { EnumsService } from '@shared/services/enums.service';
 
 // Paginated response interface
 interface PaginatedResponse<T> {
@@ -178,6 +179,7 @@ export interface AdditionSummary {
 })
 export class InventoryService {
   private http = inject(HttpClient);
+  private enums = inject(EnumsService);
   private baseUrl = `${environment.apiUrl}/inventory`;
 
   // === MATERIALS ===
@@ -306,19 +308,19 @@ export class InventoryService {
   // ===== Enum / Dropdown Options =====
   
   getMaterialCategories(): Observable<{ value: string; label: string }[]> {
-    return this.http.get<{ value: string; label: string }[]>(`${this.baseUrl}/materials/categories/`);
+    return this.enums.get('inventory.MaterialCategory');
   }
 
   getMaterialUnits(): Observable<{ value: string; label: string }[]> {
-    return this.http.get<{ value: string; label: string }[]>(`${this.baseUrl}/materials/units/`);
+    return this.enums.get('inventory.MaterialUnit');
   }
 
   getMovementTypes(): Observable<{ value: string; label: string }[]> {
-    return this.http.get<{ value: string; label: string }[]>(`${this.baseUrl}/movements/types/`);
+    return this.enums.get('inventory.MovementType');
   }
 
   getStockLocations(): Observable<{ value: string; label: string }[]> {
-    return this.http.get<{ value: string; label: string }[]>(`${this.baseUrl}/stock/locations/`);
+    return this.enums.get('inventory.StockLocation');
   }
 }
 
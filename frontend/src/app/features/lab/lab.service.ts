@@ -1,6 +1,7 @@
 import { Injectable, inject } from '@angular/core';
 import { Observable } from 'rxjs';
 import { ApiService, PaginatedResponse, QueryParams } from '@shared/services/api.service';
+import { EnumsService } from '@shared/services/enums.service';
 
 // === TYPES ===
 
@@ -156,6 +157,7 @@ export interface AnalysisSummary {
 })
 export class LabService {
   private api = inject(ApiService);
+  private enums = inject(EnumsService);
   private endpoint = 'lab/analyses';
 
   // === CRUD ===
@@ -189,7 +191,7 @@ export class LabService {
   // === Sample Types ===
 
   getSampleTypes(): Observable<{ value: string; label: string }[]> {
-    return this.api.action<{ value: string; label: string }[]>(this.endpoint, 'sample_types', {});
+    return this.enums.get('lab.Analysis.SampleType');
   }
 
   // === History ===
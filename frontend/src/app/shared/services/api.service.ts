@@ -1,6 +1,7 @@
 import { Injectable, inject } from '@angular/core';
 import { HttpClient, HttpParams } from '@angular/common/http';
 import { Observable } from 'rxjs';
+import { map } from 'rxjs/operators';
 import { environment } from '@env/environment';
 
 export interface PaginatedResponse<T> {
@@ -10,9 +11,42 @@ export interface PaginatedResponse<T> {
   results: T[];
 }
 
+/**
+ * Cursor page returned by high-volume lists when called with
+ * `pagination: 'cursor'`. `count` is null unless requested via `count`.
+ */
+export interface CursorPaginatedResponse<T> {
+  count: number | null;
+  next: string | null;
+  previous: string | null;
+  results: T[];
+}
+
+/**
+ * One GET executed by `ApiService.batch()`. `url` is relative to the API
+ * root (e.g. `equipment/tanks/dropdown/`) and may carry a query string.
+ */
+export interface BatchRequest {
+  id: string;
+  url: string;
+  if_none_match?: string;
+}
+
+export interface BatchResponse<T = unknown> {
+  id: string;
+  status: number;
+  etag?: string;
+  body: T | null;
+}
+
 export interface QueryParams {
   page?: number;
   page_size?: number;
+  pagination?: 'cursor';
+  cursor?: string;
+  count?: 'exact' | 'estimate';
+  fields?: string;
+  expand?: string;
   search?: string;
   ordering?: string;
   [key: string]: string | number | boolean | undefined;
@@ -109,6 +143,16 @@ export class ApiService {
     );
   }
   
+  /**
+   * Run several GET requests in one round trip. Responses come back in
+   * request order; failed sub-requests carry their own status.
+   */
+  batch(requests: BatchRequest[]): Observable<BatchResponse[]> {
+    return this.http
+      .post<{ responses: BatchResponse[] }>(`${this.baseUrl}/batch/`, { requests })
+      .pipe(map(res => res.responses));
+  }
+  
   /**
    * Custom action endpoint with DELETE method
    */
@@ -0,0 +1,37 @@
+import { Injectable, inject } from '@angular/core';
+import { HttpClient } from '@angular/common/http';
+import { Observable } from 'rxjs';
+import { map, shareReplay, switchMap } from 'rxjs/operators';
+import { environment } from '@env/environment';
+
+export interface EnumOption {
+  value: string;
+  label: string;
+}
+
+/**
+ * Choices keyed by `<app>.<Class>`, e.g. `inventory.MaterialUnit`.
+ */
+export type EnumsDocument = Record<string, EnumOption[]>;
+
+@Injectable({ providedIn: 'root' })
+export class EnumsService {
+  private http = inject(HttpClient);
+  private baseUrl = environment.apiUrl;
+
+  /**
+   * Loaded once per session. The versioned document is immutable, so after
+   * the first visit it comes from the browser or nginx cache.
+   */
+  private enums$ = this.http.get<{ version: string }>(`${this.baseUrl}/enums/`).pipe(
+    switchMap(({ version }) => this.http.get<EnumsDocument>(`${this.baseUrl}/enums/${version}/`)),
+    shareReplay(1)
+  );
+
+  /**
+   * Options of one enum, in declaration order
+   */
+  get(key: string): Observable<EnumOption[]> {
+    return this.enums$.pipe(map(enums => enums[key] ?? []));
+  }
+}
@@ -0,0 +1,19 @@
+#!/bin/sh
+# Start a hot-standby copy of the development database (db-replica service).
+# The first start clones the primary with pg_basebackup; later starts resume
+# streaming from where the standby left off.
+set -e
+
+if [ ! -s "$PGDATA/PG_VERSION" ]; then
+    until pg_isready -h db -U "$POSTGRES_USER" -d "$POSTGRES_DB"; do
+        echo "Waiting for primary..."
+        sleep 1
+    done
+    mkdir -p "$PGDATA"
+    chown postgres:postgres "$PGDATA"
+    chmod 700 "$PGDATA"
+    # -R writes standby.signal and primary_conninfo
+    su-exec postgres pg_basebackup -h db -U "$POSTGRES_USER" -D "$PGDATA" -X stream -R
+fi
+
+exec su-exec postgres postgres -c hot_standby=on